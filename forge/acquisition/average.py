@@ -1,11 +1,83 @@
 import typing
 import time
+import numpy as np
 from math import isfinite, floor, atan2, sin, cos, sqrt, degrees, radians, nan
 from forge.formattime import format_time_of_day, format_iso8601_time
 from forge.acquisition import LayeredConfiguration
 from forge.acquisition.util import parse_interval
 
 
+class _Columns:
+    # All the numeric entries of a record stored as contiguous columns, so they are accumulated with a single set of
+    # array operations instead of a call per entry.  The kind of each entry selects how its values and counts are
+    # weighted.  A NaN pending value means nothing is pending.
+    VARIABLE = 0
+    SUM = 1
+    RATE = 2
+
+    def __init__(self):
+        self.pending = np.full((4,), nan, dtype=np.float64)
+        self.accumulated = np.zeros((4,), dtype=np.float64)
+        self.weight = np.zeros((4,), dtype=np.float64)
+        self.value = np.full((4,), nan, dtype=np.float64)
+        # Values weighted by their duration (averages and rates) instead of summed directly
+        self.value_seconds = np.zeros((4,), dtype=np.bool_)
+        # Time weighted averages, with the total duration as the weight instead of the number of values
+        self.averaged = np.zeros((4,), dtype=np.bool_)
+        self.size: int = 0
+        self._released: typing.List[int] = list()
+
+    def allocate(self, kind: int) -> int:
+        if self._released:
+            index = self._released.pop()
+        else:
+            if self.size >= self.pending.shape[0]:
+                extend = self.pending.shape[0]
+                self.pending = np.concatenate((self.pending, np.full((extend,), nan, dtype=np.float64)))
+                self.accumulated = np.concatenate((self.accumulated, np.zeros((extend,), dtype=np.float64)))
+                self.weight = np.concatenate((self.weight, np.zeros((extend,), dtype=np.float64)))
+                self.value = np.concatenate((self.value, np.full((extend,), nan, dtype=np.float64)))
+                self.value_seconds = np.concatenate((self.value_seconds, np.zeros((extend,), dtype=np.bool_)))
+                self.averaged = np.concatenate((self.averaged, np.zeros((extend,), dtype=np.bool_)))
+            index = self.size
+            self.size += 1
+        self.value_seconds[index] = kind in (self.VARIABLE, self.RATE)
+        self.averaged[index] = kind == self.VARIABLE
+        return index
+
+    def release(self, index: int) -> None:
+        self.pending[index] = nan
+        self.accumulated[index] = 0.0
+        self.weight[index] = 0.0
+        self.value[index] = nan
+        self._released.append(index)
+
+    def clear(self) -> None:
+        self.pending[:self.size] = nan
+
+    def accumulate(self, seconds: float) -> None:
+        n = self.size
+        pending = self.pending[:n]
+        valid = np.isfinite(pending)
+        self.accumulated[:n] += np.where(valid, pending * np.where(self.value_seconds[:n], seconds, 1.0), 0.0)
+        self.weight[:n] += np.where(valid, np.where(self.averaged[:n], seconds, 1.0), 0.0)
+
+    def complete(self) -> None:
+        n = self.size
+        weight = self.weight[:n]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            divisor = np.where(self.averaged[:n], weight, 1.0)
+            # Nothing accumulated completes as missing, including sums, instead of zero
+            self.value[:n] = np.where(weight > 0.0, self.accumulated[:n] / divisor, nan)
+        self.accumulated[:n] = 0.0
+        weight[:] = 0.0
+
+    def reset(self) -> None:
+        self.pending[:self.size] = nan
+        self.accumulated[:self.size] = 0.0
+        self.weight[:self.size] = 0.0
+
+
 class AverageRecord:
     def __init__(self, config: typing.Optional[typing.Union[LayeredConfiguration, str, float, bool]]):
         self.config = config
@@ -35,6 +107,9 @@ class AverageRecord:
                 raise ValueError(f"invalid averaging interval {self.interval}")
 
         self._entries: typing.List[AverageRecord.Entry] = list()
+        # Entries with state outside the columns, that still need to be processed individually
+        self._object_entries: typing.List[AverageRecord.Entry] = list()
+        self._columns = _Columns()
 
         self._next_record_start: typing.Optional[float] = None
         self._accumulated_seconds: float = 0.0
@@ -58,87 +133,86 @@ class AverageRecord:
         def reset(self) -> None:
             pass
 
+        def release(self) -> None:
+            pass
+
     def has_entry(self, entry: "AverageRecord.Entry") -> bool:
         return entry in self._entries
 
-    class Variable(Entry):
-        def __init__(self):
-            super().__init__()
-            self.value: float = nan
+    def _add_entry(self, entry: "AverageRecord.Entry", columns_only: bool = False) -> None:
+        self._entries.append(entry)
+        if not columns_only:
+            self._object_entries.append(entry)
 
-            self._pending_value: typing.Optional[float] = None
-            self._sum_times_seconds: float = 0.0
-            self._count_seconds: float = 0.0
+    class _ColumnEntry(Entry):
+        # A view of a single slot in the columns of a record, or in private columns when created standalone.  When
+        # part of a record, the record accumulates, completes and resets all the columns at once.
+        KIND: int = _Columns.VARIABLE
 
-        def __call__(self, value: float) -> None:
-            if value is None or not isfinite(value):
-                self._pending_value = None
-            else:
-                self._pending_value = value
-
-        def __float__(self) -> float:
-            return self.value
+        def __init__(self, columns: typing.Optional[_Columns] = None):
+            super().__init__()
+            self._private = columns is None
+            if columns is None:
+                columns = _Columns()
+            self._columns = columns
+            self._index = columns.allocate(self.KIND)
 
         def clear(self) -> None:
-            self._pending_value = None
+            self._columns.pending[self._index] = nan
 
         def accumulate(self, seconds: float) -> None:
-            if self._pending_value is None:
-                return
-            self._sum_times_seconds += self._pending_value * seconds
-            self._count_seconds += seconds
+            if self._private:
+                self._columns.accumulate(seconds)
 
-        def complete(self) -> float:
-            if self._count_seconds <= 0.0:
-                self.value = nan
-            else:
-                self.value = self._sum_times_seconds / self._count_seconds
-            self._sum_times_seconds: float = 0.0
-            self._count_seconds: float = 0.0
+        def complete(self) -> typing.Any:
+            if self._private:
+                self._columns.complete()
             return self.value
 
         def reset(self) -> None:
-            self._pending_value = None
-            self._sum_times_seconds: float = 0.0
-            self._count_seconds: float = 0.0
-
-    def variable(self) -> "AverageRecord.Variable":
-        v = self.Variable()
-        self._entries.append(v)
-        return v
+            if self._private:
+                self._columns.reset()
 
-    class Flag(Entry):
-        def __init__(self):
-            self.value: bool = False
+        def release(self) -> None:
+            if not self._private:
+                self._columns.release(self._index)
 
-            self._pending_value: bool = False
-            self._average: bool = False
+    class Variable(_ColumnEntry):
+        def __call__(self, value: float) -> None:
+            if value is None or not isfinite(value):
+                self._columns.pending[self._index] = nan
+            else:
+                self._columns.pending[self._index] = value
 
-        def __call__(self, value: bool) -> None:
-            self._pending_value = value
+        @property
+        def value(self) -> float:
+            return float(self._columns.value[self._index])
 
-        def __bool__(self) -> bool:
+        def __float__(self) -> float:
             return self.value
 
-        def clear(self) -> None:
-            self._pending_value = False
+    def variable(self) -> "AverageRecord.Variable":
+        v = self.Variable(self._columns)
+        self._add_entry(v, columns_only=True)
+        return v
 
-        def accumulate(self, seconds: float) -> None:
-            if self._pending_value:
-                self._average = True
+    class Flag(_ColumnEntry):
+        # The number of times set, so any set flag completes as true
+        KIND = _Columns.SUM
 
-        def complete(self) -> bool:
-            self.value = self._average
-            self._average = False
-            return self.value
+        def __call__(self, value: bool) -> None:
+            self._columns.pending[self._index] = 1.0 if value else 0.0
 
-        def reset(self) -> None:
-            self._pending_value = False
-            self._average = False
+        @property
+        def value(self) -> bool:
+            return bool(self._columns.value[self._index] > 0.0)
+
+        def __bool__(self) -> bool:
+            return self.value
 
     def flag(self) -> "AverageRecord.Flag":
-        f = self.Flag()
-        self._entries.append(f)
+        f = self.Flag(self._columns)
+        self._add_entry(f, columns_only=True)
         return f
 
     class FirstValid(Entry):
@@ -184,7 +258,7 @@ class AverageRecord:
 
     def first_valid(self) -> "AverageRecord.FirstValid":
         f = self.FirstValid()
-        self._entries.append(f)
+        self._add_entry(f)
         return f
 
     class LastValid(Entry):
@@ -228,73 +302,43 @@ class AverageRecord:
 
     def last_valid(self) -> "AverageRecord.LastValid":
         f = self.LastValid()
-        self._entries.append(f)
+        self._add_entry(f)
         return f
 
-    class Sum(Entry):
-        def __init__(self):
-            super().__init__()
-            self.value: float = nan
-
-            self._pending_value: typing.Optional[float] = None
-            self._sum: typing.Optional[float] = None
+    class Sum(_ColumnEntry):
+        KIND = _Columns.SUM
 
         def __call__(self, value: float) -> None:
             if value is None or not isfinite(value):
-                self._pending_value = None
+                self._columns.pending[self._index] = nan
             else:
-                self._pending_value = value
+                self._columns.pending[self._index] = value
 
-        def __float__(self) -> float:
-            return self.value
-
-        def clear(self) -> None:
-            self._pending_value = None
-
-        def accumulate(self, seconds: float) -> None:
-            if self._pending_value is None:
-                return
-            if not self._sum:
-                self._sum = self._pending_value
-            else:
-                self._sum += self._pending_value
+        @property
+        def value(self) -> float:
+            return float(self._columns.value[self._index])
 
-        def complete(self) -> float:
-            if self._sum is None:
-                self.value = nan
-            else:
-                self.value = self._sum
-            self._sum = None
+        def __float__(self) -> float:
             return self.value
 
-        def reset(self) -> None:
-            self._pending_value = None
-            self._sum = None
-
     def sum(self) -> "AverageRecord.Sum":
-        v = self.Sum()
-        self._entries.append(v)
+        v = self.Sum(self._columns)
+        self._add_entry(v, columns_only=True)
         return v
 
     class Rate(Sum):
-        def accumulate(self, seconds: float) -> None:
-            if self._pending_value is None:
-                return
-            if not self._sum:
-                self._sum = self._pending_value * seconds
-            else:
-                self._sum += self._pending_value * seconds
+        KIND = _Columns.RATE
 
     def rate(self) -> "AverageRecord.Rate":
-        v = self.Rate()
-        self._entries.append(v)
+        v = self.Rate(self._columns)
+        self._add_entry(v, columns_only=True)
         return v
 
     class Vector(Entry):
-        def __init__(self):
+        def __init__(self, columns: typing.Optional[_Columns] = None):
             super().__init__()
-            self._variable_X = AverageRecord.Variable()
-            self._variable_Y = AverageRecord.Variable()
+            self._variable_X = AverageRecord.Variable(columns)
+            self._variable_Y = AverageRecord.Variable(columns)
 
         def __call__(self, magnitude: float, direction: float) -> None:
             if magnitude is None or not isfinite(magnitude) or direction is None or not isfinite(direction):
@@ -344,40 +388,62 @@ class AverageRecord:
             self._variable_X.reset()
             self._variable_Y.reset()
 
+        def release(self) -> None:
+            self._variable_X.release()
+            self._variable_Y.release()
+
     def vector(self):
-        v = self.Vector()
-        self._entries.append(v)
+        v = self.Vector(self._columns)
+        self._add_entry(v, columns_only=True)
         return v
 
     class Array(Entry):
-        def __init__(self, entry_type: typing.Type = None):
+        def __init__(self, entry_type: typing.Type = None, columns: typing.Optional[_Columns] = None):
             super().__init__()
             self.value: typing.List = list()
             if entry_type is None:
                 entry_type = AverageRecord.Variable
             self._entry_type = entry_type
+            self._columns = columns
+            # With the contents stored in the record columns, only the sizes are handled here
+            self._vectorized = columns is not None and issubclass(entry_type, AverageRecord._ColumnEntry)
+            self._indices = np.empty((0,), dtype=np.intp)
             self._contents: typing.List = list()
             self._pending_size: typing.Optional[int] = None
             self._largest_size: typing.Optional[int] = None
 
         @classmethod
-        def nested(cls, dimensions: int = 1, entry_type: typing.Type = None) -> "AverageRecord.Array":
+        def nested(cls, dimensions: int = 1, entry_type: typing.Type = None,
+                   columns: typing.Optional[_Columns] = None) -> "AverageRecord.Array":
             while dimensions > 1:
                 def capture(t):
                     class Nest(cls):
-                        def __init__(self):
-                            super().__init__(t)
+                        def __init__(self, columns: typing.Optional[_Columns] = None):
+                            super().__init__(t, columns)
                     return Nest
 
                 entry_type = capture(entry_type)
                 dimensions -= 1
-            return cls(entry_type=entry_type)
+            return cls(entry_type=entry_type, columns=columns)
+
+        def _create_entry(self) -> "AverageRecord.Entry":
+            if self._columns is None:
+                return self._entry_type()
+            return self._entry_type(self._columns)
 
         def __call__(self, contents: typing.List) -> None:
-            while len(contents) > len(self._contents):
-                self._contents.append(self._entry_type())
-            for i in range(len(contents)):
-                self._contents[i](contents[i])
+            if len(contents) > len(self._contents):
+                while len(contents) > len(self._contents):
+                    self._contents.append(self._create_entry())
+                if self._vectorized:
+                    self._indices = np.array([v._index for v in self._contents], dtype=np.intp)
+            if self._vectorized:
+                values = np.array(contents, dtype=np.float64)
+                values[np.invert(np.isfinite(values))] = nan
+                self._columns.pending[self._indices[:values.shape[0]]] = values
+            else:
+                for i in range(len(contents)):
+                    self._contents[i](contents[i])
             self._pending_size = len(contents)
 
         def __getitem__(self, item: int) -> float:
@@ -387,8 +453,11 @@ class AverageRecord:
             return len(self.value)
 
         def clear(self) -> None:
-            for v in self._contents:
-                v.clear()
+            if self._vectorized:
+                self._columns.pending[self._indices] = nan
+            else:
+                for v in self._contents:
+                    v.clear()
             self._pending_size = None
 
         def accumulate(self, seconds: float) -> None:
@@ -398,37 +467,53 @@ class AverageRecord:
                 self._largest_size = self._pending_size
             else:
                 self._largest_size = max(self._largest_size, self._pending_size)
-            for v in self._contents:
-                v.accumulate(seconds)
+            if not self._vectorized:
+                for v in self._contents:
+                    v.accumulate(seconds)
 
         def complete(self) -> typing.List:
             if not self._largest_size:
+                for v in self._contents:
+                    v.release()
                 self._contents.clear()
             elif len(self._contents) > self._largest_size:
+                for v in self._contents[self._largest_size:]:
+                    v.release()
                 del self._contents[self._largest_size:]
 
-            self.value.clear()
-            for v in self._contents:
-                self.value.append(v.complete())
+            if self._vectorized:
+                self._indices = self._indices[:len(self._contents)]
+                self.value = self._columns.value[self._indices].tolist()
+            else:
+                self.value.clear()
+                for v in self._contents:
+                    self.value.append(v.complete())
 
             self._pending_size = None
             self._largest_size = None
             return self.value
 
         def reset(self) -> None:
-            for v in self._contents:
-                v.reset()
+            if not self._vectorized:
+                for v in self._contents:
+                    v.reset()
             self._pending_size = None
             self._largest_size = None
 
+        def release(self) -> None:
+            for v in self._contents:
+                v.release()
+            self._contents.clear()
+            self._indices = self._indices[:0]
+
     def array(self, dimensions: int = 1):
-        a = self.Array.nested(dimensions)
-        self._entries.append(a)
+        a = self.Array.nested(dimensions, columns=self._columns)
+        self._add_entry(a)
         return a
 
     def array_last_valid(self, dimensions: int = 1):
         a = self.Array.nested(dimensions, AverageRecord.LastValid)
-        self._entries.append(a)
+        self._add_entry(a)
         return a
 
     def _accumulate_values(self, next_value_start: float, next_value_end: float) -> None:
@@ -438,11 +523,13 @@ class AverageRecord:
 
         self._accumulated_seconds += effective_seconds
         self._accumulated_count += 1
-        for v in self._entries:
+        self._columns.accumulate(effective_seconds)
+        for v in self._object_entries:
             v.accumulate(effective_seconds)
 
     def _clear_pending_values(self) -> None:
-        for v in self._entries:
+        self._columns.clear()
+        for v in self._object_entries:
             v.clear()
 
     def _advance_average(self, now: float) -> None:
@@ -499,7 +586,9 @@ class AverageRecord:
         result = self.Result(self._average_start, self._average_end or now,
                              self._accumulated_seconds, self._accumulated_count)
 
-        for v in self._entries:
+        # Columns first, so arrays see their completed contents
+        self._columns.complete()
+        for v in self._object_entries:
             v.complete()
 
         return result
@@ -549,7 +638,8 @@ class AverageRecord:
         return result
 
     def reset(self) -> None:
-        for v in self._entries:
+        self._columns.reset()
+        for v in self._object_entries:
             v.reset()
         self._average_start = None
         self._average_end = None
@@ -0,0 +1,91 @@
+import typing
+import argparse
+import time
+import numpy as np
+from forge.acquisition import LayeredConfiguration
+from forge.acquisition.average import AverageRecord
+
+
+class _SimulatedOPC:
+    def __init__(self, bins: int, average: float):
+        self.record = AverageRecord(LayeredConfiguration({'AVERAGE': average}))
+        self.counts = self.record.array()
+        self.concentration = self.record.variable()
+        self.sample_flow = self.record.variable()
+        self.sheath_flow = self.record.variable()
+        self.pressure = self.record.variable()
+        self.temperature = self.record.variable()
+        self.laser_current = self.record.variable()
+        self.total_counts = self.record.sum()
+        self.particle_rate = self.record.rate()
+        self.laser_fault = self.record.flag()
+        self.flow_fault = self.record.flag()
+        self.firmware = self.record.last_valid()
+
+        generator = np.random.default_rng(bins)
+        self._bin_counts = generator.gamma(2.0, 10.0, (64, bins)).tolist()
+        self._scalars = generator.normal(100.0, 5.0, (64, 6)).tolist()
+        self._faults = (generator.random((64, 2)) < 0.01).tolist()
+
+    def report(self, index: int, now: float) -> typing.Optional[AverageRecord.Result]:
+        bins = self._bin_counts[index % 64]
+        scalars = self._scalars[index % 64]
+        faults = self._faults[index % 64]
+
+        self.counts(bins)
+        self.concentration(scalars[0])
+        self.sample_flow(scalars[1])
+        self.sheath_flow(scalars[2])
+        self.pressure(scalars[3])
+        self.temperature(scalars[4])
+        self.laser_current(scalars[5])
+        self.total_counts(bins[0])
+        self.particle_rate(bins[1])
+        self.laser_fault(faults[0])
+        self.flow_fault(faults[1])
+        self.firmware("1.0")
+        return self.record(now)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forge acquisition averaging benchmark.")
+
+    parser.add_argument('--bins',
+                        dest='bins', type=int, default=100,
+                        help="number of size distribution bins")
+    parser.add_argument('--instruments',
+                        dest='instruments', type=int, default=4,
+                        help="number of simulated instruments")
+    parser.add_argument('--reports',
+                        dest='reports', type=int, default=3600,
+                        help="number of one second reports per instrument")
+    parser.add_argument('--average',
+                        dest='average', type=float, default=60.0,
+                        help="averaging interval in seconds")
+
+    args = parser.parse_args()
+
+    instruments = [_SimulatedOPC(args.bins, args.average) for _ in range(args.instruments)]
+    start_time = 1609459200.0
+    averages = 0
+    checksum = 0.0
+
+    begin_time = time.monotonic()
+    for index in range(args.reports):
+        now = start_time + index
+        for opc in instruments:
+            if opc.report(index, now) is None:
+                continue
+            averages += 1
+            checksum += sum(opc.counts.value) + float(opc.concentration) + float(opc.particle_rate)
+    elapsed = time.monotonic() - begin_time
+
+    total_reports = args.reports * args.instruments
+    print(f"{args.instruments} instruments with {args.bins} bins, {args.reports} reports each")
+    print(f"{elapsed:8.3f} seconds, {total_reports / elapsed:10.0f} reports/second, "
+          f"{elapsed / total_reports * 1E6:8.1f} microseconds/report")
+    print(f"{averages} averages, checksum {checksum:.6e}")
+
+
+if __name__ == '__main__':
+    main()
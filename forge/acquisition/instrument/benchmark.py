@@ -0,0 +1,126 @@
+import typing
+import asyncio
+import logging
+import argparse
+import importlib
+import io
+import os
+from forge.acquisition.serial.multiplexer.capture import CaptureWriter, read_capture
+from .streaming import StreamingInstrument, StreamingSimulator
+from .replay import capture_simulator, replay_capture
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def streaming_drivers() -> typing.Iterator[typing.Tuple[str, typing.Type[StreamingInstrument],
+                                                        typing.Type[StreamingSimulator]]]:
+    root = os.path.dirname(__file__)
+    for name in sorted(os.listdir(root)):
+        if not os.path.isfile(os.path.join(root, name, 'instrument.py')):
+            continue
+        if not os.path.isfile(os.path.join(root, name, 'simulator.py')):
+            continue
+        try:
+            instrument = importlib.import_module(f'.{name}.instrument', __package__).Instrument
+            simulator = importlib.import_module(f'.{name}.simulator', __package__).Simulator
+        except (ImportError, AttributeError):
+            _LOGGER.debug(f"Unable to load driver {name}", exc_info=True)
+            continue
+        if not issubclass(instrument, StreamingInstrument) or not issubclass(simulator, StreamingSimulator):
+            continue
+        yield name, instrument, simulator
+
+
+async def _capture_driver(args: argparse.Namespace, instrument: typing.Type[StreamingInstrument],
+                          simulator: typing.Type[StreamingSimulator],
+                          config: dict) -> typing.Tuple[int, bytes]:
+    def setup(s: StreamingSimulator) -> None:
+        if config and hasattr(s, 'unpolled_interval'):
+            s.unpolled_interval = args.interval
+
+    output = io.BytesIO()
+    captured = await capture_simulator(instrument, simulator, CaptureWriter(output), args.duration,
+                                       config=config, setup=setup, startup_timeout=args.timeout)
+    return captured, output.getvalue()
+
+
+async def _benchmark_driver(args: argparse.Namespace, instrument: typing.Type[StreamingInstrument],
+                            simulator: typing.Type[StreamingSimulator]) -> typing.Tuple[int, int, float, float]:
+    try:
+        captured, contents = await _capture_driver(args, instrument, simulator, {'REPORT_INTERVAL': args.interval})
+    except asyncio.TimeoutError:
+        # Some drivers only accept whole second intervals, so fall back to their defaults
+        captured, contents = await _capture_driver(args, instrument, simulator, {})
+    capture = list(read_capture(io.BytesIO(contents)))
+
+    # Polled drivers sleep out the remainder of their interval between commands, so replay with none at all
+    replay_config = {'REPORT_INTERVAL': 0}
+
+    records = 0
+    elapsed = 0.0
+    cpu = 0.0
+    for _ in range(args.repeat):
+        result = await replay_capture(instrument, capture, config=replay_config, timeout=args.timeout)
+        records += max(result.records - 1, 0)
+        elapsed += result.elapsed
+        cpu += result.cpu
+
+    return captured, len(contents), records / elapsed if elapsed > 0.0 else 0.0, \
+        cpu / records if records > 0 else 0.0
+
+
+async def run(args: argparse.Namespace) -> None:
+    print(f"{'Driver':24} {'Captured':>8} {'Bytes':>9} {'Records/s':>10} {'CPU us/record':>14}")
+    for name, instrument, simulator in streaming_drivers():
+        if args.driver and name not in args.driver:
+            continue
+        try:
+            captured, size, rate, cpu = await _benchmark_driver(args, instrument, simulator)
+        except Exception as e:
+            _LOGGER.debug(f"Benchmark failed for {name}", exc_info=True)
+            print(f"{name:24} failed: {e!r}")
+            continue
+        if rate <= 0.0:
+            print(f"{name:24} {captured:8d} {size:9d} {'no records':>10}")
+            continue
+        print(f"{name:24} {captured:8d} {size:9d} {rate:10.0f} {cpu * 1E6:14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forge acquisition instrument parser benchmark.")
+
+    parser.add_argument('--debug',
+                        dest='debug', action='store_true',
+                        help="enable debug output")
+    parser.add_argument('--duration',
+                        dest='duration', type=float, default=5.0,
+                        help="seconds of simulator traffic to capture per driver after communications start")
+    parser.add_argument('--interval',
+                        dest='interval', type=float, default=0.01,
+                        help="simulator and polling report interval during capture")
+    parser.add_argument('--repeat',
+                        dest='repeat', type=int, default=3,
+                        help="number of times to replay each capture")
+    parser.add_argument('--timeout',
+                        dest='timeout', type=float, default=60.0,
+                        help="maximum seconds for communications start up or a single replay")
+
+    parser.add_argument('driver', nargs='*',
+                        help="drivers to benchmark, default all")
+
+    args = parser.parse_args()
+    if args.debug:
+        from forge.log import set_debug_logger
+        set_debug_logger()
+    else:
+        # Every replay ends with the driver losing communications, so those errors are expected
+        logging.getLogger('forge.acquisition.instrument').setLevel(logging.CRITICAL)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(run(args))
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+import typing
+import asyncio
+import logging
+import time
+from forge.tasks import wait_cancelable
+from forge.acquisition import LayeredConfiguration
+from forge.acquisition.serial.multiplexer.eavesdropper import EavesdroppedDirection
+from forge.acquisition.serial.multiplexer.capture import CaptureWriter
+from .streaming import StreamingContext, StreamingInstrument, StreamingSimulator
+from .testing import DataOutput, BusInterface, PersistentInterface, _aio_pipe
+
+_LOGGER = logging.getLogger(__name__)
+
+CaptureRecord = typing.Tuple[float, EavesdroppedDirection, bytes]
+
+
+class ReplayBusInterface(BusInterface):
+    def __init__(self):
+        super().__init__()
+        self.data_records: int = 0
+        self.first_record_time: typing.Optional[float] = None
+        self.first_record_cpu: typing.Optional[float] = None
+
+    async def emit_data_record(self, contents: typing.Dict[str, typing.Union[float, typing.List[float]]]) -> None:
+        if self.data_records == 0:
+            self.first_record_time = time.monotonic()
+            self.first_record_cpu = time.process_time()
+        self.data_records += 1
+        await super().emit_data_record(contents)
+
+
+class _ReplayWriter:
+    def __init__(self, written: typing.Callable[[int], None]):
+        self._written = written
+        self._closed = False
+        self.transport = None
+
+    def write(self, data: bytes) -> None:
+        self._written(len(data))
+
+    async def drain(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self._closed = True
+
+    def is_closing(self) -> bool:
+        return self._closed
+
+    async def wait_closed(self) -> None:
+        pass
+
+
+class ReplayContext(StreamingContext):
+    def __init__(self, config: LayeredConfiguration, data: DataOutput, bus: ReplayBusInterface,
+                 persistent: PersistentInterface, capture: typing.Sequence[CaptureRecord],
+                 response_timeout: float = 2.0):
+        super().__init__(config, data, bus, persistent)
+        self.bus = bus
+        self.capture = capture
+        self.response_timeout = response_timeout
+        self.finished = asyncio.Event()
+
+        self._reader: typing.Optional[asyncio.StreamReader] = None
+        self._feed_task: typing.Optional[asyncio.Task] = None
+        self._write_credit: int = 0
+        self._write_event = asyncio.Event()
+
+    def _written(self, count: int) -> None:
+        self._write_credit += count
+        self._write_event.set()
+
+    async def _wait_written(self, count: int, timeout: float) -> None:
+        # Every captured command needs at least one write from the instrument before the traffic after it is
+        # released, with any excess carried forward, so differences in how writes are split do not stall the replay.
+        while self._write_credit <= 0:
+            self._write_event.clear()
+            try:
+                await wait_cancelable(self._write_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                _LOGGER.debug("Instrument did not write the captured command, continuing replay")
+                return
+        self._write_credit = max(self._write_credit - count, 0)
+
+    async def _feed(self) -> None:
+        # Until the instrument produces its first record, the capture is released at its original pace, so start up
+        # delays and drains see the same traffic they did when captured.  After that, everything not waiting on a
+        # command from the instrument is released immediately.
+        origin: typing.Optional[float] = None
+        previous: typing.Optional[float] = None
+        for timestamp, direction, data in self.capture:
+            if direction == EavesdroppedDirection.TO_SERIAL_PORT:
+                gap = timestamp - previous if previous is not None else 0.0
+                previous = timestamp
+                await self._wait_written(len(data), max(gap, 0.0) + self.response_timeout)
+                origin = None
+                continue
+            previous = timestamp
+
+            if self.bus.data_records == 0:
+                now = time.monotonic()
+                if origin is None:
+                    origin = now - timestamp
+                delay = origin + timestamp - now
+                if delay > 0.0:
+                    await asyncio.sleep(delay)
+
+            self._reader.feed_data(data)
+            await asyncio.sleep(0)
+
+        self._reader.feed_eof()
+        while not self._reader.at_eof():
+            await asyncio.sleep(0.001)
+        self.finished.set()
+
+    async def open_stream(self) -> typing.Tuple[typing.Optional[asyncio.StreamReader],
+                                                typing.Optional[asyncio.StreamWriter]]:
+        if self._reader is None:
+            self._reader = asyncio.StreamReader()
+            self._feed_task = asyncio.ensure_future(self._feed())
+        return self._reader, _ReplayWriter(self._written)
+
+    async def close_stream(self, reader: typing.Optional[asyncio.StreamReader],
+                           writer: typing.Optional[asyncio.StreamWriter]) -> None:
+        pass
+
+    async def close(self) -> None:
+        if self._feed_task:
+            t = self._feed_task
+            self._feed_task = None
+            t.cancel()
+            try:
+                await t
+            except asyncio.CancelledError:
+                pass
+
+
+class ReplayResult:
+    def __init__(self, records: int, elapsed: float, cpu: float):
+        self.records = records
+        self.elapsed = elapsed
+        self.cpu = cpu
+
+    @property
+    def records_per_second(self) -> float:
+        # The first record starts the measurement, so it is not counted
+        if self.records <= 1 or self.elapsed <= 0.0:
+            return 0.0
+        return (self.records - 1) / self.elapsed
+
+    @property
+    def cpu_per_record(self) -> float:
+        if self.records <= 1:
+            return 0.0
+        return self.cpu / (self.records - 1)
+
+
+async def _stop_task(task: asyncio.Task) -> None:
+    # A driver timing out a wait at the same moment can absorb the cancellation, so repeat it
+    for _ in range(10):
+        if task.done():
+            break
+        task.cancel()
+        await asyncio.wait({task}, timeout=1.0)
+    if not task.done():
+        _LOGGER.warning("Task did not stop after repeated cancellation")
+        return
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+async def replay_capture(instrument: typing.Type[StreamingInstrument], capture: typing.Sequence[CaptureRecord],
+                         config: typing.Optional[dict] = None,
+                         timeout: typing.Optional[float] = None) -> ReplayResult:
+    data = DataOutput("nil", "XTEST")
+    bus = ReplayBusInterface()
+    persistent = PersistentInterface()
+    context = ReplayContext(LayeredConfiguration(config or dict()), data, bus, persistent, capture)
+    i = instrument(context)
+
+    instrument_run = asyncio.ensure_future(i.run())
+    try:
+        if timeout:
+            await wait_cancelable(context.finished.wait(), timeout)
+        else:
+            await context.finished.wait()
+    finally:
+        end_time = time.monotonic()
+        end_cpu = time.process_time()
+        await _stop_task(instrument_run)
+        await context.close()
+
+    if bus.first_record_time is None:
+        return ReplayResult(0, 0.0, 0.0)
+    return ReplayResult(bus.data_records, end_time - bus.first_record_time, end_cpu - bus.first_record_cpu)
+
+
+class _CaptureWriter:
+    def __init__(self, writer: asyncio.StreamWriter, output: CaptureWriter):
+        self.writer = writer
+        self.output = output
+        self.transport = writer.transport
+
+    def write(self, data: bytes) -> None:
+        self.output.write(bytes(data), EavesdroppedDirection.TO_SERIAL_PORT)
+        self.writer.write(data)
+
+    async def drain(self) -> None:
+        await self.writer.drain()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class _CaptureContext(StreamingContext):
+    def __init__(self, config: LayeredConfiguration, data: DataOutput, bus: BusInterface,
+                 persistent: PersistentInterface, reader: asyncio.StreamReader, writer: _CaptureWriter):
+        super().__init__(config, data, bus, persistent)
+        self.reader = reader
+        self.writer = writer
+
+    async def open_stream(self) -> typing.Tuple[typing.Optional[asyncio.StreamReader],
+                                                typing.Optional[asyncio.StreamWriter]]:
+        return self.reader, self.writer
+
+    async def close_stream(self, reader: typing.Optional[asyncio.StreamReader],
+                           writer: typing.Optional[asyncio.StreamWriter]) -> None:
+        pass
+
+
+async def capture_simulator(instrument: typing.Type[StreamingInstrument],
+                            simulator: typing.Type[StreamingSimulator],
+                            output: CaptureWriter, duration: float,
+                            config: typing.Optional[dict] = None,
+                            startup_timeout: typing.Optional[float] = 120.0,
+                            setup: typing.Optional[typing.Callable[[StreamingSimulator], None]] = None) -> int:
+    simulator_read, instrument_write = await _aio_pipe()
+    simulator_output, simulator_write = await _aio_pipe()
+    instrument_read = asyncio.StreamReader()
+
+    async def forward_output():
+        while True:
+            data = await simulator_output.read(4096)
+            if not data:
+                break
+            output.write(data, EavesdroppedDirection.FROM_SERIAL_PORT)
+            instrument_read.feed_data(data)
+        instrument_read.feed_eof()
+
+    s = simulator(simulator_read, simulator_write)
+    if setup:
+        setup(s)
+    bus = ReplayBusInterface()
+    context = _CaptureContext(LayeredConfiguration(config or dict()), DataOutput("nil", "XTEST"), bus,
+                              PersistentInterface(), instrument_read, _CaptureWriter(instrument_write, output))
+    i = instrument(context)
+
+    run = [
+        asyncio.ensure_future(forward_output()),
+        asyncio.ensure_future(s.run()),
+        asyncio.ensure_future(i.run()),
+    ]
+    async def wait_for_record():
+        while bus.data_records == 0:
+            await bus.data_value_updated.wait()
+            bus.data_value_updated.clear()
+
+    try:
+        # Communications start up is included in the capture, but the duration only counts once records are arriving
+        if startup_timeout:
+            await wait_cancelable(wait_for_record(), startup_timeout)
+        else:
+            await wait_for_record()
+        await asyncio.sleep(duration)
+    finally:
+        for t in run:
+            await _stop_task(t)
+        simulator_write.close()
+        instrument_write.close()
+        output.flush()
+
+    return bus.data_records
@@ -0,0 +1,44 @@
+import pytest
+import io
+from forge.acquisition.serial.multiplexer.eavesdropper import EavesdroppedDirection
+from forge.acquisition.serial.multiplexer.capture import CaptureWriter, read_capture
+from forge.acquisition.instrument.replay import capture_simulator, replay_capture
+from forge.acquisition.instrument.tsi377xcpc.simulator import Simulator
+from forge.acquisition.instrument.tsi377xcpc.instrument import Instrument
+
+
+def test_capture_file():
+    output = io.BytesIO()
+    writer = CaptureWriter(output, origin=1000.0)
+    writer.write(b"RALL\r", EavesdroppedDirection.TO_SERIAL_PORT, 1000.25)
+    writer.write(b"1,2,3\r", EavesdroppedDirection.FROM_SERIAL_PORT, 1001.5)
+    writer.write(b"A" * 70000, EavesdroppedDirection.FROM_SERIAL_PORT, 999.0)
+    writer.flush()
+
+    output.seek(0)
+    records = list(read_capture(output))
+    assert len(records) == 4
+    assert records[0] == (1000.25, EavesdroppedDirection.TO_SERIAL_PORT, b"RALL\r")
+    assert records[1] == (1001.5, EavesdroppedDirection.FROM_SERIAL_PORT, b"1,2,3\r")
+    assert records[2][0] == 1000.0
+    assert records[2][2] + records[3][2] == b"A" * 70000
+
+    with pytest.raises(ValueError):
+        list(read_capture(io.BytesIO(b"NOTACAPTURE" * 4)))
+    with pytest.raises(ValueError):
+        list(read_capture(io.BytesIO(output.getvalue()[:-1])))
+
+
+@pytest.mark.asyncio
+async def test_replay():
+    config = {'REPORT_INTERVAL': 0.05}
+    output = io.BytesIO()
+    captured = await capture_simulator(Instrument, Simulator, CaptureWriter(output), 1.0, config=config)
+    assert captured > 0
+
+    output.seek(0)
+    capture = list(read_capture(output))
+    result = await replay_capture(Instrument, capture, config=config, timeout=30)
+    assert abs(result.records - captured) <= 1
+    assert result.records_per_second > 0.0
+    assert result.cpu_per_record > 0.0
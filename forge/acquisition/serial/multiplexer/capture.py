@@ -0,0 +1,70 @@
+import typing
+import asyncio
+import struct
+import time
+from forge.acquisition.serial.multiplexer.eavesdropper import EavesdroppedDirection, read_eavesdropped
+
+
+# A capture is a short header with the time origin, followed by one record per eavesdropped packet: the offset from
+# the origin in milliseconds, the direction and the data length, then the raw data.
+_CAPTURE_MAGIC = b'FCAP'
+_CAPTURE_VERSION = 1
+_HEADER = struct.Struct('<4sBd')
+_RECORD = struct.Struct('<IBH')
+_MAXIMUM_OFFSET = 0xFFFFFFFF
+
+
+class CaptureWriter:
+    def __init__(self, output: typing.BinaryIO, origin: typing.Optional[float] = None):
+        self.output = output
+        if origin is None:
+            origin = time.time()
+        self.origin = origin
+        self.output.write(_HEADER.pack(_CAPTURE_MAGIC, _CAPTURE_VERSION, origin))
+
+    def write(self, data: bytes, direction: EavesdroppedDirection, timestamp: typing.Optional[float] = None) -> None:
+        if timestamp is None:
+            timestamp = time.time()
+        offset = min(max(int(round((timestamp - self.origin) * 1000.0)), 0), _MAXIMUM_OFFSET)
+        while data:
+            chunk = data[:0xFFFF]
+            self.output.write(_RECORD.pack(offset, direction.value, len(chunk)))
+            self.output.write(chunk)
+            data = data[len(chunk):]
+
+    def flush(self) -> None:
+        self.output.flush()
+
+
+def read_capture(source: typing.BinaryIO) -> typing.Iterator[typing.Tuple[float, EavesdroppedDirection, bytes]]:
+    header = source.read(_HEADER.size)
+    if len(header) != _HEADER.size:
+        raise ValueError("capture header truncated")
+    magic, version, origin = _HEADER.unpack(header)
+    if magic != _CAPTURE_MAGIC:
+        raise ValueError("not a serial capture file")
+    if version != _CAPTURE_VERSION:
+        raise ValueError(f"unsupported capture version {version}")
+
+    while True:
+        record = source.read(_RECORD.size)
+        if not record:
+            break
+        if len(record) != _RECORD.size:
+            raise ValueError("capture record truncated")
+        offset, direction, length = _RECORD.unpack(record)
+        data = source.read(length)
+        if len(data) != length:
+            raise ValueError("capture data truncated")
+        yield origin + offset / 1000.0, EavesdroppedDirection(direction), data
+
+
+def load_capture(filename: str) -> typing.List[typing.Tuple[float, EavesdroppedDirection, bytes]]:
+    with open(filename, 'rb') as f:
+        return list(read_capture(f))
+
+
+async def record_eavesdropped(evs: asyncio.StreamReader, output: CaptureWriter) -> None:
+    async for data, direction in read_eavesdropped(evs):
+        output.write(data, direction)
+    output.flush()
@@ -260,7 +260,12 @@ async def run(args) -> None:
     else:
         input_task = asyncio.ensure_future(read_stdin_lines(local_reader, evs_writer, local_read_target))
 
-    if args.unbuffered:
+    capture_file = None
+    if args.capture:
+        from .capture import CaptureWriter, record_eavesdropped
+        capture_file = open(args.capture, 'wb')
+        output_task = asyncio.ensure_future(record_eavesdropped(evs_reader, CaptureWriter(capture_file)))
+    elif args.unbuffered:
         output_task = asyncio.ensure_future(display_raw(evs_reader, local_writer))
     else:
         output_task = asyncio.ensure_future(display_lines(evs_reader, local_writer))
@@ -281,6 +286,9 @@ async def run(args) -> None:
     except asyncio.CancelledError:
         pass
 
+    if capture_file:
+        capture_file.close()
+
 
 def main():
     parser = argparse.ArgumentParser(description="Acquisition serial eavesdropper client.")
@@ -294,6 +302,9 @@ def main():
     parser.add_argument('--write-multiplexed',
                         dest='write_multiplexed', action='store_true',
                         help="write to downstream connections instead of the serial port")
+    parser.add_argument('--capture',
+                        dest='capture',
+                        help="record timestamped traffic to a capture file instead of displaying it")
 
     parser.add_argument('socket',
                         help="eavesdropper socket path")
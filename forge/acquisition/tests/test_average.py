@@ -174,3 +174,53 @@ def test_types():
     assert abs(vector.magnitude - 25.0) < 1e-6
     assert abs(vector.direction - 30.0) < 1e-6
     assert arr.value == [3.5, 4.5, 5.5]
+
+
+def test_columns():
+    a = AverageRecord(LayeredConfiguration({'AVERAGE': 100}))
+    s1 = a.sum()
+    r1 = a.rate()
+    arr = a.array()
+    nested = a.array(dimensions=2)
+    standalone = AverageRecord.Variable()
+
+    result = a(100.0)
+    assert result is None
+
+    s1(1.0)
+    r1(2.0)
+    arr([1.0, 2.0, 3.0, 4.0])
+    nested([[1.0, 2.0], [3.0]])
+    standalone(5.0)
+    standalone.accumulate(10.0)
+    result = a(150.0)
+    assert result is None
+
+    s1(2.0)
+    r1(None)
+    arr([3.0, float('nan'), 5.0])
+    nested([[3.0, 4.0]])
+    standalone(7.0)
+    standalone.accumulate(30.0)
+    result = a(200.0)
+    assert result.total_seconds == 100.0
+    assert float(s1) == 3.0
+    assert float(r1) == 100.0
+    assert arr.value == [2.0, 2.0, 4.0, 4.0]
+    assert nested.value == [[2.0, 3.0], [3.0]]
+    assert standalone.complete() == 6.5
+
+    s1(None)
+    r1(1.0)
+    arr([6.0, 7.0])
+    nested([])
+    result = a(300.0)
+    assert result.total_seconds == 100.0
+    assert str(float(s1)) == 'nan'
+    assert float(r1) == 100.0
+    assert arr.value == [6.0, 7.0]
+    assert nested.value == []
+
+    arr([1.0, 2.0, 3.0, 4.0, 5.0])
+    result = a(400.0)
+    assert arr.value == [1.0, 2.0, 3.0, 4.0, 5.0]
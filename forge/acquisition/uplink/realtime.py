@@ -33,6 +33,15 @@ class RealtimeTranslatorOutput:
             existing[field] = value
             self.translator._queue_send_data()
 
+        def send_records(self, records: typing.Dict[str, typing.Dict[str, typing.Union[float, typing.List[float]]]]) -> None:
+            for data_name, record in records.items():
+                existing = self.queued_data.get(data_name)
+                if existing is None:
+                    self.queued_data[data_name] = record
+                else:
+                    existing.update(record)
+            self.translator._queue_send_data()
+
     def __init__(self, station: str, output: RealtimeOutput, translator: RealtimeTranslator):
         self.station = station
         self.output = output
@@ -5,11 +5,15 @@ import struct
 import os
 import random
 import time
+import contextvars
+from collections import deque
+from contextlib import contextmanager
 from forge.tasks import wait_cancelable
 from forge.service import send_file_contents
 from ..protocol import ProtocolError, Handshake, ServerPacket, ClientPacket, read_string, write_string
 
 _LOGGER = logging.getLogger(__name__)
+_STATUS_SOURCE: "contextvars.ContextVar[typing.Optional[str]]" = contextvars.ContextVar('_STATUS_SOURCE', default=None)
 
 
 class LockDenied(Exception):
@@ -36,11 +40,15 @@ class Connection:
         self._request_queue = asyncio.Queue()
         self._callback_queue = asyncio.Queue()
         self._closed = asyncio.Event()
-        self._response_handler: "typing.Optional[typing.Tuple[typing.Callable[[Connection, ServerPacket, ...], typing.Awaitable], typing.Tuple, typing.Dict, asyncio.Future]]" = None
+        # Responses arrive in request order, so pipelined requests just queue their handlers
+        self._response_handlers: "typing.Deque[typing.Tuple[typing.Callable[[Connection, ServerPacket, ...], typing.Awaitable], typing.Tuple, typing.Dict, asyncio.Future, bool]]" = deque()
+        self.pipeline_depth: int = 16
         self._notification_handlers: "typing.Dict[str, typing.List[typing.Tuple[typing.Callable[[str, int, int, ...], typing.Awaitable], typing.Tuple, typing.Dict]]]" = dict()
         self._intent_handlers: "typing.Dict[str, typing.List[typing.Tuple[typing.Callable[[str, int, int, ...], typing.Awaitable], typing.Tuple, typing.Dict]]]" = dict()
         self._transaction_intents: "typing.Optional[typing.Dict[Connection.IntentHandle, bool]]" = None
         self._internal_run: typing.Optional[asyncio.Task] = None
+        self._status_sources: typing.Dict[str, str] = dict()
+        self.protocol_version: int = Handshake.COMPATIBLE_PROTOCOL_VERSION.value
 
     @classmethod
     async def default_connection(cls, name: str, use_environ: bool = True) -> "Connection":
@@ -122,10 +130,11 @@ class Connection:
         (check, version) = struct.unpack('<II', await self.reader.readexactly(8))
         if check != Handshake.SERVER_TO_CLIENT.value:
             raise ProtocolError(f"Invalid handshake 0x{check:08X}")
-        if version != Handshake.PROTOCOL_VERSION.value:
+        if version < Handshake.COMPATIBLE_PROTOCOL_VERSION.value:
             raise ProtocolError(f"Invalid protocol version {version}")
+        self.protocol_version = min(version, Handshake.PROTOCOL_VERSION.value)
 
-        self.writer.write(struct.pack('<I', Handshake.PROTOCOL_VERSION.value))
+        self.writer.write(struct.pack('<I', self.protocol_version))
         write_string(self.writer, self.name)
         self.writer.write(struct.pack('<I', Handshake.CLIENT_READY.value))
         await self._drain_writer()
@@ -141,14 +150,15 @@ class Connection:
     async def _request_response(self,
                                 request: "typing.Callable[[Connection, ...], typing.Awaitable]",
                                 response: "typing.Optional[typing.Callable[[Connection, ServerPacket, ...], typing.Awaitable]]",
-                                *args, **kwargs) -> typing.Any:
+                                *args, _pipelined: bool = False, **kwargs) -> typing.Any:
         completed = asyncio.Future()
 
         await self._request_queue.put((
             request,
             response,
             args, kwargs,
-            completed
+            completed,
+            _pipelined,
         ))
 
         wait_closed = asyncio.ensure_future(self._closed.wait())
@@ -196,8 +206,8 @@ class Connection:
         self._callback_queue.put_nowait((call, args, kwargs))
 
     async def _process_packet(self, packet_type: ServerPacket) -> None:
-        if self._response_handler:
-            response, args, kwargs, completed = self._response_handler
+        if self._response_handlers:
+            response, args, kwargs, completed, _ = self._response_handlers[0]
             try:
                 fut = asyncio.ensure_future(response(self, packet_type, *args, **kwargs))
                 try:
@@ -220,7 +230,7 @@ class Connection:
                     if not completed.done():
                         # Might have been canceled due to the caller being canceled itself
                         completed.set_result(data)
-                    self._response_handler = None
+                    self._response_handlers.popleft()
                     return
             except Exception as e:
                 if not completed.done():
@@ -257,6 +267,13 @@ class Connection:
         if uid != 0:
             await self._request_response(send_ack, None, uid)
 
+    def _can_send_request(self) -> bool:
+        if not self._response_handlers:
+            return True
+        if len(self._response_handlers) >= self.pipeline_depth:
+            return False
+        return all([pipelined for _, _, _, _, pipelined in self._response_handlers])
+
     async def run(self) -> None:
         _LOGGER.debug("Connection ready", extra=self.log_extra)
         tasks = set()
@@ -264,6 +281,7 @@ class Connection:
         try:
             packet_begin = None
             request_available = None
+            held_request = None
             callback_available = None
             callback_running = None
             send_heartbeat = None
@@ -273,7 +291,7 @@ class Connection:
                     packet_begin = asyncio.ensure_future(wait_cancelable(self.reader.readexactly(1), 65.0))
                     tasks.add(packet_begin)
 
-                if not request_available and not self._response_handler:
+                if not request_available and not held_request and self._can_send_request():
                     request_available = asyncio.ensure_future(self._request_queue.get())
                     tasks.add(request_available)
 
@@ -302,13 +320,24 @@ class Connection:
                     if packet_type == ServerPacket.HEARTBEAT:
                         awaiting_heartbeat = 0
 
+                send_request = None
                 if request_available in done:
-                    request, response, args, kwargs, completed = request_available.result()
+                    send_request = request_available.result()
                     request_available = None
+                    if self._response_handlers and not send_request[-1]:
+                        # Anything not explicitly pipelined waits for all outstanding responses
+                        held_request = send_request
+                        send_request = None
+                elif held_request and not self._response_handlers:
+                    send_request = held_request
+                    held_request = None
+
+                if send_request:
+                    request, response, args, kwargs, completed, pipelined = send_request
                     try:
                         await request(self, *args, **kwargs)
                         if response:
-                            self._response_handler = (response, args, kwargs, completed)
+                            self._response_handlers.append((response, args, kwargs, completed, pipelined))
                         else:
                             completed.set_result(None)
                     except (IOError, EOFError, ConnectionResetError) as e:
@@ -386,7 +415,8 @@ class Connection:
             request,
             None,
             [], {},
-            completed
+            completed,
+            False,
         ))
         wait_closed = asyncio.ensure_future(self._closed.wait())
         done, pending = await asyncio.wait([completed, wait_closed], return_when=asyncio.FIRST_COMPLETED)
@@ -543,14 +573,30 @@ class Connection:
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
         await self.shutdown()
 
+    @contextmanager
+    def transaction_status_source(self, name: str):
+        # Status set from tasks within the context is combined with any other concurrent sources
+        token = _STATUS_SOURCE.set(name)
+        try:
+            yield
+        finally:
+            _STATUS_SOURCE.reset(token)
+            self._status_sources.pop(name, None)
+
     async def set_transaction_status(self, status: str):
+        source = _STATUS_SOURCE.get()
+        if source is not None:
+            self._status_sources[source] = status
+            status = "; ".join([f"{name}: {status}" for name, status in self._status_sources.items()])
+
         async def request(connection: "Connection", status: str):
             connection.writer.write(struct.pack('<B', ClientPacket.SET_TRANSACTION_STATUS.value))
             write_string(connection.writer, status)
 
         await self._request_response(request, None, status)
 
-    async def read_data(self, name: str, writer: typing.Callable[[bytes], typing.Awaitable]) -> None:
+    async def read_data(self, name: str, writer: typing.Callable[[bytes], typing.Awaitable],
+                        pipelined: bool = False) -> None:
         async def request(connection: "Connection"):
             connection.writer.write(struct.pack('<B', ClientPacket.READ_FILE.value))
             write_string(connection.writer, name)
@@ -569,26 +615,55 @@ class Connection:
             else:
                 return 2
 
-        r = await self._request_response(request, response)
+        r = await self._request_response(request, response, _pipelined=pipelined)
         if r == 2:
             raise FileNotFoundError
 
-    async def read_file(self, name: str, destination: typing.BinaryIO) -> None:
+    async def read_file(self, name: str, destination: typing.BinaryIO, pipelined: bool = False) -> None:
         async def writer(data: bytes) -> None:
             destination.write(data)
 
-        await self.read_data(name, writer)
+        await self.read_data(name, writer, pipelined=pipelined)
 
-    async def read_bytes(self, name: str) -> bytes:
+    async def read_bytes(self, name: str, pipelined: bool = False) -> bytes:
         result = bytearray()
 
         async def writer(data: bytes) -> None:
             nonlocal result
             result += data
 
-        await self.read_data(name, writer)
+        await self.read_data(name, writer, pipelined=pipelined)
         return bytes(result)
 
+    @property
+    def file_digests_available(self) -> bool:
+        return self.protocol_version >= Handshake.PROTOCOL_VERSION.value
+
+    async def file_digests(self, names: typing.List[str]) -> typing.List[typing.Optional[typing.Tuple[int, bytes]]]:
+        if not self.file_digests_available:
+            raise NotImplementedError("Server does not support file digests")
+
+        async def request(connection: "Connection"):
+            connection.writer.write(struct.pack('<BI', ClientPacket.FILE_DIGESTS.value, len(names)))
+            for name in names:
+                write_string(connection.writer, name)
+
+        async def response(connection: "Connection", packet_type: ServerPacket):
+            if packet_type != ServerPacket.FILE_DIGESTS_RESULT:
+                return None
+            count = struct.unpack('<I', await connection.reader.readexactly(4))[0]
+            result: typing.List[typing.Optional[typing.Tuple[int, bytes]]] = list()
+            for _ in range(count):
+                present = struct.unpack('<B', await connection.reader.readexactly(1))[0]
+                if not present:
+                    result.append(None)
+                    continue
+                size = struct.unpack('<Q', await connection.reader.readexactly(8))[0]
+                result.append((size, await connection.reader.readexactly(32)))
+            return result
+
+        return await self._request_response(request, response)
+
     async def write_data(self, name: str, total_size: int,
                          reader: typing.Callable[[int], typing.Awaitable[bytes]]) -> None:
         async def request(connection: "Connection"):
@@ -801,7 +876,7 @@ class Connection:
         while True:
             now = time.monotonic()
 
-            if self._response_handler:
+            if self._response_handlers:
                 effective_timeout = to_timeout(request_timeout)
             else:
                 effective_timeout = to_timeout(heartbeat_timeout)
@@ -3,6 +3,8 @@ import asyncio
 import logging
 import time
 import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from math import floor, ceil
 from tempfile import NamedTemporaryFile
 from netCDF4 import Dataset
@@ -20,6 +22,9 @@ from forge.data.structure.timeseries import file_id, date_created
 
 _LOGGER = logging.getLogger(__name__)
 _VALID_INSTRUMENT = re.compile(r"[A-Z][A-Z0-9]*")
+# A single worker, since the NetCDF library cannot be used from multiple threads at once
+_MERGE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ArchiveMerge")
+_MERGE_DEPTH = 4
 
 
 class InvalidFile(Exception):
@@ -183,22 +188,23 @@ class ArchivePut:
         file.time_coverage_start = format_iso8601_time(archive_file_start / 1000.0)
         file.time_coverage_end = format_iso8601_time(archive_file_end / 1000.0)
 
-    async def _merge_data_file(self, file: Dataset, station: str, archive: str, instrument_id: str,
-                               archive_file_start: int, archive_file_end: int) -> None:
-        with NamedTemporaryFile(suffix=".nc") as existing_file, NamedTemporaryFile(suffix=".nc") as merged_file:
-            merge = MergeInstrument()
-
-            archive_file_name = data_file_name(station, archive, instrument_id, archive_file_start / 1000.0)
-            try:
-                await self._connection.read_file(archive_file_name, existing_file)
-                existing_file.flush()
-                existing_data = Dataset(existing_file.name, 'r')
-                merge.overlay(existing_data, archive_file_start, archive_file_end)
-                _LOGGER.debug("Using existing data file %s", archive_file_name)
-            except FileNotFoundError:
-                _LOGGER.debug("No existing data for %s", archive_file_name)
-                existing_data = None
+    def _merge_data_contents(self, file: Dataset, station: str, archive: str, instrument_id: str,
+                             archive_file_start: int, archive_file_end: int,
+                             existing_contents: typing.Optional[bytes],
+                             index: ArchiveIndex, history: typing.Optional[InstrumentHistory]) -> bytes:
+        archive_file_name = data_file_name(station, archive, instrument_id, archive_file_start / 1000.0)
+        merge = MergeInstrument()
+
+        if existing_contents is not None:
+            existing_data = Dataset(archive_file_name, 'r', memory=existing_contents)
+            merge.overlay(existing_data, archive_file_start, archive_file_end)
+            _LOGGER.debug("Using existing data file %s", archive_file_name)
+        else:
+            _LOGGER.debug("No existing data for %s", archive_file_name)
+            existing_data = None
 
+        # The merged output goes through a file, since in-memory images cannot be reopened for writing
+        with NamedTemporaryFile(suffix=".nc") as merged_file:
             try:
                 merge.overlay(file, archive_file_start, archive_file_end)
                 result = merge.execute(merged_file.name)
@@ -209,11 +215,9 @@ class ArchivePut:
             try:
                 self._prepare_data_file(result, station, archive, instrument_id,
                                         archive_file_start, archive_file_end)
-                self._get_index(station, archive, archive_file_start).integrate_file(result)
-                if archive == "raw":
-                    self._get_history(station, archive_file_start).update_file(
-                        result, archive_file_start, archive_file_end
-                    )
+                index.integrate_file(result)
+                if history is not None:
+                    history.update_file(result, archive_file_start, archive_file_end)
                 result.close()
                 result = None
             finally:
@@ -221,9 +225,67 @@ class ArchivePut:
                     result.close()
 
             merged_file.seek(0)
-            await self._connection.write_file(archive_file_name, merged_file)
+            return merged_file.read()
+
+    async def _merge_data_files(self, file: Dataset, station: str, archive: str, instrument_id: str,
+                                archive_files: typing.List[typing.Tuple[int, int]]) -> None:
+        # Reads are pipelined ahead of the merge, which runs in a worker thread while the uploads of completed
+        # files continue.  Every file from its read until its upload holds a slot, so at most _MERGE_DEPTH files
+        # are held in memory at once.
+        in_flight = asyncio.Semaphore(_MERGE_DEPTH)
+
+        async def fetch(archive_file_name: str) -> typing.Optional[bytes]:
+            try:
+                return await self._connection.read_bytes(archive_file_name, pipelined=True)
+            except FileNotFoundError:
+                return None
+
+        async def send(archive_file_name: str, contents: bytes) -> None:
+            try:
+                await self._connection.write_bytes(archive_file_name, contents)
+            finally:
+                in_flight.release()
             _LOGGER.debug("Sent updated file %s", archive_file_name)
 
+        archive_file_names = [
+            data_file_name(station, archive, instrument_id, archive_file_start / 1000.0)
+            for archive_file_start, _ in archive_files
+        ]
+        fetches: typing.Deque[asyncio.Future] = deque()
+        sends: typing.List[asyncio.Future] = list()
+        next_fetch = 0
+        try:
+            for idx in range(len(archive_files)):
+                while next_fetch < len(archive_files) and (next_fetch == idx or not in_flight.locked()):
+                    await in_flight.acquire()
+                    fetches.append(asyncio.ensure_future(fetch(archive_file_names[next_fetch])))
+                    next_fetch += 1
+
+                archive_file_start, archive_file_end = archive_files[idx]
+                existing_contents = await fetches[0]
+                fetches.popleft()
+                index = self._get_index(station, archive, archive_file_start)
+                history = self._get_history(station, archive_file_start) if archive == "raw" else None
+                contents = await asyncio.get_event_loop().run_in_executor(
+                    _MERGE_EXECUTOR, self._merge_data_contents,
+                    file, station, archive, instrument_id, archive_file_start, archive_file_end, existing_contents,
+                    index, history,
+                )
+                sends.append(asyncio.ensure_future(send(archive_file_names[idx], contents)))
+            await asyncio.gather(*sends)
+        except:
+            for t in list(fetches) + sends:
+                try:
+                    t.cancel()
+                except:
+                    pass
+            for t in list(fetches) + sends:
+                try:
+                    await t
+                except:
+                    pass
+            raise
+
     async def data(self, file: Dataset, archive: str = "raw",
                    file_start_ms: int = None, file_end_ms: int = None,
                    station: str = None) -> None:
@@ -239,6 +301,7 @@ class ArchivePut:
         station = self.get_station(file, station)
         destination_start, destination_end = self._get_destination_bounds(file, file_start_ms, file_end_ms)
 
+        archive_files: typing.List[typing.Tuple[int, int]] = list()
         if archive in ("avgd", "avgm"):
             start_year = time.gmtime(destination_start / 1000.0).tm_year
             end_year = time.gmtime(destination_end / 1000.0).tm_year + 1
@@ -251,8 +314,7 @@ class ArchivePut:
                     break
 
                 await self._lock_data(station, archive, archive_file_start, archive_file_end)
-                await self._merge_data_file(file, station, archive, instrument_id,
-                                            archive_file_start, archive_file_end)
+                archive_files.append((archive_file_start, archive_file_end))
         else:
             start_day_index = int(floor(destination_start / (24 * 60 * 60 * 1000)))
             end_day_index = int(ceil(destination_end / (24 * 60 * 60 * 1000))) + 1
@@ -266,8 +328,8 @@ class ArchivePut:
                     break
 
                 await self._lock_data(station, archive, archive_file_start, archive_file_end)
-                await self._merge_data_file(file, station, archive, instrument_id,
-                                            archive_file_start, archive_file_end)
+                archive_files.append((archive_file_start, archive_file_end))
+        await self._merge_data_files(file, station, archive, instrument_id, archive_files)
 
         send_notify_key = data_notification_key(station, archive)
         sent_intervals = self._sent_notifications.get(send_notify_key)
@@ -12,7 +12,10 @@ class Handshake(IntEnum):
     SERVER_TO_CLIENT = 0x3462A633
     CLIENT_READY = 0xA6CBA125
     SERVER_READY = 0x52EB140A
-    PROTOCOL_VERSION = 3
+    # The server announces its highest version and the client replies with the lower of that and its own, which
+    # is then the version both use.  Neither side uses features newer than the negotiated version.
+    PROTOCOL_VERSION = 4
+    COMPATIBLE_PROTOCOL_VERSION = 3
 
 
 @unique
@@ -41,6 +44,8 @@ class ClientPacket(IntEnum):
 
     LIST_FILES = 16
 
+    FILE_DIGESTS = 17
+
 
 @unique
 class ServerPacket(IntEnum):
@@ -69,6 +74,8 @@ class ServerPacket(IntEnum):
 
     LIST_RESULT = 17
 
+    FILE_DIGESTS_RESULT = 18
+
 
 @unique
 class ServerDiagnosticRequest(IntEnum):
@@ -78,6 +85,7 @@ class ServerDiagnosticRequest(IntEnum):
     LIST_NOTIFICATION_LISTENERS = 4
     LIST_NOTIFICATION_WAIT = 5
     TRANSACTION_DETAILS = 6
+    STORAGE_LOCK_WAIT = 7
 
     CLOSE_CONNECTION = 100
 
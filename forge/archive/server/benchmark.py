@@ -0,0 +1,139 @@
+import typing
+import asyncio
+import argparse
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from forge.archive import CONFIGURATION
+from .control import Controller
+from .storagelock import WaitHistogram
+
+
+async def _writer(control: Controller, writer: int, commits: int, file_size: int) -> None:
+    contents = bytes(file_size)
+    for commit in range(commits):
+        handle = await control.storage.begin_write()
+        async with handle as storage:
+            with storage.write_file(f"benchmark/{writer}/{commit}") as f:
+                f.write(contents)
+        await handle.commit()
+
+
+async def _run(root: Path, writers: int, commits: int, file_size: int, grouped: bool) -> float:
+    control = Controller(root)
+    if not grouped:
+        control.group_commit_limit = 1
+    await control.initialize()
+    try:
+        begin_time = time.monotonic()
+        await asyncio.gather(*[_writer(control, i, commits, file_size) for i in range(writers)])
+        return time.monotonic() - begin_time
+    finally:
+        control.shutdown()
+
+
+async def _reader(control: Controller, files: int, end_time: float) -> int:
+    reads = 0
+    while time.monotonic() < end_time:
+        handle = await control.storage.begin_read()
+        for i in range(files):
+            async with handle as storage:
+                f = storage.read_file(f"benchmark/read/{i}")
+            f.read()
+            f.close()
+            reads += 1
+        await control.storage.list_files("benchmark/read")
+        await handle.release()
+    return reads
+
+
+async def _contention(root: Path, readers: int, writers: int, file_size: int,
+                      duration: float) -> typing.Tuple[int, int, Controller]:
+    control = Controller(root)
+    await control.initialize()
+    try:
+        files = 16
+        handle = await control.storage.begin_write()
+        async with handle as storage:
+            for i in range(files):
+                with storage.write_file(f"benchmark/read/{i}") as f:
+                    f.write(bytes(file_size))
+        await handle.commit()
+
+        end_time = time.monotonic() + duration
+        commits = 0
+
+        async def writer(index: int) -> None:
+            nonlocal commits
+            while time.monotonic() < end_time:
+                await _writer(control, index, 1, file_size)
+                commits += 1
+
+        results = await asyncio.gather(
+            *[_reader(control, files, end_time) for _ in range(readers)],
+            *[writer(i) for i in range(writers)]
+        )
+        return sum(results[:readers]), commits, control
+    finally:
+        control.shutdown()
+
+
+def _print_wait(name: str, histogram: WaitHistogram) -> None:
+    count = histogram.count
+    mean = histogram.total / count if count else 0.0
+    print(f"    {name:>9} wait: {count:>8d} acquires, mean {mean * 1000.0:8.3f} ms, "
+          f"max {histogram.maximum * 1000.0:8.3f} ms, histogram {histogram.counts}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forge archive storage commit benchmark.")
+
+    parser.add_argument('--commits',
+                        dest='commits', type=int, default=256,
+                        help="total number of commits for each run")
+    parser.add_argument('--size',
+                        dest='size', type=int, default=4096,
+                        help="size of the file written in each commit")
+    parser.add_argument('--writers',
+                        dest='writers', type=int, action='append',
+                        help="concurrent writer count to run, may be repeated")
+    parser.add_argument('--readers',
+                        dest='readers', type=int, default=16,
+                        help="concurrent reader count for the contention run")
+    parser.add_argument('--duration',
+                        dest='duration', type=float, default=2.0,
+                        help="duration of the contention run in seconds")
+    parser.add_argument('--window',
+                        dest='window', type=float,
+                        help="group commit window in seconds")
+
+    args = parser.parse_args()
+    writer_counts = args.writers or [1, 8, 64]
+    if args.window is not None:
+        CONFIGURATION.set('ARCHIVE.GROUP_COMMIT.WINDOW', args.window)
+    CONFIGURATION.set('ARCHIVE.LOCK_STORAGE', False)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    for writers in writer_counts:
+        commits = max(1, args.commits // writers)
+        for name, grouped in (("Single", False), ("Grouped", True)):
+            with TemporaryDirectory() as root:
+                elapsed = loop.run_until_complete(_run(Path(root), writers, commits, args.size, grouped))
+            total = writers * commits
+            print(f"{writers:>3d} writers {name:>8}: {total:>6d} commits in {elapsed:8.3f} seconds, "
+                  f"{total / elapsed:10.1f} commits/second")
+
+    if args.readers > 0:
+        with TemporaryDirectory() as root:
+            reads, commits, control = loop.run_until_complete(_contention(
+                Path(root), args.readers, max(writer_counts), args.size, args.duration))
+        print(f"Contention: {args.readers} readers and {max(writer_counts)} writers, "
+              f"{reads / args.duration:10.1f} reads/second, {commits / args.duration:10.1f} commits/second")
+        _print_wait("shared", control._storage_lock.shared_wait)
+        _print_wait("exclusive", control._storage_lock.exclusive_wait)
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
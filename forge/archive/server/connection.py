@@ -29,6 +29,7 @@ class Connection:
         self.identifier = identifier
         self.control: Controller = None
         self.name: str = None
+        self.protocol_version: int = Handshake.COMPATIBLE_PROTOCOL_VERSION.value
         self._logger = _ConnectionLogger(_LOGGER, {'connection': self})
         self._unsolicited = asyncio.Queue()
 
@@ -127,12 +128,12 @@ class Connection:
         check = struct.unpack('<I', await self.reader.readexactly(4))[0]
         if check != Handshake.CLIENT_TO_SERVER.value:
             raise ProtocolError(f"Invalid handshake 0x{check:08X}")
-        self.writer.write(struct.pack('<II', Handshake.SERVER_TO_CLIENT.value,
-                                      Handshake.PROTOCOL_VERSION.value))
+        self.writer.write(struct.pack('<II', Handshake.SERVER_TO_CLIENT.value, Handshake.PROTOCOL_VERSION.value))
         await self._drain_writer()
         check = struct.unpack('<I', await self.reader.readexactly(4))[0]
-        if check != Handshake.PROTOCOL_VERSION.value:
+        if check < Handshake.COMPATIBLE_PROTOCOL_VERSION.value or check > Handshake.PROTOCOL_VERSION.value:
             raise ProtocolError(f"Invalid protocol version {check}")
+        self.protocol_version = check
 
         client_name = await read_string(self.reader)
         if not client_name:
@@ -204,6 +205,23 @@ class Connection:
                 await send_file_contents(source, self.writer, total_size)
             finally:
                 source.close()
+        elif (packet_type == ClientPacket.FILE_DIGESTS and self._transaction and
+              self.protocol_version >= Handshake.PROTOCOL_VERSION.value):
+            count = struct.unpack('<I', await self.reader.readexactly(4))[0]
+            names: typing.List[str] = list()
+            for _ in range(count):
+                names.append(await read_string(self.reader))
+            self.writer.write(struct.pack('<B', ServerPacket.FILE_DIGESTS_RESULT.value))
+            digests = await self._transaction.file_digests(names)
+            self._logger.debug("Sending %d file digests", len(digests))
+            self.writer.write(struct.pack('<I', len(digests)))
+            for digest in digests:
+                if not digest:
+                    self.writer.write(struct.pack('<B', 0))
+                    continue
+                size, digest = digest
+                self.writer.write(struct.pack('<BQ', 1, size))
+                self.writer.write(digest)
         elif packet_type == ClientPacket.WRITE_FILE and self._transaction:
             name = await read_string(self.reader)
             total_size = struct.unpack('<Q', await self.reader.readexactly(8))[0]
@@ -5,9 +5,11 @@ from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor
 from forge.service import get_writer_fileno
 from forge.tasks import wait_cancelable
+from forge.archive import CONFIGURATION
 from .connection import Connection
 from .transaction import ReadTransaction, WriteTransaction
 from .storage import Storage
+from .storagelock import StorageLock
 from .lock import ArchiveLocker
 from .notify import NotificationDispatch
 from .intent import IntentTracker
@@ -21,11 +23,12 @@ class Controller:
             self._control = control
 
         async def __aenter__(self) -> Storage:
-            await self._control._storage_lock.acquire()
+            await self._control._storage_lock.acquire(exclusive=False)
             return self._control._storage
 
         async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
-            self._control._storage_lock.release()
+            self._control._storage_lock.release(exclusive=False)
+
 
         def __enter__(self) -> Storage:
             if self._control._storage_lock.locked():
@@ -57,11 +60,11 @@ class Controller:
             self._handle = handle
 
         async def __aenter__(self) -> typing.Union[Storage.ReadHandle, Storage.WriteHandle]:
-            await self._control._storage_lock.acquire()
+            await self._control._storage_lock.acquire(exclusive=False)
             return self._handle
 
         async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
-            self._control._storage_lock.release()
+            self._control._storage_lock.release(exclusive=False)
 
         def __enter__(self) -> typing.Union[Storage.ReadHandle, Storage.WriteHandle]:
             if self._control._storage_lock.locked():
@@ -76,16 +79,20 @@ class Controller:
             return self._handle.generation
 
         async def release(self) -> None:
-            async with self as handle:
-                await asyncio.get_event_loop().run_in_executor(None, handle.release)
+            # Only detaching redirections changes what readers see, their files are removed after
+            async with self._control._storage_lock.exclusive():
+                self._handle.unreference()
+                redirections = self._control._storage.detach_redirections()
+            await asyncio.get_event_loop().run_in_executor(None, self._control._storage.release_redirections, redirections)
 
         async def commit(self, progress: typing.Optional[typing.Callable[[int, int], None]] = None) -> None:
-            async with self as handle:
-                await asyncio.get_event_loop().run_in_executor(None, handle.commit, progress)
+            await self._control._group_commit(self._handle, progress)
 
         async def abort(self) -> None:
-            async with self as handle:
-                await asyncio.get_event_loop().run_in_executor(None, handle.abort)
+            # Shared access only excludes a publish changing the references, the transaction directory is private
+            async with self:
+                self._handle.discard()
+            await asyncio.get_event_loop().run_in_executor(None, self._handle.remove_storage)
 
     def __init__(self, storage_root: typing.Optional[Path] = None):
         self._storage = Storage(root_directory=storage_root)
@@ -94,11 +101,17 @@ class Controller:
         self.intent = IntentTracker()
         self._next_connection_uid: int = 1
         self.active_connections: typing.Dict[int, Connection] = dict()
-        self._storage_lock: asyncio.Lock = None
+        self._storage_lock: StorageLock = None
+        self.group_commit_window = float(CONFIGURATION.get('ARCHIVE.GROUP_COMMIT.WINDOW', 0.002))
+        self.group_commit_limit = int(CONFIGURATION.get('ARCHIVE.GROUP_COMMIT.LIMIT', 64))
+        self._pending_commit: typing.Optional[typing.List[typing.Tuple[
+            Storage.WriteHandle, typing.Optional[typing.Callable[[int, int], None]], asyncio.Future
+        ]]] = None
+        self._commit_tasks: typing.Set[asyncio.Task] = set()
 
     async def initialize(self) -> None:
         self._storage.initialize()
-        self._storage_lock = asyncio.Lock()
+        self._storage_lock = StorageLock()
 
     def shutdown(self) -> None:
         self._storage.shutdown()
@@ -109,6 +122,55 @@ class Controller:
                 pass
         self.active_connections.clear()
 
+    async def _run_commit_group(self, group: typing.List[typing.Tuple[
+        Storage.WriteHandle, typing.Optional[typing.Callable[[int, int], None]], asyncio.Future
+    ]]) -> None:
+        # Commits arriving while waiting for the window join the group, so the whole group shares a single journal
+        # sync.  A lone commit with nothing else in progress does not wait.
+        if self.group_commit_limit > 1 and self.group_commit_window > 0 and len(self._commit_tasks) > 1:
+            await asyncio.sleep(self.group_commit_window)
+        if self._pending_commit is group:
+            self._pending_commit = None
+
+        try:
+            await self._commit_phases(group)
+        except Exception as e:
+            for _, _, completed in group:
+                if not completed.done():
+                    completed.set_exception(e)
+            return
+        for _, _, completed in group:
+            if not completed.done():
+                completed.set_result(None)
+
+    async def _commit_phases(self, group: typing.List[typing.Tuple[
+        Storage.WriteHandle, typing.Optional[typing.Callable[[int, int], None]], asyncio.Future
+    ]]) -> None:
+        # Only publishing the changes needs exclusive access, the journal and cleanup touch just the transaction
+        # directories, so readers continue until the publish
+        handles = [handle for handle, _, _ in group]
+        loop = asyncio.get_event_loop()
+        journal_file = await loop.run_in_executor(None, self._storage.journal_group, handles)
+        async with self._storage_lock.exclusive():
+            await loop.run_in_executor(
+                None,
+                self._storage.publish_group, [(handle, progress) for handle, progress, _ in group]
+            )
+        await loop.run_in_executor(None, self._storage.complete_group, handles, journal_file)
+
+    async def _group_commit(self, handle: Storage.WriteHandle,
+                            progress: typing.Optional[typing.Callable[[int, int], None]] = None) -> None:
+        group = self._pending_commit
+        if group is None or len(group) >= self.group_commit_limit:
+            group = list()
+            self._pending_commit = group
+            task = asyncio.ensure_future(self._run_commit_group(group))
+            self._commit_tasks.add(task)
+            task.add_done_callback(self._commit_tasks.discard)
+        completed = asyncio.get_event_loop().create_future()
+        group.append((handle, progress, completed))
+        await completed
+
     @staticmethod
     def _construct_identifier(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> str:
         identifier = None
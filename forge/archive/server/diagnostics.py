@@ -125,6 +125,13 @@ class Diagnostics:
             return dict()
         return details
 
+    def _storage_lock_wait(self) -> typing.Dict:
+        lock = self.control._storage_lock
+        return {
+            'shared': lock.shared_wait.to_json(),
+            'exclusive': lock.exclusive_wait.to_json(),
+        }
+
     async def connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
         _LOGGER.debug("Accepted diagnostic connection")
         try:
@@ -157,6 +164,10 @@ class Diagnostics:
                 result = self._transaction_details(uid)
                 writer.write(to_json(result).encode('utf-8'))
                 await writer.drain()
+            elif request == ServerDiagnosticRequest.STORAGE_LOCK_WAIT:
+                result = self._storage_lock_wait()
+                writer.write(to_json(result).encode('utf-8'))
+                await writer.drain()
             elif request == ServerDiagnosticRequest.CLOSE_CONNECTION:
                 uid = await wait_cancelable(reader.readexactly(8), 10.0)
                 uid = struct.unpack('<Q', uid)[0]
@@ -252,6 +263,12 @@ def main():
                                 type=int,
                                 help="the connection UID to display")
 
+    command_parser = subparsers.add_parser('storage-lock',
+                                           help="show storage lock wait times")
+    command_parser.add_argument('--json',
+                                dest='json', action='store_true',
+                                help="output histograms in JSON")
+
     args = parser.parse_args()
     if not args.socket:
         parser.error("No diagnostic socket set")
@@ -594,6 +611,33 @@ def main():
                     output_columns([
                         "KEY", "START", "END"
                     ], output_rows, flex=0, prefix="    ")
+        elif args.command == 'storage-lock':
+            writer.write(struct.pack('<B', ServerDiagnosticRequest.STORAGE_LOCK_WAIT.value))
+            response = await read_all_json()
+            if args.json:
+                print(to_json(response))
+            else:
+                def format_bound(value: float) -> str:
+                    if value < 1.0:
+                        return f"<{value * 1000.0:g}ms"
+                    return f"<{value:g}s"
+
+                output_rows = list()
+                bounds = None
+                for mode in ('shared', 'exclusive'):
+                    histogram = response[mode]
+                    bounds = histogram['bounds']
+                    count = sum(histogram['counts'])
+                    mean = histogram['total'] / count if count else 0.0
+                    output_rows.append([
+                        mode.upper(),
+                        str(count),
+                        f"{mean * 1000.0:.3f}",
+                        f"{histogram['maximum'] * 1000.0:.3f}",
+                    ] + [str(c) for c in histogram['counts']])
+                output_columns([
+                    "MODE", "COUNT", "MEAN MS", "MAX MS"
+                ] + [format_bound(b) for b in bounds] + [">" + format_bound(bounds[-1])[1:]], output_rows)
         try:
             writer.close()
         except OSError:
@@ -0,0 +1,336 @@
+import typing
+import logging
+import os
+import stat
+import struct
+import time
+import threading
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+_LOGGER = logging.getLogger(__name__)
+
+
+# The index is a compacted snapshot of the latest modification time, size and SHA-256 digest of every file,
+# followed by an append-only log of changes made since the snapshot.  Both use the same record format:
+#
+#   uint8 operation, uint64 generation, float64 commit time, uint64 size, uint8 digest length,
+#   uint16 path length, char[] path, byte[] digest
+#
+# A zero length digest means it is not known yet, and is calculated from the file contents on first use.  Digest
+# records fill in a digest without changing the modification time.
+#
+# The snapshot starts with a magic and version header, while the log is only records.  A truncated trailing
+# record in the log (e.g. from an interrupted write) is ignored.
+#
+# In memory, changes are kept in commit time order for each directory, so a query only looks at the directories
+# within the requested path.
+class ModificationIndex:
+    _SNAPSHOT_MAGIC = b'FMTI'
+    _SNAPSHOT_VERSION = 2
+    _HEADER = struct.Struct('<4sI')
+    _RECORD = struct.Struct('<BQdQBH')
+
+    _OPERATION_WRITE = 0
+    _OPERATION_REMOVE = 1
+    _OPERATION_DIGEST = 2
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.compact_threshold: int = 65536
+        self._latest: typing.Dict[str, float] = dict()
+        self._last_time: float = 0.0
+        self._directories: typing.Dict[str, typing.Tuple[typing.List[float], typing.List[str]]] = dict()
+        self._directory_names: typing.Optional[typing.List[str]] = None
+        self._digests: typing.Dict[str, typing.Tuple[int, bytes]] = dict()
+        self._log: typing.Optional[typing.BinaryIO] = None
+        self._log_lock = threading.Lock()
+        self._log_records: int = 0
+
+    @property
+    def _snapshot_file(self) -> Path:
+        return self.directory / "snapshot"
+
+    @property
+    def _log_file(self) -> Path:
+        return self.directory / "log"
+
+    def __len__(self) -> int:
+        return len(self._latest)
+
+    @classmethod
+    def _read_records(cls, source: typing.BinaryIO) -> typing.Iterator[typing.Tuple[
+        int, int, float, str, typing.Optional[typing.Tuple[int, bytes]]
+    ]]:
+        while True:
+            raw = source.read(cls._RECORD.size)
+            if len(raw) != cls._RECORD.size:
+                break
+            operation, generation, commit_time, size, digest_length, path_length = cls._RECORD.unpack(raw)
+            raw = source.read(path_length + digest_length)
+            if len(raw) != path_length + digest_length:
+                break
+            digest = (size, raw[path_length:]) if digest_length else None
+            yield operation, generation, commit_time, raw[:path_length].decode('utf-8'), digest
+
+    @classmethod
+    def _write_record(cls, destination: typing.BinaryIO, operation: int, generation: int,
+                      commit_time: float, path: str,
+                      digest: typing.Optional[typing.Tuple[int, bytes]] = None) -> None:
+        raw = path.encode('utf-8')
+        if digest:
+            size, digest = digest
+        else:
+            size, digest = 0, b''
+        destination.write(cls._RECORD.pack(operation, generation, commit_time, size, len(digest), len(raw)))
+        destination.write(raw)
+        destination.write(digest)
+
+    def _insert(self, path: str, commit_time: float) -> None:
+        if commit_time < self._last_time:
+            commit_time = self._last_time
+        self._last_time = commit_time
+        self._latest[path] = commit_time
+
+        directory = path.rpartition('/')[0]
+        changes = self._directories.get(directory)
+        if changes is None:
+            changes = (list(), list())
+            self._directories[directory] = changes
+            self._directory_names = None
+        changes[0].append(commit_time)
+        changes[1].append(path)
+
+    def _apply_record(self, operation: int, path: str, commit_time: float,
+                      digest: typing.Optional[typing.Tuple[int, bytes]]) -> None:
+        if operation == self._OPERATION_REMOVE:
+            self._latest.pop(path, None)
+            self._digests.pop(path, None)
+        elif operation == self._OPERATION_DIGEST:
+            if path in self._latest and digest:
+                self._digests[path] = digest
+        else:
+            self._insert(path, commit_time)
+            if digest:
+                self._digests[path] = digest
+            else:
+                self._digests.pop(path, None)
+
+    def _reset(self) -> None:
+        self._latest.clear()
+        self._last_time = 0.0
+        self._directories.clear()
+        self._directory_names = None
+        self._digests.clear()
+
+    def load(self) -> bool:
+        self._reset()
+        try:
+            with self._snapshot_file.open('rb') as snapshot:
+                magic, version = self._HEADER.unpack(snapshot.read(self._HEADER.size))
+                if magic != self._SNAPSHOT_MAGIC or version != self._SNAPSHOT_VERSION:
+                    _LOGGER.warning("Modification index snapshot version mismatch")
+                    return False
+                for operation, _, commit_time, path, digest in self._read_records(snapshot):
+                    self._apply_record(operation, path, commit_time, digest)
+        except (FileNotFoundError, struct.error):
+            self._reset()
+            return False
+
+        self._log_records = 0
+        valid_end = 0
+        try:
+            with self._log_file.open('rb') as log:
+                for operation, _, commit_time, path, digest in self._read_records(log):
+                    self._apply_record(operation, path, commit_time, digest)
+                    self._log_records += 1
+                    valid_end = log.tell()
+                log.seek(0, os.SEEK_END)
+                if log.tell() != valid_end:
+                    # Drop any partial record, so appends start on a boundary
+                    _LOGGER.warning("Discarding %d bytes of partial modification index log", log.tell() - valid_end)
+                    os.truncate(self._log_file, valid_end)
+        except FileNotFoundError:
+            pass
+
+        _LOGGER.debug("Loaded modification index with %d files and %d log records",
+                      len(self._latest), self._log_records)
+        return True
+
+    def _open_log(self) -> typing.BinaryIO:
+        if self._log is None:
+            self._log = self._log_file.open('ab')
+        return self._log
+
+    def close(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def record(self, generation: int, changes: typing.Iterable[typing.Tuple[
+        str, bool, typing.Optional[typing.Tuple[int, bytes]]
+    ]]) -> None:
+        with self._log_lock:
+            log = self._open_log()
+            commit_time = time.time()
+            for path, removed, digest in changes:
+                operation = self._OPERATION_REMOVE if removed else self._OPERATION_WRITE
+                self._apply_record(operation, path, commit_time, digest)
+                self._write_record(log, operation, generation, commit_time, path, digest)
+                self._log_records += 1
+            log.flush()
+
+            if self._log_records > self.compact_threshold and self._log_records > len(self._latest):
+                self._compact(generation)
+
+    def sync(self) -> None:
+        with self._log_lock:
+            if self._log is not None:
+                os.fsync(self._log.fileno())
+
+    def digest(self, path: str) -> typing.Optional[typing.Tuple[int, bytes]]:
+        return self._digests.get(path)
+
+    def record_digest(self, path: str, digest: typing.Tuple[int, bytes]) -> None:
+        with self._log_lock:
+            if path not in self._latest:
+                return
+            self._digests[path] = digest
+            log = self._open_log()
+            self._write_record(log, self._OPERATION_DIGEST, 0, 0, path, digest)
+            self._log_records += 1
+            log.flush()
+
+    def compact(self, generation: int = 0) -> None:
+        with self._log_lock:
+            self._compact(generation)
+
+    def _compact(self, generation: int) -> None:
+        _LOGGER.debug("Compacting modification index with %d files", len(self._latest))
+        ordered = sorted(self._latest.items(), key=lambda x: x[1])
+        self._last_time = 0.0
+        self._directories.clear()
+        self._directory_names = None
+        for path, commit_time in ordered:
+            self._insert(path, commit_time)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary = self.directory / "snapshot.tmp"
+        with temporary.open('wb') as snapshot:
+            snapshot.write(self._HEADER.pack(self._SNAPSHOT_MAGIC, self._SNAPSHOT_VERSION))
+            for path, commit_time in ordered:
+                self._write_record(snapshot, self._OPERATION_WRITE, generation, commit_time, path,
+                                   self._digests.get(path))
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        temporary.rename(self._snapshot_file)
+
+        self.close()
+        self._log_file.open('wb').close()
+        self._log_records = 0
+
+    def rebuild(self, root: Path) -> None:
+        _LOGGER.info("Rebuilding modification index from %s", root)
+        self.close()
+        self._reset()
+
+        found: typing.List[typing.Tuple[float, str]] = list()
+
+        def recurse(path: Path):
+            try:
+                for file in os.scandir(path):
+                    if file.name.startswith('.'):
+                        continue
+                    try:
+                        if file.is_dir(follow_symlinks=False):
+                            recurse(Path(file.path))
+                            continue
+                        st = file.stat(follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+                    if not stat.S_ISREG(st.st_mode):
+                        continue
+                    found.append((st.st_mtime, str(Path(file.path).relative_to(root))))
+            except (FileNotFoundError, NotADirectoryError):
+                pass
+
+        recurse(root)
+        found.sort()
+        for modified, path in found:
+            self._insert(path, modified)
+        self.compact()
+        _LOGGER.info("Modification index rebuilt with %d files", len(self._latest))
+
+    def modified_after(self, path: str, modified_after: float) -> typing.List[str]:
+        latest = self._latest.get(path)
+        if latest is not None:
+            return [path] if latest > modified_after else []
+
+        if self._directory_names is None:
+            self._directory_names = sorted(self._directories.keys())
+        # Subdirectories sort between the path with a trailing separator and the next character after it
+        check_directories = self._directory_names[
+            bisect_left(self._directory_names, path + "/"):bisect_left(self._directory_names, path + "0")
+        ]
+        if path in self._directories:
+            check_directories.append(path)
+
+        result: typing.Set[str] = set()
+        for directory in check_directories:
+            times, paths = self._directories[directory]
+            for index in range(bisect_right(times, modified_after), len(times)):
+                check = paths[index]
+                if self._latest.get(check, -1) <= modified_after:
+                    continue
+                result.add(check)
+        return list(result)
+
+
+def main():
+    import argparse
+    import fcntl
+    from forge.archive import CONFIGURATION
+
+    parser = argparse.ArgumentParser(description="Forge archive modification index maintenance.")
+
+    parser.add_argument('--debug',
+                        dest='debug', action='store_true',
+                        help="enable debug output")
+    parser.add_argument('--directory',
+                        dest='directory',
+                        default=CONFIGURATION.get('ARCHIVE.STORAGE_DIRECTORY', '/var/lib/forge/archive'),
+                        help="archive storage directory")
+
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('rebuild',
+                          help="reconstruct the index from the archive files")
+    subparsers.add_parser('compact',
+                          help="merge the change log into the snapshot")
+
+    args = parser.parse_args()
+    if args.debug:
+        from forge.log import set_debug_logger
+        set_debug_logger()
+
+    root = Path(args.directory)
+    with (root / ".version").open('rt') as version_file:
+        try:
+            fcntl.flock(version_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            parser.error("Archive storage is in use, stop the server first")
+
+        index = ModificationIndex(root / ".index")
+        if args.command == 'rebuild':
+            index.rebuild(root)
+        elif args.command == 'compact':
+            if not index.load():
+                parser.error("No valid index present, rebuild it instead")
+            index.compact()
+        else:
+            parser.error("No command specified")
+        index.close()
+        print(f"Index contains {len(index)} files")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,13 +6,30 @@ import struct
 import random
 import stat
 import os
+import hashlib
+import sys
 from bisect import bisect_left, bisect_right
 from pathlib import Path
 from forge.archive import CONFIGURATION
+from .mtimeindex import ModificationIndex
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _file_digest(file: typing.BinaryIO) -> typing.Tuple[int, bytes]:
+    size = os.fstat(file.fileno()).st_size
+    if sys.version_info[:2] >= (3, 11):
+        return size, hashlib.file_digest(file, "sha256").digest()
+
+    h = hashlib.sha256()
+    while True:
+        data = file.read(65536)
+        if not data:
+            break
+        h.update(data)
+    return size, h.digest()
+
+
 class _RedirectedWrittenFile:
     def __init__(self, storage: Path):
         self.storage = storage
@@ -72,6 +89,7 @@ def _remove_empty_directories(root: Path, destination: Path) -> None:
 class _ActionWriteFile:
     def __init__(self, contents: Path):
         self.contents = contents
+        self.digest: typing.Optional[typing.Tuple[int, bytes]] = None
 
     def read(self) -> typing.BinaryIO:
         return self.contents.open('rb')
@@ -119,6 +137,10 @@ class _ActionRemoveFile:
     def read(self) -> None:
         return None
 
+    @property
+    def digest(self) -> None:
+        return None
+
     def discard(self) -> None:
         pass
 
@@ -156,6 +178,7 @@ class Storage:
     _STORAGE_VERSION = 1
     _REDIRECTION_PREFIX = ".redirection_"
     _TRANSACTION_PREFIX = ".transaction_"
+    _GROUP_JOURNAL = ".group_journal"
 
     def __init__(self, root_directory: Path = None):
         if not root_directory:
@@ -165,6 +188,7 @@ class Storage:
             raise RuntimeError(f"Archive storage {self._root} is not a directory")
 
         self._version_file: typing.Optional[typing.TextIO] = None
+        self._index = ModificationIndex(self._root / ".index")
 
         self._generation: int = 1
 
@@ -196,41 +220,67 @@ class Storage:
             raise ValueError
         return str(name)
 
-    def _replay_transaction(self, transaction_root: Path) -> None:
-        def read_string(journal: typing.BinaryIO) -> typing.Optional[str]:
-            raw_length = journal.read(2)
-            if not raw_length:
-                raise EOFError
-            raw_length = struct.unpack('<H', raw_length)[0]
-            if not raw_length:
-                return None
-            raw = journal.read(raw_length)
-            return raw.decode('utf-8')
+    @staticmethod
+    def _read_journal_string(journal: typing.BinaryIO) -> typing.Optional[str]:
+        raw_length = journal.read(2)
+        if not raw_length:
+            raise EOFError
+        raw_length = struct.unpack('<H', raw_length)[0]
+        if not raw_length:
+            return None
+        raw = journal.read(raw_length)
+        return raw.decode('utf-8')
+
+    def _replay_action(self, transaction_root: Path, name: str,
+                       source: typing.Optional[str]) -> typing.Tuple[str, bool, None]:
+        destination = self._root / name
+        removed = not source
+        if removed:
+            try:
+                destination.unlink()
+                _LOGGER.debug("Replayed remove of %s", destination)
+            except FileNotFoundError:
+                _LOGGER.debug("Ignored stale remove of %s", destination)
+            _remove_empty_directories(self._root, destination)
+        else:
+            source = transaction_root / source
+            if not source.exists():
+                _LOGGER.debug("Ignored stale rename of %s to %s", source, destination)
+            else:
+                _LOGGER.debug("Replaying move of %s to %s", source, destination)
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                destination.unlink(missing_ok=True)
+                source.rename(destination)
+        return name, removed, None
 
+    def _replay_transaction(self, transaction_root: Path) -> typing.List[typing.Tuple[str, bool, None]]:
+        changes: typing.List[typing.Tuple[str, bool, None]] = list()
         with (transaction_root / ".journal").open('rb') as journal:
             while True:
                 try:
-                    destination = read_string(journal)
+                    destination = self._read_journal_string(journal)
                 except EOFError:
                     break
-                destination = self._root / destination
-                source = read_string(journal)
-                if not source:
-                    try:
-                        destination.unlink()
-                        _LOGGER.debug("Replayed remove of %s", destination)
-                    except FileNotFoundError:
-                        _LOGGER.debug("Ignored stale remove of %s", destination)
-                    _remove_empty_directories(self._root, destination)
-                else:
-                    source = transaction_root / source
-                    if not source.exists():
-                        _LOGGER.debug("Ignored stale rename of %s to %s", source, destination)
-                    else:
-                        _LOGGER.debug("Replaying move of %s to %s", source, destination)
-                        destination.parent.mkdir(parents=True, exist_ok=True)
-                        destination.unlink(missing_ok=True)
-                        source.rename(destination)
+                source = self._read_journal_string(journal)
+                changes.append(self._replay_action(transaction_root, destination, source))
+        return changes
+
+    def _replay_group(self, journal_file: Path) -> typing.List[typing.Tuple[str, bool, None]]:
+        changes: typing.List[typing.Tuple[str, bool, None]] = list()
+        with journal_file.open('rb') as journal:
+            while True:
+                try:
+                    transaction_name = self._read_journal_string(journal)
+                except EOFError:
+                    break
+                transaction_root = self._root / transaction_name
+                action_count = struct.unpack('<I', journal.read(4))[0]
+                _LOGGER.debug("Replaying %d actions from %s", action_count, transaction_name)
+                for _ in range(action_count):
+                    destination = self._read_journal_string(journal)
+                    source = self._read_journal_string(journal)
+                    changes.append(self._replay_action(transaction_root, destination, source))
+        return changes
 
     def initialize(self) -> None:
         lock_archive = bool(CONFIGURATION.get('ARCHIVE.LOCK_STORAGE', True))
@@ -262,22 +312,38 @@ class Storage:
             self._version_file.close()
             self._version_file = None
 
-        # No guarantees about commit order, so don't worry about replay order
+        # No guarantees about commit order, so don't worry about replay order.  A group journal can reference the
+        # contents of other transactions, so all replays complete before any transaction is removed.
+        index_loaded = self._index.load()
+        replayed: typing.List[typing.Tuple[str, bool, None]] = list()
+        remove_transactions: typing.List[Path] = list()
         for check in self._root.iterdir():
             if check.name.startswith(self._REDIRECTION_PREFIX):
                 _LOGGER.info("Removing stale redirection %s", check.name)
                 shutil.rmtree(check)
             elif check.name.startswith(self._TRANSACTION_PREFIX):
+                remove_transactions.append(check)
+                group_journal = check / self._GROUP_JOURNAL
                 journal = check / ".journal"
-                if not journal.exists():
-                    _LOGGER.info("Removing stale transaction %s", check.name)
-                else:
+                if group_journal.exists():
+                    _LOGGER.info("Replaying transaction group %s", check.name)
+                    replayed.extend(self._replay_group(group_journal))
+                elif journal.exists():
                     _LOGGER.info("Replaying transaction %s", check.name)
-                    self._replay_transaction(check)
-                shutil.rmtree(check)
+                    replayed.extend(self._replay_transaction(check))
+        for check in remove_transactions:
+            _LOGGER.info("Removing transaction %s", check.name)
+            shutil.rmtree(check)
+
+        if not index_loaded:
+            _LOGGER.info("No valid modification index present")
+            self._index.rebuild(self._root)
+        elif replayed:
+            self._index.record(self._generation, replayed)
 
     def shutdown(self) -> None:
         self._release_redirections(None)
+        self._index.close()
 
         if self._version_file:
             self._version_file.close()
@@ -301,7 +367,7 @@ class Storage:
 
         self._refcount[target].add(key)
 
-    def release_generation(self, generation: int, key: "typing.Hashable") -> None:
+    def unreference_generation(self, generation: int, key: "typing.Hashable") -> None:
         target = bisect_left(self._refcount_generation, generation)
         assert target < len(self._refcount_generation)
 
@@ -313,18 +379,34 @@ class Storage:
         for i in range(len(self._refcount)):
             if len(self._refcount[i]) == 0:
                 continue
-
             if i != 0:
-                gen = self._refcount_generation[i]
                 del self._refcount_generation[:i]
                 del self._refcount[:i]
-                self._release_redirections(gen)
-
             break
         else:
             self._refcount_generation.clear()
             self._refcount.clear()
-            self._release_redirections(None)
+
+    def detach_redirections(self) -> typing.List[_Redirection]:
+        # Removes the redirections that no remaining reference can see, without touching their files.  This
+        # changes what readers see, so it must exclude them, but the returned redirections can be released after.
+        if not self._refcount_generation:
+            retain_index = len(self._redirections)
+        else:
+            retain_index = bisect_left(self._redirection_generation, self._refcount_generation[0])
+        detached = self._redirections[:retain_index]
+        del self._redirection_generation[:retain_index]
+        del self._redirections[:retain_index]
+        return detached
+
+    @staticmethod
+    def release_redirections(redirections: typing.List[_Redirection]) -> None:
+        for r in redirections:
+            r.release()
+
+    def release_generation(self, generation: int, key: "typing.Hashable") -> None:
+        self.unreference_generation(generation, key)
+        self.release_redirections(self.detach_redirections())
 
     class ReadHandle:
         def __init__(self, storage: "Storage"):
@@ -332,10 +414,14 @@ class Storage:
             self.generation = storage._generation
             self._was_released = False
 
-        def release(self) -> None:
-            self.storage.release_generation(self.generation, self)
+        def unreference(self) -> None:
+            self.storage.unreference_generation(self.generation, self)
             self._was_released = True
 
+        def release(self) -> None:
+            self.unreference()
+            self.storage.release_redirections(self.storage.detach_redirections())
+
         def __enter__(self) -> "Storage.ReadHandle":
             return self
 
@@ -345,6 +431,9 @@ class Storage:
         def read_file(self, name: str) -> typing.Optional[typing.BinaryIO]:
             return self.storage.read_file(name, self.generation)
 
+        def file_digest(self, name: str) -> typing.Optional[typing.Tuple[int, bytes]]:
+            return self.storage.file_digest(name, self.generation)
+
         def __del__(self):
             if not self._was_released:
                 _LOGGER.error("Leaked handle for generation %d", self.generation)
@@ -367,16 +456,24 @@ class Storage:
             self._actions: typing.Dict[str, typing.Union[_ActionWriteFile, _ActionRemoveFile]] = dict()
 
         def commit(self, progress: typing.Optional[typing.Callable[[int, int], None]] = None) -> None:
-            super().release()
-            self.storage._commit(self.generation + 1, self._transaction_root, self._actions, progress)
+            self.storage.commit_group([(self, progress)])
 
-        def abort(self) -> None:
-            super().release()
+        def discard(self) -> None:
+            # Only the reference and pending changes, so readers of published storage are not affected.  Any
+            # redirections this was holding are released by the next release or commit.
+            self.unreference()
             for k in self._actions.keys():
                 self.storage._pending_changes.discard(k)
+
+        def remove_storage(self) -> None:
             _LOGGER.debug("Removing aborted transaction (%d) storage", self.generation)
             shutil.rmtree(self._transaction_root)
 
+        def abort(self) -> None:
+            self.discard()
+            self.storage.release_redirections(self.storage.detach_redirections())
+            self.remove_storage()
+
         def __enter__(self) -> "Storage.WriteHandle":
             return self
 
@@ -392,6 +489,16 @@ class Storage:
                 return changed.read()
             return super().read_file(name)
 
+        def file_digest(self, name: str) -> typing.Optional[typing.Tuple[int, bytes]]:
+            changed = self._actions.get(name)
+            if changed:
+                contents = changed.read()
+                if not contents:
+                    return None
+                with contents:
+                    return _file_digest(contents)
+            return super().file_digest(name)
+
         def write_file(self, name: str) -> typing.BinaryIO:
             name = self.storage.normalize_filename(name)
 
@@ -480,6 +587,34 @@ class Storage:
         except (FileNotFoundError, IsADirectoryError):
             return None
 
+    def file_digest(self, name: str, generation: int) -> typing.Optional[typing.Tuple[int, bytes]]:
+        try:
+            name = self.normalize_filename(name)
+        except ValueError:
+            return None
+
+        # Files replaced after the generation are rare, so just calculate them directly
+        consider_index = bisect_right(self._redirection_generation, generation)
+        for redirection in self._redirections[consider_index:]:
+            try:
+                r = redirection.read(name)
+            except (FileNotFoundError, IsADirectoryError):
+                return None
+            if r:
+                with r:
+                    return _file_digest(r)
+
+        digest = self._index.digest(name)
+        if digest:
+            return digest
+        try:
+            with (self._root / name).open('rb') as f:
+                digest = _file_digest(f)
+        except (FileNotFoundError, IsADirectoryError):
+            return None
+        self._index.record_digest(name, digest)
+        return digest
+
     def check_file_exists(self, name: str, generation: int) -> bool:
         try:
             name = self.normalize_filename(name)
@@ -494,33 +629,53 @@ class Storage:
         return (self._root / name).exists()
 
     @staticmethod
-    def _write_journal(journal_file: Path,
+    def _sync_journal(journal: typing.BinaryIO) -> None:
+        journal.flush()
+        try:
+            os.fdatasync(journal.fileno())
+        except AttributeError:
+            os.fsync(journal.fileno())
+
+    @staticmethod
+    def _journal_actions(journal: typing.BinaryIO,
+                         actions: typing.Dict[str, typing.Union[_ActionWriteFile, _ActionRemoveFile]]) -> None:
+        for name, act in actions.items():
+            raw = name.encode('utf-8')
+            journal.write(struct.pack('<H', len(raw)))
+            journal.write(raw)
+            act.journal(journal)
+
+    @classmethod
+    def _write_journal(cls, journal_file: Path,
                        actions: typing.Dict[str, typing.Union[_ActionWriteFile, _ActionRemoveFile]]) -> None:
         try:
             with journal_file.open('wb') as journal:
-                for name, act in actions.items():
-                    raw = name.encode('utf-8')
-                    journal.write(struct.pack('<H', len(raw)))
-                    journal.write(raw)
-                    act.journal(journal)
-                journal.flush()
-                try:
-                    os.fdatasync(journal.fileno())
-                except AttributeError:
-                    os.fsync(journal.fileno())
+                cls._journal_actions(journal, actions)
+                cls._sync_journal(journal)
         except:
             _LOGGER.error("Journal write failed", exc_info=True)
             os._exit(1)
 
-    def _commit(self, generation: int, transaction_root: Path,
-                actions: typing.Dict[str, typing.Union[_ActionWriteFile, _ActionRemoveFile]],
-                progress: typing.Optional[typing.Callable[[int, int], None]] = None) -> None:
-        _LOGGER.debug("Committing %d changes at generation %d", len(actions), generation)
-
-        # First, make the journal
-        journal_file = transaction_root / ".journal"
-        self._write_journal(journal_file, actions)
+    @classmethod
+    def _write_group_journal(cls, journal_file: Path, transactions: typing.List[typing.Tuple[
+        Path, typing.Dict[str, typing.Union[_ActionWriteFile, _ActionRemoveFile]]
+    ]]) -> None:
+        try:
+            with journal_file.open('wb') as journal:
+                for transaction_root, actions in transactions:
+                    raw = transaction_root.name.encode('utf-8')
+                    journal.write(struct.pack('<H', len(raw)))
+                    journal.write(raw)
+                    journal.write(struct.pack('<I', len(actions)))
+                    cls._journal_actions(journal, actions)
+                cls._sync_journal(journal)
+        except:
+            _LOGGER.error("Group journal write failed", exc_info=True)
+            os._exit(1)
 
+    def _apply(self, generation: int,
+               actions: typing.Dict[str, typing.Union[_ActionWriteFile, _ActionRemoveFile]],
+               progress: typing.Optional[typing.Callable[[int, int], None]] = None) -> None:
         # Insert a redirection, if needed
         if len(self._refcount_generation) > 0 and self._refcount_generation[0] <= generation:
             redirection_root = self._root / (self._REDIRECTION_PREFIX + str(generation))
@@ -551,17 +706,66 @@ class Storage:
             if progress is not None:
                 progress(completed_actions, len(actions))
 
+        self._index.record(generation, [
+            (name, isinstance(act, _ActionRemoveFile), act.digest) for name, act in actions.items()
+        ])
+
+    def journal_group(self, handles: typing.List["Storage.WriteHandle"]) -> Path:
+        # Digests are calculated here, since the contents are final and likely still cached
+        for handle in handles:
+            for act in handle._actions.values():
+                if not isinstance(act, _ActionWriteFile):
+                    continue
+                with act.read() as f:
+                    act.digest = _file_digest(f)
+
+        # One journal and sync for the whole group, placed in the first transaction so it is removed last.  This
+        # only touches the transaction directories, so it does not need to exclude readers.
+        journal_file = handles[0]._transaction_root / self._GROUP_JOURNAL
+        self._write_group_journal(journal_file, [(h._transaction_root, h._actions) for h in handles])
+        return journal_file
+
+    def publish_group(self, handles: typing.List[typing.Tuple[
+        "Storage.WriteHandle", typing.Optional[typing.Callable[[int, int], None]]
+    ]]) -> None:
+        for handle, _ in handles:
+            Storage.ReadHandle.release(handle)
+
+        for handle, progress in handles:
+            generation = handle.generation + 1
+            _LOGGER.debug("Applying %d changes at generation %d", len(handle._actions), generation)
+            self._apply(generation, handle._actions, progress)
+
+    def complete_group(self, handles: typing.List["Storage.WriteHandle"], journal_file: Path) -> None:
+        # The index changes are only recovered by replaying the journal, so they have to be durable before it goes
+        self._index.sync()
+
         # Changes applied, remove the journal
         journal_file.unlink()
 
-        # Remove storage directory
-        shutil.rmtree(transaction_root)
+        # Remove storage directories, with the journal one last so an interrupted removal is still replayed
+        # correctly
+        for handle in reversed(handles):
+            shutil.rmtree(handle._transaction_root)
 
-        _LOGGER.debug("Transaction commit completed at generation %d", generation)
+        _LOGGER.debug("Transaction group commit of %d completed", len(handles))
+
+    def commit_group(self, handles: typing.List[typing.Tuple[
+        "Storage.WriteHandle", typing.Optional[typing.Callable[[int, int], None]]
+    ]]) -> None:
+        if not handles:
+            return
+        _LOGGER.debug("Committing group of %d transactions", len(handles))
+        journal_file = self.journal_group([h for h, _ in handles])
+        self.publish_group(handles)
+        self.complete_group([h for h, _ in handles], journal_file)
 
     def list_files(self, path: str, modified_after: float = 0) -> typing.List[str]:
         _LOGGER.debug("Listing files at %s modified after time %.0f", path, modified_after)
-        path = self._root / self.normalize_filename(path, allow_toplevel=True)
+        path = self.normalize_filename(path, allow_toplevel=True)
+        if modified_after > 0:
+            return self._index.modified_after(path, modified_after)
+        path = self._root / path
 
         result: typing.List[str] = list()
 
@@ -0,0 +1,123 @@
+import typing
+import asyncio
+import time
+from bisect import bisect_left
+from collections import deque
+
+
+class WaitHistogram:
+    BOUNDS = (0.0001, 0.001, 0.01, 0.1, 1.0, 10.0)
+
+    def __init__(self):
+        self.counts: typing.List[int] = [0] * (len(self.BOUNDS) + 1)
+        self.total: float = 0.0
+        self.maximum: float = 0.0
+
+    def record(self, elapsed: float) -> None:
+        self.counts[bisect_left(self.BOUNDS, elapsed)] += 1
+        self.total += elapsed
+        self.maximum = max(self.maximum, elapsed)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def to_json(self) -> typing.Dict[str, typing.Any]:
+        return {
+            'bounds': list(self.BOUNDS),
+            'counts': list(self.counts),
+            'total': self.total,
+            'maximum': self.maximum,
+        }
+
+
+# Any number of shared holders proceed together, while exclusive holders run alone.  Waiters are granted in
+# arrival order, so neither mode starves the other.
+class StorageLock:
+    def __init__(self):
+        self._shared: int = 0
+        self._exclusive: bool = False
+        self._waiters: typing.Deque[typing.Tuple[bool, asyncio.Future]] = deque()
+        self.shared_wait = WaitHistogram()
+        self.exclusive_wait = WaitHistogram()
+
+    def locked(self) -> bool:
+        return self._exclusive or self._shared > 0
+
+    def exclusive_locked(self) -> bool:
+        return self._exclusive
+
+    def _can_grant(self, exclusive: bool) -> bool:
+        if self._exclusive:
+            return False
+        if exclusive:
+            return self._shared == 0
+        return True
+
+    def _grant(self, exclusive: bool) -> None:
+        if exclusive:
+            self._exclusive = True
+        else:
+            self._shared += 1
+
+    def _wake(self) -> None:
+        while self._waiters:
+            exclusive, waiter = self._waiters[0]
+            if waiter.done():
+                self._waiters.popleft()
+                continue
+            if not self._can_grant(exclusive):
+                break
+            self._waiters.popleft()
+            self._grant(exclusive)
+            waiter.set_result(None)
+
+    async def acquire(self, exclusive: bool = False) -> None:
+        begin_time = time.monotonic()
+        if not self._waiters and self._can_grant(exclusive):
+            self._grant(exclusive)
+        else:
+            waiter = asyncio.get_event_loop().create_future()
+            self._waiters.append((exclusive, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self.release(exclusive)
+                else:
+                    try:
+                        self._waiters.remove((exclusive, waiter))
+                    except ValueError:
+                        pass
+                    self._wake()
+                raise
+        if exclusive:
+            self.exclusive_wait.record(time.monotonic() - begin_time)
+        else:
+            self.shared_wait.record(time.monotonic() - begin_time)
+
+    def release(self, exclusive: bool = False) -> None:
+        if exclusive:
+            assert self._exclusive
+            self._exclusive = False
+        else:
+            assert self._shared > 0
+            self._shared -= 1
+        self._wake()
+
+    class _Context:
+        def __init__(self, lock: "StorageLock", exclusive: bool):
+            self.lock = lock
+            self.exclusive = exclusive
+
+        async def __aenter__(self) -> None:
+            await self.lock.acquire(self.exclusive)
+
+        async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+            self.lock.release(self.exclusive)
+
+    def shared(self) -> "StorageLock._Context":
+        return self._Context(self, False)
+
+    def exclusive(self) -> "StorageLock._Context":
+        return self._Context(self, True)
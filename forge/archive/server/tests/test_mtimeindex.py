@@ -0,0 +1,67 @@
+from forge.archive.server.mtimeindex import ModificationIndex
+
+
+def test_log_replay(tmp_path):
+    index = ModificationIndex(tmp_path / "index")
+    index.rebuild(tmp_path / "archive")
+    index.record(1, [("a/file1", False, None), ("a/file2", False, (1, b"1")), ("b/file1", False, None)])
+    index.record(2, [("a/file2", True, None)])
+    index.close()
+
+    # Partial trailing record from an interrupted append
+    with (tmp_path / "index" / "log").open('ab') as log:
+        log.write(b"\x00\x01\x02")
+
+    index = ModificationIndex(tmp_path / "index")
+    assert index.load()
+    assert len(index) == 2
+    assert sorted(index.modified_after("a", 1)) == ["a/file1"]
+    assert index.modified_after("b/file1", 1) == ["b/file1"]
+    index.record(3, [("a/file3", False, (2, b"22"))])
+    index.record_digest("a/file1", (3, b"333"))
+    index.close()
+
+    index = ModificationIndex(tmp_path / "index")
+    assert index.load()
+    assert sorted(index.modified_after("a", 1)) == ["a/file1", "a/file3"]
+    assert index.digest("a/file1") == (3, b"333")
+    assert index.digest("a/file2") is None
+    assert index.digest("a/file3") == (2, b"22")
+    assert index.digest("b/file1") is None
+
+
+def test_compact(tmp_path):
+    index = ModificationIndex(tmp_path / "index")
+    index.rebuild(tmp_path / "archive")
+    index.compact_threshold = 4
+    for i in range(10):
+        index.record(i, [("a/file", False, (i, b"digest")), (f"a/remove{i}", False, None)])
+        index.record(i, [(f"a/remove{i}", True, None)])
+    index.close()
+    assert (tmp_path / "index" / "log").stat().st_size < 100
+
+    index = ModificationIndex(tmp_path / "index")
+    assert index.load()
+    assert index.modified_after("a", 1) == ["a/file"]
+    assert index.digest("a/file") == (9, b"digest")
+
+
+def test_missing(tmp_path):
+    index = ModificationIndex(tmp_path / "index")
+    assert not index.load()
+
+
+def test_subtree(tmp_path):
+    index = ModificationIndex(tmp_path / "index")
+    index.rebuild(tmp_path / "archive")
+    index.record(1, [("data/bnd/raw/2023/file1", False, None), ("data/bnd-x/raw/2023/file1", False, None),
+                     ("data/bnd/raw/file2", False, None), ("data/thd/raw/2023/file1", False, None)])
+    index.record(2, [("data/bnd/raw/file2", True, None)])
+
+    assert index.modified_after("data/bnd", 1) == ["data/bnd/raw/2023/file1"]
+    assert index.modified_after("data/bnd/raw/2023/file1", 1) == ["data/bnd/raw/2023/file1"]
+    assert sorted(index.modified_after("data", 1)) == [
+        "data/bnd-x/raw/2023/file1", "data/bnd/raw/2023/file1", "data/thd/raw/2023/file1"
+    ]
+    assert index.modified_after("data/bnd", 1e12) == []
+    index.close()
@@ -1,6 +1,8 @@
 import pytest
 import typing
 import time
+import shutil
+import hashlib
 from forge.archive import CONFIGURATION
 from forge.archive.server.storage import Storage
 
@@ -169,6 +171,81 @@ def test_transaction_replay(tmp_path, storage):
             assert r.read_file("test/rem") is None
 
 
+def test_commit_group(tmp_path, storage):
+    with storage:
+        with storage.begin_write() as w:
+            with w.write_file("test/rem") as f:
+                f.write(b"FirstGen")
+
+        r = storage.begin_read()
+
+        w1 = storage.begin_write()
+        with w1.write_file("test/file1") as f:
+            f.write(b"Write1")
+        assert w1.remove_file("test/rem")
+        w2 = storage.begin_write()
+        with w2.write_file("test/file2") as f:
+            f.write(b"Write2")
+
+        progress = list()
+        storage.commit_group([
+            (w1, lambda c, t: progress.append((1, c, t))),
+            (w2, lambda c, t: progress.append((2, c, t))),
+        ])
+        assert progress == [(1, 1, 2), (1, 2, 2), (2, 1, 1)]
+
+        with r.read_file("test/rem") as f:
+            assert f.read() == b"FirstGen"
+        assert r.read_file("test/file1") is None
+        r.release()
+
+        with storage.begin_read() as r:
+            with r.read_file("test/file1") as f:
+                assert f.read() == b"Write1"
+            with r.read_file("test/file2") as f:
+                assert f.read() == b"Write2"
+            assert r.read_file("test/rem") is None
+
+        for check in (tmp_path / "storage").iterdir():
+            assert not check.name.startswith(".redirection_")
+            assert not check.name.startswith(".transaction_")
+
+
+def test_group_replay(tmp_path, storage):
+    storage.initialize()
+    with storage.begin_write() as w:
+        with w.write_file("test/rem") as f:
+            f.write(b"FirstGen")
+
+    w1 = storage.begin_write()
+    with w1.write_file("test/file1") as f:
+        f.write(b"Write1")
+    assert w1.remove_file("test/rem")
+    w2 = storage.begin_write()
+    with w2.write_file("test/file2") as f:
+        f.write(b"Write2")
+
+    journal_file = w2._transaction_root / storage._GROUP_JOURNAL
+    storage._write_group_journal(journal_file, [
+        (w2._transaction_root, w2._actions),
+        (w1._transaction_root, w1._actions),
+    ])
+
+    w1._was_released = True
+    w2._was_released = True
+    storage = Storage(tmp_path / "storage")
+    with storage:
+        for check in (tmp_path / "storage").iterdir():
+            assert not check.name.startswith(".transaction_")
+
+        with storage.begin_read() as r:
+            with r.read_file("test/file1") as f:
+                assert f.read() == b"Write1"
+            with r.read_file("test/file2") as f:
+                assert f.read() == b"Write2"
+            assert r.read_file("test/rem") is None
+
+
 def test_list_files(storage):
     with storage:
         begin_write = time.time()
@@ -199,3 +276,81 @@ def test_list_files(storage):
             "test/file",
         ]
         assert storage.list_files("test/file") == []
+
+
+def test_modification_index(tmp_path, storage):
+    with storage:
+        with storage.begin_write() as w:
+            with w.write_file("test/file1") as f:
+                f.write(b"A")
+            with w.write_file("test/file2") as f:
+                f.write(b"A")
+            with w.write_file("other/file") as f:
+                f.write(b"A")
+
+        time.sleep(0.01)
+        after_first = time.time()
+        with storage.begin_write() as w:
+            with w.write_file("test/file3") as f:
+                f.write(b"A")
+            with w.write_file("test/sub/file1") as f:
+                f.write(b"A")
+            assert w.remove_file("test/file2")
+
+        assert sorted(storage.list_files("test", modified_after=after_first)) == [
+            "test/file3",
+            "test/sub/file1",
+        ]
+        assert storage.list_files("other", modified_after=after_first) == []
+
+    storage = Storage(tmp_path / "storage")
+    with storage:
+        assert sorted(storage.list_files("test", modified_after=after_first)) == [
+            "test/file3",
+            "test/sub/file1",
+        ]
+        assert sorted(storage.list_files("test", modified_after=1)) == [
+            "test/file1",
+            "test/file3",
+            "test/sub/file1",
+        ]
+
+    # Missing index rebuilt from the files
+    shutil.rmtree(tmp_path / "storage" / ".index")
+    storage = Storage(tmp_path / "storage")
+    with storage:
+        assert sorted(storage.list_files("test", modified_after=1)) == [
+            "test/file1",
+            "test/file3",
+            "test/sub/file1",
+        ]
+
+
+def test_file_digest(tmp_path, storage):
+    (tmp_path / "storage" / "test").mkdir()
+    with (tmp_path / "storage" / "test" / "existing").open("wb") as f:
+        f.write(b"Existing")
+    storage.initialize()
+
+    def digest(contents: bytes):
+        return len(contents), hashlib.sha256(contents).digest()
+
+    assert storage.file_digest("test/existing", 1) == digest(b"Existing")
+
+    with storage.begin_write() as w:
+        with w.write_file("test/file") as f:
+            f.write(b"FirstGen")
+
+    r = storage.begin_read()
+    with storage.begin_write() as w:
+        with w.write_file("test/file") as f:
+            f.write(b"SecondGen")
+        assert w.file_digest("test/file") == digest(b"SecondGen")
+
+    assert r.file_digest("test/file") == digest(b"FirstGen")
+    r.release()
+    with storage.begin_read() as r:
+        assert r.file_digest("test/file") == digest(b"SecondGen")
+        assert r.file_digest("test/existing") == digest(b"Existing")
+        assert r.file_digest("test/missing") is None
+    storage.shutdown()
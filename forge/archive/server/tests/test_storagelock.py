@@ -0,0 +1,79 @@
+import pytest
+import asyncio
+from forge.archive.server.storagelock import StorageLock, WaitHistogram
+
+
+@pytest.mark.asyncio
+async def test_shared():
+    lock = StorageLock()
+    await lock.acquire()
+    await lock.acquire()
+    assert lock.locked()
+    assert not lock.exclusive_locked()
+    lock.release()
+    lock.release()
+    assert not lock.locked()
+    assert lock.shared_wait.count == 2
+
+
+@pytest.mark.asyncio
+async def test_exclusive():
+    lock = StorageLock()
+    order = list()
+
+    await lock.acquire()
+
+    async def exclusive():
+        async with lock.exclusive():
+            order.append("exclusive")
+            await asyncio.sleep(0.01)
+            order.append("exclusive done")
+
+    async def shared():
+        async with lock.shared():
+            order.append("shared")
+
+    exclusive_task = asyncio.ensure_future(exclusive())
+    await asyncio.sleep(0.01)
+    assert order == []
+    # Queued behind the pending exclusive access
+    shared_task = asyncio.ensure_future(shared())
+    await asyncio.sleep(0.01)
+    assert order == []
+
+    lock.release()
+    await asyncio.wait_for(asyncio.gather(exclusive_task, shared_task), timeout=5)
+    assert order == ["exclusive", "exclusive done", "shared"]
+    assert not lock.locked()
+    assert lock.exclusive_wait.count == 1
+    assert lock.exclusive_wait.maximum > 0
+
+
+@pytest.mark.asyncio
+async def test_cancel_waiting():
+    lock = StorageLock()
+    await lock.acquire()
+
+    exclusive_task = asyncio.ensure_future(lock.acquire(exclusive=True))
+    await asyncio.sleep(0.01)
+    shared_task = asyncio.ensure_future(lock.acquire())
+    await asyncio.sleep(0.01)
+    assert not shared_task.done()
+
+    exclusive_task.cancel()
+    await asyncio.wait_for(shared_task, timeout=5)
+    lock.release()
+    lock.release()
+    assert not lock.locked()
+
+
+def test_histogram():
+    h = WaitHistogram()
+    h.record(0.00001)
+    h.record(0.05)
+    h.record(100.0)
+    assert h.count == 3
+    assert h.counts[0] == 1
+    assert h.counts[3] == 1
+    assert h.counts[-1] == 1
+    assert h.maximum == 100.0
@@ -64,6 +64,13 @@ class _BaseTransaction(ABC):
         async with self.storage_handle as handle:
             return handle.read_file(name)
 
+    async def file_digests(self, names: typing.List[str]) -> typing.List[typing.Optional[typing.Tuple[int, bytes]]]:
+        async with self.storage_handle as handle:
+            def calculate():
+                return [handle.file_digest(name) for name in names]
+
+            return await asyncio.get_event_loop().run_in_executor(None, calculate)
+
     async def write_file(self, name: str) -> typing.BinaryIO:
         raise NotImplementedError
 
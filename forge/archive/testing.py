@@ -0,0 +1,18 @@
+import typing
+import asyncio
+import os
+
+
+async def _aio_pipe() -> typing.Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    read, write = os.pipe()
+    read = os.fdopen(read, mode='rb')
+    write = os.fdopen(write, mode='wb')
+
+    loop = asyncio.get_event_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), read)
+
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, write)
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+
+    return reader, writer
@@ -2,31 +2,20 @@ import pytest
 import pytest_asyncio
 import asyncio
 import typing
-import os
+import hashlib
+import struct
 from tempfile import NamedTemporaryFile
 from forge.archive import CONFIGURATION
 from forge.archive.server.control import Controller
+from forge.archive.server.storage import Storage
+from forge.archive.protocol import Handshake, ClientPacket, ServerPacket, read_string, write_string
 from forge.archive.client.connection import Connection, LockDenied
+from forge.archive.testing import _aio_pipe
 
 
 CONFIGURATION.set('ARCHIVE.LOCK_STORAGE', False)
 
 
-async def _aio_pipe() -> typing.Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
-    read, write = os.pipe()
-    read = os.fdopen(read, mode='rb')
-    write = os.fdopen(write, mode='wb')
-
-    loop = asyncio.get_event_loop()
-    reader = asyncio.StreamReader()
-    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), read)
-
-    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, write)
-    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
-
-    return reader, writer
-
-
 @pytest_asyncio.fixture
 async def control(tmp_path):
     dest = tmp_path / "storage"
@@ -156,6 +145,75 @@ async def test_storage(control, control_connection):
     await control_run
 
 
+@pytest.mark.asyncio
+async def test_file_digests(control, control_connection):
+    control_run, connection = control_connection
+    assert connection.protocol_version == Handshake.PROTOCOL_VERSION.value
+
+    def digest(contents: bytes) -> typing.Tuple[int, bytes]:
+        return len(contents), hashlib.sha256(contents).digest()
+
+    async with connection.transaction(True):
+        await connection.write_bytes("test/file1", b"TestBytes")
+        await connection.write_bytes("test/file2", b"TestFile")
+        assert await connection.file_digests(["test/file1"]) == [digest(b"TestBytes")]
+
+    async with connection.transaction(False):
+        assert await connection.file_digests(["test/file1", "test/missing", "test/file2"]) == [
+            digest(b"TestBytes"), None, digest(b"TestFile"),
+        ]
+
+    async with connection.transaction(True):
+        await connection.write_bytes("test/file1", b"Updated")
+        await connection.remove_file("test/file2")
+        assert await connection.file_digests(["test/file1", "test/file2"]) == [digest(b"Updated"), None]
+
+    async with connection.transaction(False):
+        assert await connection.file_digests(["test/file1", "test/file2"]) == [digest(b"Updated"), None]
+
+    await connection.shutdown()
+    await control_run
+
+
+@pytest.mark.asyncio
+async def test_pipelined_read(control, control_connection):
+    control_run, connection = control_connection
+    connection.pipeline_depth = 3
+
+    async with connection.transaction(True):
+        for i in range(8):
+            await connection.write_bytes(f"test/file{i}", f"Contents{i}".encode('ascii') * (i * 10000 + 1))
+
+    async def read(name: str) -> typing.Optional[bytes]:
+        result = bytearray()
+
+        async def writer(data: bytes) -> None:
+            result.extend(data)
+
+        try:
+            await connection.read_data(name, writer, pipelined=True)
+        except FileNotFoundError:
+            return None
+        return bytes(result)
+
+    async with connection.transaction(False):
+        names = [f"test/file{i}" for i in range(8)]
+        names.insert(3, "test/missing")
+        reads = [asyncio.ensure_future(read(name)) for name in names]
+        digests = asyncio.ensure_future(connection.file_digests(["test/file0"]))
+        reads.append(asyncio.ensure_future(read("test/file7")))
+        results = await asyncio.gather(*reads)
+        assert (await digests)[0][0] == len(b"Contents0")
+
+    expected = [f"Contents{i}".encode('ascii') * (i * 10000 + 1) for i in range(8)]
+    expected.insert(3, None)
+    expected.append(expected[-1])
+    assert results == expected
+
+    await connection.shutdown()
+    await control_run
+
+
 @pytest.mark.asyncio
 async def test_overlap(control):
     control1_run, connection1 = await _make_connection(control)
@@ -274,3 +332,181 @@ async def test_overlap(control):
 
     await connection2.shutdown()
     await control2_run
+
+
+@pytest.mark.asyncio
+async def test_status_sources(control):
+    control1_run, connection1 = await _make_connection(control)
+    control2_run, connection2 = await _make_connection(control)
+
+    async def check_status(expected: str) -> None:
+        async with connection2.transaction(False):
+            try:
+                await connection2.lock_read("test/key1", 100, 200)
+                assert False
+            except LockDenied as e:
+                assert e.status == expected
+
+    both_set = asyncio.Event()
+
+    async def set_status(name: str, status: str) -> None:
+        with connection1.transaction_status_source(name):
+            await connection1.set_transaction_status(status)
+            if name == "AAA":
+                await both_set.wait()
+            else:
+                both_set.set()
+                await check_status("AAA: First; BBB: Second")
+
+    async with connection1.transaction(True):
+        await connection1.lock_write("test/key1", 100, 200)
+        await asyncio.gather(
+            asyncio.ensure_future(set_status("AAA", "First")),
+            asyncio.ensure_future(set_status("BBB", "Second")),
+        )
+        await connection1.set_transaction_status("Done")
+        await check_status("Done")
+
+    await connection1.shutdown()
+    await connection2.shutdown()
+    await control1_run
+    await control2_run
+
+
+@pytest.mark.asyncio
+async def test_commit_exclusive_publish(control, control_connection):
+    control_run, connection = control_connection
+
+    exclusive_phases = list()
+    journal_group = control._storage.journal_group
+    publish_group = control._storage.publish_group
+    complete_group = control._storage.complete_group
+
+    def record_journal(*args):
+        exclusive_phases.append(("journal", control._storage_lock.exclusive_locked()))
+        return journal_group(*args)
+
+    def record_publish(*args):
+        exclusive_phases.append(("publish", control._storage_lock.exclusive_locked()))
+        return publish_group(*args)
+
+    def record_complete(*args):
+        exclusive_phases.append(("complete", control._storage_lock.exclusive_locked()))
+        return complete_group(*args)
+
+    control._storage.journal_group = record_journal
+    control._storage.publish_group = record_publish
+    control._storage.complete_group = record_complete
+
+    async with connection.transaction(True):
+        await connection.lock_write("test/data", 100, 200)
+        await connection.write_bytes("test/file1", b"TestBytes")
+
+    assert exclusive_phases == [("journal", False), ("publish", True), ("complete", False)]
+
+    async with connection.transaction(False):
+        assert await connection.read_bytes("test/file1") == b"TestBytes"
+
+    await connection.shutdown()
+    await control_run
+
+
+@pytest.mark.asyncio
+async def test_release_abort_unlocked_cleanup(control, control_connection, monkeypatch):
+    control_run, connection = control_connection
+
+    exclusive_phases = list()
+    release_redirections = control._storage.release_redirections
+    discard = Storage.WriteHandle.discard
+    remove_storage = Storage.WriteHandle.remove_storage
+
+    def record_release(*args):
+        exclusive_phases.append(("release", control._storage_lock.exclusive_locked()))
+        return release_redirections(*args)
+
+    def record_discard(self):
+        exclusive_phases.append(("discard", control._storage_lock.exclusive_locked()))
+        return discard(self)
+
+    def record_remove(self):
+        exclusive_phases.append(("remove", control._storage_lock.exclusive_locked()))
+        return remove_storage(self)
+
+    control._storage.release_redirections = record_release
+    monkeypatch.setattr(Storage.WriteHandle, "discard", record_discard)
+    monkeypatch.setattr(Storage.WriteHandle, "remove_storage", record_remove)
+
+    async with connection.transaction(False):
+        with pytest.raises(FileNotFoundError):
+            await connection.read_bytes("test/file1")
+
+    assert exclusive_phases == [("release", False)]
+    exclusive_phases.clear()
+
+    with pytest.raises(RuntimeError):
+        async with connection.transaction(True):
+            await connection.lock_write("test/data", 100, 200)
+            await connection.write_bytes("test/file1", b"TestBytes")
+            raise RuntimeError
+
+    assert exclusive_phases == [("discard", False), ("remove", False)]
+
+    async with connection.transaction(False):
+        with pytest.raises(FileNotFoundError):
+            await connection.read_bytes("test/file1")
+
+    await connection.shutdown()
+    await control_run
+
+
+@pytest.mark.asyncio
+async def test_compatible_client(control):
+    client_reader, server_writer = await _aio_pipe()
+    server_reader, client_writer = await _aio_pipe()
+    control_run = asyncio.ensure_future(control.connection(server_reader, server_writer))
+
+    # A client from before file digests replies with its own lower version
+    client_writer.write(struct.pack('<I', Handshake.CLIENT_TO_SERVER.value))
+    check, version = struct.unpack('<II', await client_reader.readexactly(8))
+    assert check == Handshake.SERVER_TO_CLIENT.value
+    assert version == Handshake.PROTOCOL_VERSION.value
+    client_writer.write(struct.pack('<I', Handshake.COMPATIBLE_PROTOCOL_VERSION.value))
+    write_string(client_writer, "compatible client")
+    client_writer.write(struct.pack('<I', Handshake.CLIENT_READY.value))
+    assert struct.unpack('<I', await client_reader.readexactly(4))[0] == Handshake.SERVER_READY.value
+
+    client_writer.write(struct.pack('<B', ClientPacket.HEARTBEAT.value))
+    assert struct.unpack('<B', await client_reader.readexactly(1))[0] == ServerPacket.HEARTBEAT.value
+
+    client_writer.write(struct.pack('<B', ClientPacket.CLOSE.value))
+    await control_run
+
+
+@pytest.mark.asyncio
+async def test_compatible_server():
+    client_reader, server_writer = await _aio_pipe()
+    server_reader, client_writer = await _aio_pipe()
+
+    # A server from before file digests announces and requires its own version
+    async def server():
+        assert struct.unpack('<I', await server_reader.readexactly(4))[0] == Handshake.CLIENT_TO_SERVER.value
+        server_writer.write(struct.pack('<II', Handshake.SERVER_TO_CLIENT.value,
+                                        Handshake.COMPATIBLE_PROTOCOL_VERSION.value))
+        assert struct.unpack('<I', await server_reader.readexactly(4))[0] == \
+               Handshake.COMPATIBLE_PROTOCOL_VERSION.value
+        assert await read_string(server_reader) == "current client"
+        assert struct.unpack('<I', await server_reader.readexactly(4))[0] == Handshake.CLIENT_READY.value
+        server_writer.write(struct.pack('<I', Handshake.SERVER_READY.value))
+        assert struct.unpack('<B', await server_reader.readexactly(1))[0] == ClientPacket.CLOSE.value
+        server_writer.close()
+
+    server_run = asyncio.ensure_future(server())
+    connection = Connection(client_reader, client_writer, "current client")
+    await connection.startup()
+    assert connection.protocol_version == Handshake.COMPATIBLE_PROTOCOL_VERSION.value
+    assert not connection.file_digests_available
+    with pytest.raises(NotImplementedError):
+        await connection.file_digests(["test/file1"])
+
+    await connection.shutdown()
+    await server_run
@@ -0,0 +1,89 @@
+import pytest
+import asyncio
+import typing
+from math import nan
+from netCDF4 import Dataset
+from forge.formattime import format_iso8601_time
+from forge.archive import CONFIGURATION
+from forge.archive.server.control import Controller
+from forge.archive.client import data_file_name
+from forge.archive.client.connection import Connection
+from forge.archive.client.put import ArchivePut
+from forge.archive.testing import _aio_pipe
+from forge.data.structure.timeseries import time_coordinate
+
+
+CONFIGURATION.set('ARCHIVE.LOCK_STORAGE', False)
+
+
+def _make_file(path, start_ms: int, end_ms: int, times: typing.List[int], values: typing.List[float]) -> Dataset:
+    data = Dataset(str(path), 'w', format='NETCDF4')
+    data.instrument_id = "X1"
+    data.instrument = "test"
+    data.forge_tags = "tag1"
+    data.time_coverage_start = format_iso8601_time(start_ms / 1000.0)
+    data.time_coverage_end = format_iso8601_time(end_ms / 1000.0)
+    group = data.createGroup("data")
+    var = time_coordinate(group)
+    var[:] = times
+    var = group.createVariable("value", "f8", ("time",), fill_value=nan)
+    var[:] = values
+    return data
+
+
+@pytest.mark.asyncio
+async def test_merge_days(tmp_path):
+    dest = tmp_path / "storage"
+    dest.mkdir(exist_ok=True)
+    control = Controller(dest)
+    await control.initialize()
+
+    client_reader, server_writer = await _aio_pipe()
+    server_reader, client_writer = await _aio_pipe()
+    control_run = asyncio.ensure_future(control.connection(server_reader, server_writer))
+    connection = Connection(client_reader, client_writer, "test put")
+    await connection.startup()
+
+    day_ms = 24 * 60 * 60 * 1000
+    start_ms = 1696982400000
+
+    data = _make_file(tmp_path / "first.nc", start_ms, start_ms + 3 * day_ms,
+                      [start_ms + i * day_ms // 2 for i in range(6)], [float(i) for i in range(6)])
+    async with connection.transaction(True):
+        put = ArchivePut(connection)
+        await put.data(data, archive="raw", station="bnd")
+        await put.commit_index()
+    data.close()
+
+    data = _make_file(tmp_path / "second.nc", start_ms + day_ms, start_ms + 2 * day_ms,
+                      [start_ms + day_ms], [100.0])
+    async with connection.transaction(True):
+        put = ArchivePut(connection)
+        await put.data(data, archive="raw", station="bnd")
+        await put.commit_index()
+    data.close()
+
+    async with connection.transaction(False):
+        contents: typing.List[typing.Tuple[typing.List[int], typing.List[float]]] = list()
+        for day in range(3):
+            name = data_file_name("bnd", "raw", "X1", (start_ms + day * day_ms) / 1000.0)
+            check = Dataset(name, 'r', memory=await connection.read_bytes(name))
+            try:
+                assert check.instrument_id == "X1"
+                group = check.groups["data"]
+                contents.append((list(group.variables["time"][:]), list(group.variables["value"][:])))
+            finally:
+                check.close()
+
+    assert contents[0] == ([start_ms, start_ms + day_ms // 2], [0.0, 1.0])
+    assert contents[1] == ([start_ms + day_ms], [100.0])
+    assert contents[2] == ([start_ms + 2 * day_ms, start_ms + 2 * day_ms + day_ms // 2], [4.0, 5.0])
+
+    # Later processing (e.g. clean passing) modifies fetched files in place
+    async with connection.transaction(False):
+        with (tmp_path / "fetched.nc").open("wb") as f:
+            await connection.read_file(data_file_name("bnd", "raw", "X1", start_ms / 1000.0), f)
+    Dataset(str(tmp_path / "fetched.nc"), 'r+').close()
+
+    await connection.shutdown()
+    await control_run
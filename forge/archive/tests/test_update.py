@@ -0,0 +1,86 @@
+import pytest
+import typing
+from contextlib import contextmanager, asynccontextmanager
+from pathlib import Path
+from forge.archive.client.connection import LockDenied
+from forge.archive.update.manager import StationsController
+
+
+class _StubConnection:
+    def __init__(self):
+        self.in_transaction = False
+        self.committed: typing.List[str] = list()
+
+    @asynccontextmanager
+    async def transaction(self, write: bool = False):
+        self.in_transaction = True
+        try:
+            yield self
+        finally:
+            self.in_transaction = False
+
+    @contextmanager
+    def transaction_status_source(self, name: str):
+        yield
+
+    async def set_transaction_status(self, status: str) -> None:
+        pass
+
+
+class _Controller(StationsController):
+    class Manager(StationsController.Manager):
+        @property
+        def state_file(self) -> Path:
+            return self.controller.state_path / f"{self.station}.json"
+
+        @property
+        def listen_keys(self) -> typing.Iterable[str]:
+            return []
+
+        @property
+        def intent_keys(self) -> typing.Iterable[str]:
+            return []
+
+        async def perform_update(self, start: int, end: int) -> None:
+            assert self.update_connection.in_transaction
+            self.controller.performed.append((self.station, start, end))
+            if self.station in self.controller.busy:
+                raise LockDenied("busy")
+
+    def __init__(self, state_path: Path, busy: typing.Set[str]):
+        super().__init__(_StubConnection(), 2)
+        self.state_path = state_path
+        self.busy = busy
+        self.performed: typing.List[typing.Tuple[str, int, int]] = list()
+
+        async def open_connection() -> _StubConnection:
+            return _StubConnection()
+
+        self.open_connection = open_connection
+
+
+@pytest.mark.asyncio
+async def test_busy_unit_requeued(tmp_path):
+    controller = _Controller(tmp_path, {"bbb"})
+    units = list()
+    for station_idx, (station, start) in enumerate((("aaa", 1000), ("bbb", 5000))):
+        manager = controller.Manager(controller, station)
+        controller.stations[station] = manager
+        await manager.initialize()
+        await manager._install_pending(start, start + 1000)
+        await manager.flush()
+        units.append((station_idx, manager, await manager.next_update()))
+
+    assert await controller._perform_units(units) == [1]
+
+    assert sorted(controller.performed) == [("aaa", 1000, 2000), ("bbb", 5000, 6000)]
+    # Each unit has its own transaction, so only the busy one is rolled back and pending again
+    assert controller.stations["aaa"]._pending == []
+    assert not await controller.stations["aaa"].has_update()
+    manager = controller.stations["bbb"]
+    assert [(p.start, p.end) for p in manager._pending] == [(5000, 6000)]
+    assert await manager.has_update()
+    for manager in controller.stations.values():
+        assert manager._pending_in_progress is None
+        assert manager.update_connection is controller.connection
+    assert len(controller._unit_connections) == 1
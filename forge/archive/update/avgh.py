@@ -2,6 +2,7 @@ import typing
 import asyncio
 import logging
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from forge.archive import CONFIGURATION
 from forge.archive.client.connection import Connection
 from forge.archive.client import data_lock_key, data_notification_key, passed_notification_key
@@ -33,18 +34,33 @@ class DataController(StationsController):
             )) + (await super().get_modified(modified_after))
 
         async def perform_update(self, start: int, end: int) -> None:
-            await update_avgh_data(self.connection, self.station, start / 1000.0, end / 1000.0)
-            await self.connection.set_transaction_status("Writing hourly averaged data")
-
-    def __init__(self, connection: Connection, state_path: Path):
-        super().__init__(connection)
+            changed: typing.Optional[typing.List[typing.Tuple[float, float]]] = None
+            if self.changed_intervals:
+                changed = [(s / 1000.0, e / 1000.0) for s, e in self.changed_intervals]
+            await update_avgh_data(self.update_connection, self.station, start / 1000.0, end / 1000.0,
+                                   self.controller.executor, changed, self.controller.quantile_sketch)
+            await self.update_connection.set_transaction_status("Writing hourly averaged data")
+
+    def __init__(self, connection: Connection, state_path: Path, concurrent_updates: int = 1,
+                 workers: typing.Optional[int] = None, quantile_sketch: bool = False):
+        super().__init__(connection, concurrent_updates)
         self.state_path = state_path
+        self.quantile_sketch = quantile_sketch
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+
+    async def shutdown(self) -> None:
+        await super().shutdown()
+        self.executor.shutdown(wait=False)
+
+    def aborted(self) -> None:
+        super().aborted()
+        self.executor.shutdown(wait=False)
 
     @classmethod
     def create_updater(cls, connection: Connection, args):
         state_path = Path(args.state_path)
         state_path.mkdir(parents=True, exist_ok=True)
-        return cls(connection, state_path)
+        return cls(connection, state_path, args.concurrent_stations, args.workers, args.quantile_sketch)
 
     @classmethod
     def updater_control_socket(cls) -> typing.Optional[str]:
@@ -56,6 +72,18 @@ class DataController(StationsController):
                             dest='state_path',
                             default=CONFIGURATION.get("ARCHIVE.UPDATE.AVGH.STATE", "/var/lib/forge/state/archive/avgh"),
                             help="set the state file directory")
+        parser.add_argument('--workers',
+                            dest='workers', type=int,
+                            default=CONFIGURATION.get("ARCHIVE.UPDATE.AVGH.WORKERS"),
+                            help="set the number of averaging worker processes")
+        parser.add_argument('--concurrent-stations',
+                            dest='concurrent_stations', type=int,
+                            default=CONFIGURATION.get("ARCHIVE.UPDATE.AVGH.CONCURRENT_STATIONS", 4),
+                            help="set the number of stations updated in parallel")
+        parser.add_argument('--quantile-sketch',
+                            dest='quantile_sketch', action='store_true',
+                            default=CONFIGURATION.get("ARCHIVE.UPDATE.AVGH.QUANTILE_SKETCH", False),
+                            help="store mergeable quantile sketches with the hourly averages")
 
     UPDATER_DESCRIPTION = "Forge archive hourly averaged data update."
     UPDATER_CONNECTION_NAME = "update hourly data"
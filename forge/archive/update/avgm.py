@@ -3,6 +3,7 @@ import asyncio
 import logging
 import time
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from forge.logicaltime import start_of_year_ms, end_of_year_ms
 from forge.archive import CONFIGURATION
 from forge.archive.client.connection import Connection
@@ -60,18 +61,32 @@ class DataController(StationsController):
             return start, end
 
         async def perform_update(self, start: int, end: int) -> None:
-            await update_avgm_data(self.connection, self.station, start / 1000.0, end / 1000.0)
-            await self.connection.set_transaction_status("Writing monthly averaged data")
-
-    def __init__(self, connection: Connection, state_path: Path):
-        super().__init__(connection)
+            changed: typing.Optional[typing.List[typing.Tuple[float, float]]] = None
+            if self.changed_intervals:
+                changed = [(s / 1000.0, e / 1000.0) for s, e in self.changed_intervals]
+            await update_avgm_data(self.update_connection, self.station, start / 1000.0, end / 1000.0,
+                                   self.controller.executor, changed)
+            await self.update_connection.set_transaction_status("Writing monthly averaged data")
+
+    def __init__(self, connection: Connection, state_path: Path, concurrent_updates: int = 1,
+                 workers: typing.Optional[int] = None):
+        super().__init__(connection, concurrent_updates)
         self.state_path = state_path
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+
+    async def shutdown(self) -> None:
+        await super().shutdown()
+        self.executor.shutdown(wait=False)
+
+    def aborted(self) -> None:
+        super().aborted()
+        self.executor.shutdown(wait=False)
 
     @classmethod
     def create_updater(cls, connection: Connection, args):
         state_path = Path(args.state_path)
         state_path.mkdir(parents=True, exist_ok=True)
-        return cls(connection, state_path)
+        return cls(connection, state_path, args.concurrent_stations, args.workers)
 
     @classmethod
     def updater_control_socket(cls) -> typing.Optional[str]:
@@ -83,6 +98,14 @@ class DataController(StationsController):
                             dest='state_path',
                             default=CONFIGURATION.get("ARCHIVE.UPDATE.AVGM.STATE", "/var/lib/forge/state/archive/avgm"),
                             help="set the state file directory")
+        parser.add_argument('--workers',
+                            dest='workers', type=int,
+                            default=CONFIGURATION.get("ARCHIVE.UPDATE.AVGM.WORKERS"),
+                            help="set the number of averaging worker processes")
+        parser.add_argument('--concurrent-stations',
+                            dest='concurrent_stations', type=int,
+                            default=CONFIGURATION.get("ARCHIVE.UPDATE.AVGM.CONCURRENT_STATIONS", 4),
+                            help="set the number of stations updated in parallel")
 
     UPDATER_DESCRIPTION = "Forge archive monthly averaged data update."
     UPDATER_CONNECTION_NAME = "update monthly data"
@@ -0,0 +1,163 @@
+import typing
+import argparse
+import shutil
+import time
+import numpy as np
+from math import nan
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from netCDF4 import Dataset, Group
+from forge.data.structure import instrument_timeseries
+from forge.data.structure.timeseries import time_coordinate, averaged_time_variable, cutsize_variable
+from forge.processing.average.run import process_avgh, process_avgm
+
+
+def _synthetic_file(path: Path, start_epoch: int, count: int, interval: int, variables: int, seed: int) -> None:
+    generator = np.random.default_rng(seed)
+    root = Dataset(str(path), 'w', format='NETCDF4')
+    try:
+        instrument_timeseries(
+            root, "NIL", "X1",
+            start_epoch, start_epoch + count * interval,
+            interval, {"aerosol"}
+        )
+        data: Group = root.createGroup("data")
+
+        var = time_coordinate(data)
+        var[:] = np.arange(count, dtype=np.int64) * (interval * 1000) + start_epoch * 1000
+        var = averaged_time_variable(data)
+        var[:] = np.full(count, interval * 1000)
+
+        var = cutsize_variable(data)
+        var[:] = np.where((np.arange(count) * interval // 360) % 2 == 0, 1.0, 10.0)
+
+        data.createDimension('wavelength', 3)
+        var = data.createVariable('wavelength', 'f8', ('wavelength',), fill_value=nan)
+        var[:] = [450, 550, 700]
+
+        for index in range(variables):
+            values = generator.lognormal(1.0, 0.75, (count, 3))
+            values[generator.random(values.shape) < 0.01] = nan
+            var = data.createVariable(f'value{index}', 'f8', ('time', 'wavelength'), fill_value=nan)
+            var.ancillary_variables = 'cut_size'
+            var[:] = values
+
+        var = data.createVariable('speed', 'f8', ('time',), fill_value=nan)
+        var.cell_methods = "time: mean direction: vector_direction"
+        var[:] = generator.lognormal(1.0, 0.5, count)
+        var = data.createVariable('direction', 'f8', ('time',), fill_value=nan)
+        var.cell_methods = "time: mean speed: vector_magnitude"
+        var[:] = generator.uniform(0.0, 360.0, count)
+    finally:
+        root.close()
+
+
+def _edit_file(path: Path, start_index: int, end_index: int, seed: int) -> None:
+    generator = np.random.default_rng(seed)
+    root = Dataset(str(path), 'r+')
+    try:
+        data = root.groups['data']
+        for var in data.variables.values():
+            if not var.name.startswith('value'):
+                continue
+            var[start_index:end_index, :] = generator.lognormal(2.0, 0.75, (end_index - start_index, 3))
+    finally:
+        root.close()
+
+
+def _same_group(a: Group, b: Group) -> bool:
+    if set(a.variables.keys()) != set(b.variables.keys()) or set(a.groups.keys()) != set(b.groups.keys()):
+        return False
+    for name, var in a.variables.items():
+        values = np.ma.getdata(var[...])
+        if not np.array_equal(values, np.ma.getdata(b.variables[name][...]), equal_nan=values.dtype.kind == 'f'):
+            return False
+    for name, group in a.groups.items():
+        if not _same_group(group, b.groups[name]):
+            return False
+    return True
+
+
+def _run_update(run: typing.Callable[..., None], source: Path, working: Path, *args) -> float:
+    input_file = working / "input.nc"
+    shutil.copyfile(str(source), str(input_file))
+    begin_time = time.perf_counter()
+    run("nil", str(input_file), str(working / "output.nc"), *args)
+    return time.perf_counter() - begin_time
+
+
+def _benchmark(name: str, run: typing.Callable[..., None], output_directory: typing.Tuple,
+               source: Path, working: Path, edits: typing.List[typing.Tuple[int, int]],
+               interval: int, start_epoch: int, repeat: int) -> None:
+    full_output = working / "full.nc"
+    _run_update(run, source, working, *output_directory)
+    shutil.move(str(working / "output.nc"), str(full_output))
+
+    print(f"{name}")
+    print(f"{'Edit':>10} {'Full s':>9} {'Splice s':>9} {'Speedup':>8}  Output")
+    for count, offset in edits:
+        edited = working / "edited.nc"
+        shutil.copyfile(str(source), str(edited))
+        _edit_file(edited, offset, offset + count, count)
+        changed = (start_epoch * 1000 + offset * interval * 1000,
+                   start_epoch * 1000 + (offset + count) * interval * 1000)
+
+        full_elapsed = 0.0
+        for _ in range(repeat):
+            full_elapsed += _run_update(run, edited, working, *output_directory)
+        shutil.move(str(working / "output.nc"), str(working / "expected.nc"))
+
+        splice_elapsed = 0.0
+        for _ in range(repeat):
+            existing = working / "existing.nc"
+            shutil.copyfile(str(full_output), str(existing))
+            splice_elapsed += _run_update(run, edited, working, *output_directory, str(existing), changed)
+
+        expected = Dataset(str(working / "expected.nc"), 'r')
+        result = Dataset(str(working / "output.nc"), 'r')
+        try:
+            matches = _same_group(expected, result)
+        finally:
+            expected.close()
+            result.close()
+
+        full_elapsed /= repeat
+        splice_elapsed /= repeat
+        print(f"{count:>8} r {full_elapsed:9.3f} {splice_elapsed:9.3f} {full_elapsed / splice_elapsed:7.1f}x  "
+              f"{'matches' if matches else 'DIFFERS'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forge incremental averaging update benchmark.")
+
+    parser.add_argument('--variables',
+                        dest='variables', type=int, default=8,
+                        help="number of averaged variables with a wavelength dimension")
+    parser.add_argument('--repeat',
+                        dest='repeat', type=int, default=3,
+                        help="number of times to repeat each update")
+    parser.add_argument('--seed',
+                        dest='seed', type=int, default=1,
+                        help="synthetic data random seed")
+
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as working:
+        working = Path(working)
+
+        day_start = 1704067200
+        source = working / "clean.nc"
+        _synthetic_file(source, day_start, 24 * 60 * 60, 1, args.variables, args.seed)
+        _benchmark("Hourly averages of one day of one second data", process_avgh, ("", ),
+                   source, working, [(1, 30000), (300, 30000), (3600, 30000), (6 * 3600, 30000)],
+                   1, day_start, args.repeat)
+
+        source = working / "avgd.nc"
+        _synthetic_file(source, day_start, 366, 24 * 60 * 60, args.variables, args.seed)
+        _benchmark("Monthly averages of one year of daily data", process_avgm, (),
+                   source, working, [(1, 40), (7, 40), (60, 40)],
+                   24 * 60 * 60, day_start, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,7 @@ from netCDF4 import Dataset
 from math import floor
 from tempfile import NamedTemporaryFile
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from forge.const import MAX_I64
 from forge.archive import CONFIGURATION
 from forge.archive.client.connection import Connection, LockDenied, LockBackoff
@@ -93,18 +94,29 @@ class DataController(StationsController):
             return modified_ranges
 
         async def perform_update(self, start: int, end: int) -> None:
-            await update_clean_data(self.connection, self.station, start / 1000.0, end / 1000.0)
-            await self.connection.set_transaction_status("Writing clean data")
+            await update_clean_data(self.update_connection, self.station, start / 1000.0, end / 1000.0,
+                                    self.controller.executor, self.controller.workers)
+            await self.update_connection.set_transaction_status("Writing clean data")
 
-    def __init__(self, connection: Connection, state_path: Path):
+    def __init__(self, connection: Connection, state_path: Path, workers: typing.Optional[int] = None):
         super().__init__(connection)
         self.state_path = state_path
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+
+    async def shutdown(self) -> None:
+        await super().shutdown()
+        self.executor.shutdown(wait=False)
+
+    def aborted(self) -> None:
+        super().aborted()
+        self.executor.shutdown(wait=False)
 
     @classmethod
     def create_updater(cls, connection: Connection, args):
         state_path = Path(args.state_path)
         state_path.mkdir(parents=True, exist_ok=True)
-        return cls(connection, state_path)
+        return cls(connection, state_path, args.workers)
 
     @classmethod
     def updater_control_socket(cls) -> typing.Optional[str]:
@@ -116,6 +128,10 @@ class DataController(StationsController):
                             dest='state_path',
                             default=CONFIGURATION.get("ARCHIVE.UPDATE.CLEAN.STATE", "/var/lib/forge/state/archive/clean"),
                             help="set the state file directory")
+        parser.add_argument('--workers',
+                            dest='workers', type=int,
+                            default=CONFIGURATION.get("ARCHIVE.UPDATE.CLEAN.WORKERS"),
+                            help="set the number of passing worker processes")
 
     UPDATER_DESCRIPTION = "Forge archive clean data update."
     UPDATER_CONNECTION_NAME = "update clean data"
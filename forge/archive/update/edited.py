@@ -99,8 +99,8 @@ class DataController(StationsController):
             return modified_ranges
 
         async def perform_update(self, start: int, end: int) -> None:
-            await update_edited_data(self.connection, self.station, start / 1000.0, end / 1000.0)
-            await self.connection.set_transaction_status("Writing edited data")
+            await update_edited_data(self.update_connection, self.station, start / 1000.0, end / 1000.0)
+            await self.update_connection.set_transaction_status("Writing edited data")
 
     def __init__(self, connection: Connection, state_path: Path):
         super().__init__(connection)
@@ -6,13 +6,14 @@ import datetime
 import os
 import re
 from collections import OrderedDict
+from contextlib import AsyncExitStack
 from pathlib import Path
-from json import load as from_json, dump as to_json
 from math import floor, ceil
 from forge.range import FindIntersecting, Merge as RangeMerge
 from forge.const import STATIONS, MAX_I64
 from forge.logicaltime import year_bounds_ms
 from forge.tasks import wait_cancelable
+from forge.statestore import StateStore
 from forge.dashboard.report import report_ok, report_failed
 from ..client.connection import Connection, LockDenied, LockBackoff
 
@@ -23,10 +24,13 @@ class UpdateManager:
     STATE_VERSION = 1
 
     class _Pending:
-        def __init__(self, manager: "UpdateManager", start: int, end: int):
+        def __init__(self, manager: "UpdateManager", start: int, end: int,
+                     changed: typing.Optional[typing.List[typing.Tuple[int, int]]] = None):
             self.manager = manager
             self.start = start
             self.end = end
+            # The unrounded notified intervals, or None when anything in the range may have changed
+            self.changed = changed
             self.intents: typing.List[Connection.IntentHandle] = list()
 
         async def acquire(self) -> None:
@@ -62,10 +66,31 @@ class UpdateManager:
         self._stale_intents: typing.List[Connection.IntentHandle] = list()
         self._shutdown_in_progress: bool = False
 
+        self._state_store: typing.Optional[StateStore] = None
+        self._saved_pending: typing.Dict[UpdateManager._Pending, str] = dict()
+        self._stale_state_keys: typing.Set[str] = set()
+        self._next_pending_key: int = 0
+
     @property
     def state_file(self) -> Path:
         raise NotImplementedError
 
+    @property
+    def state_store(self) -> StateStore:
+        if self._state_store is None:
+            self._state_store = StateStore(self.state_file, self._legacy_state)
+        return self._state_store
+
+    @staticmethod
+    def _legacy_state(state: typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+        entries: typing.Dict[str, typing.Any] = {
+            'version': state.get('version'),
+            'modified': state.get('modified'),
+        }
+        for idx in range(len(state.get('pending', []))):
+            entries[f"pending.{idx}"] = state['pending'][idx]
+        return entries
+
     @property
     def listen_keys(self) -> typing.Iterable[str]:
         raise NotImplementedError
@@ -92,13 +117,7 @@ class UpdateManager:
             await self.connection.listen_intent(key, self._intent_hit)
 
     async def load_existing(self) -> None:
-        try:
-            with open(self.state_file, "r") as f:
-                if os.fstat(f.fileno()).st_size == 0:
-                    raise FileNotFoundError
-                state = from_json(f)
-        except FileNotFoundError:
-            state = None
+        state = self.state_store.load()
         state_modified: typing.Optional[float] = None
         if state:
             state_version = state.get('version')
@@ -106,9 +125,19 @@ class UpdateManager:
                 raise RuntimeError(f"Unsupported state version {state_version} vs {self.STATE_VERSION}")
             state_modified = state['modified']
 
+            # Loaded pending are re-merged into new ones, so the saved entries are replaced on the next save
+            state_pending: typing.List[typing.List[int]] = list()
+            for key, p in state.items():
+                if not key.startswith("pending."):
+                    continue
+                self._stale_state_keys.add(key)
+                self._next_pending_key = max(self._next_pending_key, int(key[8:]) + 1)
+                state_pending.append(p)
+            state_pending.sort()
+
             async with self._lock:
-                _LOGGER.debug("Found %d state pending", len(state['pending']))
-                for p in state['pending']:
+                _LOGGER.debug("Found %d state pending", len(state_pending))
+                for p in state_pending:
                     # This is both to ensure intents are acquired and to handle state re-merge due to
                     # error shutdown (active just appended)
                     await self._install_pending(p[0], p[1], save_state=False)
@@ -171,6 +200,7 @@ class UpdateManager:
             self._manager = manager
             self._active: typing.Optional["UpdateManager._Pending"] = active
             self._active_update_index = index
+            self._intents_released = False
             # Manager will be up to date as of the start of the update, at least
             self._update_sync_time: float = time.time()
 
@@ -191,14 +221,22 @@ class UpdateManager:
                     update_idx -= 1
                 self._manager._do_update[key] = update_idx
 
+        @property
+        def changed(self) -> typing.Optional[typing.List[typing.Tuple[int, int]]]:
+            if not self._active:
+                return None
+            return self._active.changed
+
         async def __aenter__(self) -> typing.Tuple[int, int]:
             self._manager._do_update.pop(self._active)
             self._remove_from_pending()
 
-            # We're in a transaction, so queue intents for release
-            assert self._manager.connection.in_transaction
-            for i in self._active.intents:
-                await i.release()
+            # When the update is in a transaction on the intent connection, queue the intents for release with it,
+            # otherwise they are released once the update completes
+            if self._manager.connection.in_transaction:
+                for i in self._active.intents:
+                    await i.release()
+                self._intents_released = True
 
             return self._active.start, self._active.end
 
@@ -212,7 +250,7 @@ class UpdateManager:
                 async with self._manager._lock:
                     # Re-acquire the failed range in the current pending
                     await self._manager._install_pending(
-                        active.start, active.end,
+                        active.start, active.end, changed=active.changed,
                         force_update=not self._manager._shutdown_in_progress,
                         # Save state even in shutdown, since the shutdown will have saved without the pending
                         # we're rolling back
@@ -227,6 +265,9 @@ class UpdateManager:
                 return
 
             # Active intents cleared by transaction exit, and pending itself no longer relevant (update completed)
+            if not self._intents_released:
+                for i in active.intents:
+                    await i.release(True)
             active.intents.clear()
 
             async with self._manager._lock:
@@ -263,24 +304,30 @@ class UpdateManager:
             # Don't need to re-merge since a load will merge anyway
             save_pending = save_pending + [self._pending_in_progress]
 
-        state_contents: typing.Dict[str, typing.Any] = {
+        changed: typing.Dict[str, typing.Any] = {
             'version': self.STATE_VERSION,
             'modified': int(floor(self._archive_sync_time)),
-            'pending': [[p.start, p.end] for p in save_pending],
         }
+        # Pending ranges never change once created, so only ones added or removed since the last save are written
+        current_pending: typing.Set[UpdateManager._Pending] = set(save_pending)
+        removed: typing.Set[str] = self._stale_state_keys
+        self._stale_state_keys = set()
+        for p in list(self._saved_pending.keys()):
+            if p in current_pending:
+                continue
+            removed.add(self._saved_pending.pop(p))
+        for p in save_pending:
+            if p in self._saved_pending:
+                continue
+            key = f"pending.{self._next_pending_key}"
+            self._next_pending_key += 1
+            self._saved_pending[p] = key
+            changed[key] = [p.start, p.end]
 
-        with open(self.state_file, "w") as f:
-            to_json(state_contents, f)
-
-            if sync:
-                try:
-                    f.flush()
-                    os.fdatasync(f.fileno())
-                except AttributeError:
-                    os.fsync(f.fileno())
+        self.state_store.update(changed, removed, sync=sync)
 
     def _merge_pending(
-            self, start: int, end: int
+            self, start: int, end: int, changed: typing.Optional[typing.List[typing.Tuple[int, int]]] = None,
     ) -> typing.Tuple[typing.Optional["UpdateManager._Pending"], typing.Optional[int], typing.List["UpdateManager._Pending"]]:
         class Merge(RangeMerge):
             def __init__(self, manager: "UpdateManager"):
@@ -309,20 +356,34 @@ class UpdateManager:
                 return self.manager._pending[index].end
 
             def insert(self, index: int, start: int, end: int) -> typing.Any:
-                new_pending = self.manager._Pending(self.manager, start, end)
+                merged_changed = list(changed) if changed is not None else None
+                for p in self.to_release:
+                    if merged_changed is None or p.changed is None:
+                        merged_changed = None
+                        break
+                    merged_changed.extend(p.changed)
+                new_pending = self.manager._Pending(self.manager, start, end, merged_changed)
                 self.manager._pending.insert(index, new_pending)
                 self.inserted_index = index
                 return new_pending
 
             def merge_contained(self, index: int) -> typing.Any:
+                # Not saved in the state, so the existing pending can be extended in place
+                contained = self.manager._pending[index]
+                if contained.changed is not None:
+                    if changed is None:
+                        contained.changed = None
+                    else:
+                        contained.changed.extend(changed)
                 return None
 
         merge = Merge(self)
         new_pending = merge(start, end)
         return new_pending, merge.inserted_index, merge.to_release
 
-    async def _install_pending(self, start: int, end: int, save_state: bool = True, force_update: bool = False) -> None:
-        new_pending, inserted_index, to_release = self._merge_pending(start, end)
+    async def _install_pending(self, start: int, end: int, save_state: bool = True, force_update: bool = False,
+                               changed: typing.Optional[typing.List[typing.Tuple[int, int]]] = None) -> None:
+        new_pending, inserted_index, to_release = self._merge_pending(start, end, changed)
         if not new_pending:
             _LOGGER.debug("Already have pending containing %d,%d", start, end)
             return
@@ -351,6 +412,7 @@ class UpdateManager:
                 return
 
             _LOGGER.debug(f"Received notification for %s,%d,%d", key, start, end)
+            changed = [(start, end)]
             start, end = self.round_notification(key, start, end)
 
             # A notification received means we're synced up with the backing modified time, since the notification
@@ -359,7 +421,7 @@ class UpdateManager:
 
             # Connection callbacks are not re-entrant and the connection can process normal requests
             # (intent acquisition), so this is safe.
-            await self._install_pending(start, end)
+            await self._install_pending(start, end, changed=changed)
 
     async def _intent_hit(self, key: str, start: int, end: int) -> None:
         async with self._lock:
@@ -383,6 +445,9 @@ class StationsController:
             super().__init__(controller.connection)
             self.controller = controller
             self.station = station
+            # The connection with the transaction the update is performed in
+            self.update_connection: Connection = controller.connection
+            self.changed_intervals: typing.Optional[typing.List[typing.Tuple[int, int]]] = None
 
         def notify_update_ready(self) -> None:
             self.controller._update_ready.set()
@@ -446,8 +511,12 @@ class StationsController:
                 end = start + 24 * 60 * 60 * 1000
             return start, end
 
-    def __init__(self, connection: Connection):
+    def __init__(self, connection: Connection, concurrent_updates: int = 1):
         self.connection = connection
+        self.concurrent_updates = max(concurrent_updates, 1)
+        # Concurrent updates each need their own connection for their transaction
+        self.open_connection: typing.Optional[typing.Callable[[], typing.Awaitable[Connection]]] = None
+        self._unit_connections: typing.List[Connection] = list()
         self._update_ready = asyncio.Event()
         self.stations: typing.Dict[str, "StationsController.Manager"] = OrderedDict()
         self._in_transaction: bool = False
@@ -474,48 +543,94 @@ class StationsController:
             return False
 
         station_order = [s for s in self.stations.values()]
+        concurrent_updates = self.concurrent_updates if self.open_connection else 1
         backoff = LockBackoff()
         while True:
-            station_busy: typing.Optional[int] = None
+            units: typing.List[typing.Tuple[int, StationsController.Manager, UpdateManager._NextUpdate]] = list()
+            for station_idx in range(len(station_order)):
+                station = station_order[station_idx]
+                update_context = await station.next_update()
+                if not update_context:
+                    continue
+                units.append((station_idx, station, update_context))
+                if len(units) >= concurrent_updates:
+                    break
+            if not units:
+                # No stations have any work to do, so back to sleeping
+                return False
+
             try:
                 self._in_transaction = True
-                async with self.connection.transaction(True):
-                    for station_idx in range(len(station_order)):
-                        station = station_order[station_idx]
-                        update_context = await station.next_update()
-                        if not update_context:
-                            continue
-                        try:
-                            async with update_context as (start, end):
-                                _LOGGER.debug(f"Starting update for {station.station.upper()} on {start},{end}")
-                                await station.perform_update(start, end)
-                        except LockDenied:
-                            station_busy = station_idx
-                            raise
-
-                        # Station success, so reset wait time and finish the transaction
-                        _LOGGER.debug("Update completed")
-                        backoff.clear()
-                        break
-                    else:
-                        # No stations have any work to do, so back to sleeping
-                        return False
-            except LockDenied as ld:
-                _LOGGER.debug("Archive busy: %s", ld.status)
-                self._in_transaction = False
-                for station in self.stations.values():
-                    await station.transaction_exit()
-                # If a station was busy, put it at the back so that we try others first
-                if station_busy is not None:
-                    station = station_order[station_busy]
-                    del station_order[station_busy]
-                    station_order.append(station)
-                await backoff()
+                busy_stations = await self._perform_units(units)
             finally:
                 self._in_transaction = False
                 for station in self.stations.values():
                     await station.transaction_exit()
 
+            # If a station was busy, put it at the back so that we try others first
+            for station in [station_order[station_idx] for station_idx in busy_stations]:
+                station_order.remove(station)
+                station_order.append(station)
+            if len(busy_stations) == len(units):
+                await backoff()
+                continue
+
+            # Station success, so reset wait time
+            _LOGGER.debug("Update completed")
+            backoff.clear()
+
+    async def _unit_connections_for(self, count: int) -> typing.List[Connection]:
+        while len(self._unit_connections) < count - 1:
+            self._unit_connections.append(await self.open_connection())
+        return [self.connection] + self._unit_connections[:count - 1]
+
+    async def _perform_units(self, units: typing.List[typing.Tuple[int, "StationsController.Manager", "UpdateManager._NextUpdate"]]) -> typing.List[int]:
+        # Each unit is a separate transaction on its own connection, so one that is denied a lock is rolled back and
+        # re-queued on its own, while the others still commit.  Returns the indices of the busy stations.
+        connections = await self._unit_connections_for(len(units))
+
+        async def run_unit(connection: Connection, station: "StationsController.Manager",
+                           update_context: "UpdateManager._NextUpdate") -> bool:
+            try:
+                async with connection.transaction(True):
+                    async with update_context as (start, end):
+                        _LOGGER.debug(f"Starting update for {station.station.upper()} on {start},{end}")
+                        station.update_connection = connection
+                        station.changed_intervals = update_context.changed
+                        try:
+                            if len(units) == 1:
+                                await station.perform_update(start, end)
+                            else:
+                                with connection.transaction_status_source(station.station.upper()):
+                                    await station.perform_update(start, end)
+                        finally:
+                            station.update_connection = self.connection
+                            station.changed_intervals = None
+            except LockDenied as ld:
+                _LOGGER.debug(f"Archive busy for {station.station.upper()}: %s", ld.status)
+                return False
+            return True
+
+        tasks = [
+            asyncio.ensure_future(run_unit(connections[unit_idx], units[unit_idx][1], units[unit_idx][2]))
+            for unit_idx in range(len(units))
+        ]
+        try:
+            completed = await asyncio.gather(*tasks)
+        except:
+            for t in tasks:
+                try:
+                    t.cancel()
+                except:
+                    pass
+            for t in tasks:
+                try:
+                    await t
+                except:
+                    pass
+            raise
+        return [units[unit_idx][0] for unit_idx in range(len(units)) if not completed[unit_idx]]
+
     async def run(self, before_idle: typing.Optional[typing.Callable[[], typing.Awaitable]] = None) -> None:
         while True:
             self._update_ready.clear()
@@ -542,6 +657,12 @@ class StationsController:
                 await station.shutdown()
             except:
                 _LOGGER.warning(f"Error during station {station.station.upper()} shutdown", exc_info=True)
+        for connection in self._unit_connections:
+            try:
+                await connection.shutdown()
+            except:
+                _LOGGER.warning("Error during update connection shutdown", exc_info=True)
+        self._unit_connections.clear()
 
     def aborted(self) -> None:
         self._shutdown_in_progress = True
@@ -550,6 +671,9 @@ class StationsController:
                 station.aborted()
             except:
                 _LOGGER.warning(f"Error during station {station.station.upper()} abort", exc_info=True)
+        for connection in self._unit_connections:
+            connection.abort()
+        self._unit_connections.clear()
 
     async def flush(self, start: int = -MAX_I64, end: int = MAX_I64, stations: typing.Set[str] = None) -> None:
         if self._shutdown_in_progress:
@@ -676,26 +800,31 @@ class StationsController:
                         except:
                             pass
 
-        async def initialize():
-            nonlocal connection
-            nonlocal controller
-            nonlocal control_server
-
+        async def open_connection() -> Connection:
             if args.tcp_server and args.tcp_port:
                 _LOGGER.debug(f"Connecting to archive TCP socket {args.tcp_server}:{args.tcp_port}")
                 reader, writer = await asyncio.open_connection(args.tcp_server, int(args.tcp_port))
-                connection = ArchiveConnection(reader, writer, cls.UPDATER_CONNECTION_NAME)
+                result = ArchiveConnection(reader, writer, cls.UPDATER_CONNECTION_NAME)
             elif args.unix_socket:
                 _LOGGER.debug(f"Connecting to archive Unix socket {args.unix_socket}")
                 reader, writer = await asyncio.open_unix_connection(args.unix_socket)
-                connection = ArchiveConnection(reader, writer, cls.UPDATER_CONNECTION_NAME)
+                result = ArchiveConnection(reader, writer, cls.UPDATER_CONNECTION_NAME)
             else:
-                connection = await ArchiveConnection.default_connection(cls.UPDATER_CONNECTION_NAME)
+                result = await ArchiveConnection.default_connection(cls.UPDATER_CONNECTION_NAME)
+
+            await result.startup()
+            return result
+
+        async def initialize():
+            nonlocal connection
+            nonlocal controller
+            nonlocal control_server
 
-            await connection.startup()
+            connection = await open_connection()
 
             _LOGGER.debug("Initializing station update controller")
             controller = cls.create_updater(connection, args)
+            controller.open_connection = open_connection
 
             if args.systemd:
                 import systemd.daemon
@@ -65,6 +65,12 @@ class ParseArguments:
                 parser.add_argument('--temp-dir',
                                     dest='temp_dir',
                                     help="temporary file root directory")
+                parser.add_argument('--workers',
+                                    dest='workers', type=int,
+                                    help="number of worker processes for per-file stages")
+                parser.add_argument('--stage-statistics',
+                                    dest='stage_statistics', action='store_true',
+                                    help="report stage timing and queue depth on completion")
                 group = parser.add_mutually_exclusive_group()
                 group.add_argument('--archive-host',
                                    dest='archive_tcp_server',
@@ -116,6 +122,11 @@ class ParseArguments:
                     if not temp_dir.is_dir():
                         parser.error("invalid temporary directory")
                     exec.temp_dir_root = temp_dir
+                if args.workers is not None:
+                    if args.workers < 1:
+                        parser.error("invalid number of workers")
+                    exec.workers = args.workers
+                exec.report_statistics = args.stage_statistics
 
             if not args.command:
                 parser.error("no command specified")
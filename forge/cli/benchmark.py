@@ -0,0 +1,138 @@
+import typing
+import asyncio
+import argparse
+import hashlib
+import time
+import numpy as np
+from math import nan
+from functools import partial
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from netCDF4 import Dataset
+from forge.data.structure import instrument_timeseries
+from forge.data.structure.timeseries import time_coordinate
+from forge.processing.average.calculate import FixedIntervalFileAverager
+from .execute import Execute, ExecuteStage
+from .commands.contamination import RemoveContaminationStage
+from .commands.average import AverageStage
+
+
+def _synthetic_day(destination: Path, day: int, instruments: int, interval: int) -> None:
+    day_start = 1609459200 + day * 86400
+    times = np.arange(day_start * 1000, (day_start + 86400) * 1000, interval * 1000, dtype=np.int64)
+    generator = np.random.default_rng(day)
+    for instrument in range(instruments):
+        instrument_id = f"X{instrument + 1}"
+        file = Dataset(str(destination / f"NIL-{instrument_id}_s{day_start}.nc"), 'w', format='NETCDF4')
+        try:
+            instrument_timeseries(file, "nil", instrument_id, day_start, day_start + 86400, interval, {"aerosol"})
+            data = file.createGroup("data")
+            time_coordinate(data)[:] = times
+
+            var = data.createVariable('system_flags', 'u8', ('time',), fill_value=False)
+            var.variable_id = "F1"
+            flags = np.zeros(times.shape, dtype=np.uint64)
+            flags[generator.random(times.shape) < 0.05] = 0x01
+            var[:] = flags
+
+            data.createDimension('wavelength', 3)
+            var = data.createVariable('wavelength', 'f8', ('wavelength',), fill_value=nan)
+            var[:] = [450, 550, 700]
+
+            var = data.createVariable('scattering_coefficient', 'f8', ('time', 'wavelength'), fill_value=nan)
+            var.variable_id = "Bs"
+            var[:] = generator.normal(20.0, 5.0, (times.shape[0], 3))
+
+            var = data.createVariable('sample_temperature', 'f8', ('time',), fill_value=nan)
+            var.variable_id = "T"
+            var[:] = generator.normal(25.0, 1.0, times.shape)
+        finally:
+            file.close()
+
+
+class _Digest(ExecuteStage):
+    def __init__(self, execute: Execute):
+        super().__init__(execute)
+        self.digest: typing.Optional[str] = None
+
+    async def __call__(self) -> None:
+        result = hashlib.sha256()
+
+        def add_group(group: Dataset) -> None:
+            for name in sorted(group.variables.keys()):
+                result.update(name.encode('utf-8'))
+                values = group.variables[name][...]
+                if isinstance(values, str):
+                    result.update(values.encode('utf-8'))
+                else:
+                    result.update(np.ma.getdata(values).tobytes())
+            for name in sorted(group.groups.keys()):
+                add_group(group.groups[name])
+
+        for file in sorted(self.data_files(), key=lambda f: f.name):
+            data = Dataset(str(file), 'r')
+            try:
+                result.update(file.name.encode('utf-8'))
+                add_group(data)
+            finally:
+                data.close()
+        self.digest = result.hexdigest()
+
+
+async def _run(files: typing.List[Path], workers: int) -> typing.Tuple[float, Execute, _Digest]:
+    execute = Execute()
+    execute.workers = workers
+    execute.attach_external_files(files)
+    execute.install(RemoveContaminationStage(execute))
+    execute.install(AverageStage(execute, partial(FixedIntervalFileAverager, 60 * 60 * 1000), "PT1H"))
+    digest = _Digest(execute)
+    execute.install(digest)
+
+    begin_time = time.monotonic()
+    await execute()
+    return time.monotonic() - begin_time, execute, digest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forge data command pipeline benchmark.")
+
+    parser.add_argument('--days',
+                        dest='days', type=int, default=30,
+                        help="number of days of synthetic data")
+    parser.add_argument('--instruments',
+                        dest='instruments', type=int, default=2,
+                        help="number of instruments per day")
+    parser.add_argument('--interval',
+                        dest='interval', type=int, default=60,
+                        help="record interval in seconds")
+    parser.add_argument('--workers',
+                        dest='workers', type=int, action='append',
+                        help="worker count to run, may be repeated")
+
+    args = parser.parse_args()
+    worker_counts = args.workers or [1, Execute().workers]
+
+    with TemporaryDirectory() as source:
+        source = Path(source)
+        for day in range(args.days):
+            _synthetic_day(source, day, args.instruments, args.interval)
+        files = sorted(source.iterdir())
+        print(f"Pipeline: contamination | average 1H over {len(files)} files")
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        reference_digest: typing.Optional[str] = None
+        for workers in worker_counts:
+            elapsed, execute, digest = loop.run_until_complete(_run(files, workers))
+            print(f"{workers:>3d} workers: {elapsed:8.3f} seconds")
+            for stage in execute.stages:
+                print(f"    {stage.statistics}")
+            if reference_digest is None:
+                reference_digest = digest.digest
+            elif reference_digest != digest.digest:
+                print("    OUTPUT MISMATCH")
+        loop.close()
+
+
+if __name__ == '__main__':
+    main()
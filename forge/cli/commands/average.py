@@ -4,6 +4,8 @@ import logging
 import argparse
 import time
 import numpy as np
+from functools import partial
+from pathlib import Path
 from netCDF4 import Dataset
 from forge.timeparse import parse_interval_argument
 from forge.formattime import format_iso8601_duration
@@ -77,11 +79,8 @@ class Command(ParseCommand):
             except ValueError:
                 parser.error(f"invalid averaging interval '{args.interval}'")
 
-            def make_averager(times_epoch_ms, averaged_time_ms, nominal_spacing_ms):
-                return FixedIntervalFileAverager(interval, times_epoch_ms, averaged_time_ms,
-                                                 nominal_spacing_ms)
-
-            averager = make_averager
+            # A partial instead of a closure so it can be sent to the worker processes
+            averager = partial(FixedIntervalFileAverager, interval)
             file_interval = format_iso8601_duration(interval)
 
             def require_merge():
@@ -137,14 +136,32 @@ class AverageStage(ExecuteStage):
     async def __call__(self) -> None:
         begin_time = time.monotonic()
         with self.data_replacement() as output_path:
-            for input_file in self.data_file_progress("Averaging data", write=True):
-                output_file = Dataset(str(output_path / input_file.name), 'w', format='NETCDF4')
-                input_file = Dataset(str(input_file), 'r')
-                try:
-                    average_file(input_file, output_file, self.make_averager)
-                    if self.file_interval:
-                        output_file.setncattr("time_coverage_resolution", self.file_interval)
-                finally:
-                    input_file.close()
-                    output_file.close()
+            await self.process_files("Averaging data", _average_file, [
+                (input_file, output_path / input_file.name, self.make_averager, self.file_interval)
+                for input_file in self.data_files(write=True)
+            ])
         _LOGGER.debug("Averaging completed in %.3f seconds", time.monotonic() - begin_time)
+
+    @property
+    def stream_title(self) -> typing.Optional[str]:
+        return "Averaging data"
+
+    def stream_file(self, input_file: Path, output_file: Path,
+                    owned: bool) -> typing.Tuple[typing.Callable[..., typing.Any], typing.Tuple]:
+        return _average_file, (input_file, output_file, self.make_averager, self.file_interval)
+
+
+def _average_file(
+        input_file: Path, output_file: Path,
+        make_averager: typing.Callable[[np.ndarray, typing.Optional[np.ndarray], typing.Optional[typing.Union[int, float]]], FileAverager],
+        file_interval: typing.Optional[str] = None,
+) -> None:
+    output_file = Dataset(str(output_file), 'w', format='NETCDF4')
+    input_file = Dataset(str(input_file), 'r')
+    try:
+        average_file(input_file, output_file, make_averager)
+        if file_interval:
+            output_file.setncattr("time_coverage_resolution", file_interval)
+    finally:
+        input_file.close()
+        output_file.close()
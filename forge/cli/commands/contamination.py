@@ -3,6 +3,8 @@ import asyncio
 import logging
 import argparse
 import time
+import shutil
+from pathlib import Path
 from netCDF4 import Dataset
 from forge.processing.average.contamination import invalidate_contamination
 from ..execute import Execute, ExecuteStage
@@ -56,10 +58,36 @@ class RemoveContaminationStage(ExecuteStage):
 
     async def __call__(self) -> None:
         begin_time = time.monotonic()
-        for file in self.data_file_progress("Invalidating contaminated data", write=True):
-            file = Dataset(str(file), 'r+')
-            try:
-                invalidate_contamination(file, self.override_station, self.override_tags)
-            finally:
-                file.close()
+        await self.process_files("Invalidating contaminated data", _invalidate_file, [
+            (file, self.override_station, self.override_tags)
+            for file in self.data_files(write=True)
+        ])
         _LOGGER.debug("Contamination filter completed in %.3f seconds", time.monotonic() - begin_time)
+
+    @property
+    def stream_title(self) -> typing.Optional[str]:
+        return "Invalidating contaminated data"
+
+    def stream_file(self, input_file: Path, output_file: Path,
+                    owned: bool) -> typing.Tuple[typing.Callable[..., typing.Any], typing.Tuple]:
+        return _invalidate_stream_file, (input_file, output_file, owned, self.override_station, self.override_tags)
+
+
+def _invalidate_file(file: Path, override_station: typing.Optional[str],
+                     override_tags: typing.Optional[typing.Set[str]]) -> None:
+    file = Dataset(str(file), 'r+')
+    try:
+        invalidate_contamination(file, override_station, override_tags)
+    finally:
+        file.close()
+
+
+def _invalidate_stream_file(input_file: Path, output_file: Path, owned: bool,
+                            override_station: typing.Optional[str],
+                            override_tags: typing.Optional[typing.Set[str]]) -> None:
+    # Input links are to external files, so those are never modified
+    if owned and not input_file.is_symlink():
+        shutil.move(str(input_file), str(output_file))
+    else:
+        shutil.copyfile(input_file, output_file)
+    _invalidate_file(output_file, override_station, override_tags)
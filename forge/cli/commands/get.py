@@ -14,6 +14,7 @@ from netCDF4 import Dataset, Variable, Group, EnumType, VLType
 from forge.const import STATIONS, MAX_I64
 from forge.timeparse import parse_time_bounds_arguments, parse_iso8601_time
 from forge.formattime import format_iso8601_time
+from forge.formatsize import format_bytes
 from forge.logicaltime import containing_year_range, start_of_year, end_of_year_ms, year_bounds_ms, containing_epoch_month_range, start_of_epoch_month_ms
 from forge.archive.client import index_lock_key, index_file_name, data_lock_key, data_file_name
 from forge.archive.client.connection import Connection, LockDenied, LockBackoff
@@ -153,6 +154,9 @@ Available archive are 'raw', 'edited', 'clean', 'avgh', 'avgd', 'avgm', or 'ALLA
         parser.add_argument('--incremental-lock',
                             dest='incremental_lock', action='store_true',
                             help="perform archive locking per year")
+        parser.add_argument('--prefetch',
+                            dest='prefetch', type=int, default=8,
+                            help="number of archive files to read concurrently")
 
         if can_filter:
             parser.add_argument('--keep-all',
@@ -1057,6 +1061,9 @@ class ArchiveRead(ExecuteStage):
             self.keep_all: bool = True
 
         self.incremental_lock = args.incremental_lock
+        self.prefetch: int = args.prefetch
+        if self.prefetch < 1:
+            parser.error("Invalid number of files to prefetch")
 
         self.stations: typing.Set[str] = set()
         for stn in _PLAIN_SPLIT.split(args.station.strip()):
@@ -1133,7 +1140,8 @@ class ArchiveRead(ExecuteStage):
         filter_tasks.append(asyncio.ensure_future(filter_task()))
 
     async def _fetch_file(self, connection: Connection, archive: str, archive_path: str,
-                          created_files: typing.List[Path], filter_tasks: typing.List[asyncio.Future]) -> bool:
+                          created_files: typing.List[Path], filter_tasks: typing.List[asyncio.Future],
+                          received: typing.Optional[typing.Callable[[int], None]] = None) -> bool:
         archive_parts = Path(archive_path)
         output_file = self.data_path / archive_parts.name
         if output_file.exists():
@@ -1145,7 +1153,12 @@ class ArchiveRead(ExecuteStage):
 
         try:
             with write_file as f:
-                await connection.read_file(archive_path, f)
+                async def writer(data: bytes) -> None:
+                    f.write(data)
+                    if received:
+                        received(len(data))
+
+                await connection.read_data(archive_path, writer, pipelined=True)
         except FileNotFoundError:
             try:
                 output_file.unlink()
@@ -1157,6 +1170,79 @@ class ArchiveRead(ExecuteStage):
         await self._filter_file(output_file, archive, archive_path, created_files, filter_tasks)
         return True
 
+    async def _prefetch_files(self, connection: Connection, archive: str, archive_files: typing.List[str],
+                              title: str, progress: Progress,
+                              fraction_start: float, fraction_end: float) -> typing.List[Path]:
+        # Reads are pipelined on the connection, so keeping several in flight hides the round trip per file,
+        # while the filtering of completed files proceeds in the background
+        created_files: typing.List[Path] = list()
+        filter_tasks: typing.List[asyncio.Future] = list()
+        fetch_tasks: typing.Set[asyncio.Future] = set()
+        completed_files: int = 0
+        transferred_bytes: int = 0
+        begin_time = time.monotonic()
+
+        def update_progress() -> None:
+            elapsed = time.monotonic() - begin_time
+            if elapsed > 0.0:
+                rate = format_bytes(transferred_bytes / elapsed) + "/s"
+            else:
+                rate = format_bytes(None) + "/s"
+            progress.set_title(f"{title} ({rate}, {len(fetch_tasks)} in flight)")
+            step_complete = completed_files / len(archive_files)
+            progress(fraction_start + step_complete * (fraction_end - fraction_start))
+
+        def received(size: int) -> None:
+            nonlocal transferred_bytes
+            transferred_bytes += size
+
+        def reap_filtered() -> None:
+            for v in [v for v in filter_tasks if v.done()]:
+                filter_tasks.remove(v)
+                v.result()
+
+        async def complete_next() -> None:
+            nonlocal completed_files
+
+            done, _ = await asyncio.wait(fetch_tasks, return_when=asyncio.FIRST_COMPLETED)
+            for v in done:
+                fetch_tasks.discard(v)
+                if v.result():
+                    self.statistics.files += 1
+            completed_files += len(done)
+            reap_filtered()
+            self.statistics.sample_queue(len(fetch_tasks))
+            update_progress()
+
+        progress.set_title(title)
+        if not archive_files:
+            return created_files
+        try:
+            for archive_path in archive_files:
+                while len(fetch_tasks) >= self.prefetch:
+                    await complete_next()
+                fetch_tasks.add(asyncio.ensure_future(self._fetch_file(
+                    connection, archive, archive_path,
+                    created_files, filter_tasks, received,
+                )))
+            while fetch_tasks:
+                await complete_next()
+            _LOGGER.debug(f"Waiting for filter completion on {len(filter_tasks)} files")
+            while filter_tasks:
+                await asyncio.wait(filter_tasks, return_when=asyncio.FIRST_COMPLETED)
+                reap_filtered()
+        except:
+            for f in fetch_tasks:
+                f.cancel()
+            for f in list(fetch_tasks) + filter_tasks:
+                try:
+                    await f
+                except:
+                    pass
+            raise
+
+        return created_files
+
     async def _read_year(self, station: str, archive: str, connection: Connection, current_year: int,
                          progress: Progress, fraction_start: float, fraction_end: float) -> typing.List[Path]:
         year_start = start_of_year(current_year)
@@ -1177,61 +1263,25 @@ class ArchiveRead(ExecuteStage):
         await connection.lock_read(data_lock_key(station, archive),
                                    self.start_ms, self.end_ms)
 
-        progress.set_title(f"Reading {station.upper()}/{archive.upper()}/{current_year} data")
-
-        filter_tasks: typing.List[asyncio.Future] = list()
-        completed_files: int = 0
-        total_files: int = 0
-
-        async def progress_filter(timeout: typing.Optional = 0):
-            nonlocal completed_files
-
-            if not filter_tasks:
-                return
-
-            done, pending = await asyncio.wait(filter_tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
-            for v in done:
-                v.result()
-            completed_files += len(done)
-            filter_tasks.clear()
-            filter_tasks.extend(pending)
-
-            step_complete = completed_files / total_files
-            progress(fraction_start + step_complete * (fraction_end - fraction_start))
-
-        created_files: typing.List[Path] = list()
+        # Only instruments present in the index for the year are requested at all
+        archive_files: typing.List[str] = list()
         if archive in ('avgd', 'avgm'):
-            total_files = len(read_instrument_ids)
-            for instrument_id in read_instrument_ids:
-                await progress_filter()
-                if not await self._fetch_file(
-                    connection, archive,
-                    data_file_name(station, archive, instrument_id, year_start),
-                    created_files, filter_tasks
-                ):
-                    completed_files += 1
+            for instrument_id in sorted(read_instrument_ids):
+                archive_files.append(data_file_name(station, archive, instrument_id, year_start))
         else:
             year_start_ms = int(floor(year_start * 1000))
             year_end_ms = end_of_year_ms(current_year)
             read_start_day = int(floor(max(year_start_ms, self.start_ms) / (24 * 60 * 60 * 1000)))
             read_end_day = int(ceil(min(year_end_ms, self.end_ms) / (24 * 60 * 60 * 1000)))
-            total_days = read_end_day - read_start_day
-            total_files = len(read_instrument_ids) * total_days
-            for instrument_id in read_instrument_ids:
+            for instrument_id in sorted(read_instrument_ids):
                 for day_number in range(read_start_day, read_end_day):
-                    await progress_filter()
-                    if not await self._fetch_file(
-                        connection, archive,
-                        data_file_name(station, archive, instrument_id, day_number * 24 * 60 * 60),
-                        created_files, filter_tasks,
-                    ):
-                        completed_files += 1
-
-        _LOGGER.debug(f"Waiting for read completion on {len(filter_tasks)} files")
-        while filter_tasks:
-            await progress_filter(None)
+                    archive_files.append(data_file_name(station, archive, instrument_id, day_number * 24 * 60 * 60))
 
-        return created_files
+        return await self._prefetch_files(
+            connection, archive, archive_files,
+            f"Reading {station.upper()}/{archive.upper()}/{current_year} data",
+            progress, fraction_start, fraction_end,
+        )
 
     async def _read_single_lock(self, connection: Connection, station: str, archive: str):
         start_year, end_year = containing_year_range(self.start_ms / 1000.0, self.end_ms / 1000.0)
@@ -1383,80 +1433,64 @@ class FilterStage(ExecuteStage):
             elif isinstance(stage, SelectStage):
                 return
 
-    def _apply_filter(self, input_path: Path, output_path: Path) -> None:
-        input_root = Dataset(str(input_path), 'r')
-        try:
-            if self.data_selection.accept_whole_file(
-                    input_root,
-                    self.start_ms, self.end_ms,
-                    accept_statistics=self._retain_statistics,
-            ):
-                input_root.close()
-                input_root = None
-                shutil.move(str(input_path), str(output_path))
-                _LOGGER.debug("Filter accepted whole file '%s'", str(output_path))
-            else:
-                output_root = Dataset(str(output_path), 'w', format='NETCDF4')
-                try:
-                    keep_file = self.data_selection.filter_file(
-                        input_root, output_root,
-                        self.start_ms, self.end_ms,
-                        accept_statistics=self._retain_statistics,
-                    )
-                finally:
-                    output_root.close()
-                if not keep_file:
-                    _LOGGER.debug("Filter rejected file '%s'", str(output_path))
-                    try:
-                        output_path.unlink()
-                    except (OSError, FileNotFoundError):
-                        pass
-                else:
-                    _LOGGER.debug("Filter accepted partial file '%s'", str(output_path))
-        finally:
-            if input_root is not None:
-                input_root.close()
-
     async def __call__(self) -> None:
         _LOGGER.debug("Starting archive data filter")
         begin_time = time.monotonic()
         with self.data_replacement() as output_base:
-            filter_tasks: typing.List[asyncio.Future] = list()
-            with self.progress("Filtering data") as progress:
-                input_files = list(self.data_files())
-                completed_files: int = 0
-
-                async def progress_filter(timeout: typing.Optional = 0):
-                    nonlocal completed_files
-
-                    if not filter_tasks:
-                        return
-
-                    done, pending = await asyncio.wait(filter_tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
-                    for v in done:
-                        v.result()
-                    completed_files += len(done)
-                    filter_tasks.clear()
-                    filter_tasks.extend(pending)
-
-                    progress(completed_files / len(input_files))
-
-                for input_path in input_files:
-                    output_path = output_base / input_path.name
-
-                    filter_tasks.append(asyncio.ensure_future(asyncio.get_event_loop().run_in_executor(
-                        self.netcdf_executor, self._apply_filter, input_path, output_path
-                    )))
-                    await progress_filter()
-
-                _LOGGER.debug(f"Waiting for filter completion on {len(filter_tasks)} files")
-                while filter_tasks:
-                    await progress_filter(None)
-
+            await self.process_files("Filtering data", _filter_file, [
+                (self.data_selection, self.start_ms, self.end_ms, self._retain_statistics,
+                 input_path, output_base / input_path.name)
+                for input_path in self.data_files()
+            ])
 
         end_time = time.monotonic()
         _LOGGER.debug("Archive data filter completed in %.3f seconds", end_time - begin_time)
 
+    @property
+    def stream_title(self) -> typing.Optional[str]:
+        return "Filtering data"
+
+    def stream_file(self, input_file: Path, output_file: Path,
+                    owned: bool) -> typing.Tuple[typing.Callable[..., typing.Any], typing.Tuple]:
+        return _filter_file, (self.data_selection, self.start_ms, self.end_ms, self._retain_statistics,
+                              input_file, output_file)
+
+
+def _filter_file(data_selection: DataSelection, start_ms: typing.Optional[int], end_ms: typing.Optional[int],
+                 retain_statistics: bool, input_path: Path, output_path: Path) -> None:
+    input_root = Dataset(str(input_path), 'r')
+    try:
+        if data_selection.accept_whole_file(
+                input_root,
+                start_ms, end_ms,
+                accept_statistics=retain_statistics,
+        ):
+            input_root.close()
+            input_root = None
+            shutil.move(str(input_path), str(output_path))
+            _LOGGER.debug("Filter accepted whole file '%s'", str(output_path))
+        else:
+            output_root = Dataset(str(output_path), 'w', format='NETCDF4')
+            try:
+                keep_file = data_selection.filter_file(
+                    input_root, output_root,
+                    start_ms, end_ms,
+                    accept_statistics=retain_statistics,
+                )
+            finally:
+                output_root.close()
+            if not keep_file:
+                _LOGGER.debug("Filter rejected file '%s'", str(output_path))
+                try:
+                    output_path.unlink()
+                except (OSError, FileNotFoundError):
+                    pass
+            else:
+                _LOGGER.debug("Filter accepted partial file '%s'", str(output_path))
+    finally:
+        if input_root is not None:
+            input_root.close()
+
 
 class WavelengthSelector:
     def __init__(self, data_selection: DataSelection):
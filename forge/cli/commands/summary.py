@@ -6,11 +6,13 @@ import sys
 import re
 import shutil
 import numpy as np
+from pathlib import Path
 from copy import deepcopy
-from math import isfinite, sqrt, nan, log10, floor
+from math import isfinite, nan, log10, floor
 from netCDF4 import Variable, Dataset, Dimension
 from forge.data.dimensions import find_dimension, find_dimension_values
 from forge.data.statistics import find_statistics_origin
+from forge.data.sketch import Moments, QuantileSketch
 from forge.data.structure.variable import get_display_units
 from . import ParseCommand, ParseArguments
 from .netcdf import MergeInstrument
@@ -45,6 +47,9 @@ class Command(ParseCommand):
         parser.add_argument('--separate-cut-size',
                             dest='separate_cut_size', action='store_true',
                             help="separate rows cut size")
+        parser.add_argument('--percentiles',
+                            dest='percentiles',
+                            help="comma separated percentiles to display, with 0 and 100 as the minimum and maximum")
 
     @classmethod
     def instantiate(cls, cmd: ParseArguments.SubCommand, execute: "Execute",
@@ -96,10 +101,9 @@ class _ValueRow:
     _EXTRACT_DECIMALS = re.compile(r"[-+]?\s*\d+\.(\d+)", flags=re.IGNORECASE)
     _EXTRACT_EXPONENT = re.compile(r"[-+]?\s*\d+\.(\d+)\s*e[-+]?\s*\d+", flags=re.IGNORECASE)
 
-    def __init__(self):
-        self._sum: float = 0.0
-        self._sum_sq: float = 0.0
-        self._count: int = 0
+    def __init__(self, quantiles: bool = False):
+        self._moments = Moments()
+        self._quantiles: typing.Optional[QuantileSketch] = QuantileSketch() if quantiles else None
         self._maximum_decimals: int = 0
         self._exponent_decimals: int = 0
         self._statistics_stddev: float = nan
@@ -139,12 +143,9 @@ class _ValueRow:
             self._units = units
 
     def integrate_values(self, values: np.ndarray) -> None:
-        values = values[np.isfinite(values)]
-        if values.size == 0:
-            return
-        self._sum += float(np.nansum(values))
-        self._sum_sq += float(np.nansum(values ** 2))
-        self._count += values.size
+        self._moments.update(values)
+        if self._quantiles is not None:
+            self._quantiles.update(values)
 
     def integrate_stddev(self, values: np.ndarray) -> None:
         values = values[np.isfinite(values)]
@@ -153,6 +154,22 @@ class _ValueRow:
         idx = [-1] * len(values.shape)
         self._statistics_stddev = values[tuple(idx)]
 
+    def merge(self, other: "_ValueRow") -> None:
+        # Other is from a later file, so it takes precedence for anything that is not accumulated
+        self._moments.merge(other._moments)
+        if self._quantiles is not None and other._quantiles is not None:
+            self._quantiles.merge(other._quantiles)
+        self._maximum_decimals = max(self._maximum_decimals, other._maximum_decimals)
+        self._exponent_decimals = max(self._exponent_decimals, other._exponent_decimals)
+        if isfinite(other._statistics_stddev):
+            self._statistics_stddev = other._statistics_stddev
+        if other._variable_name:
+            self._variable_name = other._variable_name
+        if other._long_name:
+            self._long_name = other._long_name
+        if other._units:
+            self._units = other._units
+
     def _format_value(self, value: typing.Optional[float]) -> str:
         if value is None or not isfinite(value):
             return ""
@@ -176,18 +193,26 @@ class _ValueRow:
 
     @property
     def mean(self) -> str:
-        if not self._count:
+        if not self._moments.count:
             return ""
-        return self._format_value(self._sum / self._count)
+        return self._format_value(self._moments.mean)
 
     @property
     def stddev(self) -> str:
-        if self._count <= 1:
+        if self._moments.count <= 1:
             return self._format_value(self._statistics_stddev)
-        stddev = self._count * self._sum_sq - self._sum ** 2
-        stddev /= self._count * (self._count - 1)
-        stddev = sqrt(stddev)
-        return self._format_value(stddev)
+        return self._format_value(self._moments.stddev)
+
+    def percentile(self, percentile: float) -> str:
+        if not self._moments.count:
+            return ""
+        if percentile <= 0.0:
+            return self._format_value(self._moments.minimum)
+        if percentile >= 100.0:
+            return self._format_value(self._moments.maximum)
+        if self._quantiles is None:
+            return ""
+        return self._format_value(self._quantiles.quantile(percentile / 100.0))
 
     @property
     def description(self) -> str:
@@ -340,16 +365,14 @@ class _RowContext:
         return r
 
 
-class _SummaryStage(ExecuteStage):
-    def __init__(self, execute: Execute, parser: argparse.ArgumentParser, args: argparse.Namespace):
-        super().__init__(execute)
-
-        self._use_statistics = args.use_statistics
-        self._show_instrument = args.separate_instruments
-        self._base_context = _RowContext()
-        self._base_context.attach_args(args)
-
-        self._wavelength_selector = WavelengthSelector.instantiate_if_available(execute)
+# Everything needed to summarize a single file, so it can be sent to a worker process
+class _FileSummary:
+    def __init__(self, base_context: _RowContext, use_statistics: bool,
+                 wavelength_selector: typing.Optional[WavelengthSelector], quantiles: bool):
+        self._base_context = base_context
+        self._use_statistics = use_statistics
+        self._wavelength_selector = wavelength_selector
+        self._quantiles = quantiles
 
     def _process_variable(self, root: Dataset, variable: Variable, context: _RowContext,
                           values: typing.Dict[_RowContext, _ValueRow],
@@ -357,7 +380,7 @@ class _SummaryStage(ExecuteStage):
         def integrate_values(context: _RowContext, data: np.ndarray) -> None:
             target = values.get(context)
             if not target:
-                target = _ValueRow()
+                target = _ValueRow(quantiles=self._quantiles)
                 values[context] = target
             if is_stddev:
                 target.integrate_stddev(data)
@@ -497,7 +520,8 @@ class _SummaryStage(ExecuteStage):
 
         fanout_wavelength(context, variable[:].data, list(variable.dimensions))
 
-    def _process_file(self, root: Dataset, values: typing.Dict[_RowContext, _ValueRow]):
+    def __call__(self, root: Dataset) -> typing.Dict[_RowContext, _ValueRow]:
+        values: typing.Dict[_RowContext, _ValueRow] = dict()
         context = deepcopy(self._base_context)
         context.attach_file(root)
 
@@ -566,6 +590,42 @@ class _SummaryStage(ExecuteStage):
                 integrate_group(sub)
 
         integrate_group(root)
+        return values
+
+
+def _summarize_file(summary: _FileSummary, input_file: Path) -> typing.Dict[_RowContext, _ValueRow]:
+    input_file = Dataset(str(input_file), 'r')
+    try:
+        return summary(input_file)
+    finally:
+        input_file.close()
+
+
+class _SummaryStage(ExecuteStage):
+    def __init__(self, execute: Execute, parser: argparse.ArgumentParser, args: argparse.Namespace):
+        super().__init__(execute)
+
+        self._show_instrument = args.separate_instruments
+        base_context = _RowContext()
+        base_context.attach_args(args)
+
+        self._percentiles: typing.List[float] = list()
+        if args.percentiles:
+            for arg in args.percentiles.split(','):
+                arg = arg.strip()
+                try:
+                    percentile = float(arg)
+                except ValueError:
+                    parser.error(f"Invalid percentile '{arg}'")
+                if not isfinite(percentile) or percentile < 0.0 or percentile > 100.0:
+                    parser.error(f"Invalid percentile '{arg}'")
+                self._percentiles.append(percentile)
+
+        self._summary = _FileSummary(
+            base_context, args.use_statistics,
+            WavelengthSelector.instantiate_if_available(execute),
+            any([0.0 < p < 100.0 for p in self._percentiles]),
+        )
 
     @staticmethod
     def _assign_wavelength_suffixes(rows: typing.List[_RowContext]) -> typing.Dict[_RowContext, str]:
@@ -634,12 +694,21 @@ class _SummaryStage(ExecuteStage):
         for _, ctx, _ in rows:
             output_wavelength = output_wavelength or ctx.wavelength is not None
 
+        def percentile_title(percentile: float) -> str:
+            if percentile <= 0.0:
+                return "MIN"
+            if percentile >= 100.0:
+                return "MAX"
+            return f"P{percentile:g}"
+
         columns = [
             ["NAME"],
             ["MEAN"],
             ["STDDEV"],
-            ["DESCRIPTION"],
         ]
+        for p in self._percentiles:
+            columns.append([percentile_title(p)])
+        columns.append(["DESCRIPTION"])
         wavelength_rows = ["WL"]
         instrument_rows = ["INSTRUMENT"]
         prior_key = None
@@ -656,13 +725,15 @@ class _SummaryStage(ExecuteStage):
                 wavelength_rows.append(ctx.display_wavelength)
             columns[1].append(value.mean)
             columns[2].append(value.stddev)
+            for pidx in range(len(self._percentiles)):
+                columns[3 + pidx].append(value.percentile(self._percentiles[pidx]))
 
             desc = value.description
             if force_changed or last_desc != desc:
-                columns[3].append(desc)
+                columns[-1].append(desc)
                 last_desc = desc
             else:
-                columns[3].append("")
+                columns[-1].append("")
 
             inst = ctx.display_instrument
             unique_instruments.add(inst)
@@ -705,16 +776,21 @@ class _SummaryStage(ExecuteStage):
     async def __call__(self) -> None:
         values: typing.Dict[_RowContext, _ValueRow] = dict()
 
-        for input_file in self.data_file_progress("Scanning data"):
-            input_file = Dataset(input_file, 'r')
-            try:
-                self._process_file(input_file, values)
-            finally:
-                input_file.close()
+        def merge(file_values: typing.Dict[_RowContext, _ValueRow]) -> None:
+            for context, add in file_values.items():
+                target = values.get(context)
+                if target is None:
+                    values[context] = add
+                else:
+                    target.merge(add)
+
+        await self.process_files("Scanning data", _summarize_file, [
+            (self._summary, input_file) for input_file in self.data_files()
+        ], merge=merge)
 
         if not sys.stdout.isatty():
             with self.progress("Writing summary"):
                 self._do_output(values)
         else:
             terminal_width = shutil.get_terminal_size(fallback=(0, 24)).columns
-            self._do_output(values, terminal_width or None)
\ No newline at end of file
+            self._do_output(values, terminal_width or None)
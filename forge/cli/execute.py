@@ -3,12 +3,15 @@ import asyncio
 import logging
 import sys
 import os
+import time
+from collections import deque
 from pathlib import Path
 from math import floor
 from shutil import copyfile
 from tempfile import TemporaryDirectory, mkstemp
 from abc import ABC, abstractmethod
-from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import get_context
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from forge.archive.client.connection import Connection
 
 _LOGGER = logging.getLogger(__name__)
@@ -99,10 +102,39 @@ class Progress:
         sys.stderr.flush()
 
 
+class StageStatistics:
+    def __init__(self, name: str):
+        self.name = name
+        self.elapsed: float = 0.0
+        self.files: int = 0
+        self.max_queue_depth: int = 0
+        self._queue_depth_total: int = 0
+        self._queue_depth_samples: int = 0
+
+    def sample_queue(self, depth: int) -> None:
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self._queue_depth_total += depth
+        self._queue_depth_samples += 1
+
+    @property
+    def mean_queue_depth(self) -> float:
+        if not self._queue_depth_samples:
+            return 0.0
+        return self._queue_depth_total / self._queue_depth_samples
+
+    def __str__(self) -> str:
+        result = f"{self.name}: {self.elapsed:.3f} seconds"
+        if self.files:
+            result += (f", {self.files} files, queue depth {self.mean_queue_depth:.1f} mean "
+                       f"{self.max_queue_depth} max")
+        return result
+
+
 class ExecuteStage(ABC):
     def __init__(self, execute: "Execute"):
         self.exec = execute
         self.idx = len(execute.stages)
+        self.statistics = StageStatistics(type(self).__name__)
 
     async def before(self) -> None:
         pass
@@ -114,6 +146,19 @@ class ExecuteStage(ABC):
     async def __call__(self) -> None:
         pass
 
+    @property
+    def stream_title(self) -> typing.Optional[str]:
+        # Stages that process each file independently set this and implement stream_file, so consecutive ones
+        # stream files through each other instead of each running over the whole data set in turn
+        return None
+
+    def stream_file(self, input_file: Path, output_file: Path,
+                    owned: bool) -> typing.Tuple[typing.Callable[..., typing.Any], typing.Tuple]:
+        # Returns the call run by a worker to produce the output file from the input one, with no output file
+        # meaning that the file was removed.  An owned input file may be moved or modified, since it is removed
+        # after the call completes.
+        raise NotImplementedError
+
     def progress(self, title: str) -> Progress:
         return self.exec.progress(title)
 
@@ -169,6 +214,61 @@ class ExecuteStage(ABC):
     def netcdf_executor(self) -> ThreadPoolExecutor:
         return self.exec.netcdf_executor
 
+    async def process_files(self, title: str, process: typing.Callable[..., typing.Any],
+                            file_args: typing.Iterable[typing.Tuple],
+                            merge: typing.Optional[typing.Callable[[typing.Any], None]] = None) -> typing.List[typing.Any]:
+        # Files are independent, so they are processed in parallel by the worker processes, but only a bounded number
+        # are in flight and results are collected in submission order, so the output is the same as a serial run.
+        # With a merge, each result is handed to it as it completes instead of being retained.
+        executor = self.exec.file_executor
+        limit = self.exec.queue_limit
+        loop = asyncio.get_event_loop()
+        file_args = list(file_args)
+        results: typing.List[typing.Any] = list()
+        in_flight: typing.Deque[asyncio.Future] = deque()
+        completed: int = 0
+
+        with self.progress(title) as progress:
+            def accept(result: typing.Any) -> None:
+                nonlocal completed
+                if merge is not None:
+                    merge(result)
+                else:
+                    results.append(result)
+                completed += 1
+                self.statistics.files += 1
+                progress(completed / len(file_args))
+
+            async def complete_next() -> None:
+                accept(await in_flight.popleft())
+
+            if executor is None:
+                # Run in the main thread, since some processing uses thread pools of its own
+                for args in file_args:
+                    accept(process(*args))
+                    await asyncio.sleep(0)
+                return results
+
+            try:
+                for args in file_args:
+                    while len(in_flight) >= limit:
+                        await complete_next()
+                    in_flight.append(loop.run_in_executor(executor, process, *args))
+                    self.statistics.sample_queue(len(in_flight))
+                while in_flight:
+                    await complete_next()
+            except:
+                for f in in_flight:
+                    f.cancel()
+                for f in in_flight:
+                    try:
+                        await f
+                    except:
+                        pass
+                raise
+
+        return results
+
 
 class Execute:
     def __init__(self):
@@ -186,6 +286,10 @@ class Execute:
         self._writable_data_path: typing.Optional[TemporaryDirectory] = None
 
         self._netcdf_executor: typing.Optional[ThreadPoolExecutor] = None
+        self._process_executor: typing.Optional[ProcessPoolExecutor] = None
+
+        self.workers: int = os.cpu_count() or 1
+        self.report_statistics: bool = False
 
     @property
     def netcdf_executor(self) -> ThreadPoolExecutor:
@@ -196,6 +300,22 @@ class Execute:
             self._netcdf_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="NetCDFWorker")
         return self._netcdf_executor
 
+    @property
+    def file_executor(self) -> typing.Optional[ProcessPoolExecutor]:
+        # Each worker process has its own NetCDF library instance, so they can run concurrently
+        if self.workers <= 1:
+            return None
+        if self._process_executor is None:
+            # Not forked directly, since the parent may already have started the threads used by the
+            # parallel numerical routines
+            self._process_executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                         mp_context=get_context("forkserver"))
+        return self._process_executor
+
+    @property
+    def queue_limit(self) -> int:
+        return max(self.workers * 2, 1)
+
     def set_archive_unix(self, socket: str) -> None:
         self._override_archive_unix = socket
 
@@ -224,13 +344,145 @@ class Execute:
             connection = await Connection.default_connection("data command")
         return connection
 
+    async def _stream_stages(self, stages: typing.List[ExecuteStage]) -> None:
+        # Each stage takes files from a bounded queue and passes its completed ones on in the order it received them,
+        # so files move through all the stages at once and the output is the same as running them in turn
+        input_files = sorted(self.data_files())
+        first_owned = self._writable_data_path is not None
+        executor = self.file_executor
+        limit = self.queue_limit
+        loop = asyncio.get_event_loop()
+        output_directories = [TemporaryDirectory(dir=self.temp_dir_root) for _ in stages]
+        queues: typing.List[asyncio.Queue] = [asyncio.Queue(maxsize=limit) for _ in stages]
+        total = len(input_files) * len(stages)
+        completed: int = 0
+        begin_time = time.monotonic()
+
+        try:
+            with self.progress(", ".join([s.stream_title for s in stages])) as progress:
+                def advance(count: int) -> None:
+                    nonlocal completed
+                    completed += count
+                    progress(completed / total)
+
+                async def feed() -> None:
+                    for file in input_files:
+                        await queues[0].put(file)
+                    await queues[0].put(None)
+
+                async def run_stage(stage_number: int) -> None:
+                    stage = stages[stage_number]
+                    output_path = Path(output_directories[stage_number].name)
+                    source = queues[stage_number]
+                    sink = queues[stage_number + 1] if stage_number + 1 < len(stages) else None
+                    owned = stage_number != 0 or first_owned
+                    in_flight: typing.Deque[typing.Tuple[Path, Path, asyncio.Future]] = deque()
+
+                    async def complete_next() -> None:
+                        input_file, output_file, result = in_flight.popleft()
+                        await result
+                        stage.statistics.files += 1
+                        if owned:
+                            try:
+                                input_file.unlink()
+                            except FileNotFoundError:
+                                pass
+                        if not os.path.lexists(str(output_file)):
+                            # Removed, so it also counts as complete for all the later stages
+                            advance(len(stages) - stage_number)
+                            return
+                        advance(1)
+                        if sink is not None:
+                            await sink.put(output_file)
+
+                    try:
+                        while True:
+                            input_file = await source.get()
+                            if input_file is None:
+                                break
+                            while len(in_flight) >= limit:
+                                await complete_next()
+                            output_file = output_path / input_file.name
+                            process, args = stage.stream_file(input_file, output_file, owned)
+                            if executor is None:
+                                result = loop.create_future()
+                                result.set_result(process(*args))
+                            else:
+                                result = loop.run_in_executor(executor, process, *args)
+                            in_flight.append((input_file, output_file, result))
+                            stage.statistics.sample_queue(source.qsize() + len(in_flight))
+                        while in_flight:
+                            await complete_next()
+                    except:
+                        for _, _, f in in_flight:
+                            f.cancel()
+                        for _, _, f in in_flight:
+                            try:
+                                await f
+                            except:
+                                pass
+                        raise
+                    stage.statistics.elapsed = time.monotonic() - begin_time
+                    _LOGGER.debug("Stage %s", stage.statistics)
+                    if sink is not None:
+                        await sink.put(None)
+
+                tasks = [asyncio.ensure_future(feed())]
+                for stage_number in range(len(stages)):
+                    tasks.append(asyncio.ensure_future(run_stage(stage_number)))
+                try:
+                    await asyncio.gather(*tasks)
+                except:
+                    for t in tasks:
+                        t.cancel()
+                    for t in tasks:
+                        try:
+                            await t
+                        except:
+                            pass
+                    raise
+        except:
+            for d in output_directories:
+                d.cleanup()
+            raise
+
+        for d in output_directories[:-1]:
+            d.cleanup()
+        if self._writable_data_path:
+            self._writable_data_path.cleanup()
+        self._writable_data_path = output_directories[-1]
+
     async def __call__(self) -> None:
-        for s in self.stages:
-            await s.before()
-        for s in self.stages:
-            await s()
-        for s in self.stages:
-            await s.after()
+        try:
+            for s in self.stages:
+                await s.before()
+            stage_index = 0
+            while stage_index < len(self.stages):
+                stream_end = stage_index
+                while stream_end < len(self.stages) and self.stages[stream_end].stream_title is not None:
+                    stream_end += 1
+                if stream_end - stage_index > 1:
+                    await self._stream_stages(self.stages[stage_index:stream_end])
+                    stage_index = stream_end
+                    continue
+
+                s = self.stages[stage_index]
+                begin_time = time.monotonic()
+                await s()
+                s.statistics.elapsed = time.monotonic() - begin_time
+                _LOGGER.debug("Stage %s", s.statistics)
+                stage_index += 1
+            for s in self.stages:
+                await s.after()
+        finally:
+            if self._process_executor:
+                # Stages cancel any of their files still queued when they fail, so nothing is left to run
+                self._process_executor.shutdown(wait=True)
+                self._process_executor = None
+
+        if self.report_statistics:
+            for s in self.stages:
+                sys.stderr.write(f"{s.statistics}\n")
 
         if self._read_only_combined_input:
             self._read_only_combined_input.cleanup()
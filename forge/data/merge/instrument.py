@@ -307,7 +307,7 @@ class _Variable:
             priority = 0
             if dim == 'wavelength':
                 priority = 1
-            elif dim == 'quantile':
+            elif dim == 'quantile' or dim == 'quantile_sketch':
                 priority = 2
             elif dim == 'cut_size':
                 priority = -1
@@ -0,0 +1,164 @@
+import typing
+import numpy as np
+from math import ceil, sqrt, nan
+
+
+def _finite_values(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64).ravel()
+    return values[np.isfinite(values)]
+
+
+# Count, mean and sum of squared differences from the mean (Welford), combined in blocks with the pairwise update
+# (Chan et al.), so both bulk updates and merges are numerically stable and independent of the order of blocks.
+class Moments:
+    def __init__(self):
+        self.count: int = 0
+        self.mean: float = nan
+        self.m2: float = 0.0
+        self.minimum: float = nan
+        self.maximum: float = nan
+
+    def _combine(self, count: int, mean: float, m2: float, minimum: float, maximum: float) -> None:
+        if count <= 0:
+            return
+        if self.count == 0:
+            self.count = count
+            self.mean = mean
+            self.m2 = m2
+            self.minimum = minimum
+            self.maximum = maximum
+            return
+
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.minimum = min(self.minimum, minimum)
+        self.maximum = max(self.maximum, maximum)
+
+    def update(self, values: np.ndarray) -> None:
+        values = _finite_values(values)
+        if values.shape[0] == 0:
+            return
+        mean = float(np.mean(values))
+        self._combine(values.shape[0], mean, float(np.sum(np.square(values - mean))),
+                      float(np.min(values)), float(np.max(values)))
+
+    def merge(self, other: "Moments") -> None:
+        self._combine(other.count, other.mean, other.m2, other.minimum, other.maximum)
+
+    @property
+    def variance(self) -> float:
+        if self.count <= 1:
+            return nan
+        return self.m2 / (self.count - 1)
+
+    @property
+    def stddev(self) -> float:
+        if self.count <= 1:
+            return nan
+        return sqrt(self.variance)
+
+
+# A KLL quantile sketch (Karnin, Lang and Liberty).  Values are held in levels of compactors, where each value at
+# level h stands for 2^h inputs.  A full level is sorted and every other value is promoted to the next one, with
+# lower levels given geometrically less capacity than the top.  This bounds the size to roughly 3k values and the
+# rank error to around 1.7/k, regardless of the number of inputs.  The promoted half alternates, so the result is
+# deterministic for the same sequence of updates and merges.
+class QuantileSketch:
+    _CAPACITY_RATIO = 2.0 / 3.0
+
+    def __init__(self, k: int = 200):
+        self.k = k
+        self.count: int = 0
+        self._levels: typing.List[np.ndarray] = [np.empty((0,), dtype=np.float64)]
+        self._promote_offset: int = 0
+
+    def __len__(self) -> int:
+        return sum([level.shape[0] for level in self._levels])
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(int(ceil(self.k * self._CAPACITY_RATIO ** depth)), 2)
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if items.shape[0] <= self._capacity(level):
+                level += 1
+                continue
+            if level + 1 == len(self._levels):
+                self._levels.append(np.empty((0,), dtype=np.float64))
+
+            items = np.sort(items)
+            if items.shape[0] % 2 != 0:
+                self._levels[level] = items[:1]
+                items = items[1:]
+            else:
+                self._levels[level] = np.empty((0,), dtype=np.float64)
+            self._levels[level + 1] = np.concatenate((self._levels[level + 1], items[self._promote_offset::2]))
+            self._promote_offset ^= 1
+            level += 1
+
+    def update(self, values: np.ndarray) -> None:
+        values = _finite_values(values)
+        if values.shape[0] == 0:
+            return
+        self.count += values.shape[0]
+        self._levels[0] = np.concatenate((self._levels[0], values))
+        self._compress()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.count == 0:
+            return
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty((0,), dtype=np.float64))
+        for level in range(len(other._levels)):
+            self._levels[level] = np.concatenate((self._levels[level], other._levels[level]))
+        self.count += other.count
+        self._compress()
+
+    def compact(self, limit: int) -> None:
+        # A smaller capacity keeps the sketch valid, only with a larger rank error
+        while len(self) > limit and self.k > 2:
+            self.k -= 1
+            self._compress()
+
+    def items(self) -> typing.Tuple[np.ndarray, np.ndarray]:
+        values = np.concatenate(self._levels)
+        levels = np.concatenate([np.full(self._levels[level].shape, level, dtype=np.uint8)
+                                 for level in range(len(self._levels))])
+        return values, levels
+
+    def merge_items(self, values: np.ndarray, levels: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64).ravel()
+        levels = np.asarray(levels).ravel()
+        valid = np.isfinite(values)
+        values = values[valid]
+        levels = levels[valid].astype(np.int64)
+        if values.shape[0] == 0:
+            return
+        while len(self._levels) <= int(np.max(levels)):
+            self._levels.append(np.empty((0,), dtype=np.float64))
+        for level in np.unique(levels):
+            self._levels[level] = np.concatenate((self._levels[level], values[levels == level]))
+        self.count += int(np.sum(np.left_shift(1, levels)))
+        self._compress()
+
+    def quantiles(self, fractions: typing.Sequence[float]) -> typing.List[float]:
+        if self.count == 0:
+            return [nan] * len(fractions)
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(self._levels[level].shape, 1 << level, dtype=np.int64)
+                                  for level in range(len(self._levels))])
+        order = np.argsort(items, kind='stable')
+        items = items[order]
+        cumulative = np.cumsum(weights[order])
+        targets = np.asarray(fractions, dtype=np.float64) * cumulative[-1]
+        indices = np.clip(np.searchsorted(cumulative, targets, side='left'), 0, items.shape[0] - 1)
+        return items[indices].tolist()
+
+    def quantile(self, fraction: float) -> float:
+        return self.quantiles([fraction])[0]
@@ -1,7 +1,8 @@
 import typing
 import numpy as np
+from numba import njit
 from math import isfinite, nan, exp, log, sqrt
-from forge.solver import newton_raphson
+from forge.solver import newton_raphson, secant_array
 from forge.units import ZERO_C_IN_K
 
 
@@ -100,12 +101,47 @@ def svp(t_kelvin: typing.Union[float, np.ndarray], over_water: bool = False) ->
         return svp_over_water(t_kelvin)
 
 
+@njit(cache=True, nogil=True, error_model='numpy')
+def _svp_over_ice_kernel(t_kelvin: float) -> float:
+    if not t_kelvin > 0.0:
+        return nan
+    return exp(-5.8666426e3 / t_kelvin +
+               2.232870244e1 +
+               (1.39387003e-2 + (-3.4262402e-5 + (2.7040955e-8 * t_kelvin)) * t_kelvin) * t_kelvin +
+               6.7063522e-1 * log(t_kelvin))
+
+
+@njit(cache=True, nogil=True, error_model='numpy')
+def _svp_over_water_kernel(t_kelvin: float) -> float:
+    if not t_kelvin > 0.0 or t_kelvin > 678.0:
+        return nan
+
+    th = t_kelvin - 0.23855557567849 / (t_kelvin - 0.65017534844798e3)
+    A = (th + 0.11670521452767e4) * th - 0.72421316703206e6
+    B = (-0.17073846940092e2 * th + 0.12020824702470e5) * th - 0.32325550322333e7
+    C = (0.14915108613530e2 * th - 0.48232657361591e4) * th + 0.40511340542057e6
+
+    p = 2.0 * C / (-B + sqrt(B * B - 4 * A * C))
+    p *= p
+    p *= p
+    return p * 1e6
+
+
+@njit(cache=True, nogil=True, error_model='numpy')
+def _svp_kernel(t_kelvin: float) -> float:
+    if t_kelvin < ZERO_C_IN_K:
+        return _svp_over_ice_kernel(t_kelvin)
+    return _svp_over_water_kernel(t_kelvin)
+
+
 def _svp_solve(svp_target: typing.Union[float, np.ndarray],
                t_initial: typing.Union[float, np.ndarray] = None,
                over_water: bool = False) -> typing.Union[float, np.ndarray]:
     x1 = None
     if t_initial is not None:
         x1 = t_initial + 1.0
+    if not isinstance(svp_target, (int, float)):
+        return secant_array(svp_target, _svp_over_water_kernel if over_water else _svp_kernel, x0=t_initial, x1=x1)
     try:
         return newton_raphson(svp_target, lambda t: svp(t, over_water=over_water), x0=t_initial, x1=x1)
     except (ValueError, OverflowError):
@@ -19,3 +19,7 @@ STANDARD_QUANTILES = [
     0.99865,
     1.0
 ]
+
+# KLL sketch accuracy and the fixed number of stored items, which holds even a month of one second data
+QUANTILE_SKETCH_K = 64
+QUANTILE_SKETCH_SIZE = 128
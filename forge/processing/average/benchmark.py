@@ -0,0 +1,90 @@
+import typing
+import argparse
+import time
+import numpy as np
+from forge.processing.average import STANDARD_QUANTILES, QUANTILE_SKETCH_K, QUANTILE_SKETCH_SIZE
+from forge.processing.average.statistics import bin_quantiles, bin_quantile_sketches, bin_merge_quantile_sketches
+
+
+def _synthetic_data(days: int, seed: int) -> np.ndarray:
+    generator = np.random.default_rng(seed)
+    seconds = np.arange(days * 86400, dtype=np.float64)
+    values = generator.lognormal(1.0, 0.75, seconds.shape) * \
+        (2.0 + np.sin(seconds * (2.0 * np.pi / 86400.0)))
+    values[generator.random(seconds.shape) < 0.01] = np.nan
+    return values
+
+
+def _rank_error(sorted_values: np.ndarray, quantiles: np.ndarray) -> float:
+    lower = np.searchsorted(sorted_values, quantiles, side='left') / sorted_values.shape[0]
+    upper = np.searchsorted(sorted_values, quantiles, side='right') / sorted_values.shape[0]
+    fractions = np.asarray(STANDARD_QUANTILES)
+    error = np.maximum(lower - fractions, fractions - upper)
+    return float(np.max(np.maximum(error, 0.0)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forge averaging quantile sketch benchmark.")
+
+    parser.add_argument('--days',
+                        dest='days', type=int, default=31,
+                        help="number of days of one second data")
+    parser.add_argument('--seed',
+                        dest='seed', type=int, default=1,
+                        help="synthetic data random seed")
+
+    args = parser.parse_args()
+
+    values = _synthetic_data(args.days, args.seed)
+    hour_start = np.arange(0, values.shape[0], 60 * 60)
+    day_start = np.arange(0, hour_start.shape[0], 24)
+    print(f"{values.shape[0]} one second values, {hour_start.shape[0]} hours")
+
+    # Compile before timing
+    bin_quantiles(hour_start[:2], values[:2 * 60 * 60], STANDARD_QUANTILES)
+
+    begin_time = time.perf_counter()
+    bin_quantiles(hour_start, values, STANDARD_QUANTILES)
+    hourly_quantiles_elapsed = time.perf_counter() - begin_time
+
+    begin_time = time.perf_counter()
+    sketch_values, sketch_levels = bin_quantile_sketches(hour_start, values, QUANTILE_SKETCH_K, QUANTILE_SKETCH_SIZE)
+    hourly_sketch_elapsed = time.perf_counter() - begin_time
+
+    hourly_minimum = np.fmin.reduceat(values, hour_start)
+    hourly_maximum = np.fmax.reduceat(values, hour_start)
+
+    begin_time = time.perf_counter()
+    exact_daily = bin_quantiles(day_start * 60 * 60, values, STANDARD_QUANTILES)
+    exact_monthly = bin_quantiles(np.array([0]), values, STANDARD_QUANTILES)
+    exact_elapsed = time.perf_counter() - begin_time
+
+    begin_time = time.perf_counter()
+    sketch_daily, daily_values, daily_levels = bin_merge_quantile_sketches(
+        day_start, sketch_values, sketch_levels, STANDARD_QUANTILES, QUANTILE_SKETCH_K,
+        minimum=hourly_minimum, maximum=hourly_maximum,
+    )
+    sketch_monthly, _, _ = bin_merge_quantile_sketches(
+        np.array([0]), daily_values, daily_levels, STANDARD_QUANTILES, QUANTILE_SKETCH_K,
+        minimum=np.fmin.reduceat(hourly_minimum, day_start), maximum=np.fmax.reduceat(hourly_maximum, day_start),
+    )
+    merge_elapsed = time.perf_counter() - begin_time
+
+    daily_error = 0.0
+    for day in range(day_start.shape[0]):
+        day_values = values[day * 86400:(day + 1) * 86400]
+        daily_error = max(daily_error, _rank_error(np.sort(day_values[np.isfinite(day_values)]), sketch_daily[day]))
+    monthly_error = _rank_error(np.sort(values[np.isfinite(values)]), sketch_monthly[0])
+
+    print(f"Hourly exact quantiles       {hourly_quantiles_elapsed:8.3f} seconds")
+    print(f"Hourly sketches              {hourly_sketch_elapsed:8.3f} seconds, "
+          f"{sketch_values.nbytes + sketch_levels.nbytes} bytes")
+    print(f"Daily and total from values  {exact_elapsed:8.3f} seconds")
+    print(f"Daily and total from merges  {merge_elapsed:8.3f} seconds, {exact_elapsed / merge_elapsed:.1f}x")
+    print(f"Maximum rank error           daily {daily_error:.4f}, total {monthly_error:.4f}")
+    print(f"Maximum value difference     daily {np.max(np.abs(sketch_daily - exact_daily)):.3e}, "
+          f"total {np.max(np.abs(sketch_monthly - exact_monthly)):.3e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 import typing
+import copy
 from abc import ABC, abstractmethod
 from math import nan, inf
 import numpy as np
@@ -292,6 +293,38 @@ class FileAverager(ABC):
         """
         raise NotImplementedError
 
+    @property
+    def bin_count(self) -> int:
+        """
+        The number of bins generated.
+        """
+        return self._bin_start.shape[0]
+
+    def window(self, begin: int, end: int) -> typing.Tuple["FileAverager", slice]:
+        """
+        Restrict the averager to a contiguous range of bins.  The coverage weights are retained from the
+        whole input, so the restricted bins are identical to the same bins calculated from all values.
+
+        :param begin: the index of the first bin
+        :param end: the index after the last bin
+        :returns: a tuple of the restricted averager and the selector for the input values it requires
+        """
+        assert 0 <= begin < end <= self._bin_start.shape[0]
+        input_begin = int(self._bin_start[begin])
+        if end < self._bin_start.shape[0]:
+            input_end = int(self._bin_start[end])
+        else:
+            input_end = self._original_times.shape[0]
+
+        result = copy.copy(self)
+        result._original_times = self._original_times[input_begin:input_end]
+        if self._original_averaged_time is not None:
+            result._original_averaged_time = self._original_averaged_time[input_begin:input_end]
+        result._weights = self._weights[input_begin:input_end]
+        result._bin_numbers = self._bin_numbers[begin:end]
+        result._bin_start = self._bin_start[begin:end] - input_begin
+        return result, slice(input_begin, input_end)
+
     def __call__(self, values: np.ndarray, mask: np.ndarray = None) -> np.ndarray:
         """
         Calculate the weighted average of an input.
@@ -459,6 +492,42 @@ class FileAverager(ABC):
         from forge.processing.average.statistics import bin_quantiles
         return bin_quantiles(self._bin_start, values, quantiles)
 
+    def quantile_sketches(self, values: np.ndarray, k: int, size: int) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate mergeable quantile sketches for the input.
+
+        :param values: the input values
+        :param k: the sketch accuracy parameter
+        :param size: the number of stored items in each sketch
+        :returns: a tuple of the binned sketch values and levels, with the sketch dimension added to the end
+        """
+        from forge.processing.average.statistics import bin_quantile_sketches
+        return bin_quantile_sketches(self._bin_start, values, k, size)
+
+    def merge_quantile_sketches(
+            self,
+            sketch_values: np.ndarray,
+            sketch_levels: np.ndarray,
+            quantiles: typing.Union[np.ndarray, float, typing.Iterable[float]],
+            k: int,
+            minimum: typing.Optional[np.ndarray] = None,
+            maximum: typing.Optional[np.ndarray] = None,
+    ) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Merge input quantile sketches and calculate quantiles from the result.
+
+        :param sketch_values: the input sketch values, with the sketch dimension at the end
+        :param sketch_levels: the input sketch levels
+        :param quantiles: the quantiles [0-1]
+        :param k: the sketch accuracy parameter
+        :param minimum: the optional exact minimum of each input, used for the zero quantile
+        :param maximum: the optional exact maximum of each input, used for the one quantile
+        :returns: a tuple of the binned quantiles and the merged sketch values and levels
+        """
+        from forge.processing.average.statistics import bin_merge_quantile_sketches
+        return bin_merge_quantile_sketches(self._bin_start, sketch_values, sketch_levels, quantiles, k,
+                                           minimum=minimum, maximum=maximum)
+
     @property
     def averaged_count(self) -> np.ndarray:
         """
@@ -9,7 +9,7 @@ from forge.data.attrs import cell_methods, copy as copy_attrs
 from forge.data.state import is_state_group
 from forge.data.values import create_and_copy_variable
 from .calculate import FileAverager
-from . import STANDARD_QUANTILES
+from . import STANDARD_QUANTILES, QUANTILE_SKETCH_K, QUANTILE_SKETCH_SIZE
 
 
 def _has_any_time(group: Group) -> bool:
@@ -170,6 +170,33 @@ class _AverageController(ABC):
         output_variable.coverage_content_type = "auxillaryInformation"
         return output_variable
 
+    @staticmethod
+    def declare_quantile_sketch(input_variable: Variable, output_root: Dataset,
+                                dimensions_start: typing.Tuple[str]) -> typing.Tuple[Variable, Variable]:
+        category = _AverageController.statistics_category(output_root, 'quantile_sketch')
+        if category.dimensions.get('quantile_sketch') is None:
+            category.createDimension('quantile_sketch', QUANTILE_SKETCH_SIZE)
+        output_values = _AverageController.declare_variable(
+            input_variable, category, dimensions_start,
+            dimensions_end=('quantile_sketch', ),
+            copy_attrs=('coordinates', 'units', 'C_format'),
+            fill_value=nan,
+        )
+        output_values.long_name = "mergeable quantile sketch values in the average period"
+        output_values.coverage_content_type = "auxillaryInformation"
+
+        category = _AverageController.statistics_category(output_root, 'quantile_sketch_level')
+        if category.dimensions.get('quantile_sketch') is None:
+            category.createDimension('quantile_sketch', QUANTILE_SKETCH_SIZE)
+        output_levels = _AverageController.declare_variable(
+            input_variable, category, dimensions_start,
+            dimensions_end=('quantile_sketch', ),
+            dtype="u1", copy_attrs=('coordinates', ), fill_value=False,
+        )
+        output_levels.long_name = "quantile sketch value levels, with each value representing 2^level data points"
+        output_levels.coverage_content_type = "auxillaryInformation"
+        return output_values, output_levels
+
     @abstractmethod
     def declare(self, output_root: Dataset, dimensions_start: typing.Tuple[str] = None):
         pass
@@ -180,7 +207,8 @@ class _AverageController(ABC):
         pass
 
     @staticmethod
-    def create(input_root: Dataset, input_variable: Variable) -> typing.Optional["_AverageController"]:
+    def create(input_root: Dataset, input_variable: Variable, quantile_sketch: bool = False,
+               input_selector: slice = slice(None)) -> typing.Optional["_AverageController"]:
         if len(input_variable.dimensions) == 0 or input_variable.dimensions[0] != 'time':
             return None
 
@@ -225,14 +253,78 @@ class _AverageController(ABC):
                 if input_direction is not None:
                     direction_methods = cell_methods(input_direction)
                     if direction_methods.get(input_variable.name) == 'vector_magnitude':
-                        return _AverageVector(input_variable, input_direction)
+                        return _AverageVector(input_root, input_variable, input_direction, quantile_sketch,
+                                              input_selector)
 
-        return _AverageSimple(input_variable)
+        return _AverageSimple(input_root, input_variable, quantile_sketch, input_selector)
+
+
+def _input_statistics(input_root: Dataset, category: str, name: str) -> typing.Optional[Variable]:
+    statistics_group = input_root.groups.get("statistics")
+    if statistics_group is None:
+        return None
+    input_category = statistics_group.groups.get(category)
+    if input_category is None:
+        return None
+    return input_category.variables.get(name)
+
+
+class _AverageQuantiles:
+    def __init__(self, input_root: Dataset, input_variable: Variable, quantile_sketch: bool,
+                 input_selector: slice = slice(None)):
+        self._input_variable = input_variable
+        self._input_selector = input_selector
+        self._input_quantiles = _input_statistics(input_root, 'quantiles', input_variable.name)
+        self._input_sketch = _input_statistics(input_root, 'quantile_sketch', input_variable.name)
+        self._input_sketch_level = _input_statistics(input_root, 'quantile_sketch_level', input_variable.name)
+        if self._input_sketch is None or self._input_sketch_level is None:
+            self._input_sketch = None
+            self._input_sketch_level = None
+        # Sketches are carried forward once present, so every later stage can merge them
+        self._quantile_sketch = quantile_sketch or self._input_sketch is not None
+
+    def declare(self, output_root: Dataset, dimensions_start: typing.Tuple[str]):
+        self._output_quantiles = _AverageController.declare_quantiles(
+            self._input_variable, output_root, dimensions_start)
+        if self._quantile_sketch:
+            self._output_sketch, self._output_sketch_level = _AverageController.declare_quantile_sketch(
+                self._input_variable, output_root, dimensions_start)
+
+    def _input_extreme(self, quantile: float, exclude: np.ndarray) -> typing.Optional[np.ndarray]:
+        if self._input_quantiles is None:
+            return None
+        result = self._input_quantiles[self._input_selector, ..., STANDARD_QUANTILES.index(quantile)].data
+        result[exclude] = nan
+        return result
+
+    def apply(self, averager: FileAverager, values: np.ndarray, output_selector: typing.Tuple) -> None:
+        if self._input_sketch is None:
+            self._output_quantiles[output_selector] = averager.quantiles(values, STANDARD_QUANTILES)
+            if self._quantile_sketch:
+                sketch_values, sketch_levels = averager.quantile_sketches(
+                    values, QUANTILE_SKETCH_K, QUANTILE_SKETCH_SIZE)
+                self._output_sketch[output_selector] = sketch_values
+                self._output_sketch_level[output_selector] = sketch_levels
+            return
+
+        # Inputs without a valid average (e.x. another cut size) have nothing to contribute
+        exclude = np.invert(np.isfinite(values))
+        sketch_values = self._input_sketch[self._input_selector].data
+        sketch_values[exclude] = nan
+        quantiles, sketch_values, sketch_levels = averager.merge_quantile_sketches(
+            sketch_values, self._input_sketch_level[self._input_selector].data, STANDARD_QUANTILES, QUANTILE_SKETCH_K,
+            minimum=self._input_extreme(0.0, exclude), maximum=self._input_extreme(1.0, exclude),
+        )
+        self._output_quantiles[output_selector] = quantiles
+        self._output_sketch[output_selector] = sketch_values
+        self._output_sketch_level[output_selector] = sketch_levels
 
 
 class _AverageSimple(_AverageController):
-    def __init__(self, input_variable: Variable):
+    def __init__(self, input_root: Dataset, input_variable: Variable, quantile_sketch: bool = False,
+                 input_selector: slice = slice(None)):
         self._input_variable = input_variable
+        self._quantiles = _AverageQuantiles(input_root, input_variable, quantile_sketch, input_selector)
 
     def declare(self, output_root: Dataset, dimensions_start: typing.Tuple[str] = None):
         if dimensions_start is None:
@@ -242,9 +334,9 @@ class _AverageSimple(_AverageController):
         self._output_unweighted_mean = self.declare_unweighted_mean(self._input_variable, output_root, dimensions_start)
         self._output_stddev = self.declare_stddev(self._input_variable, output_root, dimensions_start)
         if self._input_variable.name != 'quantile' and 'quantile' not in self._input_variable.dimensions:
-            self._output_quantiles = self.declare_quantiles(self._input_variable, output_root, dimensions_start)
+            self._quantiles.declare(output_root, dimensions_start)
         else:
-            self._output_quantiles = None
+            self._quantiles = None
 
     def apply(self, averager: FileAverager, values: np.ndarray,
               output_selector: typing.Tuple = None, mask: np.ndarray = None) -> None:
@@ -255,8 +347,8 @@ class _AverageSimple(_AverageController):
         unweighted_mean = averager.unweighted_mean(values, mask=mask)
         self._output_unweighted_mean[output_selector] = unweighted_mean
         self._output_stddev[output_selector] = averager.stddev(values, unweighted_mean, mask=mask)
-        if self._output_quantiles is not None:
-            self._output_quantiles[output_selector] = averager.quantiles(values, STANDARD_QUANTILES)
+        if self._quantiles is not None:
+            self._quantiles.apply(averager, values, output_selector)
 
 
 class _AverageFlags(_AverageController):
@@ -332,9 +424,13 @@ class _AverageSum(_AverageController):
 
 
 class _AverageVector(_AverageController):
-    def __init__(self, input_magnitude: Variable, input_direction: Variable):
+    def __init__(self, input_root: Dataset, input_magnitude: Variable, input_direction: Variable,
+                 quantile_sketch: bool = False, input_selector: slice = slice(None)):
         self._input_magnitude = input_magnitude
         self._input_direction = input_direction
+        self._input_selector = input_selector
+        self._magnitude_quantiles = _AverageQuantiles(input_root, input_magnitude, quantile_sketch, input_selector)
+
     @staticmethod
     def declare_stability_factor(input_variable: Variable, output_root: Dataset,
                                  dimensions_start: typing.Tuple[str]) -> Variable:
@@ -356,7 +452,7 @@ class _AverageVector(_AverageController):
         self._output_magnitude_valid_count = self.declare_valid_count(self._input_magnitude, output_root, dimensions_start)
         self._output_magnitude_unweighted_mean = self.declare_unweighted_mean(self._input_magnitude, output_root, dimensions_start)
         self._output_magnitude_stddev = self.declare_stddev(self._input_magnitude, output_root, dimensions_start)
-        self._output_magnitude_quantiles = self.declare_quantiles(self._input_magnitude, output_root, dimensions_start)
+        self._magnitude_quantiles.declare(output_root, dimensions_start)
         self._output_magnitude_stability = self.declare_stability_factor(self._input_magnitude, output_root, dimensions_start)
 
         self._output_direction = self.declare_output(self._input_direction, output_root, dimensions_start)
@@ -366,7 +462,7 @@ class _AverageVector(_AverageController):
         if output_selector is None:
             output_selector = (slice(None), )
 
-        direction = self._input_direction[:].data
+        direction = self._input_direction[self._input_selector].data
         direction[np.invert(np.isfinite(magnitude))] = nan
         if mask is not None:
             direction[mask] = nan
@@ -379,7 +475,7 @@ class _AverageVector(_AverageController):
         unweighted_mean = averager.unweighted_mean(magnitude, mask=mask)
         self._output_magnitude_unweighted_mean[output_selector] = unweighted_mean
         self._output_magnitude_stddev[output_selector] = averager.stddev(magnitude, unweighted_mean, mask=mask)
-        self._output_magnitude_quantiles[output_selector] = averager.quantiles(magnitude, STANDARD_QUANTILES)
+        self._magnitude_quantiles.apply(averager, magnitude, output_selector)
 
         mean_magnitude = averager(magnitude)
         mean_magnitude[mean_magnitude == 0.0] = nan
@@ -391,6 +487,8 @@ def _average_data(
         output_root: Dataset,
         make_averager: typing.Callable[[np.ndarray, typing.Optional[np.ndarray], typing.Optional[typing.Union[int, float]]], FileAverager],
         time_coverage_resolution: typing.Optional[typing.Union[int, float]] = None,
+        quantile_sketch: bool = False,
+        splice: typing.Optional["_Splice"] = None,
 ) -> None:
     if 'time' not in input_root.dimensions:
         return
@@ -403,6 +501,9 @@ def _average_data(
     if averaged_time_ms is not None:
         averaged_time_ms = averaged_time_ms[...].data
     averager = make_averager(times_epoch_ms, averaged_time_ms, time_coverage_resolution)
+    input_selector = slice(None)
+    if splice is not None:
+        averager, input_selector = splice.window(output_root, averager)
 
     output_time = time_coordinate(output_root)
     output_time[:] = averager.times
@@ -413,12 +514,13 @@ def _average_data(
         for name, input_variable in input_root.variables.items():
             if _exclude_averaged_variable(input_variable):
                 continue
-            controller = _AverageController.create(input_root, input_variable)
+            controller = _AverageController.create(input_root, input_variable, quantile_sketch, input_selector)
             if not controller:
                 continue
             controller.declare(output_root)
-            controller.apply(averager, input_variable[:].data)
+            controller.apply(averager, input_variable[input_selector].data)
     else:
+        # All sizes in the file are declared, even when splicing bins that only contain some of them
         cut_size = cut_size[...].data
         finite_sizes = np.isfinite(cut_size)
         possible_sizes = sorted(np.unique(cut_size[finite_sizes]))
@@ -434,18 +536,19 @@ def _average_data(
             if name == 'cut_size':
                 continue
             if 'cut_size' not in getattr(input_variable, 'ancillary_variables', "").split():
-                controller = _AverageController.create(input_root, input_variable)
+                controller = _AverageController.create(input_root, input_variable, quantile_sketch, input_selector)
                 if not controller:
                     continue
                 controller.declare(output_root)
-                controller.apply(averager, input_variable[:].data)
+                controller.apply(averager, input_variable[input_selector].data)
                 continue
-            controller = _AverageController.create(input_root, input_variable)
+            controller = _AverageController.create(input_root, input_variable, quantile_sketch, input_selector)
             if not controller:
                 continue
             controller.declare(output_root, ('cut_size', ))
             cut_variables.append((input_variable, controller))
 
+        cut_size = cut_size[input_selector]
         for select_size in possible_sizes:
             if isfinite(select_size):
                 remove_selector = np.invert(cut_size == select_size)
@@ -455,7 +558,7 @@ def _average_data(
                 output_idx = len(possible_sizes) - 1
 
             for input_variable, controller in cut_variables:
-                filtered_data = input_variable[:].data
+                filtered_data = input_variable[input_selector].data
                 if np.issubdtype(filtered_data.dtype, np.floating):
                     filtered_data[remove_selector] = nan
                     mask = None
@@ -481,6 +584,8 @@ def _average_group(
         output_root: Dataset,
         make_averager: typing.Callable[[np.ndarray, typing.Optional[np.ndarray], typing.Optional[typing.Union[int, float]]], FileAverager],
         time_coverage_resolution: typing.Optional[typing.Union[int, float]] = None,
+        quantile_sketch: bool = False,
+        splice: typing.Optional["_Splice"] = None,
 ) -> None:
     copy_attrs(input_root, output_root)
     for name, input_dimension in input_root.dimensions.items():
@@ -494,25 +599,173 @@ def _average_group(
             continue
         create_and_copy_variable(input_variable, output_root)
 
-    _average_data(input_root, output_root, make_averager, time_coverage_resolution)
+    _average_data(input_root, output_root, make_averager, time_coverage_resolution, quantile_sketch, splice)
 
     for name, input_group in input_root.groups.items():
         if _exclude_sub_group(input_group):
             continue
         output_group = output_root.createGroup(name)
-        _average_group(input_group, output_group, make_averager, time_coverage_resolution)
+        _average_group(input_group, output_group, make_averager, time_coverage_resolution, quantile_sketch, splice)
+
+
+def _time_coverage_resolution(input_root: Dataset) -> typing.Optional[typing.Union[int, float]]:
+    time_coverage_resolution = getattr(input_root, "time_coverage_resolution", None)
+    if time_coverage_resolution is None:
+        return None
+    try:
+        return parse_iso8601_duration(str(time_coverage_resolution))
+    except ValueError:
+        return None
 
 
 def average_file(
         input_root: Dataset,
         output_root: Dataset,
-        make_averager: typing.Callable[[np.ndarray, typing.Optional[np.ndarray], typing.Optional[typing.Union[int, float]]], FileAverager]
+        make_averager: typing.Callable[[np.ndarray, typing.Optional[np.ndarray], typing.Optional[typing.Union[int, float]]], FileAverager],
+        quantile_sketch: bool = False,
 ) -> None:
-    time_coverage_resolution = getattr(input_root, "time_coverage_resolution", None)
-    if time_coverage_resolution is not None:
-        try:
-            time_coverage_resolution = parse_iso8601_duration(str(time_coverage_resolution))
-        except ValueError:
-            time_coverage_resolution = None
+    _average_group(input_root, output_root, make_averager, _time_coverage_resolution(input_root), quantile_sketch)
+
+
+class _Splice:
+    # Rewritten on every archive write, so they never make the existing averages invalid
+    ROOT_VOLATILE_ATTRS = frozenset(("history", "date_created", "id", "time_coverage_start", "time_coverage_end"))
+
+    def __init__(self, changed_start_ms: int, changed_end_ms: int):
+        self.changed_start_ms = changed_start_ms
+        self.changed_end_ms = changed_end_ms
+        self._windows: typing.Dict[str, typing.Tuple[int, np.ndarray]] = dict()
+        self._writes: typing.List[typing.Tuple[Variable, Variable, int]] = list()
 
-    _average_group(input_root, output_root, make_averager, time_coverage_resolution)
+    def window(self, output_root: Dataset, averager: FileAverager) -> typing.Tuple[FileAverager, slice]:
+        bin_times = averager.times
+        begin = int(np.searchsorted(bin_times, self.changed_start_ms, side='right')) - 1
+        end = int(np.searchsorted(bin_times, self.changed_end_ms, side='left'))
+        # Always recalculate at least one bin, so everything is still declared for the structure comparison
+        begin = min(max(begin, 0), averager.bin_count - 1)
+        end = max(end, begin + 1)
+        self._windows[output_root.path] = (begin, bin_times)
+        return averager.window(begin, end)
+
+    @staticmethod
+    def _same_value(a, b) -> bool:
+        a = np.asarray(a)
+        b = np.asarray(b)
+        if a.shape != b.shape or a.dtype.kind != b.dtype.kind:
+            return False
+        if a.dtype.kind == 'f':
+            return bool(np.array_equal(a, b, equal_nan=True))
+        return bool(np.array_equal(a, b))
+
+    @classmethod
+    def _same_attrs(cls, partial: typing.Union[Group, Variable], existing: typing.Union[Group, Variable],
+                    ignore: typing.FrozenSet[str] = frozenset()) -> bool:
+        names = set(partial.ncattrs()) - ignore
+        if names != set(existing.ncattrs()) - ignore:
+            return False
+        for name in names:
+            if not cls._same_value(partial.getncattr(name), existing.getncattr(name)):
+                return False
+        return True
+
+    def _match_group(self, partial: Group, existing: Group,
+                     window: typing.Optional[typing.Tuple[int, np.ndarray]]) -> bool:
+        if not self._same_attrs(partial, existing, self.ROOT_VOLATILE_ATTRS if partial.parent is None else frozenset()):
+            return False
+        if set(partial.groups.keys()) != set(existing.groups.keys()):
+            return False
+        if set(partial.dimensions.keys()) != set(existing.dimensions.keys()):
+            return False
+        if set(partial.enumtypes.keys()) != set(existing.enumtypes.keys()):
+            return False
+        if set(partial.variables.keys()) != set(existing.variables.keys()):
+            return False
+
+        for name, partial_enum in partial.enumtypes.items():
+            existing_enum = existing.enumtypes[name]
+            if partial_enum.dtype != existing_enum.dtype or partial_enum.enum_dict != existing_enum.enum_dict:
+                return False
+
+        if 'time' in partial.dimensions:
+            window = self._windows.get(partial.path)
+            if window is None:
+                return False
+            _, bin_times = window
+            # Any added or removed bin shifts everything after it, so that is a full recalculation
+            if existing.dimensions['time'].size != bin_times.shape[0]:
+                return False
+            existing_times = existing.variables.get('time')
+            if existing_times is None or not np.array_equal(existing_times[:].data, bin_times):
+                return False
+        for name, dimension in partial.dimensions.items():
+            if name == 'time':
+                continue
+            if dimension.size != existing.dimensions[name].size:
+                return False
+
+        for name, partial_variable in partial.variables.items():
+            existing_variable = existing.variables[name]
+            if partial_variable.dimensions != existing_variable.dimensions:
+                return False
+            if isinstance(partial_variable.datatype, EnumType):
+                if not isinstance(existing_variable.datatype, EnumType):
+                    return False
+                if partial_variable.datatype.name != existing_variable.datatype.name:
+                    return False
+            elif partial_variable.dtype != existing_variable.dtype:
+                return False
+            if not self._same_attrs(partial_variable, existing_variable):
+                return False
+
+            if len(partial_variable.dimensions) > 0 and partial_variable.dimensions[0] == 'time':
+                if window is None:
+                    return False
+                if name != 'time':
+                    self._writes.append((partial_variable, existing_variable, window[0]))
+                continue
+            if not self._same_value(np.ma.getdata(partial_variable[...]), np.ma.getdata(existing_variable[...])):
+                return False
+
+        for name, partial_group in partial.groups.items():
+            if not self._match_group(partial_group, existing.groups[name], window):
+                return False
+        return True
+
+    def apply(self, partial: Dataset, existing: Dataset) -> bool:
+        self._writes.clear()
+        if not self._match_group(partial, existing, None):
+            return False
+
+        for source, destination, begin in self._writes:
+            destination[begin:begin + source.shape[0], ...] = source[...]
+        for name in self.ROOT_VOLATILE_ATTRS:
+            try:
+                value = partial.getncattr(name)
+            except AttributeError:
+                if name in existing.ncattrs():
+                    existing.delncattr(name)
+                continue
+            existing.setncattr(name, value)
+        return True
+
+
+def splice_average_file(
+        input_root: Dataset,
+        output_root: Dataset,
+        make_averager: typing.Callable[[np.ndarray, typing.Optional[np.ndarray], typing.Optional[typing.Union[int, float]]], FileAverager],
+        changed_start_ms: int,
+        changed_end_ms: int,
+        quantile_sketch: bool = False,
+        output_attrs: typing.Optional[typing.Dict[str, typing.Any]] = None,
+) -> bool:
+    # False when the structure or metadata differs, with the existing output left unchanged
+    splice = _Splice(changed_start_ms, changed_end_ms)
+    partial = Dataset("/dev/null", 'w', format='NETCDF4', memory=1)
+    try:
+        _average_group(input_root, partial, make_averager, _time_coverage_resolution(input_root),
+                       quantile_sketch, splice)
+        for name, value in (output_attrs or dict()).items():
+            partial.setncattr(name, value)
+        return splice.apply(partial, output_root)
+    finally:
+        partial.close()
@@ -4,14 +4,38 @@ import logging
 from tempfile import mkstemp
 from netCDF4 import Dataset
 from forge.formattime import format_iso8601_duration
-from forge.processing.average.file import average_file
+from forge.processing.average.file import average_file, splice_average_file
 from forge.processing.average.contamination import invalidate_contamination, copy_contaminated
 from forge.processing.average.calculate import FixedIntervalFileAverager, MonthFileAverager
 
 _LOGGER = logging.getLogger(__name__)
 
 
-def process_avgh(station: str, input_file: str, output_file: str, output_directory: str) -> None:
+def _splice_existing(input_data: Dataset, output_file: str, existing_file: typing.Optional[str],
+                     changed: typing.Optional[typing.Tuple[int, int]], make_averager: typing.Callable,
+                     output_attrs: typing.Dict[str, typing.Any], quantile_sketch: bool = False) -> bool:
+    if not existing_file or not changed:
+        return False
+    try:
+        os.replace(existing_file, output_file)
+    except OSError:
+        return False
+
+    output_data = Dataset(str(output_file), 'r+')
+    try:
+        if splice_average_file(input_data, output_data, make_averager, changed[0], changed[1],
+                               quantile_sketch=quantile_sketch, output_attrs=output_attrs):
+            return True
+    finally:
+        output_data.close()
+    _LOGGER.debug("Structure changed in %s, recalculating all averages", output_file)
+    return False
+
+
+def process_avgh(station: str, input_file: str, output_file: str, output_directory: str,
+                 existing_file: typing.Optional[str] = None,
+                 changed: typing.Optional[typing.Tuple[int, int]] = None,
+                 quantile_sketch: bool = False) -> None:
     def make_averager(times_epoch_ms, averaged_time_ms, nominal_spacing_ms):
         return FixedIntervalFileAverager(60 * 60 * 1000, times_epoch_ms, averaged_time_ms, nominal_spacing_ms)
 
@@ -30,7 +54,7 @@ def process_avgh(station: str, input_file: str, output_file: str, output_directo
                 _LOGGER.debug("Making contaminated data to %s", str(contaminated_output_file))
                 contaminated_output_file = Dataset(str(contaminated_output_file), 'w', format='NETCDF4')
                 try:
-                    average_file(input_data, contaminated_output_file, make_averager)
+                    average_file(input_data, contaminated_output_file, make_averager, quantile_sketch=quantile_sketch)
                     contaminated_output_file.setncattr("time_coverage_resolution", format_iso8601_duration(60 * 60))
                     contaminated_output_file.setncattr("instrument_id", contaminated_instrument)
                     tags = set(str(getattr(contaminated_output_file, "forge_tags", "")).split())
@@ -41,9 +65,13 @@ def process_avgh(station: str, input_file: str, output_file: str, output_directo
                     contaminated_output_file.close()
 
         invalidate_contamination(input_data, station)
+        if _splice_existing(input_data, output_file, existing_file, changed, make_averager, {
+            "time_coverage_resolution": format_iso8601_duration(60 * 60),
+        }, quantile_sketch=quantile_sketch):
+            return
         output_file = Dataset(str(output_file), 'w', format='NETCDF4')
         try:
-            average_file(input_data, output_file, make_averager)
+            average_file(input_data, output_file, make_averager, quantile_sketch=quantile_sketch)
             output_file.setncattr("time_coverage_resolution", format_iso8601_duration(60 * 60))
         finally:
             output_file.close()
@@ -84,10 +112,16 @@ def process_avgd(station: str, input_file: str, output_file: str) -> None:
             pass
 
 
-def process_avgm(station: str, input_file: str, output_file: str) -> None:
+def process_avgm(station: str, input_file: str, output_file: str,
+                 existing_file: typing.Optional[str] = None,
+                 changed: typing.Optional[typing.Tuple[int, int]] = None) -> None:
     _LOGGER.debug("Processing monthly average file %s:%s", station.upper(), input_file)
     input_data = Dataset(str(input_file), 'r')
     try:
+        if _splice_existing(input_data, output_file, existing_file, changed, MonthFileAverager, {
+            "time_coverage_resolution": "P1M",
+        }):
+            return
         output_file = Dataset(str(output_file), 'w', format='NETCDF4')
         try:
             average_file(input_data, output_file, MonthFileAverager)
@@ -1,6 +1,7 @@
 import typing
 import numpy as np
 from numba import njit, prange
+from forge.data.sketch import QuantileSketch
 
 
 @njit(cache=True, nogil=True, parallel=True)
@@ -39,3 +40,76 @@ def bin_quantiles(
     result = np.empty((bin_start.shape[0], *values.shape[1:], quantiles.shape[0]), dtype=values.dtype)
     _bin_quantiles_inner(values, bin_start, quantiles, result)
     return result
+
+
+def _bin_end(bin_start: np.ndarray, total: int) -> np.ndarray:
+    return np.concatenate((bin_start[1:], [total]))
+
+
+def _store_sketch(sketch: QuantileSketch, size: int, values: np.ndarray, levels: np.ndarray) -> None:
+    sketch.compact(size)
+    sketch_values, sketch_levels = sketch.items()
+    values[:sketch_values.shape[0]] = sketch_values
+    levels[:sketch_levels.shape[0]] = sketch_levels
+
+
+def bin_quantile_sketches(
+        bin_start: np.ndarray,
+        values: np.ndarray,
+        k: int,
+        size: int,
+) -> typing.Tuple[np.ndarray, np.ndarray]:
+    assert len(bin_start.shape) == 1
+    assert bin_start.shape[0] > 0
+    assert len(values.shape) > 0
+
+    result_values = np.full((bin_start.shape[0], *values.shape[1:], size), np.nan, dtype=values.dtype)
+    result_levels = np.zeros(result_values.shape, dtype=np.uint8)
+    bin_end = _bin_end(bin_start, values.shape[0])
+    for bin_number in range(bin_start.shape[0]):
+        for value_index in np.ndindex(*values.shape[1:]):
+            sketch = QuantileSketch(k)
+            sketch.update(values[(slice(bin_start[bin_number], bin_end[bin_number]), *value_index)])
+            _store_sketch(sketch, size, result_values[(bin_number, *value_index)],
+                          result_levels[(bin_number, *value_index)])
+    return result_values, result_levels
+
+
+def bin_merge_quantile_sketches(
+        bin_start: np.ndarray,
+        sketch_values: np.ndarray,
+        sketch_levels: np.ndarray,
+        quantiles: typing.Union[np.ndarray, float, typing.Iterable[float]],
+        k: int,
+        minimum: typing.Optional[np.ndarray] = None,
+        maximum: typing.Optional[np.ndarray] = None,
+) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    assert len(bin_start.shape) == 1
+    assert bin_start.shape[0] > 0
+    assert len(sketch_values.shape) > 1
+    assert sketch_values.shape == sketch_levels.shape
+
+    quantiles = np.asarray(quantiles).flatten()
+    size = sketch_values.shape[-1]
+    element_shape = sketch_values.shape[1:-1]
+
+    result = np.full((bin_start.shape[0], *element_shape, quantiles.shape[0]), np.nan, dtype=sketch_values.dtype)
+    result_values = np.full((bin_start.shape[0], *element_shape, size), np.nan, dtype=sketch_values.dtype)
+    result_levels = np.zeros(result_values.shape, dtype=np.uint8)
+    bin_end = _bin_end(bin_start, sketch_values.shape[0])
+    for bin_number in range(bin_start.shape[0]):
+        for value_index in np.ndindex(*element_shape):
+            selector = (slice(bin_start[bin_number], bin_end[bin_number]), *value_index)
+            sketch = QuantileSketch(k)
+            sketch.merge_items(sketch_values[selector], sketch_levels[selector])
+            result[(bin_number, *value_index)] = sketch.quantiles(quantiles)
+            _store_sketch(sketch, size, result_values[(bin_number, *value_index)],
+                          result_levels[(bin_number, *value_index)])
+
+    # The sketches lose the extremes, so those come from the exact per input limits
+    if minimum is not None:
+        result[..., quantiles == 0.0] = np.fmin.reduceat(minimum, bin_start, axis=0)[..., None]
+    if maximum is not None:
+        result[..., quantiles == 1.0] = np.fmax.reduceat(maximum, bin_start, axis=0)[..., None]
+
+    return result, result_values, result_levels
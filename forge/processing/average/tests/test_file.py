@@ -4,8 +4,8 @@ from math import nan
 from netCDF4 import Dataset, Group
 from forge.data.structure import instrument_timeseries
 from forge.data.structure.timeseries import time_coordinate, averaged_time_variable, averaged_count_variable, cutsize_variable, cutsize_coordinate
-from forge.processing.average import STANDARD_QUANTILES
-from forge.processing.average.file import average_file
+from forge.processing.average import STANDARD_QUANTILES, QUANTILE_SKETCH_SIZE
+from forge.processing.average.file import average_file, splice_average_file
 from forge.processing.average.calculate import FixedIntervalFileAverager
 
 
@@ -519,4 +519,150 @@ def test_cut_dimension(tmp_path):
     assert float(var[1, 0]) == 60
     assert float(var[1, -1]) == 119
     assert var[0, :].tolist() == pytest.approx(np.nanquantile(np.arange(60), STANDARD_QUANTILES).tolist())
-    assert var[1, :].tolist() == pytest.approx(np.nanquantile(np.arange(60, 120), STANDARD_QUANTILES).tolist())
\ No newline at end of file
+    assert var[1, :].tolist() == pytest.approx(np.nanquantile(np.arange(60, 120), STANDARD_QUANTILES).tolist())
+
+def _rank_error(sorted_values: np.ndarray, value: float, quantile: float) -> float:
+    lower = np.searchsorted(sorted_values, value, side='left') / sorted_values.shape[0]
+    upper = np.searchsorted(sorted_values, value, side='right') / sorted_values.shape[0]
+    if lower <= quantile <= upper:
+        return 0.0
+    return min(abs(lower - quantile), abs(upper - quantile))
+
+
+def test_quantile_sketch_average(tmp_path):
+    input_file = Dataset(str(tmp_path / "input.nc"), 'w', format='NETCDF4')
+    hourly_file = Dataset(str(tmp_path / "hourly.nc"), 'w', format='NETCDF4')
+    daily_file = Dataset(str(tmp_path / "daily.nc"), 'w', format='NETCDF4')
+
+    instrument_timeseries(
+        input_file, "NIL", "X1",
+        0, 24 * 60 * 60,
+        1, {"aerosol"}
+    )
+    data: Group = input_file.createGroup("data")
+
+    var = time_coordinate(data)
+    var[:] = np.arange(0, 24 * 60 * 60 * 1000, 1000)
+
+    rng = np.random.default_rng(3)
+    raw = rng.lognormal(1.0, 0.75, (24 * 60 * 60, 2))
+    raw[rng.random(raw.shape) < 0.05] = nan
+    raw[6 * 60 * 60:7 * 60 * 60, 1] = nan
+
+    data.createDimension('wavelength', 2)
+    var = data.createVariable('wavelength', 'f8', ('wavelength', ), fill_value=nan)
+    var[:] = [450, 550]
+    var = data.createVariable('avgwl1', 'f8', ('time', 'wavelength'), fill_value=nan)
+    var[:] = raw
+
+    def make_hourly(times_epoch_ms, averaged_time_ms, nominal_spacing_ms):
+        return FixedIntervalFileAverager(60 * 60 * 1000, times_epoch_ms, averaged_time_ms, nominal_spacing_ms)
+    average_file(input_file, hourly_file, make_hourly, quantile_sketch=True)
+
+    statistics = hourly_file.groups['data'].groups['statistics']
+    var = statistics.groups['quantile_sketch'].variables['avgwl1']
+    assert var.dimensions == ('time', 'wavelength', 'quantile_sketch')
+    assert var.shape == (24, 2, QUANTILE_SKETCH_SIZE)
+    levels = statistics.groups['quantile_sketch_level'].variables['avgwl1'][:].data
+    assert np.all(np.isnan(var[6, 1, :].data))
+    assert np.sum(np.left_shift(1, levels[0, 0, :].astype(np.int64))[np.isfinite(var[0, 0, :].data)]) == \
+        np.count_nonzero(np.isfinite(raw[:60 * 60, 0]))
+    var = statistics.groups['quantiles'].variables['avgwl1']
+    assert var[0, 0, :].tolist() == pytest.approx(np.nanquantile(raw[:60 * 60, 0], STANDARD_QUANTILES).tolist())
+
+    def make_daily(times_epoch_ms, averaged_time_ms, nominal_spacing_ms):
+        return FixedIntervalFileAverager(24 * 60 * 60 * 1000, times_epoch_ms, averaged_time_ms, nominal_spacing_ms)
+    average_file(hourly_file, daily_file, make_daily)
+
+    statistics = daily_file.groups['data'].groups['statistics']
+    assert 'avgwl1' in statistics.groups['quantile_sketch'].variables
+    var = statistics.groups['quantiles'].variables['avgwl1']
+    assert var.shape == (1, 2, len(STANDARD_QUANTILES))
+    for wavelength in range(2):
+        values = raw[:, wavelength]
+        sorted_values = np.sort(values[np.isfinite(values)])
+        daily = var[0, wavelength, :].data
+        assert daily[0] == sorted_values[0]
+        assert daily[-1] == sorted_values[-1]
+        for q, value in zip(STANDARD_QUANTILES, daily):
+            assert _rank_error(sorted_values, value, q) < 0.03
+
+
+def _splice_input(root: Dataset, raw: np.ndarray) -> None:
+    instrument_timeseries(
+        root, "NIL", "X1",
+        0, 6 * 60 * 60,
+        60, {"aerosol"}
+    )
+    data: Group = root.createGroup("data")
+
+    var = time_coordinate(data)
+    var[:] = np.arange(0, 6 * 60 * 60 * 1000, 60 * 1000)
+    var = averaged_time_variable(data)
+    var[:] = [50 * 1000] * 360
+
+    var = cutsize_variable(data)
+    var[:] = np.where((np.arange(360) // 6) % 2 == 0, 1.0, 10.0)
+
+    var = data.createVariable('avg1', 'f8', ('time',), fill_value=nan)
+    var.ancillary_variables = 'cut_size'
+    var[:] = raw[:, 0]
+
+    var = data.createVariable('sum1', 'f8', ('time',), fill_value=nan)
+    var.cell_methods = "time: sum"
+    var[:] = raw[:, 1]
+
+    var = data.createVariable('vm1', 'f8', ('time',), fill_value=nan)
+    var.cell_methods = "time: mean vd1: vector_direction"
+    var[:] = raw[:, 2]
+
+    var = data.createVariable('vd1', 'f8', ('time',), fill_value=nan)
+    var.cell_methods = "time: mean vm1: vector_magnitude"
+    var[:] = raw[:, 3] * 90.0
+
+
+def _assert_same_group(a: Group, b: Group) -> None:
+    assert set(a.variables.keys()) == set(b.variables.keys())
+    for name, var in a.variables.items():
+        values = np.ma.getdata(var[...])
+        assert np.array_equal(values, np.ma.getdata(b.variables[name][...]), equal_nan=values.dtype.kind == 'f'), name
+    assert set(a.groups.keys()) == set(b.groups.keys())
+    for name, group in a.groups.items():
+        _assert_same_group(group, b.groups[name])
+
+
+def test_splice_average(tmp_path):
+    def make_averager(times_epoch_ms, averaged_time_ms, nominal_spacing_ms):
+        return FixedIntervalFileAverager(60 * 60 * 1000, times_epoch_ms, averaged_time_ms, nominal_spacing_ms)
+
+    rng = np.random.default_rng(5)
+    raw = rng.lognormal(1.0, 0.5, (360, 4))
+    input_file = Dataset(str(tmp_path / "input.nc"), 'w', format='NETCDF4')
+    _splice_input(input_file, raw)
+    output_file = Dataset(str(tmp_path / "output.nc"), 'w', format='NETCDF4')
+    average_file(input_file, output_file, make_averager, quantile_sketch=True)
+    output_file.close()
+
+    raw[130:140, :] = rng.lognormal(2.0, 0.5, (10, 4))
+    raw[135, 0] = nan
+    input_file.groups['data'].variables['avg1'][130:140] = raw[130:140, 0]
+    input_file.groups['data'].variables['sum1'][130:140] = raw[130:140, 1]
+    input_file.groups['data'].variables['vm1'][130:140] = raw[130:140, 2]
+    input_file.groups['data'].variables['vd1'][130:140] = raw[130:140, 3] * 90.0
+
+    output_file = Dataset(str(tmp_path / "output.nc"), 'r+')
+    assert splice_average_file(input_file, output_file, make_averager,
+                               130 * 60 * 1000, 140 * 60 * 1000, quantile_sketch=True)
+    expected_file = Dataset(str(tmp_path / "expected.nc"), 'w', format='NETCDF4')
+    average_file(input_file, expected_file, make_averager, quantile_sketch=True)
+    _assert_same_group(expected_file, output_file)
+    expected_file.close()
+
+    var = input_file.groups['data'].createVariable('added1', 'f8', ('time',), fill_value=nan)
+    var[:] = raw[:, 0]
+    assert not splice_average_file(input_file, output_file, make_averager,
+                                   130 * 60 * 1000, 140 * 60 * 1000, quantile_sketch=True)
+    assert 'added1' not in output_file.groups['data'].variables
+
+    output_file.close()
+    input_file.close()
@@ -6,14 +6,17 @@ import datetime
 import os
 import re
 from math import floor, ceil
+from functools import partial
 from pathlib import Path
+from contextlib import contextmanager
 from concurrent.futures import ProcessPoolExecutor
 from netCDF4 import Dataset
-from forge.logicaltime import round_to_year
+from forge.logicaltime import round_to_year, start_of_year
 from forge.temp import WorkingDirectory
 from forge.archive.client.connection import Connection
 from forge.archive.client.put import ArchivePut
-from forge.archive.client.get import get_all_daily_files, get_all_yearly_files
+from forge.archive.client.get import get_all_daily_files, get_all_yearly_files, read_file_or_nothing
+from forge.archive.client import data_lock_key, data_file_name
 from forge.data.structure.history import append_history
 from .run import process_avgh, process_avgd, process_avgm
 from .merge import merge_files
@@ -25,6 +28,15 @@ _DAY_FILE_MATCH = re.compile(
 )
 
 
+@contextmanager
+def _executor(shared: typing.Optional[ProcessPoolExecutor]):
+    if shared is not None:
+        yield shared
+        return
+    with ProcessPoolExecutor() as executor:
+        yield executor
+
+
 async def _write_files(connection: Connection, put: ArchivePut, source: Path, station: str, archive: str,
                        whole_file: bool, history: str, status: str) -> None:
     write_files: typing.List[Path] = list()
@@ -63,6 +75,64 @@ async def _write_files(connection: Connection, put: ArchivePut, source: Path, st
     await put.commit_index()
 
 
+def _changed_span(changed: typing.Optional[typing.List[typing.Tuple[float, float]]],
+                  file_start: float, file_end: float) -> typing.Optional[typing.Tuple[int, int]]:
+    if not changed:
+        return None
+    span_start: typing.Optional[float] = None
+    span_end: typing.Optional[float] = None
+    for start, end in changed:
+        if end <= file_start or start >= file_end:
+            continue
+        span_start = start if span_start is None else min(span_start, start)
+        span_end = end if span_end is None else max(span_end, end)
+    if span_start is None:
+        # Nothing known to have changed, so this only verifies the structure
+        span_start = file_start
+        span_end = file_start
+    elif span_start <= file_start and span_end >= file_end:
+        # Covers the whole file, so splicing would only add the existing file fetch
+        return None
+    return int(floor(max(span_start, file_start) * 1000)), int(ceil(min(span_end, file_end) * 1000))
+
+
+async def _fetch_splice_existing(connection: Connection, station: str, archive: str, yearly: bool,
+                                 input_directory: Path, existing_directory: Path, start: int, end: int,
+                                 changed: typing.Optional[typing.List[typing.Tuple[float, float]]]) -> typing.Dict[str, typing.Tuple[int, int]]:
+    if not changed:
+        return dict()
+
+    spans: typing.Dict[str, typing.Tuple[str, int, typing.Tuple[int, int]]] = dict()
+    for input_file in input_directory.iterdir():
+        match = _DAY_FILE_MATCH.fullmatch(input_file.name)
+        if not match:
+            continue
+        if yearly:
+            file_start = start_of_year(int(match.group(3)))
+            file_end = start_of_year(int(match.group(3)) + 1)
+        else:
+            file_start = int(floor(datetime.datetime(
+                int(match.group(3)), int(match.group(4)), int(match.group(5)),
+                tzinfo=datetime.timezone.utc
+            ).timestamp()))
+            file_end = file_start + 24 * 60 * 60
+        span = _changed_span(changed, file_start, file_end)
+        if span is None:
+            continue
+        spans[input_file.name] = (match.group(1), file_start, span)
+    if not spans:
+        return dict()
+
+    await connection.lock_read(data_lock_key(station, archive), start * 1000, end * 1000)
+    result: typing.Dict[str, typing.Tuple[int, int]] = dict()
+    for name, (instrument_id, file_start, span) in spans.items():
+        await read_file_or_nothing(connection, data_file_name(station, archive, instrument_id, file_start),
+                                   existing_directory)
+        if (existing_directory / name).exists():
+            result[name] = span
+    return result
+
+
 async def _concurrent_run(connection: Connection, executor: ProcessPoolExecutor, station: str,
                           run: typing.Callable,
                           args: typing.List[typing.Tuple], status: str) -> None:
@@ -81,35 +151,48 @@ async def _concurrent_run(connection: Connection, executor: ProcessPoolExecutor,
             completed_calls += 1
         await connection.set_transaction_status(status.format(percent_done=(completed_calls / len(args)) * 100.0))
 
-    for a in args:
-        launched = asyncio.get_event_loop().run_in_executor(executor, run, station, *a)
+    # The executor may be shared, so anything not yet started is cancelled rather than left for it to run
+    try:
+        for a in args:
+            launched = asyncio.get_event_loop().run_in_executor(executor, run, station, *a)
 
-        launched_calls.add(launched)
-        while len(launched_calls) > concurrent_limit:
-            await process_launched()
+            launched_calls.add(launched)
+            while len(launched_calls) > concurrent_limit:
+                await process_launched()
 
-    while launched_calls:
-        await process_launched()
+        while launched_calls:
+            await process_launched()
+    finally:
+        for launched in launched_calls:
+            launched.cancel()
 
 
 async def _run_avgh(connection: Connection, input_directory: Path, output_directory: Path,
-                    station: str, start: int, end: int) -> None:
-    with ProcessPoolExecutor() as executor:
-        run_args: typing.List[typing.Tuple[str, str, str]] = list()
+                    station: str, start: int, end: int,
+                    executor: typing.Optional[ProcessPoolExecutor] = None,
+                    existing_directory: typing.Optional[Path] = None,
+                    splice: typing.Optional[typing.Dict[str, typing.Tuple[int, int]]] = None,
+                    quantile_sketch: bool = False) -> None:
+    with _executor(executor) as executor:
+        run_args: typing.List[typing.Tuple] = list()
         for input_file in input_directory.iterdir():
             if not input_file.name.endswith('.nc'):
                 continue
             if not input_file.is_file():
                 continue
-            run_args.append((str(input_file), str(output_directory / input_file.name), str(output_directory)))
+            changed = splice.get(input_file.name) if splice else None
+            if changed:
+                run_args.append((str(input_file), str(output_directory / input_file.name), str(output_directory),
+                                 str(existing_directory / input_file.name), changed))
+            else:
+                run_args.append((str(input_file), str(output_directory / input_file.name), str(output_directory)))
             if len(run_args) % 256 == 0:
                 await asyncio.sleep(0)
 
         await _concurrent_run(
-            connection, executor, station, process_avgh, run_args,
+            connection, executor, station, partial(process_avgh, quantile_sketch=quantile_sketch), run_args,
             "Generating hourly averages, {percent_done:.0f}% done"
         )
-        executor.shutdown(wait=True)
 
 
 async def _write_avgh(connection: Connection, station: str, start: int, end: int,
@@ -121,7 +204,10 @@ async def _write_avgh(connection: Connection, station: str, start: int, end: int
                        "Writing hourly averaged data, {percent_done:.0f}% done")
 
 
-async def update_avgh_data(connection: Connection, station: str, start: float, end: float) -> None:
+async def update_avgh_data(connection: Connection, station: str, start: float, end: float,
+                           executor: typing.Optional[ProcessPoolExecutor] = None,
+                           changed: typing.Optional[typing.List[typing.Tuple[float, float]]] = None,
+                           quantile_sketch: bool = False) -> None:
     start = int(floor(start / (24 * 60 * 60))) * 24 * 60 * 60
     end = int(ceil(end / (24 * 60 * 60))) * 24 * 60 * 60
     async with WorkingDirectory() as working_directory:
@@ -133,11 +219,19 @@ async def update_avgh_data(connection: Connection, station: str, start: float, e
         await get_all_daily_files(connection, station, "clean", start, end, input_directory,
                                   status_format="Loading clean data for averaging, {percent_done:.0f}% done")
 
+        existing_directory = working_directory / "existing"
+        existing_directory.mkdir(exist_ok=True)
+        splice = await _fetch_splice_existing(connection, station, "avgh", False,
+                                              input_directory, existing_directory, start, end, changed)
+        if splice:
+            _LOGGER.debug(f"Splicing {len(splice)} existing hourly averages for {station.upper()} {start},{end}")
+
         output_directory = working_directory / "output"
         output_directory.mkdir(exist_ok=True)
         _LOGGER.debug(f"Running hourly averaging for {station.upper()} {start},{end}")
         await connection.set_transaction_status("Starting hourly average calculation")
-        await _run_avgh(connection, input_directory, output_directory, station, start, end)
+        await _run_avgh(connection, input_directory, output_directory, station, start, end, executor,
+                        existing_directory, splice, quantile_sketch)
 
         _LOGGER.debug(f"Writing hourly averaged data for {station.upper()} {start},{end}")
         await connection.set_transaction_status("Writing hourly averaged data")
@@ -146,8 +240,9 @@ async def update_avgh_data(connection: Connection, station: str, start: float, e
 
 
 async def _run_avgd(connection: Connection, input_directory: Path, output_directory: Path,
-                    station: str, start: int, end: int) -> None:
-    with ProcessPoolExecutor() as executor:
+                    station: str, start: int, end: int,
+                    executor: typing.Optional[ProcessPoolExecutor] = None) -> None:
+    with _executor(executor) as executor:
         run_args: typing.List[typing.Tuple[str, str]] = list()
         for input_file in input_directory.iterdir():
             if not input_file.name.endswith('.nc'):
@@ -162,12 +257,12 @@ async def _run_avgd(connection: Connection, input_directory: Path, output_direct
             connection, executor, station, process_avgd, run_args,
             "Generating daily averages, {percent_done:.0f}% done"
         )
-        executor.shutdown(wait=True)
 
 
 async def _merge_avgd(connection: Connection, input_directory: Path, output_directory: Path,
-                    station: str, start: int, end: int) -> None:
-    with ProcessPoolExecutor() as executor:
+                    station: str, start: int, end: int,
+                    executor: typing.Optional[ProcessPoolExecutor] = None) -> None:
+    with _executor(executor) as executor:
         merge_sets: typing.Dict[typing.Tuple[str, int], typing.List[typing.Tuple[int, Path]]] = dict()
         total_file_count = 0
         for input_file in input_directory.iterdir():
@@ -207,7 +302,6 @@ async def _merge_avgd(connection: Connection, input_directory: Path, output_dire
             connection, executor, station, merge_files, run_args,
             "Merging daily averages, {percent_done:.0f}% done"
         )
-        executor.shutdown(wait=True)
 
 
 async def _write_avgd(connection: Connection, station: str, start: int, end: int,
@@ -220,7 +314,8 @@ async def _write_avgd(connection: Connection, station: str, start: int, end: int
                        "Writing daily averaged data, {percent_done:.0f}% done")
 
 
-async def update_avgd_data(connection: Connection, station: str, start: float, end: float) -> None:
+async def update_avgd_data(connection: Connection, station: str, start: float, end: float,
+                           executor: typing.Optional[ProcessPoolExecutor] = None) -> None:
     start = int(floor(start / (24 * 60 * 60))) * 24 * 60 * 60
     end = int(ceil(end / (24 * 60 * 60))) * 24 * 60 * 60
     async with WorkingDirectory() as working_directory:
@@ -236,13 +331,13 @@ async def update_avgd_data(connection: Connection, station: str, start: float, e
         average_directory.mkdir(exist_ok=True)
         _LOGGER.debug(f"Running daily averaging for {station.upper()} {start},{end}")
         await connection.set_transaction_status("Starting daily average calculation")
-        await _run_avgd(connection, input_directory, average_directory, station, start, end)
+        await _run_avgd(connection, input_directory, average_directory, station, start, end, executor)
 
         output_directory = working_directory / "output"
         output_directory.mkdir(exist_ok=True)
         _LOGGER.debug(f"Merging daily averages for {station.upper()} {start},{end}")
         await connection.set_transaction_status("Starting daily average merging")
-        await _merge_avgd(connection, average_directory, output_directory, station, start, end)
+        await _merge_avgd(connection, average_directory, output_directory, station, start, end, executor)
 
         _LOGGER.debug(f"Writing daily averaged data for {station.upper()} {start},{end}")
         await connection.set_transaction_status("Writing daily averaged data")
@@ -251,15 +346,23 @@ async def update_avgd_data(connection: Connection, station: str, start: float, e
 
 
 async def _run_avgm(connection: Connection, input_directory: Path, output_directory: Path,
-                    station: str, start: int, end: int) -> None:
-    with ProcessPoolExecutor() as executor:
-        run_args: typing.List[typing.Tuple[str, str]] = list()
+                    station: str, start: int, end: int,
+                    executor: typing.Optional[ProcessPoolExecutor] = None,
+                    existing_directory: typing.Optional[Path] = None,
+                    splice: typing.Optional[typing.Dict[str, typing.Tuple[int, int]]] = None) -> None:
+    with _executor(executor) as executor:
+        run_args: typing.List[typing.Tuple] = list()
         for input_file in input_directory.iterdir():
             if not input_file.name.endswith('.nc'):
                 continue
             if not input_file.is_file():
                 continue
-            run_args.append((str(input_file), str(output_directory / input_file.name)))
+            changed = splice.get(input_file.name) if splice else None
+            if changed:
+                run_args.append((str(input_file), str(output_directory / input_file.name),
+                                 str(existing_directory / input_file.name), changed))
+            else:
+                run_args.append((str(input_file), str(output_directory / input_file.name)))
             if len(run_args) % 256 == 0:
                 await asyncio.sleep(0)
 
@@ -267,7 +370,6 @@ async def _run_avgm(connection: Connection, input_directory: Path, output_direct
             connection, executor, station, process_avgm, run_args,
             "Generating monthly averages, {percent_done:.0f}% done"
         )
-        executor.shutdown(wait=True)
 
 
 async def _write_avgm(connection: Connection, station: str, start: int, end: int,
@@ -279,7 +381,9 @@ async def _write_avgm(connection: Connection, station: str, start: int, end: int
                        "Writing monthly averaged data, {percent_done:.0f}% done")
 
 
-async def update_avgm_data(connection: Connection, station: str, start: float, end: float) -> None:
+async def update_avgm_data(connection: Connection, station: str, start: float, end: float,
+                           executor: typing.Optional[ProcessPoolExecutor] = None,
+                           changed: typing.Optional[typing.List[typing.Tuple[float, float]]] = None) -> None:
     start, end = round_to_year(start, end)
     async with WorkingDirectory() as working_directory:
         working_directory = Path(working_directory)
@@ -289,11 +393,19 @@ async def update_avgm_data(connection: Connection, station: str, start: float, e
         await connection.set_transaction_status("Loading daily data for averaging")
         await get_all_yearly_files(connection, station, "avgd", start, end, input_directory)
 
+        existing_directory = working_directory / "existing"
+        existing_directory.mkdir(exist_ok=True)
+        splice = await _fetch_splice_existing(connection, station, "avgm", True,
+                                              input_directory, existing_directory, start, end, changed)
+        if splice:
+            _LOGGER.debug(f"Splicing {len(splice)} existing monthly averages for {station.upper()} {start},{end}")
+
         output_directory = working_directory / "output"
         output_directory.mkdir(exist_ok=True)
         _LOGGER.debug(f"Running monthly averaging for {station.upper()} {start},{end}")
         await connection.set_transaction_status("Starting monthly average calculation")
-        await _run_avgm(connection, input_directory, output_directory, station, start, end)
+        await _run_avgm(connection, input_directory, output_directory, station, start, end, executor,
+                        existing_directory, splice)
 
         _LOGGER.debug(f"Writing monthly averaged data for {station.upper()} {start},{end}")
         await connection.set_transaction_status("Writing monthly averaged data")
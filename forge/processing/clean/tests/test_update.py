@@ -0,0 +1,104 @@
+import pytest
+import asyncio
+import typing
+from math import nan
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+from netCDF4 import Dataset
+from forge.formattime import format_iso8601_time
+from forge.archive import CONFIGURATION
+from forge.archive.server.control import Controller
+from forge.archive.client import data_file_name
+from forge.archive.client.connection import Connection
+from forge.archive.client.put import ArchivePut
+from forge.archive.testing import _aio_pipe
+from forge.data.structure.timeseries import time_coordinate
+from forge.processing.clean.passing import apply_pass
+from forge.processing.clean.update import update_clean_data
+
+
+CONFIGURATION.set('ARCHIVE.LOCK_STORAGE', False)
+
+
+def _make_file(path, start_ms: int, end_ms: int, times: typing.List[int], values: typing.List[float]) -> Dataset:
+    data = Dataset(str(path), 'w', format='NETCDF4')
+    data.instrument_id = "X1"
+    data.instrument = "test"
+    data.forge_tags = "aerosol"
+    data.time_coverage_start = format_iso8601_time(start_ms / 1000.0)
+    data.time_coverage_end = format_iso8601_time(end_ms / 1000.0)
+    group = data.createGroup("data")
+    var = time_coordinate(group)
+    var[:] = times
+    var = group.createVariable("value", "f8", ("time",), fill_value=nan)
+    var[:] = values
+    return data
+
+
+@pytest.mark.asyncio
+async def test_update_clean(tmp_path):
+    dest = tmp_path / "storage"
+    dest.mkdir(exist_ok=True)
+    control = Controller(dest)
+    await control.initialize()
+
+    client_reader, server_writer = await _aio_pipe()
+    server_reader, client_writer = await _aio_pipe()
+    control_run = asyncio.ensure_future(control.connection(server_reader, server_writer))
+    connection = Connection(client_reader, client_writer, "test clean")
+    await connection.startup()
+
+    day_ms = 24 * 60 * 60 * 1000
+    start_ms = 1696982400000
+
+    data = _make_file(tmp_path / "edited.nc", start_ms, start_ms + 3 * day_ms,
+                      [start_ms + i * day_ms // 2 for i in range(6)], [float(i) for i in range(6)])
+    async with connection.transaction(True):
+        put = ArchivePut(connection)
+        await put.data(data, archive="edited", station="bnd")
+        await put.commit_index()
+    data.close()
+
+    async with connection.transaction(True):
+        await apply_pass(connection, "bnd", "aerosol", start_ms / 1000, (start_ms + 2 * day_ms) / 1000, "", None)
+
+    status: typing.List[str] = list()
+    set_transaction_status = connection.set_transaction_status
+
+    async def record_status(message: str) -> None:
+        status.append(message)
+        await set_transaction_status(message)
+
+    connection.set_transaction_status = record_status
+
+    # Not forked directly, since other tests may have already started the parallel numerical routine threads
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("forkserver")) as executor:
+        async with connection.transaction(True):
+            await update_clean_data(connection, "bnd", start_ms / 1000, (start_ms + 3 * day_ms) / 1000,
+                                    executor=executor, workers=1)
+
+    assert "Processing clean data, 100% done" in status
+    # Writing can finish before the pass does, in which case there is no final percentage
+    assert status[-1] in ("Writing clean data", "Writing clean data, 100% done")
+
+    async with connection.transaction(False):
+        contents: typing.List[typing.Tuple[typing.List[int], typing.List[float]]] = list()
+        for day in range(2):
+            name = data_file_name("bnd", "clean", "X1", (start_ms + day * day_ms) / 1000.0)
+            check = Dataset(name, 'r', memory=await connection.read_bytes(name))
+            try:
+                assert check.instrument_id == "X1"
+                assert getattr(check, "data_pass_time", None)
+                group = check.groups["data"]
+                contents.append((list(group.variables["time"][:]), list(group.variables["value"][:])))
+            finally:
+                check.close()
+
+        with pytest.raises(FileNotFoundError):
+            await connection.read_bytes(data_file_name("bnd", "clean", "X1", (start_ms + 2 * day_ms) / 1000.0))
+
+    assert contents[0] == ([start_ms, start_ms + day_ms // 2], [0.0, 1.0])
+    assert contents[1] == ([start_ms + day_ms, start_ms + day_ms + day_ms // 2], [2.0, 3.0])
+
+    await connection.shutdown()
+    await control_run
@@ -4,8 +4,11 @@ import logging
 import time
 import datetime
 import re
+import os
 from math import floor, ceil
 from pathlib import Path
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
 from netCDF4 import Dataset
 from forge.logicaltime import containing_year_range, start_of_year
 from forge.formattime import format_iso8601_time
@@ -25,6 +28,15 @@ _DAY_FILE_MATCH = re.compile(
 )
 
 
+@contextmanager
+def _executor(shared: typing.Optional[ProcessPoolExecutor]):
+    if shared is not None:
+        yield shared
+        return
+    with ProcessPoolExecutor() as executor:
+        yield executor
+
+
 async def _fetch_passed(connection: Connection, station: str, start: int, end: int, destination: Path) -> None:
     await connection.lock_read(passed_lock_key(station), start * 1000, end * 1000)
 
@@ -33,7 +45,120 @@ async def _fetch_passed(connection: Connection, station: str, start: int, end: i
         await read_file_or_nothing(connection, passed_file_name(station, year_start), destination)
 
 
-async def _run_pass(connection: Connection, working_directory: Path, station: str, start: int, end: int) -> None:
+def _accept_day(station: str, passed_file: str, limit_start: int, limit_end: int,
+                file_start: int, file_end: int, files: typing.List[str], pass_time: float) -> typing.List[str]:
+    accept = AcceptIntoClean(station, passed_file, limit_start, limit_end)
+    try:
+        accepted: typing.List[str] = list()
+        for check_file in files:
+            data = accept.accept_file(file_start, file_end, check_file)
+            if data is None:
+                os.unlink(check_file)
+                continue
+            data, profile_pass_time = data
+            try:
+                append_history(data, "forge.pass", pass_time)
+                data.setncattr("data_pass_time", format_iso8601_time(profile_pass_time))
+            finally:
+                data.close()
+            accepted.append(check_file)
+        return accepted
+    finally:
+        accept.close()
+
+
+def _replace_file(original: typing.Optional[Dataset], replacement: Dataset) -> bool:
+    if original is None:
+        return True
+
+    original_pass_time = getattr(original, 'data_pass_time', None)
+    if original_pass_time is None:
+        return True
+    original_pass_time = parse_iso8601_time(str(original_pass_time)).timestamp()
+
+    replace_pass_time = getattr(replacement, 'data_pass_time', None)
+    if replace_pass_time is None:
+        return True
+    replace_pass_time = parse_iso8601_time(str(replace_pass_time)).timestamp()
+
+    return original_pass_time < replace_pass_time
+
+
+class _PipelinedWrite:
+    def __init__(self, connection: Connection, station: str):
+        self.connection = connection
+        self.station = station
+        self.put = ArchivePut(connection)
+        self._queue: "asyncio.Queue[typing.Optional[Path]]" = asyncio.Queue()
+        self._task: typing.Optional[asyncio.Task] = None
+        self._lock_range: typing.Tuple[int, int] = (0, 0)
+        self._queued: int = 0
+        self._written: int = 0
+        self._total: typing.Optional[int] = None
+
+    def start(self, start: int, end: int) -> None:
+        self._lock_range = (start * 1000, end * 1000)
+        self._task = asyncio.ensure_future(self._run())
+
+    def add(self, file: Path) -> None:
+        self._queued += 1
+        self._queue.put_nowait(file)
+
+    def check(self) -> None:
+        if self._task.done():
+            self._task.result()
+            raise RuntimeError("Clean data writing ended early")
+
+    async def _set_status(self) -> None:
+        if not self._total:
+            return
+        percent_done = (self._written / self._total) * 100.0
+        await self.connection.set_transaction_status(f"Writing clean data, {percent_done:.0f}% done")
+
+    async def _run(self) -> None:
+        locked = False
+        while True:
+            file = await self._queue.get()
+            if file is None:
+                break
+            # Held from the first accepted file, so the clean archive is not locked while passing runs alone
+            if not locked:
+                await self.put.preemptive_lock_range(self.station, "clean", *self._lock_range)
+                locked = True
+
+            _LOGGER.debug("Writing clean file %s/%s", self.station.upper(), file.name)
+            data = Dataset(str(file), 'r+')
+            await self.put.replace_exact(data, archive="clean", station=self.station, replace_existing=_replace_file)
+
+            try:
+                file.unlink()
+            except (OSError, FileNotFoundError):
+                pass
+
+            self._written += 1
+            await self._set_status()
+
+    async def complete(self) -> None:
+        self._total = self._queued
+        self._queue.put_nowait(None)
+        if self._written < self._total:
+            await self._set_status()
+        await self._task
+        await self.put.commit_index()
+
+    async def abort(self) -> None:
+        if self._task is None or self._task.done():
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+async def _run_pass(connection: Connection, working_directory: Path, station: str, start: int, end: int,
+                    executor: ProcessPoolExecutor, write: _PipelinedWrite,
+                    workers: typing.Optional[int] = None) -> None:
     index_offset = int(floor(start / (24 * 60 * 60)))
     total_count = int(ceil(end / (24 * 60 * 60))) - index_offset
     day_files: typing.List[typing.Set[Path]] = list()
@@ -62,106 +187,65 @@ async def _run_pass(connection: Connection, working_directory: Path, station: st
     _LOGGER.debug(f"Processing clean data {start},{end} split into {len(day_files)} days with {total_file_count} files")
 
     pass_time = time.time()
-    total_file_count = 0
-    current_year: typing.Optional[int] = None
-    current_filter: typing.Optional[AcceptIntoClean] = None
-    for day_index in range(len(day_files)):
-        file_start = (day_index + index_offset) * (24 * 60 * 60)
-        file_end = file_start + 24 * 60 * 60
+    concurrent_limit = (workers or os.cpu_count() or 1) + 2
+    completed_days: int = 0
+    launched_days: typing.Dict[asyncio.Future, int] = dict()
 
-        try:
-            await connection.set_transaction_status(f"Processing clean data, {(day_index / total_count) * 100.0:.0f}% done")
+    async def process_launched():
+        nonlocal completed_days
+
+        done, _ = await asyncio.wait(launched_days.keys(), return_when=asyncio.FIRST_COMPLETED)
+        for check in done:
+            file_start = launched_days.pop(check)
+            try:
+                accepted = check.result()
+            except:
+                _LOGGER.error(f"Error generating clean for %s day %d", station.upper(), file_start, exc_info=True)
+                raise
+            for file in accepted:
+                write.add(Path(file))
+            completed_days += 1
+        write.check()
+        await connection.set_transaction_status(f"Processing clean data, {(completed_days / total_count) * 100.0:.0f}% done")
+
+    try:
+        for day_index in range(len(day_files)):
+            if not day_files[day_index]:
+                completed_days += 1
+                continue
+            file_start = (day_index + index_offset) * (24 * 60 * 60)
+            file_end = file_start + 24 * 60 * 60
 
             file_year = time.gmtime(file_start).tm_year
-            if file_year != current_year:
-                if current_filter:
-                    current_filter.close()
-                current_year = file_year
-                passed_file = working_directory / f"passed/{station.upper()}-PASSED_s{current_year:04}0101.nc"
-                if not passed_file.exists():
-                    current_filter = None
-                else:
-                    year_start = start_of_year(current_year)
-                    year_end = start_of_year(current_year + 1)
-                    current_filter = AcceptIntoClean(
-                        station, str(passed_file),
-                        max(year_start, file_start),
-                        min(year_end, end),
-                    )
-
-            if current_filter is None:
+            passed_file = working_directory / f"passed/{station.upper()}-PASSED_s{file_year:04}0101.nc"
+            if not passed_file.exists():
                 for remove_file in day_files[day_index]:
                     remove_file.unlink()
+                completed_days += 1
                 continue
 
-            for check_file in day_files[day_index]:
-                data = current_filter.accept_file(file_start, file_end, str(check_file))
-                if data is None:
-                    check_file.unlink()
-                    continue
-                data, profile_pass_time = data
-                try:
-                    append_history(data, "forge.pass", pass_time)
-                    data.setncattr("data_pass_time", format_iso8601_time(profile_pass_time))
-                finally:
-                    data.close()
-                total_file_count += 1
-        except:
-            _LOGGER.error(f"Error generating clean for %s day %d", station.upper(), file_start, exc_info=True)
-            raise
-
-    if current_filter:
-        current_filter.close()
-
-
-async def _write_data(connection: Connection, station: str, start: int, end: int, source: Path) -> None:
-    put = ArchivePut(connection)
-    await put.preemptive_lock_range(station, "clean", start * 1000, end * 1000)
-
-    write_files: typing.List[Path] = list()
-    for file in source.iterdir():
-        if not file.name.endswith('.nc'):
-            continue
-        if not file.is_file():
-            continue
-        write_files.append(file)
-        if len(write_files) % 256 == 0:
-            await asyncio.sleep(0)
-
-    for idx in range(len(write_files)):
-        _LOGGER.debug("Writing clean file %s/%s", station.upper(), write_files[idx].name)
-
-        def replace_file(original: typing.Optional[Dataset], replacement: Dataset) -> bool:
-            if original is None:
-                return True
-
-            original_pass_time = getattr(original, 'data_pass_time', None)
-            if original_pass_time is None:
-                return True
-            original_pass_time = parse_iso8601_time(str(original_pass_time)).timestamp()
+            # The filter limits are the same as a sequential pass starting each year at its first day
+            limit_start = max(start_of_year(file_year), start)
+            limit_end = min(start_of_year(file_year + 1), end)
+            launched = asyncio.get_event_loop().run_in_executor(
+                executor, _accept_day,
+                station, str(passed_file), limit_start, limit_end,
+                file_start, file_end, [str(f) for f in day_files[day_index]], pass_time,
+            )
+            launched_days[launched] = file_start
+            while len(launched_days) > concurrent_limit:
+                await process_launched()
 
-            replace_pass_time = getattr(replacement, 'data_pass_time', None)
-            if replace_pass_time is None:
-                return True
-            replace_pass_time = parse_iso8601_time(str(replace_pass_time)).timestamp()
+        while launched_days:
+            await process_launched()
+    finally:
+        for launched in launched_days.keys():
+            launched.cancel()
 
-            return original_pass_time < replace_pass_time
 
-        data = Dataset(str(write_files[idx]), 'r+')
-        await put.replace_exact(data, archive="clean", station=station, replace_existing=replace_file)
-
-        try:
-            write_files[idx].unlink()
-        except (OSError, FileNotFoundError):
-            pass
-
-        percent_done = ((idx + 1) / len(write_files)) * 100.0
-        await connection.set_transaction_status(f"Writing clean data, {percent_done:.0f}% done")
-
-    await put.commit_index()
-
-
-async def update_clean_data(connection: Connection, station: str, start: float, end: float) -> None:
+async def update_clean_data(connection: Connection, station: str, start: float, end: float,
+                            executor: typing.Optional[ProcessPoolExecutor] = None,
+                            workers: typing.Optional[int] = None) -> None:
     start = int(floor(start / (24 * 60 * 60))) * 24 * 60 * 60
     end = int(ceil(end / (24 * 60 * 60))) * 24 * 60 * 60
     async with WorkingDirectory() as working_directory:
@@ -179,10 +263,17 @@ async def update_clean_data(connection: Connection, station: str, start: float,
         await connection.set_transaction_status("Loading passed ranges")
         await _fetch_passed(connection, station, start, end, passed_directory)
 
-        _LOGGER.debug(f"Running pass filtering for {station.upper()} {start},{end}")
-        await connection.set_transaction_status("Processing clean data")
-        await _run_pass(connection, working_directory, station, start, end)
+        # Accepted files are written while later days are still being passed
+        write = _PipelinedWrite(connection, station)
+        write.start(start, end)
+        try:
+            _LOGGER.debug(f"Running pass filtering for {station.upper()} {start},{end}")
+            await connection.set_transaction_status("Processing clean data")
+            with _executor(executor) as executor:
+                await _run_pass(connection, working_directory, station, start, end, executor, write, workers)
 
-        _LOGGER.debug(f"Writing clean data for {station.upper()} {start},{end}")
-        await connection.set_transaction_status("Writing clean data")
-        await _write_data(connection, station, start, end, data_directory)
+            _LOGGER.debug(f"Writing clean data for {station.upper()} {start},{end}")
+            await connection.set_transaction_status("Writing clean data")
+            await write.complete()
+        finally:
+            await write.abort()
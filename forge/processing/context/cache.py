@@ -0,0 +1,52 @@
+import typing
+import numpy as np
+from netCDF4 import Variable
+
+
+class DecodeCache:
+    def __init__(self):
+        self._decoded: typing.Dict[str, np.ndarray] = dict()
+
+    @staticmethod
+    def _key(var: Variable) -> str:
+        group_path = var.group().path
+        if group_path.endswith('/'):
+            return group_path + var.name
+        return group_path + '/' + var.name
+
+    def __len__(self) -> int:
+        return len(self._decoded)
+
+    def read(self, var: Variable) -> np.ndarray:
+        key = self._key(var)
+        values = self._decoded.get(key)
+        if values is None:
+            if len(var.shape):
+                values = var[...].data
+            else:
+                values = np.array(var[...], dtype=var.dtype)
+            values.setflags(write=False)
+            self._decoded[key] = values
+        return values
+
+    def write(self, var: Variable, index, values: np.ndarray) -> None:
+        var[index] = values
+
+        key = self._key(var)
+        existing = self._decoded.get(key)
+        if existing is None:
+            return
+        if existing.shape != var.shape:
+            del self._decoded[key]
+            return
+        updated = np.array(existing)
+        try:
+            updated[index] = values
+        except (ValueError, TypeError, IndexError):
+            del self._decoded[key]
+            return
+        updated.setflags(write=False)
+        self._decoded[key] = updated
+
+    def invalidate(self, var: Variable) -> None:
+        self._decoded.pop(self._key(var), None)
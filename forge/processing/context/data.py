@@ -10,6 +10,7 @@ from forge.data.structure.history import append_history
 from forge.data.structure.timeseries import time_coordinate, cutsize_variable, cutsize_coordinate, variable_coordinates
 from forge.data.structure.variable import variable_cutsize as setup_cutsize
 from .variable import SelectedVariable, EmptySelectedVariable, DataVariable
+from .cache import DecodeCache
 from .selection import VariableSelection
 
 
@@ -27,8 +28,8 @@ class SelectedData(ABC):
         raise NotImplementedError
 
     @classmethod
-    def from_file(cls, data: Dataset) -> "SelectedData":
-        return FileData(data)
+    def from_file(cls, data: Dataset, cache: typing.Optional[DecodeCache] = None) -> "SelectedData":
+        return FileData(data, cache)
 
     @classmethod
     def empty_placeholder(cls) -> "SelectedData":
@@ -239,8 +240,9 @@ class EmptySelectedData(SelectedData):
 
 
 class FileData(SelectedData):
-    def __init__(self, root: Dataset):
+    def __init__(self, root: Dataset, cache: typing.Optional[DecodeCache] = None):
         self._root = root
+        self._cache = cache if cache is not None else DecodeCache()
         self._time_start = -MAX_I64
         self._time_end = MAX_I64
         self._times: typing.Optional[np.ndarray] = None
@@ -269,10 +271,10 @@ class FileData(SelectedData):
             if raw is None or len(raw.shape) != 1 or raw.shape[0] == 0:
                 self._times = np.empty(0, dtype=np.int64)
             else:
-                unmasked = raw[:].data
+                unmasked = self._cache.read(raw)
                 first = np.searchsorted(unmasked, self._time_start, side='left')
                 last = np.searchsorted(unmasked, self._time_end, side='right')
-                self._times = raw[first:last].data
+                self._times = unmasked[first:last]
 
         return self._times
 
@@ -280,6 +282,10 @@ class FileData(SelectedData):
         self._time_start = max(self._time_start, start_ms)
         self._time_end = min(self._time_end, end_ms)
 
+    def set_wavelengths(self, wavelengths: "typing.Union[typing.List[float], typing.Tuple[float, ...], np.ndarray]") -> None:
+        super().set_wavelengths(wavelengths)
+        self._cache.invalidate(self.root.groups["data"].variables["wavelength"])
+
     def _find_variable(
             self,
             matcher: typing.Callable[[Variable], bool],
@@ -306,7 +312,7 @@ class FileData(SelectedData):
             aux_matchers.append(VariableSelection.matcher(aux))
 
         for matched_variable in self._find_variable(VariableSelection.matcher(variable)):
-            matched_variable = DataVariable.from_data(matched_variable)
+            matched_variable = DataVariable.from_data(matched_variable, self._cache)
             matched_variable.restrict_times(self._time_start, self._time_end)
             if len(matched_variable.times) == 0 or matched_variable.times.shape[0] == 0:
                 continue
@@ -315,7 +321,7 @@ class FileData(SelectedData):
             for aux in aux_matchers:
                 try:
                     hit = next(self._find_variable(aux))
-                    matched_aux.append(DataVariable.aligned_with(hit, matched_variable))
+                    matched_aux.append(DataVariable.aligned_with(hit, matched_variable, self._cache))
                 except StopIteration:
                     matched_aux.append(EmptySelectedVariable(matched_variable.times))
 
@@ -361,7 +367,7 @@ class FileData(SelectedData):
                 var.variable_id = "F1"
                 var[:] = 0
 
-            matched_variable = DataVariable.from_data(var)
+            matched_variable = DataVariable.from_data(var, self._cache)
             matched_variable.restrict_times(self._time_start, self._time_end)
             if len(matched_variable.times) == 0 or matched_variable.times.shape[0] == 0:
                 continue
@@ -384,7 +390,7 @@ class FileData(SelectedData):
                 raise FileNotFoundError("requested variable not found")
             return EmptySelectedVariable(for_variable.times)
 
-        return DataVariable.aligned_with(hit, for_variable)
+        return DataVariable.aligned_with(hit, for_variable, self._cache)
 
     def get_output(
             self,
@@ -495,6 +501,6 @@ class FileData(SelectedData):
                 var.ancillary_variables = "cut_size"
             variable_coordinates(destination, var)
 
-        var = DataVariable.output_for(var, for_variable)
+        var = DataVariable.output_for(var, for_variable, self._cache)
         var.restrict_times(self._time_start, self._time_end)
         return self.OutputContext(var)
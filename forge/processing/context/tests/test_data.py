@@ -6,6 +6,7 @@ from forge.data.structure import instrument_timeseries
 from forge.data.structure.timeseries import time_coordinate, cutsize_variable, cutsize_coordinate, averaged_time_variable
 from forge.data.structure.variable import variable_wavelength
 from forge.processing.context.data import SelectedData
+from forge.processing.context.cache import DecodeCache
 
 
 def _setup_file(file: Dataset, times):
@@ -650,3 +651,34 @@ def test_system_flags(first_data: SelectedData):
         assert system_flags[...].tolist() == [1, 0, 0, 0]
         count += 1
     assert count == 1
+
+
+def test_shared_decode(tmp_path):
+    file = Dataset(str(tmp_path / "shared.nc"), 'w', format='NETCDF4')
+    _make_file(file, [1000, 2000, 3000, 4000])
+    cache = DecodeCache()
+    first = SelectedData.from_file(file, cache)
+    second = SelectedData.from_file(file, cache)
+
+    for var1, var2 in first.select_variable({"variable_name": "var1"}, {"variable_name": "var2"}):
+        assert var1[...].tolist() == [100.0, 101.0, 102.0, 103.0]
+        assert var2[...].tolist() == [200.0, 201.0, 202.0, 203.0]
+        var1[0] = 99.0
+        var2[0] = 199.0
+    assert len(cache) == 3
+
+    for var1 in second.select_variable({"variable_name": "var1"}):
+        assert var1[...].tolist() == [99.0, 101.0, 102.0, 103.0]
+        assert var1.times.tolist() == [1000, 2000, 3000, 4000]
+    for var2 in second.select_variable({"variable_name": "var2"}):
+        assert var2[...].tolist() == [200.0, 201.0, 202.0, 203.0]
+    assert len(cache) == 3
+    assert file.groups["data"].variables["var1"][...].tolist() == [99.0, 101.0, 102.0, 103.0]
+
+    second.restrict_times(2000, 3000)
+    for var1 in second.select_variable({"variable_name": "var1"}):
+        assert var1[...].tolist() == [101.0, 102.0]
+        var1[...] = [1.0, 2.0]
+    for var1 in first.select_variable({"variable_name": "var1"}):
+        assert var1[...].tolist() == [99.0, 1.0, 2.0, 103.0]
+    assert file.groups["data"].variables["var1"][...].tolist() == [99.0, 1.0, 2.0, 103.0]
@@ -4,6 +4,7 @@ from abc import ABC, abstractmethod
 from math import nan, ceil
 from netCDF4 import Dataset, Variable
 from forge.const import MAX_I64
+from .cache import DecodeCache
 
 
 class SelectedVariable(ABC):
@@ -213,9 +214,12 @@ class EmptySelectedVariable(SelectedVariable):
 
 
 class DataVariable(SelectedVariable):
-    def __init__(self, source: Variable):
+    def __init__(self, source: Variable, cache: typing.Optional[DecodeCache] = None):
         self._variable = source
-        if len(source.shape):
+        self._cache = cache
+        if cache is not None:
+            self._values = np.array(cache.read(source))
+        elif len(source.shape):
             self._values = source[...].data
         else:
             self._values = np.array(source[...], dtype=source.dtype)
@@ -237,17 +241,20 @@ class DataVariable(SelectedVariable):
         while source is not None:
             var = source.variables.get("time")
             if var is not None:
+                if self._cache is not None:
+                    return self._cache.read(var)
                 return var[...].data
             source = source.parent
         raise ValueError("time variable not available")
 
     @classmethod
-    def from_data(cls, source: Variable) -> "DataVariable":
-        return cls(source)
+    def from_data(cls, source: Variable, cache: typing.Optional[DecodeCache] = None) -> "DataVariable":
+        return cls(source, cache)
 
     @classmethod
-    def aligned_with(cls, source: Variable, sibling: SelectedVariable) -> "DataVariable":
-        v = cls(source)
+    def aligned_with(cls, source: Variable, sibling: SelectedVariable,
+                     cache: typing.Optional[DecodeCache] = None) -> "DataVariable":
+        v = cls(source, cache)
 
         if len(sibling.times.shape) == 0:
             if v._is_constant:
@@ -307,8 +314,9 @@ class DataVariable(SelectedVariable):
         return v
 
     @classmethod
-    def output_for(cls, output: Variable, for_variable: SelectedVariable) -> "DataVariable":
-        return cls.aligned_with(output, for_variable)
+    def output_for(cls, output: Variable, for_variable: SelectedVariable,
+                   cache: typing.Optional[DecodeCache] = None) -> "DataVariable":
+        return cls.aligned_with(output, for_variable, cache)
 
     @property
     def _is_constant(self) -> bool:
@@ -353,18 +361,24 @@ class DataVariable(SelectedVariable):
         if self._averaged_weights is not None:
             self._averaged_weights = self._averaged_weights[begin_index:end_index]
 
+    def _write(self, index, values: np.ndarray) -> None:
+        if self._cache is not None:
+            self._cache.write(self.variable, index, values)
+        else:
+            self.variable[index] = values
+
     def commit(self) -> None:
         if "time" not in self.variable.dimensions:
             if self._is_constant:
-                self.variable[:] = self._values
+                self._write(slice(None), self._values)
             else:
                 if self._is_empty:
                     return
-                self.variable[:] = self._values[-1]
+                self._write(slice(None), self._values[-1])
             return
 
         if self._is_constant:
-            self.variable[:] = self._values
+            self._write(slice(None), self._values)
             return
 
         if self._is_empty:
@@ -372,10 +386,10 @@ class DataVariable(SelectedVariable):
 
         if self._time_origin_indices is None:
             if self._values.shape[0] == self.variable.shape[0]:
-                self.variable[:] = self._values
+                self._write(slice(None), self._values)
                 return
             begin_index, end_index = self._time_slice(self._raw_times, int(self._times[0]), int(self._times[-1]))
-            self.variable[begin_index:end_index] = self._values
+            self._write(slice(begin_index, end_index), self._values)
             return
 
         if len(self._time_origin_indices) == 0:
@@ -387,7 +401,7 @@ class DataVariable(SelectedVariable):
         from forge.data.merge.timealign import incoming_before
         indices = incoming_before(raw_times[begin_index:end_index], self._times)
 
-        self.variable[begin_index:end_index] = self._values[indices]
+        self._write(slice(begin_index, end_index), self._values[indices])
 
     @property
     def values(self) -> np.ndarray:
@@ -0,0 +1,74 @@
+import typing
+import argparse
+import time
+import numpy as np
+from forge.solver import newton_raphson
+from forge.units import ZERO_C_IN_K
+from forge.dewpoint import svp, dewpoint, temperature
+
+
+def _reference_svp_solve(svp_target: np.ndarray, t_initial: np.ndarray, over_water: bool) -> np.ndarray:
+    return newton_raphson(np.array(svp_target), lambda t: svp(t, over_water=over_water),
+                          x0=np.array(t_initial), x1=t_initial + 1.0)
+
+
+def _synthetic_humidity(days: int, seed: int) -> typing.Tuple[np.ndarray, np.ndarray]:
+    generator = np.random.default_rng(seed)
+    seconds = np.arange(days * 86400, dtype=np.float64)
+    t = 10.0 + 15.0 * np.sin(seconds * (2.0 * np.pi / (365.0 * 86400.0))) + \
+        5.0 * np.sin(seconds * (2.0 * np.pi / 86400.0)) + generator.normal(0.0, 0.5, seconds.shape)
+    rh = np.clip(60.0 - 20.0 * np.sin(seconds * (2.0 * np.pi / 86400.0)) +
+                 generator.normal(0.0, 5.0, seconds.shape), 1.0, 100.0)
+    invalid = generator.random(seconds.shape) < 0.01
+    t[invalid] = np.nan
+    return t, rh
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forge humidity conversion benchmark.")
+
+    parser.add_argument('--days',
+                        dest='days', type=int, default=7,
+                        help="number of days of one second data")
+    parser.add_argument('--seed',
+                        dest='seed', type=int, default=1,
+                        help="synthetic data random seed")
+    parser.add_argument('--over-water',
+                        dest='over_water', action='store_true',
+                        help="use saturation vapor pressure over water at all temperatures")
+
+    args = parser.parse_args()
+
+    t, rh = _synthetic_humidity(args.days, args.seed)
+    print(f"{t.shape[0]} one second values")
+
+    # Compile before timing
+    dewpoint(t[:16], rh[:16], over_water=args.over_water)
+
+    begin_time = time.perf_counter()
+    t_kelvin = t + ZERO_C_IN_K
+    svp_target = svp(t_kelvin, over_water=args.over_water) * (rh / 100.0)
+    reference = _reference_svp_solve(svp_target, t_kelvin, args.over_water) - ZERO_C_IN_K
+    reference_elapsed = time.perf_counter() - begin_time
+
+    begin_time = time.perf_counter()
+    result = dewpoint(t, rh, over_water=args.over_water)
+    dewpoint_elapsed = time.perf_counter() - begin_time
+
+    begin_time = time.perf_counter()
+    temperature(rh, result, over_water=args.over_water)
+    temperature_elapsed = time.perf_counter() - begin_time
+
+    valid = np.isfinite(reference)
+    print(f"Reference dewpoint       {reference_elapsed:8.3f} seconds, "
+          f"{reference_elapsed / t.shape[0] * 1E9:8.1f} ns/value")
+    print(f"Dewpoint                 {dewpoint_elapsed:8.3f} seconds, "
+          f"{dewpoint_elapsed / t.shape[0] * 1E9:8.1f} ns/value, {reference_elapsed / dewpoint_elapsed:.1f}x")
+    print(f"Temperature              {temperature_elapsed:8.3f} seconds, "
+          f"{temperature_elapsed / t.shape[0] * 1E9:8.1f} ns/value")
+    print(f"Maximum dewpoint difference {np.max(np.abs(result[valid] - reference[valid])):.3e}, "
+          f"invalid values {'match' if np.array_equal(valid, np.isfinite(result)) else 'DIFFER'}")
+
+
+if __name__ == '__main__':
+    main()
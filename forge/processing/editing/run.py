@@ -11,6 +11,7 @@ from forge.data.structure.timeseries import time_coordinate
 from ..station.lookup import station_data
 from ..context.available import AvailableData
 from ..context.data import SelectedData
+from ..context.cache import DecodeCache
 from ..context.selection import InstrumentSelection
 from .directives import apply_edit_directives
 
@@ -27,6 +28,7 @@ class EditingAvailableDay(AvailableData):
         self._station = station
         self._output_directory = output_directory
         self._data_files = data_files
+        self._decoded: typing.Dict[int, DecodeCache] = dict()
         self._day_start_ms = day_start * 1000
         self._day_end_ms = day_end * 1000 if day_end is not None else self._day_start_ms + 24 * 60 * 60 * 1000
 
@@ -34,6 +36,14 @@ class EditingAvailableDay(AvailableData):
         for f in self._data_files:
             f.close()
         self._data_files.clear()
+        self._decoded.clear()
+
+    def _selected_file(self, file: Dataset) -> SelectedData:
+        cache = self._decoded.get(id(file))
+        if cache is None:
+            cache = DecodeCache()
+            self._decoded[id(file)] = cache
+        return EditingSelectedData.from_file(file, cache)
 
     def select_instrument(
             self,
@@ -57,7 +67,7 @@ class EditingAvailableDay(AvailableData):
                 for check_aux in self._data_files:
                     if not matcher(check_aux):
                         continue
-                    aux_matched.append(EditingSelectedData.from_file(check_aux))
+                    aux_matched.append(self._selected_file(check_aux))
                     break
                 else:
                     aux_matched.append(EditingSelectedData.empty_placeholder())
@@ -67,7 +77,7 @@ class EditingAvailableDay(AvailableData):
         for check_instrument in self._data_files:
             if not match_instrument(check_instrument):
                 continue
-            matched_instrument = EditingSelectedData.from_file(check_instrument)
+            matched_instrument = self._selected_file(check_instrument)
             matched_instrument.restrict_times(start, end)
 
             ready_aux()
@@ -95,7 +105,7 @@ class EditingAvailableDay(AvailableData):
             for check_instrument in self._data_files:
                 if not matcher(check_instrument):
                     continue
-                matched_instrument = EditingSelectedData.from_file(check_instrument)
+                matched_instrument = self._selected_file(check_instrument)
                 matched_instrument.restrict_times(start, end)
                 result.append(matched_instrument)
                 break
@@ -138,7 +148,7 @@ class EditingAvailableDay(AvailableData):
             for check_instrument in self._data_files:
                 if not matcher(check_instrument):
                     continue
-                matched_instrument = EditingSelectedData.from_file(check_instrument)
+                matched_instrument = self._selected_file(check_instrument)
                 matched_instrument.restrict_times(start, end)
                 matched_inputs.append(matched_instrument)
                 hit_inputs.append(matched_instrument)
@@ -188,7 +198,7 @@ class EditingAvailableDay(AvailableData):
         time_var = time_coordinate(data_group)
         time_var[:] = output_times
 
-        output_selected = EditingSelectedData.from_file(root)
+        output_selected = self._selected_file(root)
         output_selected.restrict_times(start, end)
 
         yield output_selected, *matched_inputs
@@ -0,0 +1,138 @@
+import typing
+import asyncio
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from netCDF4 import Dataset
+
+_LOGGER = logging.getLogger(__name__)
+
+
+# Accumulation targets provide take_partial(), which returns everything integrated since the last call and resets
+# the target to empty, and merge_partial(), which appends a partial result.  Partial results are always merged in
+# file order, so the accumulated result is the same as integrating every file in sequence.
+class LatestValue:
+    def __init__(self, value: typing.Any = None):
+        self.value = value
+        self._changed: bool = False
+
+    def set(self, value: typing.Any) -> None:
+        self.value = value
+        self._changed = True
+
+    def take_partial(self) -> typing.Tuple[bool, typing.Any]:
+        result = (self._changed, self.value)
+        self._changed = False
+        return result
+
+    def merge_partial(self, partial: typing.Tuple[bool, typing.Any]) -> None:
+        changed, value = partial
+        if changed:
+            self.value = value
+
+
+def _integrate_file(integrate: typing.Callable[[Dataset], None], file: Path) -> None:
+    root = Dataset(str(file), 'r')
+    try:
+        integrate(root)
+    finally:
+        root.close()
+
+
+_worker_integration: typing.Optional[typing.Tuple[typing.Callable[[Dataset], None], typing.List[typing.Any]]] = None
+
+
+def _initialize_worker(integrate: typing.Callable[[Dataset], None], targets: typing.List[typing.Any]) -> None:
+    global _worker_integration
+    # Discard anything inherited from the parent, so each file returns only its own contribution
+    for target in targets:
+        target.take_partial()
+    _worker_integration = (integrate, targets)
+
+
+def _integrate_worker_file(file: Path) -> typing.List[typing.Any]:
+    integrate, targets = _worker_integration
+    _integrate_file(integrate, file)
+    return [target.take_partial() for target in targets]
+
+
+class ProductBuilder:
+    def __init__(self, workers: typing.Optional[int] = None):
+        if workers is None:
+            from forge.product.update import CONFIGURATION
+            workers = int(CONFIGURATION.get('PRODUCT.WORKERS', os.cpu_count() or 1))
+        self.workers = workers
+
+    @property
+    def queue_limit(self) -> int:
+        return max(self.workers * 2, 1)
+
+    class Integration:
+        def __init__(self, builder: "ProductBuilder", integrate: typing.Callable[[Dataset], None],
+                     targets: typing.Iterable[typing.Any]):
+            self.builder = builder
+            self.integrate = integrate
+            self.targets: typing.List[typing.Any] = list(targets)
+            self.files: int = 0
+            self._executor: typing.Optional[ProcessPoolExecutor] = None
+            self._in_flight: typing.Deque[asyncio.Future] = deque()
+
+        def _start_executor(self) -> ProcessPoolExecutor:
+            if self._executor is None:
+                # Forked, so the workers inherit the integration closure and targets as they are now, since
+                # neither can be pickled in general
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.builder.workers,
+                    mp_context=get_context("fork"),
+                    initializer=_initialize_worker,
+                    initargs=(self.integrate, self.targets),
+                )
+            return self._executor
+
+        async def _merge_next(self) -> None:
+            partials = await self._in_flight.popleft()
+            for target, partial in zip(self.targets, partials):
+                target.merge_partial(partial)
+            self.files += 1
+
+        async def __call__(self, file: Path) -> None:
+            if self.builder.workers <= 1:
+                _integrate_file(self.integrate, file)
+                self.files += 1
+                await asyncio.sleep(0)
+                return
+
+            executor = self._start_executor()
+            while len(self._in_flight) >= self.builder.queue_limit:
+                await self._merge_next()
+            self._in_flight.append(asyncio.get_event_loop().run_in_executor(executor, _integrate_worker_file, file))
+
+        async def complete(self) -> None:
+            while self._in_flight:
+                await self._merge_next()
+
+        def _shutdown(self) -> None:
+            for f in self._in_flight:
+                f.cancel()
+            self._in_flight.clear()
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+        async def __aenter__(self) -> "ProductBuilder.Integration":
+            return self
+
+        async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+            try:
+                if exc_type is None:
+                    await self.complete()
+            finally:
+                self._shutdown()
+            _LOGGER.debug("Integrated %d files", self.files)
+
+    def integration(self, integrate: typing.Callable[[Dataset], None],
+                    *targets: typing.Any) -> "ProductBuilder.Integration":
+        return self.Integration(self, integrate, targets)
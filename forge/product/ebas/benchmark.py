@@ -0,0 +1,177 @@
+import typing
+import asyncio
+import argparse
+import shutil
+import time
+import numpy as np
+from math import nan, isfinite
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from netCDF4 import Dataset
+from forge.data.flags import declare_flag
+from forge.data.structure import instrument_timeseries
+from forge.data.structure.timeseries import time_coordinate
+from forge.product.selection import InstrumentSelection
+from . import file as ebas_file
+from .file import EBASFile
+
+
+def _synthetic_day(destination: Path, station: str, day_start: int, interval: int) -> None:
+    times = np.arange(day_start * 1000, (day_start + 86400) * 1000, interval * 1000, dtype=np.int64)
+    generator = np.random.default_rng(day_start)
+    file = Dataset(str(destination / f"{station.upper()}-S11_s{day_start}.nc"), 'w', format='NETCDF4')
+    try:
+        instrument_timeseries(file, station, "S11", day_start, day_start + 86400, interval, {"aerosol", "scattering"})
+        data = file.createGroup("data")
+        time_coordinate(data)[:] = times
+
+        var = data.createVariable('system_flags', 'u8', ('time',), fill_value=False)
+        var.variable_id = "F1"
+        abnormal_bit = declare_flag(var, "abnormal_data_episode")
+        other_bit = declare_flag(var, "data_contamination_benchmark")
+        flags = np.zeros(times.shape, dtype=np.uint64)
+        flags[generator.random(times.shape) < 0.02] |= abnormal_bit
+        flags[generator.random(times.shape) < 0.05] |= other_bit
+        var[:] = flags
+
+        data.createDimension('wavelength', 3)
+        var = data.createVariable('wavelength', 'f8', ('wavelength',), fill_value=nan)
+        var[:] = [450, 550, 700]
+
+        for name in ('scattering_coefficient', 'backscattering_coefficient'):
+            var = data.createVariable(name, 'f8', ('time', 'wavelength'), fill_value=nan)
+            values = generator.lognormal(3.0, 1.0, (times.shape[0], 3))
+            values[generator.random(times.shape) < 0.01, :] = nan
+            var[:] = values
+
+        for name, standard_name, mean, deviation in (
+                ('sample_temperature', 'air_temperature', 25.0, 1.0),
+                ('sample_pressure', 'air_pressure', 880.0, 5.0),
+                ('sample_humidity', 'relative_humidity', 30.0, 8.0),
+        ):
+            var = data.createVariable(name, 'f8', ('time',), fill_value=nan)
+            var.standard_name = standard_name
+            var[:] = generator.normal(mean, deviation, times.shape)
+    finally:
+        file.close()
+
+
+# The per-row encoding that the vectorized path replaces, retained as the reference for output comparison
+def _reference_encode_values(values: np.ndarray,
+                             round_digits: typing.Optional[int] = None) -> typing.List[typing.Optional[float]]:
+    if round_digits is not None:
+        return [
+            (round(float(v), round_digits) if isfinite(v) else None)
+            for v in values
+        ]
+    return [
+        (float(v) if isfinite(v) else None)
+        for v in values
+    ]
+
+
+def _reference_get_flags(self: EBASFile.Flags, times: np.ndarray,
+                         valid_at_time: np.ndarray) -> typing.List[typing.List[int]]:
+    if not self._contents.has_any_valid:
+        return [
+            (self._EMPTY_FLAGS if v else self._MISSING_FLAGS) for v in valid_at_time
+        ]
+
+    flag_bits = self._contents.get_values(times, dtype=np.uint64)
+    flag_bits[np.invert(valid_at_time)] = 0xFFFF_FFFF_FFFF_FFFF
+    return [
+        (self.to_ebas_flags(int(bits)) if int(bits) != 0xFFFF_FFFF_FFFF_FFFF else self._MISSING_FLAGS) for bits in flag_bits
+    ]
+
+
+async def _run(file_type: typing.Type[EBASFile], station: str, start_epoch: int, end_epoch: int,
+               source: Path, destination: Path) -> float:
+    class File(file_type):
+        async def fetch_instrument_files(
+                self,
+                selections: typing.Iterable[InstrumentSelection],
+                archive: str,
+                destination_directory: Path,
+                fetched: typing.Optional[typing.Callable[[Path], typing.Awaitable[None]]] = None,
+        ) -> None:
+            for data_file in sorted(source.iterdir()):
+                shutil.copy(data_file, destination_directory / data_file.name)
+                if fetched:
+                    await fetched(destination_directory / data_file.name)
+
+    begin_time = time.monotonic()
+    await File(station, start_epoch * 1000, end_epoch * 1000)(destination)
+    return time.monotonic() - begin_time
+
+
+def _compare(reference: Path, check: Path) -> typing.List[str]:
+    reference_files = sorted([f.name for f in reference.iterdir()])
+    check_files = sorted([f.name for f in check.iterdir()])
+    if reference_files != check_files:
+        return [f"file set differs: {reference_files} vs {check_files}"]
+    mismatched: typing.List[str] = list()
+    for name in reference_files:
+        if (reference / name).read_bytes() != (check / name).read_bytes():
+            mismatched.append(name)
+    return mismatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forge EBAS file encoding benchmark.")
+
+    parser.add_argument('--station',
+                        dest='station', default='bnd',
+                        help="station code")
+    parser.add_argument('--type',
+                        dest='type', default='tsi3563nephelometer_lev0',
+                        help="EBAS output type code")
+    parser.add_argument('--days',
+                        dest='days', type=int, default=365,
+                        help="number of days of synthetic data")
+    parser.add_argument('--interval',
+                        dest='interval', type=int, default=60,
+                        help="record interval in seconds")
+
+    args = parser.parse_args()
+    file_type = EBASFile.from_type_code(args.type)
+    start_epoch = 1609459200
+    end_epoch = start_epoch + args.days * 86400
+
+    with TemporaryDirectory() as source, TemporaryDirectory() as reference_output, \
+            TemporaryDirectory() as vectorized_output:
+        source = Path(source)
+        reference_output = Path(reference_output)
+        vectorized_output = Path(vectorized_output)
+        for day in range(args.days):
+            _synthetic_day(source, args.station, start_epoch + day * 86400, args.interval)
+        print(f"Output: {args.type} for {args.days} days at {args.interval} seconds")
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        vectorized_encode_values = ebas_file._encode_values
+        vectorized_get_flags = EBASFile.Flags.get_flags
+        ebas_file._encode_values = _reference_encode_values
+        EBASFile.Flags.get_flags = _reference_get_flags
+        try:
+            elapsed = loop.run_until_complete(_run(file_type, args.station, start_epoch, end_epoch,
+                                                   source, reference_output))
+        finally:
+            ebas_file._encode_values = vectorized_encode_values
+            EBASFile.Flags.get_flags = vectorized_get_flags
+        print(f" Reference: {elapsed:8.3f} seconds")
+
+        elapsed = loop.run_until_complete(_run(file_type, args.station, start_epoch, end_epoch,
+                                               source, vectorized_output))
+        print(f"Vectorized: {elapsed:8.3f} seconds")
+        loop.close()
+
+        mismatched = _compare(reference_output, vectorized_output)
+        if mismatched:
+            print("OUTPUT MISMATCH: " + ", ".join(mismatched))
+            exit(1)
+        print("Output identical")
+
+
+if __name__ == '__main__':
+    main()
@@ -15,6 +15,7 @@ from ebas.domain.basic_domain_logic.time_period import estimate_period_code, est
 from nilutility.datatypes import DataObject
 from forge.timeparse import parse_iso8601_time
 from forge.product.selection import InstrumentSelection, VariableSelection
+from forge.product.builder import ProductBuilder
 from forge.processing.station.lookup import station_data
 from forge.archive.client.connection import Connection, LockBackoff, LockDenied
 from forge.archive.client import index_lock_key, data_lock_key
@@ -30,6 +31,40 @@ async def _default_connection() -> Connection:
     return await Connection.default_connection('EBAS file generation')
 
 
+def _encode_values(values: np.ndarray, round_digits: typing.Optional[int] = None) -> typing.List[typing.Optional[float]]:
+    values = np.asarray(values, dtype=np.float64)
+    valid = np.isfinite(values)
+    if round_digits is None:
+        converted = values.astype(object)
+        converted[np.invert(valid)] = None
+        return converted.tolist()
+    if round_digits < 0 or round_digits > 15:
+        return [(round(float(v), round_digits) if isfinite(v) else None) for v in values]
+
+    factor = 10.0 ** round_digits
+    with np.errstate(invalid='ignore', over='ignore'):
+        scaled = values * factor
+        converted = np.rint(scaled) / factor
+        # Python rounding is exact on the decimal value, so only scaled values at (or within the multiply error of)
+        # a half, or too large to have a fraction at all, can round differently and those are done individually
+        fraction = np.abs(scaled - np.trunc(scaled))
+        inexact = valid & ((np.abs(fraction - 0.5) <= 4 * np.spacing(np.abs(scaled))) |
+                           (np.abs(scaled) >= 2 ** 52))
+    converted = converted.astype(object)
+    converted[np.invert(valid)] = None
+    for idx in np.flatnonzero(inexact):
+        converted[idx] = round(float(values[idx]), round_digits)
+    return converted.tolist()
+
+
+def _lookup_flags(choices: typing.List[typing.List[int]], index: np.ndarray) -> typing.List[typing.List[int]]:
+    lookup = np.empty((len(choices),), dtype=object)
+    for i in range(len(choices)):
+        lookup[i] = choices[i]
+    # Each row gets its own list, since the flag lists may be modified per row after this
+    return [list(flags) for flags in lookup[index]]
+
+
 class EBASFile(ABC):
     def __init__(self, station: str, start_epoch_ms: int, end_epoch_ms: int):
         self.station = station.lower()
@@ -161,6 +196,18 @@ class EBASFile(ABC):
 
             self._values.append((time_values, var_values))
 
+        def take_partial(self) -> typing.Tuple[typing.List[typing.Tuple[np.ndarray, np.ndarray]], typing.Optional[str]]:
+            result = (self._values, self._variable_format)
+            self._values = list()
+            self._variable_format = None
+            return result
+
+        def merge_partial(self, partial: typing.Tuple[typing.List[typing.Tuple[np.ndarray, np.ndarray]], typing.Optional[str]]) -> None:
+            values, variable_format = partial
+            self._values.extend(values)
+            if variable_format is not None:
+                self._variable_format = variable_format
+
         @property
         def has_any_valid(self) -> bool:
             for _, values in self._values:
@@ -194,16 +241,7 @@ class EBASFile(ABC):
                     else:
                         round_digits = int(check.group(1))
 
-            if round_digits is not None:
-                converted_values = [
-                    (round(float(v), round_digits) if isfinite(v) else None)
-                    for v in values
-                ]
-            else:
-                converted_values = [
-                    (float(v) if isfinite(v) else None)
-                    for v in values
-                ]
+            converted_values = _encode_values(values, round_digits)
 
             nas.variables.append(DataObject(values_=converted_values, flags=flags, metadata=self.metadata))
 
@@ -273,17 +311,24 @@ class EBASFile(ABC):
 
             walk_group(root)
 
+        def take_partial(self) -> typing.Any:
+            return self._contents.take_partial()
+
+        def merge_partial(self, partial: typing.Any) -> None:
+            self._contents.merge_partial(partial)
+
         def get_flags(self, times: np.ndarray, valid_at_time: np.ndarray) -> typing.List[typing.List[int]]:
             if not self._contents.has_any_valid:
-                return [
-                    (self._EMPTY_FLAGS if v else self._MISSING_FLAGS) for v in valid_at_time
-                ]
+                return _lookup_flags([self._MISSING_FLAGS, self._EMPTY_FLAGS], valid_at_time.astype(np.intp))
 
             flag_bits = self._contents.get_values(times, dtype=np.uint64)
             flag_bits[np.invert(valid_at_time)] = 0xFFFF_FFFF_FFFF_FFFF
-            return [
-                (self.to_ebas_flags(int(bits)) if int(bits) != 0xFFFF_FFFF_FFFF_FFFF else self._MISSING_FLAGS) for bits in flag_bits
-            ]
+            # Only a handful of distinct bit patterns occur, so convert each once and share the result
+            unique_bits, unique_index = np.unique(flag_bits, return_inverse=True)
+            return _lookup_flags([
+                (self.to_ebas_flags(bits) if bits != 0xFFFF_FFFF_FFFF_FFFF else self._MISSING_FLAGS)
+                for bits in unique_bits.tolist()
+            ], unique_index)
 
     def flags(self) -> "EBASFile.Flags":
         return self.Flags(self)
@@ -336,6 +381,17 @@ class EBASFile(ABC):
                 else:
                     self.fields[field_name] = self._simplify_value(var)
 
+        def take_partial(self) -> typing.Tuple[typing.Dict[str, typing.Any], typing.Dict[str, typing.Any]]:
+            result = (self.fields, self.attributes)
+            self.fields = dict()
+            self.attributes = dict()
+            return result
+
+        def merge_partial(self, partial: typing.Tuple[typing.Dict[str, typing.Any], typing.Dict[str, typing.Any]]) -> None:
+            fields, attributes = partial
+            self.fields.update(fields)
+            self.attributes.update(attributes)
+
         def set_serial_number(self, nas: nasa_ames.EbasNasaAmes) -> None:
             if getattr(nas.metadata, 'instr_serialno', None) is not None:
                 return
@@ -521,6 +577,7 @@ class EBASFile(ABC):
             selections: typing.Iterable[InstrumentSelection],
             archive: str,
             destination_directory: Path,
+            fetched: typing.Optional[typing.Callable[[Path], typing.Awaitable[None]]] = None,
     ) -> None:
         async with await self.get_archive_connection() as connection:
             backoff = LockBackoff()
@@ -534,7 +591,7 @@ class EBASFile(ABC):
                         for sel in selections:
                             await sel.fetch_files(connection, self.station, archive,
                                                   self.start_epoch_ms, self.end_epoch_ms,
-                                                  destination_directory)
+                                                  destination_directory, fetched)
                     break
                 except LockDenied as ld:
                     _LOGGER.debug("Archive busy: %s", ld.status)
@@ -568,6 +625,8 @@ class EBASFile(ABC):
         def __init__(self, files: "EBASFile"):
             self.files = files
             self._nas: typing.Dict[str, nasa_ames.EbasNasaAmes] = dict()
+            self._created: typing.List[str] = list()
+            self._contexts: typing.List["EBASFile.MatrixData.Context"] = list()
 
         def __getitem__(self, matrix: str) -> nasa_ames.EbasNasaAmes:
             nas = self._nas.get(matrix)
@@ -575,6 +634,7 @@ class EBASFile(ABC):
                 nas = self.files.begin_file()
                 nas.metadata.matrix = matrix
                 self._nas[matrix] = nas
+                self._created.append(matrix)
             return nas
 
         def __iter__(self) -> typing.Iterator[nasa_ames.EbasNasaAmes]:
@@ -627,7 +687,8 @@ class EBASFile(ABC):
                 return {'time': selected}
 
         class Context:
-            def __init__(self, ctor: typing.Callable, *args, **kwargs):
+            def __init__(self, matrix: "EBASFile.MatrixData", ctor: typing.Callable, *args, **kwargs):
+                self.matrix = matrix
                 self._contents: typing.Dict[nasa_ames.EbasNasaAmes, typing.Any] = dict()
                 self._ctor = ctor
                 self._ctor_args = args
@@ -655,8 +716,29 @@ class EBASFile(ABC):
             def variables(self):
                 return self.values()
 
+            def take_partial(self) -> typing.List[typing.Tuple[str, typing.Any]]:
+                return [(nas.metadata.matrix, value.take_partial()) for nas, value in self._contents.items()]
+
+            def merge_partial(self, partial: typing.List[typing.Tuple[str, typing.Any]]) -> None:
+                for matrix, value in partial:
+                    self[self.matrix[matrix]].merge_partial(value)
+
         def context(self, ctor: typing.Callable, *args, **kwargs) -> "EBASFile.MatrixData.Context":
-            return self.Context(ctor, *args, **kwargs)
+            context = self.Context(self, ctor, *args, **kwargs)
+            self._contexts.append(context)
+            return context
+
+        def take_partial(self) -> typing.Tuple[typing.List[str], typing.List[typing.Any]]:
+            result = (self._created, [context.take_partial() for context in self._contexts])
+            self._created = list()
+            return result
+
+        def merge_partial(self, partial: typing.Tuple[typing.List[str], typing.List[typing.Any]]) -> None:
+            created, contexts = partial
+            for matrix in created:
+                self[matrix]
+            for context, value in zip(self._contexts, contexts):
+                context.merge_partial(value)
 
         def variable(self, **kwargs) -> "EBASFile.MatrixData.Context":
             return self.context(self.files.variable, None, **kwargs)
@@ -732,21 +814,37 @@ class EBASFile(ABC):
                 cut_sizes.append(nan)
             return cut_sizes
 
+        def _iter_cut_sizes(self, root: netCDF4.Dataset) -> typing.Iterator[typing.Tuple[nasa_ames.EbasNasaAmes, "EBASFile.MatrixData.Selector"]]:
+            cut_sizes = self._find_available_cut_sizes(root)
+            _LOGGER.debug(f"Processing {len(cut_sizes)} candidate cut sizes in {Path(root.filepath()).name}")
+            for cs in cut_sizes:
+                if cs == 1.0:
+                    yield self["pm1"], self.Selector(cs)
+                elif cs == 2.5:
+                    yield self["pm25"], self.Selector(cs)
+                elif cs == 10.0:
+                    yield self["pm10"], self.Selector(cs)
+                elif not isfinite(cs):
+                    yield self["aerosol"], self.Selector(cs)
+                else:
+                    _LOGGER.debug(f"Skipping cut size {cs} for file {Path(root.filepath()).name} due to no EBAS matrix assignment")
+
         async def iter_data_files(self, data_directory: Path) -> typing.AsyncIterable[typing.Tuple[nasa_ames.EbasNasaAmes, "EBASFile.MatrixData.Selector", netCDF4.Dataset]]:
             async for root in self.files.iter_data_files(data_directory):
-                cut_sizes = self._find_available_cut_sizes(root)
-                _LOGGER.debug(f"Processing {len(cut_sizes)} candidate cut sizes in {Path(root.filepath()).name}")
-                for cs in cut_sizes:
-                    if cs == 1.0:
-                        yield self["pm1"], self.Selector(cs), root
-                    elif cs == 2.5:
-                        yield self["pm25"], self.Selector(cs), root
-                    elif cs == 10.0:
-                        yield self["pm10"], self.Selector(cs), root
-                    elif not isfinite(cs):
-                        yield self["aerosol"], self.Selector(cs), root
-                    else:
-                        _LOGGER.debug(f"Skipping cut size {cs} for file {Path(root.filepath()).name} due to no EBAS matrix assignment")
+                for nas, selector in self._iter_cut_sizes(root):
+                    yield nas, selector, root
+
+        def integration(
+                self,
+                integrate: typing.Callable[[nasa_ames.EbasNasaAmes, "EBASFile.MatrixData.Selector", netCDF4.Dataset], None],
+                *targets: typing.Any,
+        ) -> ProductBuilder.Integration:
+            # All contexts must be created before the integration starts, since workers share the initial state
+            def integrate_file(root: netCDF4.Dataset) -> None:
+                for nas, selector in self._iter_cut_sizes(root):
+                    integrate(nas, selector, root)
+
+            return ProductBuilder().integration(integrate_file, self, *targets)
 
     def begin_file(self) -> nasa_ames.EbasNasaAmes:
         nas = nasa_ames.EbasNasaAmes()
@@ -877,9 +975,7 @@ class EBASFile(ABC):
         else:
             empty_flags = []
             missing_flags = [999]
-            file_flags = [
-                (empty_flags if v else missing_flags) for v in valid_at_time
-            ]
+            file_flags = _lookup_flags([missing_flags, empty_flags], valid_at_time.astype(np.intp))
 
         self.apply_times(nas, start_time_epoch_ms, end_time_epoch_ms)
         file_value_index = 0
@@ -1,6 +1,8 @@
 import typing
 import asyncio
 from pathlib import Path
+from netCDF4 import Dataset
+from ebas.io.file.nasa_ames import EbasNasaAmes
 from forge.units import ZERO_C_IN_K
 from forge.temp import WorkingDirectory
 from forge.product.selection import InstrumentSelection
@@ -40,8 +42,6 @@ class Level0File(SpectralFile, AerosolInstrument):
     async def __call__(self, output_directory: Path) -> None:
         async with WorkingDirectory() as data_directory:
             data_directory = Path(data_directory)
-            await self.fetch_instrument_files(self.instrument_selection, 'raw', data_directory)
-
             matrix = self.MatrixData(self)
             flags = matrix.flags()
             instrument = matrix.metadata_tracker()
@@ -73,7 +73,8 @@ class Level0File(SpectralFile, AerosolInstrument):
             transmittance = matrix.spectral_variable()
             sample_intensity = matrix.spectral_variable()
             reference_intensity = matrix.spectral_variable()
-            async for nas, selector, root in matrix.iter_data_files(data_directory):
+
+            def integrate(nas: EbasNasaAmes, selector: SpectralFile.MatrixData.Selector, root: Dataset) -> None:
                 flags[nas].integrate_file(root, selector)
                 instrument[nas].integrate_file(root)
                 for var in self.select_variable(
@@ -131,6 +132,9 @@ class Level0File(SpectralFile, AerosolInstrument):
                         var, selector(var),
                     )
 
+            async with matrix.integration(integrate) as integration:
+                await self.fetch_instrument_files(self.instrument_selection, 'raw', data_directory, integration)
+
         for var in absorption:
             var.apply_metadata(
                 title='abs{wavelength}',
@@ -210,8 +214,6 @@ class Level1File(SpectralFile, AerosolInstrument):
     async def __call__(self, output_directory: Path) -> None:
         async with WorkingDirectory() as data_directory:
             data_directory = Path(data_directory)
-            await self.fetch_instrument_files(self.instrument_selection, 'clean', data_directory)
-
             matrix = self.MatrixData(self)
             flags = matrix.flags()
             instrument = matrix.metadata_tracker()
@@ -234,7 +236,8 @@ class Level1File(SpectralFile, AerosolInstrument):
                 title="RH_int",
             )
             absorption = matrix.spectral_variable()
-            async for nas, selector, root in matrix.iter_data_files(data_directory):
+
+            def integrate(nas: EbasNasaAmes, selector: SpectralFile.MatrixData.Selector, root: Dataset) -> None:
                 flags[nas].integrate_file(root, selector)
                 instrument[nas].integrate_file(root)
                 for var in self.select_variable(
@@ -266,6 +269,9 @@ class Level1File(SpectralFile, AerosolInstrument):
                         var, selector(var),
                     )
 
+            async with matrix.integration(integrate) as integration:
+                await self.fetch_instrument_files(self.instrument_selection, 'clean', data_directory, integration)
+
         for var in absorption:
             var.apply_metadata(
                 title='abs{wavelength}',
@@ -364,8 +370,6 @@ class Level2File(SpectralFile, AerosolInstrument):
     async def __call__(self, output_directory: Path) -> None:
         async with WorkingDirectory() as data_directory:
             data_directory = Path(data_directory)
-            await self.fetch_instrument_files(self.instrument_selection, 'avgh', data_directory)
-
             matrix = self.MatrixData(self)
             flags = matrix.flags()
             instrument = matrix.metadata_tracker()
@@ -390,7 +394,8 @@ class Level2File(SpectralFile, AerosolInstrument):
             absorption = matrix.spectral_variable()
             absorption_q16 = matrix.spectral_variable()
             absorption_q84 = matrix.spectral_variable()
-            async for nas, selector, root in matrix.iter_data_files(data_directory):
+
+            def integrate(nas: EbasNasaAmes, selector: SpectralFile.MatrixData.Selector, root: Dataset) -> None:
                 flags[nas].integrate_file(root, selector)
                 instrument[nas].integrate_file(root)
                 for var in self.select_variable(
@@ -444,6 +449,9 @@ class Level2File(SpectralFile, AerosolInstrument):
                         )
                     )
 
+            async with matrix.integration(integrate) as integration:
+                await self.fetch_instrument_files(self.instrument_selection, 'avgh', data_directory, integration)
+
         for var in absorption:
             var.apply_metadata(
                 title='abs{wavelength}',
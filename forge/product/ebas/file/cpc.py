@@ -1,6 +1,8 @@
 import typing
 import asyncio
 from pathlib import Path
+from netCDF4 import Dataset
+from ebas.io.file.nasa_ames import EbasNasaAmes
 from forge.units import ZERO_C_IN_K
 from forge.temp import WorkingDirectory
 from forge.product.selection import InstrumentSelection
@@ -37,8 +39,6 @@ class Level0File(EBASFile, AerosolInstrument):
     async def __call__(self, output_directory: Path) -> None:
         async with WorkingDirectory() as data_directory:
             data_directory = Path(data_directory)
-            await self.fetch_instrument_files(self.instrument_selection, 'raw', data_directory)
-
             matrix = self.MatrixData(self)
             flags = matrix.flags()
             instrument = matrix.metadata_tracker()
@@ -84,7 +84,8 @@ class Level0File(EBASFile, AerosolInstrument):
                 statistics='arithmetic mean',
                 title="conc",
             )
-            async for nas, selector, root in matrix.iter_data_files(data_directory):
+
+            def integrate(nas: EbasNasaAmes, selector: EBASFile.MatrixData.Selector, root: Dataset) -> None:
                 flags[nas].integrate_file(root, selector)
                 instrument[nas].integrate_file(root)
                 for var in self.select_variable(
@@ -134,6 +135,9 @@ class Level0File(EBASFile, AerosolInstrument):
                 ):
                     cnc[nas].integrate_variable(var, selector(var))
 
+            async with matrix.integration(integrate) as integration:
+                await self.fetch_instrument_files(self.instrument_selection, 'raw', data_directory, integration)
+
         for var in pressure:
             var.add_characteristic('Location', 'instrument internal', self.instrument_type, var.metadata.comp_name, '0')
         for var in temperature:
@@ -190,8 +194,6 @@ class Level1File(EBASFile, AerosolInstrument):
     async def __call__(self, output_directory: Path) -> None:
         async with WorkingDirectory() as data_directory:
             data_directory = Path(data_directory)
-            await self.fetch_instrument_files(self.instrument_selection, 'clean', data_directory)
-
             matrix = self.MatrixData(self)
             flags = matrix.flags()
             instrument = matrix.metadata_tracker()
@@ -219,7 +221,8 @@ class Level1File(EBASFile, AerosolInstrument):
                 statistics='arithmetic mean',
                 title="conc",
             )
-            async for nas, selector, root in matrix.iter_data_files(data_directory):
+
+            def integrate(nas: EbasNasaAmes, selector: EBASFile.MatrixData.Selector, root: Dataset) -> None:
                 flags[nas].integrate_file(root, selector)
                 instrument[nas].integrate_file(root)
                 for var in self.select_variable(
@@ -248,6 +251,9 @@ class Level1File(EBASFile, AerosolInstrument):
                 ):
                     cnc[nas].integrate_variable(var, selector(var))
 
+            async with matrix.integration(integrate) as integration:
+                await self.fetch_instrument_files(self.instrument_selection, 'clean', data_directory, integration)
+
         for var in pressure:
             var.add_characteristic('Location', 'instrument internal', self.instrument_type, var.metadata.comp_name, '1')
         for var in temperature:
@@ -297,8 +303,6 @@ class Level2File(EBASFile, AerosolInstrument):
     async def __call__(self, output_directory: Path) -> None:
         async with WorkingDirectory() as data_directory:
             data_directory = Path(data_directory)
-            await self.fetch_instrument_files(self.instrument_selection, 'avgh', data_directory)
-
             matrix = self.MatrixData(self)
             flags = matrix.flags()
             instrument = matrix.metadata_tracker()
@@ -338,7 +342,8 @@ class Level2File(EBASFile, AerosolInstrument):
                 statistics='percentile:84.13',
                 title="conc_84pc",
             )
-            async for nas, selector, root in matrix.iter_data_files(data_directory):
+
+            def integrate(nas: EbasNasaAmes, selector: EBASFile.MatrixData.Selector, root: Dataset) -> None:
                 flags[nas].integrate_file(root, selector)
                 instrument[nas].integrate_file(root)
                 for var in self.select_variable(
@@ -381,6 +386,9 @@ class Level2File(EBASFile, AerosolInstrument):
                         converter=self.quantile_converter(var, 0.8413),
                     )
 
+            async with matrix.integration(integrate) as integration:
+                await self.fetch_instrument_files(self.instrument_selection, 'avgh', data_directory, integration)
+
         for var in pressure:
             var.add_characteristic('Location', 'instrument internal', self.instrument_type, var.metadata.comp_name, '2')
         for var in temperature:
@@ -1,5 +1,7 @@
 import typing
 from pathlib import Path
+from netCDF4 import Dataset
+from ebas.io.file.nasa_ames import EbasNasaAmes
 from forge.units import ZERO_C_IN_K
 from forge.temp import WorkingDirectory
 from forge.product.selection import InstrumentSelection
@@ -53,8 +55,6 @@ class File(EBASFile, AerosolInstrument):
     async def __call__(self, output_directory: Path) -> None:
         async with WorkingDirectory() as data_directory:
             data_directory = Path(data_directory)
-            await self.fetch_instrument_files(self.instrument_selection, 'raw', data_directory)
-
             matrix = self.MatrixData(self)
             flags = matrix.flags()
             instrument = matrix.metadata_tracker()
@@ -156,7 +156,7 @@ class File(EBASFile, AerosolInstrument):
                 title="CCN",
             )
 
-            async for nas, selector, root in matrix.iter_data_files(data_directory):
+            def integrate(nas: EbasNasaAmes, selector: EBASFile.MatrixData.Selector, root: Dataset) -> None:
                 flags[nas].integrate_file(root, selector)
                 instrument[nas].integrate_file(root)
                 for var in self.select_variable(
@@ -248,6 +248,9 @@ class File(EBASFile, AerosolInstrument):
                 ):
                     ccnc[nas].integrate_variable(var, selector(var))
 
+            async with matrix.integration(integrate) as integration:
+                await self.fetch_instrument_files(self.instrument_selection, 'raw', data_directory, integration)
+
         for var in pressure:
             var.add_characteristic('Location', 'instrument internal', self.instrument_type, var.metadata.comp_name, '0')
         for var in temperature:
@@ -1,9 +1,12 @@
 import typing
 from pathlib import Path
 from math import inf, isfinite
+from netCDF4 import Dataset
+from ebas.io.file.nasa_ames import EbasNasaAmes
 from forge.units import ZERO_C_IN_K
 from forge.temp import WorkingDirectory
 from forge.product.selection import InstrumentSelection
+from forge.product.builder import LatestValue
 from .spectral import SpectralFile
 from .aerosol_instrument import AerosolInstrument
 
@@ -59,8 +62,6 @@ class File(SpectralFile, AerosolInstrument):
     async def __call__(self, output_directory: Path) -> None:
         async with WorkingDirectory() as data_directory:
             data_directory = Path(data_directory)
-            await self.fetch_instrument_files(self.instrument_selection, 'raw', data_directory)
-
             matrix = self.MatrixData(self)
             flags = matrix.flags()
             instrument = matrix.metadata_tracker()
@@ -95,8 +96,9 @@ class File(SpectralFile, AerosolInstrument):
                 title="flow_stp",
             )
             equivalent_black_carbon = matrix.spectral_variable()
-            ebc_efficiency = 6.6
-            async for nas, selector, root in matrix.iter_data_files(data_directory):
+            latest_efficiency = LatestValue(6.6)
+
+            def integrate(nas: EbasNasaAmes, selector: SpectralFile.MatrixData.Selector, root: Dataset) -> None:
                 flags[nas].integrate_file(root, selector)
                 instrument[nas].integrate_file(root)
                 for var in self.select_variable(
@@ -146,11 +148,15 @@ class File(SpectralFile, AerosolInstrument):
                         if len(efficiency_var.shape) == 0:
                             value = float(efficiency_var[0])
                             if isfinite(value):
-                                ebc_efficiency = value
+                                latest_efficiency.set(value)
                         else:
                             values = efficiency_var[:].data.tolist()
                             if len(values) > 0 and isfinite(values[0]):
-                                ebc_efficiency = values[0]
+                                latest_efficiency.set(values[0])
+
+            async with matrix.integration(integrate, latest_efficiency) as integration:
+                await self.fetch_instrument_files(self.instrument_selection, 'raw', data_directory, integration)
+            ebc_efficiency = latest_efficiency.value
 
         for var in equivalent_black_carbon:
             var.apply_metadata(
@@ -2,6 +2,8 @@ import typing
 import numpy as np
 from pathlib import Path
 from math import inf
+from netCDF4 import Dataset
+from ebas.io.file.nasa_ames import EbasNasaAmes
 from forge.units import ZERO_C_IN_K
 from forge.temp import WorkingDirectory
 from forge.product.selection import InstrumentSelection
@@ -72,8 +74,6 @@ class File(SpectralFile, AerosolInstrument):
     async def __call__(self, output_directory: Path) -> None:
         async with WorkingDirectory() as data_directory:
             data_directory = Path(data_directory)
-            await self.fetch_instrument_files(self.instrument_selection, 'raw', data_directory)
-
             matrix = self.MatrixData(self)
             flags = matrix.flags()
             instrument = matrix.metadata_tracker()
@@ -105,7 +105,8 @@ class File(SpectralFile, AerosolInstrument):
             reference_beam_signal = matrix.spectral_variable()
             attenuation_coefficient = matrix.spectral_variable()
             equivalent_black_carbon = matrix.spectral_variable()
-            async for nas, selector, root in matrix.iter_data_files(data_directory):
+
+            def integrate(nas: EbasNasaAmes, selector: SpectralFile.MatrixData.Selector, root: Dataset) -> None:
                 flags[nas].integrate_file(root, selector)
                 instrument[nas].integrate_file(root)
                 for var in self.select_variable(
@@ -162,6 +163,9 @@ class File(SpectralFile, AerosolInstrument):
                         converter=self._transmittance_to_atn,
                     )
 
+            async with matrix.integration(integrate) as integration:
+                await self.fetch_instrument_files(self.instrument_selection, 'raw', data_directory, integration)
+
         for var in sensing_beam_signal:
             var.apply_metadata(
                 title='s_bm{wavelength}',
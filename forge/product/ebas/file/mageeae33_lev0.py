@@ -2,9 +2,12 @@ import typing
 import numpy as np
 from pathlib import Path
 from math import isfinite, nan, inf
+from netCDF4 import Dataset
+from ebas.io.file.nasa_ames import EbasNasaAmes
 from forge.units import ZERO_C_IN_K
 from forge.temp import WorkingDirectory
 from forge.product.selection import InstrumentSelection
+from forge.product.builder import LatestValue
 from .spectral import SpectralFile
 from .aerosol_instrument import AerosolInstrument
 
@@ -84,8 +87,6 @@ class File(SpectralFile, AerosolInstrument):
     async def __call__(self, output_directory: Path) -> None:
         async with WorkingDirectory() as data_directory:
             data_directory = Path(data_directory)
-            await self.fetch_instrument_files(self.instrument_selection, 'raw', data_directory)
-
             matrix = self.MatrixData(self)
             flags = matrix.flags()
             instrument = matrix.metadata_tracker()
@@ -145,9 +146,10 @@ class File(SpectralFile, AerosolInstrument):
             filter_loading_compensation_parameter = matrix.spectral_variable()
             attenuation_coefficient_1 = matrix.spectral_variable()
             attenuation_coefficient_2 = matrix.spectral_variable()
-            wavelength_efficiency = {round(wl): 6833.0 / wl for wl in [370.0, 470.0, 520.0, 590.0, 660.0, 880.0, 950.0]}
-            cref = self.cref
-            async for nas, selector, root in matrix.iter_data_files(data_directory):
+            latest_efficiency = LatestValue({round(wl): 6833.0 / wl for wl in [370.0, 470.0, 520.0, 590.0, 660.0, 880.0, 950.0]})
+            latest_cref = LatestValue(self.cref)
+
+            def integrate(nas: EbasNasaAmes, selector: SpectralFile.MatrixData.Selector, root: Dataset) -> None:
                 flags[nas].integrate_file(root, selector)
                 instrument[nas].integrate_file(root)
                 for var in self.select_variable(
@@ -283,7 +285,7 @@ class File(SpectralFile, AerosolInstrument):
                             import re
                             matched = re.search(r" \d+ \d+\.\d+ \d+\.\d+ \d+\.\d+ \d+\.\d+ \d+\.\d+ \d+\.\d+ \d+\.\d+ (\d+\.\d+) \d+\.\d+ \d+\.\d+ \d+ ", lines[0])
                             if matched:
-                                cref = float(matched.group(1))
+                                latest_cref.set(float(matched.group(1)))
 
                         elif len(lines) >= 2:
                             import csv
@@ -302,14 +304,14 @@ class File(SpectralFile, AerosolInstrument):
                             check = kv.get("c")
                             if check:
                                 try:
-                                    cref = float(check)
+                                    latest_cref.set(float(check))
                                 except ValueError:
                                     pass
 
                     cref_var = parameters_group.variables.get("weingartner_constant")
                     if cref_var is not None:
-                        cref = float(cref_var[0])
-
+                        latest_cref.set(float(cref_var[0]))
+                latest_efficiency.set(wavelength_efficiency)
 
                 def absorption_to_ebc(wavelength: float) -> typing.Optional[typing.Callable[[np.ndarray], np.ndarray]]:
                     efficiency = wavelength_efficiency.get(wavelength, nan)
@@ -336,6 +338,11 @@ class File(SpectralFile, AerosolInstrument):
                         wavelength_converter=absorption_to_ebc,
                     )
 
+            async with matrix.integration(integrate, latest_efficiency, latest_cref) as integration:
+                await self.fetch_instrument_files(self.instrument_selection, 'raw', data_directory, integration)
+            wavelength_efficiency = latest_efficiency.value
+            cref = latest_cref.value
+
         for var in reference_beam_signal:
             var.apply_metadata(
                 title='ref_{wavelength}',
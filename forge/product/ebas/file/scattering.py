@@ -2,6 +2,8 @@ import typing
 import asyncio
 import numpy as np
 from pathlib import Path
+from netCDF4 import Dataset
+from ebas.io.file.nasa_ames import EbasNasaAmes
 from forge.units import ZERO_C_IN_K, ONE_ATM_IN_HPA
 from forge.temp import WorkingDirectory
 from forge.product.selection import InstrumentSelection
@@ -73,8 +75,6 @@ class Level0File(SpectralFile, AerosolInstrument):
 
         async with WorkingDirectory() as data_directory:
             data_directory = Path(data_directory)
-            await self.fetch_instrument_files(self.instrument_selection, 'raw', data_directory)
-
             matrix = self.MatrixData(self)
             flags = matrix.flags()
             instrument = matrix.metadata_tracker()
@@ -125,7 +125,8 @@ class Level0File(SpectralFile, AerosolInstrument):
             scattering_zero = matrix.spectral_variable()
             backscattering_zero = matrix.spectral_variable()
             rayleigh_zero = matrix.spectral_variable()
-            async for nas, selector, root in matrix.iter_data_files(data_directory):
+
+            def integrate(nas: EbasNasaAmes, selector: SpectralFile.MatrixData.Selector, root: Dataset) -> None:
                 flags[nas].integrate_file(root, selector)
                 instrument[nas].integrate_file(root)
                 for var in self.select_variable(
@@ -221,6 +222,9 @@ class Level0File(SpectralFile, AerosolInstrument):
                         wavelength_converter=convert_zero_backscattering,
                     )
 
+            async with matrix.integration(integrate) as integration:
+                await self.fetch_instrument_files(self.instrument_selection, 'raw', data_directory, integration)
+
         for var in scattering:
             var.apply_metadata(
                 title='sc{wavelength}',
@@ -313,8 +317,6 @@ class Level1File(SpectralFile, AerosolInstrument):
     async def __call__(self, output_directory: Path) -> None:
         async with WorkingDirectory() as data_directory:
             data_directory = Path(data_directory)
-            await self.fetch_instrument_files(self.instrument_selection, 'clean', data_directory)
-
             matrix = self.MatrixData(self)
             flags = matrix.flags()
             instrument = matrix.metadata_tracker()
@@ -338,7 +340,8 @@ class Level1File(SpectralFile, AerosolInstrument):
             )
             scattering = matrix.spectral_variable()
             backscattering = matrix.spectral_variable()
-            async for nas, selector, root in matrix.iter_data_files(data_directory):
+
+            def integrate(nas: EbasNasaAmes, selector: SpectralFile.MatrixData.Selector, root: Dataset) -> None:
                 flags[nas].integrate_file(root, selector)
                 instrument[nas].integrate_file(root)
                 for var in self.select_variable(
@@ -377,6 +380,9 @@ class Level1File(SpectralFile, AerosolInstrument):
                         var, selector(var),
                     )
 
+            async with matrix.integration(integrate) as integration:
+                await self.fetch_instrument_files(self.instrument_selection, 'clean', data_directory, integration)
+
         for var in scattering:
             var.apply_metadata(
                 title='sc{wavelength}',
@@ -602,8 +608,6 @@ class Level2File(SpectralFile, AerosolInstrument):
     async def __call__(self, output_directory: Path) -> None:
         async with WorkingDirectory() as data_directory:
             data_directory = Path(data_directory)
-            await self.fetch_instrument_files(self.instrument_selection, 'avgh', data_directory)
-
             matrix = self.MatrixData(self)
             flags = matrix.flags()
             instrument = matrix.metadata_tracker()
@@ -631,7 +635,8 @@ class Level2File(SpectralFile, AerosolInstrument):
             backscattering = matrix.spectral_variable()
             backscattering_q16 = matrix.spectral_variable()
             backscattering_q84 = matrix.spectral_variable()
-            async for nas, selector, root in matrix.iter_data_files(data_directory):
+
+            def integrate(nas: EbasNasaAmes, selector: SpectralFile.MatrixData.Selector, root: Dataset) -> None:
                 def choose_limit(base, fine):
                     if fine is not None and selector.cut_size < 10.0:
                         return fine
@@ -721,6 +726,9 @@ class Level2File(SpectralFile, AerosolInstrument):
                         )
                     )
 
+            async with matrix.integration(integrate) as integration:
+                await self.fetch_instrument_files(self.instrument_selection, 'avgh', data_directory, integration)
+
         for var in scattering:
             var.apply_metadata(
                 title='sc{wavelength}',
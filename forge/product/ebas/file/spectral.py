@@ -28,6 +28,17 @@ class SpectralFile(EBASFile):
                 super().__init__(file)
                 self.wavelength: float = None
 
+            def take_partial(self) -> typing.Tuple[typing.Any, typing.Optional[float]]:
+                result = (super().take_partial(), self.wavelength)
+                self.wavelength = None
+                return result
+
+            def merge_partial(self, partial: typing.Tuple[typing.Any, typing.Optional[float]]) -> None:
+                contents, wavelength = partial
+                super().merge_partial(contents)
+                if wavelength is not None:
+                    self.wavelength = wavelength
+
             def set_wavelength(self, wavelength: typing.Union[int, float],
                                instrument_type: str, component: str) -> None:
                 self.add_characteristic('Wavelength', f'{int(round(wavelength))} nm',
@@ -63,6 +74,15 @@ class SpectralFile(EBASFile):
                     continue
                 yield var, var.wavelength, band_idx
 
+        def take_partial(self) -> typing.List[typing.Optional[typing.Any]]:
+            return [(var.take_partial() if var is not None else None) for var in self._band_variables]
+
+        def merge_partial(self, partial: typing.List[typing.Optional[typing.Any]]) -> None:
+            for band_idx in range(len(partial)):
+                if partial[band_idx] is None:
+                    continue
+                self._to_band_variable(band_idx).merge_partial(partial[band_idx])
+
         def _to_wavelength_band_index(self, wavelength: float) -> typing.Optional[int]:
             for band_idx in range(len(self.file.WAVELENGTH_BANDS)):
                 band = self.file.WAVELENGTH_BANDS[band_idx]
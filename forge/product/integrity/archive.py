@@ -29,7 +29,9 @@ async def calculate_archive_integrity(
         connection: Connection, station: str, archive: str,
         instrument_limit: typing.Set[str],
         start_epoch_ms: int, end_epoch_ms: int,
+        known: typing.Optional[typing.Dict[str, typing.Tuple[typing.Optional[float], bytes, bytes, bytes]]] = None,
 ) -> typing.AsyncIterator[typing.Tuple[str, float, float, bytes, bytes, bytes]]:
+    # With known results, files whose server digest matches the known file hash are not downloaded at all
     async with WorkingDirectory() as working_directory:
         with ProcessPoolExecutor() as executor:
 
@@ -38,12 +40,38 @@ async def calculate_archive_integrity(
             launched_info: typing.Dict[asyncio.Future, typing.Tuple[str, str, float]] = dict()
             transaction_begin: float = 0
 
-            async def launch_file(file_time_ms: int, instrument_id: str) -> None:
+            async def launch_files(
+                    file_time_ms: int, instrument_ids: typing.Iterable[str],
+            ) -> typing.List[typing.Tuple[str, float, float, bytes, bytes, bytes]]:
+                archive_file_names = [
+                    data_file_name(station, archive, instrument_id, file_time_ms / 1000.0)
+                    for instrument_id in instrument_ids
+                ]
+                unchanged: typing.List[typing.Tuple[str, float, float, bytes, bytes, bytes]] = list()
+                if known is not None and connection.file_digests_available:
+                    digests = await connection.file_digests(archive_file_names)
+                    changed: typing.List[str] = list()
+                    for archive_file_name, digest in zip(archive_file_names, digests):
+                        if not digest:
+                            continue
+                        existing = known.get(archive_file_name)
+                        if not existing or existing[1] != digest[1]:
+                            changed.append(archive_file_name)
+                            continue
+                        _LOGGER.debug(f"Integrity unchanged for {archive_file_name}")
+                        file_creation_time, file_hash, data_hash, qualitative_hash = existing
+                        unchanged.append((archive_file_name, file_creation_time, transaction_begin,
+                                          file_hash, data_hash, qualitative_hash))
+                    archive_file_names = changed
+
+                for archive_file_name in archive_file_names:
+                    await launch_file(archive_file_name)
+                return unchanged
+
+            async def launch_file(archive_file_name: str) -> None:
                 nonlocal launched_files
                 nonlocal launched_info
 
-                archive_file_name = data_file_name(station, archive, instrument_id, file_time_ms / 1000.0)
-
                 fd, local_name = mkstemp(suffix='.nc', dir=working_directory)
                 os.close(fd)
                 try:
@@ -114,7 +142,8 @@ async def calculate_archive_integrity(
                             if archive in ("avgd", "avgm"):
                                 completed_instruments = 0
                                 for instrument in instrument_ids:
-                                    await launch_file(year_start_ms, instrument)
+                                    for result in await launch_files(year_start_ms, [instrument]):
+                                        yield result
 
                                     while len(launched_files) > concurrent_limit:
                                         async for result in process_launched():
@@ -124,12 +153,12 @@ async def calculate_archive_integrity(
                                     completed_instruments += 1
                             else:
                                 for day_start_ms in range(inspect_start_ms, inspect_end_ms, 24 * 60 * 60 * 1000):
-                                    for instrument in instrument_ids:
-                                        await launch_file(day_start_ms, instrument)
+                                    for result in await launch_files(day_start_ms, instrument_ids):
+                                        yield result
 
-                                        while len(launched_files) > concurrent_limit:
-                                            async for result in process_launched():
-                                                yield result
+                                    while len(launched_files) > concurrent_limit:
+                                        async for result in process_launched():
+                                            yield result
 
                                     await connection.set_transaction_status(f"Calculating data integrity, {(day_start_ms - inspect_start_ms) / (inspect_end_ms - inspect_start_ms) * 100:.0f}% done")
                         break
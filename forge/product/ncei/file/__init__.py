@@ -81,6 +81,7 @@ class NCEIFile(ABC):
             self,
             selections: typing.Dict[str, typing.Iterable[InstrumentSelection]],
             destination_directory: Path,
+            fetched: typing.Optional[typing.Dict[str, typing.Callable[[Path], typing.Awaitable[None]]]] = None,
     ) -> None:
         async with await self.get_archive_connection() as connection:
             backoff = LockBackoff()
@@ -95,7 +96,8 @@ class NCEIFile(ABC):
                             for sel in dir_selections:
                                 await sel.fetch_files(connection, self.station, self.archive,
                                                       self.start_epoch_ms, self.end_epoch_ms,
-                                                      destination_directory / subdir)
+                                                      destination_directory / subdir,
+                                                      fetched.get(subdir) if fetched else None)
                     break
                 except LockDenied as ld:
                     _LOGGER.debug("Archive busy: %s", ld.status)
@@ -193,6 +195,18 @@ class NCEIFile(ABC):
                 if history:
                     self._history = history
 
+        def take_partial(self) -> typing.Tuple[typing.Optional[str], typing.List["NCEIFile.MergeInstrument._Source"]]:
+            result = (self._history, self._instrument_source)
+            self._history = None
+            self._instrument_source = list()
+            return result
+
+        def merge_partial(self, partial: typing.Tuple[typing.Optional[str], typing.List["NCEIFile.MergeInstrument._Source"]]) -> None:
+            history, instrument_source = partial
+            self._instrument_source.extend(instrument_source)
+            if history:
+                self._history = history
+
         def _write_instrument_source(self, group: netCDF4.Group) -> None:
             if not self._instrument_source:
                 return
@@ -410,6 +424,44 @@ class NCEIFile(ABC):
             for var in VariableSelection.find_matching_variables(root, *selections, statistics=statistics):
                 self.integrate_variable(root, var)
 
+        def take_partial(self) -> typing.Tuple[np.ndarray, np.ndarray, typing.List[typing.Optional[float]], typing.List[typing.Optional[float]]]:
+            result = (self.times, self.values, self._wavelengths, self._cut_sizes)
+            self.times = np.empty((0,), dtype=np.int64)
+            self.values = np.empty((0, 0, 0), dtype=np.float64)
+            self._wavelengths = list()
+            self._cut_sizes = list()
+            return result
+
+        def merge_partial(self, partial: typing.Tuple[np.ndarray, np.ndarray, typing.List[typing.Optional[float]], typing.List[typing.Optional[float]]]) -> None:
+            times, values, wavelengths, cut_sizes = partial
+
+            # New dimension values are added in the order the partial encountered them, same as integrating directly
+            def dimension_indices(existing: typing.List[typing.Optional[float]],
+                                  source: typing.List[typing.Optional[float]]) -> typing.List[int]:
+                result: typing.List[int] = list()
+                for v in source:
+                    try:
+                        result.append(existing.index(v))
+                    except ValueError:
+                        result.append(len(existing))
+                        existing.append(v)
+                return result
+
+            cut_size_indices = dimension_indices(self._cut_sizes, cut_sizes)
+            wavelength_indices = dimension_indices(self._wavelengths, wavelengths)
+            self.values = np.pad(self.values, (
+                (0, len(self._cut_sizes) - self.values.shape[0]),
+                (0, len(self._wavelengths) - self.values.shape[1]),
+                (0, 0),
+            ), mode='constant', constant_values=nan)
+            if times.shape[0] == 0:
+                return
+
+            output_data = np.full((len(self._cut_sizes), len(self._wavelengths), times.shape[0]), nan, dtype=np.float64)
+            output_data[np.ix_(cut_size_indices, wavelength_indices)] = values
+            self.times = np.concatenate((self.times, times))
+            self.values = np.concatenate((self.values, output_data), axis=2)
+
         @property
         def has_data(self) -> bool:
             return self.times.shape[0] > 0
@@ -6,6 +6,7 @@ from pathlib import Path
 from netCDF4 import Dataset, Variable
 from forge.temp import WorkingDirectory
 from forge.product.selection import InstrumentSelection, VariableSelection
+from forge.product.builder import ProductBuilder
 from . import NCEIFile
 
 _LOGGER = logging.getLogger(__name__)
@@ -46,15 +47,11 @@ class File(NCEIFile):
             data_directory = Path(data_directory)
             for subdir in ("absorption", "scattering", "cpc"):
                 (data_directory / subdir).mkdir()
-            await self.fetch_instrument_files({
-                "absorption": self.absorption_instrument,
-                "scattering": self.scattering_instrument,
-                "cpc": self.cpc_instrument,
-            }, data_directory)
 
             cpc_instrument = self.MergeInstrument()
             cpc_number_concentration = self.MergeVariable()
-            async for root in self.iter_data_files(data_directory / "cpc"):
+
+            def integrate_cpc(root: Dataset) -> None:
                 cpc_instrument.integrate_file(root)
                 cpc_number_concentration.integrate_selected(
                     root,
@@ -64,7 +61,8 @@ class File(NCEIFile):
 
             absorption_instrument = self.MergeInstrument()
             absorption_value = self.MergeVariable()
-            async for root in self.iter_data_files(data_directory / "absorption"):
+
+            def integrate_absorption(root: Dataset) -> None:
                 absorption_instrument.integrate_file(root)
                 absorption_value.integrate_selected(
                     root,
@@ -79,7 +77,8 @@ class File(NCEIFile):
             scattering_pressure = self.MergeVariable()
             scattering_temperature = self.MergeVariable()
             scattering_humidity = self.MergeVariable()
-            async for root in self.iter_data_files(data_directory / "scattering"):
+
+            def integrate_scattering(root: Dataset) -> None:
                 scattering_instrument.integrate_file(root)
                 scattering_total.integrate_selected(
                     root,
@@ -104,6 +103,25 @@ class File(NCEIFile):
                     {"standard_name": "relative_humidity"},
                 )
 
+            builder = ProductBuilder()
+            async with builder.integration(
+                    integrate_cpc, cpc_instrument, cpc_number_concentration,
+            ) as cpc_integration, builder.integration(
+                    integrate_absorption, absorption_instrument, absorption_value,
+            ) as absorption_integration, builder.integration(
+                    integrate_scattering, scattering_instrument, scattering_total, scattering_back,
+                    scattering_pressure, scattering_temperature, scattering_humidity,
+            ) as scattering_integration:
+                await self.fetch_instrument_files({
+                    "absorption": self.absorption_instrument,
+                    "scattering": self.scattering_instrument,
+                    "cpc": self.cpc_instrument,
+                }, data_directory, {
+                    "absorption": absorption_integration,
+                    "scattering": scattering_integration,
+                    "cpc": cpc_integration,
+                })
+
             async with self.output_file(output_directory, cpc_number_concentration, absorption_value,
                                         scattering_total, scattering_back) as file:
                 if file is None:
@@ -45,7 +45,8 @@ class InstrumentSelection:
 
     async def fetch_files(self, connection: Connection, station: str, archive: str,
                           start_epoch_ms: int, end_epoch_ms: int,
-                          output_directory: Path) -> None:
+                          output_directory: Path,
+                          fetched: typing.Optional[typing.Callable[[Path], typing.Awaitable[None]]] = None) -> None:
         def possible_instrument_ids(index: ArchiveIndex) -> typing.Set[str]:
             result: typing.Set[str] = set(index.known_instrument_ids)
             if self.instrument_id:
@@ -82,14 +83,17 @@ class InstrumentSelection:
                 pass
             return None
 
-        def filter_file(check: Path) -> None:
+        async def filter_file(check: Path) -> None:
             root = Dataset(str(check), 'r')
             try:
-                if self.matches_file(root):
-                    _LOGGER.debug(f"Accepted instrument file {check.name}")
-                    return
+                accepted = self.matches_file(root)
             finally:
                 root.close()
+            if accepted:
+                _LOGGER.debug(f"Accepted instrument file {check.name}")
+                if fetched:
+                    await fetched(check)
+                return
             _LOGGER.debug(f"Rejected instrument file {check.name}")
             try:
                 check.unlink()
@@ -110,11 +114,11 @@ class InstrumentSelection:
                     _LOGGER.debug(f"No candidate instruments for {station.upper()}/{archive.upper()}/{year}")
                     continue
                 _LOGGER.debug(f"Matched {len(instruments)} candidate instruments for {station.upper()}/{archive.upper()}/{year}")
-                for instrument_id in instruments:
+                for instrument_id in sorted(instruments):
                     created_file = await fetch_instrument_file(instrument_id, year_start)
                     if not created_file:
                         continue
-                    filter_file(created_file)
+                    await filter_file(created_file)
             else:
                 instruments = possible_instrument_ids(index)
                 if not instruments:
@@ -126,11 +130,11 @@ class InstrumentSelection:
                 start_day_ms = max(start_day_ms, int(floor(year_start * 1000)))
                 end_day_ms = min(end_day_ms, int(ceil(year_end * 1000)))
                 for file_time_ms in range(start_day_ms, end_day_ms, 24 * 60 * 60 * 1000):
-                    for instrument_id in instruments:
+                    for instrument_id in sorted(instruments):
                         created_file = await fetch_instrument_file(instrument_id, file_time_ms / 1000.0)
                         if not created_file:
                             continue
-                        filter_file(created_file)
+                        await filter_file(created_file)
 
 
 class VariableSelection:
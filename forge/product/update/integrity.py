@@ -52,6 +52,7 @@ class IntegrityTracker(Tracker):
         self.output_file = output_file
         self.completion_command = completion_command
         self._scan_begin: typing.Optional[float] = None
+        self._known: typing.Optional[typing.Dict[str, typing.Tuple[typing.Optional[float], bytes, bytes, bytes]]] = None
 
     def matches_selection(
             self,
@@ -126,6 +127,43 @@ class IntegrityTracker(Tracker):
                            external: bool = False) -> typing.Iterable[typing.Tuple[int, int]]:
         yield start_epoch_ms, end_epoch_ms
 
+    @property
+    def known_file(self) -> Path:
+        return self._state_path / f"{self.station.upper()}-{self.archive.upper()}-known.csv"
+
+    def _load_known(self) -> typing.Dict[str, typing.Tuple[typing.Optional[float], bytes, bytes, bytes]]:
+        if self._known is not None:
+            return self._known
+        self._known = dict()
+        try:
+            with self.known_file.open("rt") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    name, file_creation_time, file_hash, data_hash, qualitative_hash = line.split(',')
+                    self._known[name] = (
+                        float(file_creation_time) if file_creation_time else None,
+                        bytes.fromhex(file_hash), bytes.fromhex(data_hash), bytes.fromhex(qualitative_hash),
+                    )
+        except FileNotFoundError:
+            pass
+        except:
+            _LOGGER.warning(f"Error loading known integrity from {self.known_file}, recalculating all files",
+                            exc_info=True)
+            self._known.clear()
+        return self._known
+
+    def _save_known(self) -> None:
+        if self._known is None:
+            return
+        temporary_file = self.known_file.with_suffix(".tmp")
+        with temporary_file.open("wt") as f:
+            for name in sorted(self._known.keys()):
+                file_creation_time, file_hash, data_hash, qualitative_hash = self._known[name]
+                f.write(f"{name},{repr(file_creation_time) if file_creation_time else ''},{file_hash.hex()},{data_hash.hex()},{qualitative_hash.hex()}\n")
+        temporary_file.replace(self.known_file)
+
     async def perform_update(self, start_epoch_ms: int, end_epoch_ms: int) -> None:
         begin_time = time.monotonic()
         completed_files = 0
@@ -179,11 +217,16 @@ class IntegrityTracker(Tracker):
 
             current_file_name = name
 
+        known = self._load_known()
+        present_files: typing.Set[str] = set()
         try:
             async for archive_file_name, file_creation_time, hash_time, file_hash, data_hash, qualitative_hash in calculate_archive_integrity(
                     self.connection, self.station, self.archive, set(), start_epoch_ms, end_epoch_ms,
+                    known=known,
             ):
                 completed_files += 1
+                present_files.add(archive_file_name)
+                known[archive_file_name] = (file_creation_time, file_hash, data_hash, qualitative_hash)
 
                 target = apply_output_pattern(self.output_file, self.station, self.archive,
                                               archive_file_name, hash_time, file_creation_time)
@@ -191,6 +234,15 @@ class IntegrityTracker(Tracker):
                 current_file_data[archive_file_name] = f"{format_iso8601_time(file_creation_time) if file_creation_time else ''},{format_iso8601_time(hash_time)},{file_hash.hex()},{data_hash.hex()},{qualitative_hash.hex()}"
 
             flush_current_file()
+
+            # Every file still in the archive is reported, so anything else in the range has been removed
+            for archive_file_name in list(known.keys()):
+                if archive_file_name in present_files:
+                    continue
+                bounds = self._file_to_bounds(archive_file_name)
+                if bounds and intersects(start_epoch_ms, end_epoch_ms, *bounds):
+                    del known[archive_file_name]
+            self._save_known()
         except Exception as e:
             _LOGGER.warning(f"Error during integrity calculation for {self.station.upper()}/{self.archive.upper()} in {start_epoch_ms},{end_epoch_ms}", exc_info=True)
             raise CommitFailure from e
@@ -184,9 +184,15 @@ class UpdateController(ABC):
         async with self._lock:
             to_notify = list(self._notification_queue)
             self._notification_queue.clear()
+        notified: typing.List[Tracker] = list()
         for tracker, start_epoch_ms, end_epoch_ms in to_notify:
             _LOGGER.debug(f"Notifying candidate {start_epoch_ms},{end_epoch_ms} to {str(tracker)}")
-            tracker.notify_candidate(start_epoch_ms, end_epoch_ms, save_state=save_state)
+            tracker.notify_candidate(start_epoch_ms, end_epoch_ms, save_state=False)
+            if tracker not in notified:
+                notified.append(tracker)
+        if save_state:
+            for tracker in notified:
+                tracker.save_state(sync=True)
         if to_notify and self._next_candidate_process is None:
             self._next_candidate_process = time.monotonic() + self.CANDIDATE_PROCESS_DELAY
 
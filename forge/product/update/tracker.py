@@ -2,17 +2,16 @@ import typing
 import logging
 import asyncio
 import time
-import os
 import re
 from abc import ABC, abstractmethod
 from pathlib import Path
 from math import floor, ceil
-from json import load as from_json, dump as to_json
 from forge.range import Merge as RangeMerge, intersects
 from netCDF4 import Dataset
 from forge.logicaltime import containing_year_range, year_bounds_ms, start_of_year_ms
 from forge.timeparse import parse_iso8601_time, parse_iso8601_duration
 from forge.temp import WorkingDirectory
+from forge.statestore import StateStore
 from forge.product.selection import InstrumentSelection
 from forge.data.state import is_state_group
 from forge.data.dimensions import find_dimension_values
@@ -33,6 +32,7 @@ class Tracker(ABC):
         def __init__(self, start_epoch_ms: int, end_epoch_ms: int):
             self.start_epoch_ms = start_epoch_ms
             self.end_epoch_ms = end_epoch_ms
+            self.state_key: typing.Optional[str] = None
 
     class Output(ABC):
         class Update:
@@ -54,6 +54,7 @@ class Tracker(ABC):
             self.end_epoch_ms = end_epoch_ms
             self.updated: typing.List[Tracker.Output.Update] = list()
             self.have_committed: bool = False
+            self.state_key: typing.Optional[str] = None
 
         def to_state(self) -> typing.Dict[str, typing.Any]:
             return {
@@ -109,11 +110,13 @@ class Tracker(ABC):
                     return self.output.updated[index].end_epoch_ms
             
             Merge(self)(update_start_epoch_ms, update_end_epoch_ms)
+            self.tracker.output_changed(self)
 
         def merge_replaced(self, replaced: "Tracker.Output") -> None:
             for u in replaced.updated:
                 self.apply_updated(u.start_epoch_ms, u.end_epoch_ms)
             self.have_committed = self.have_committed or replaced.have_committed
+            self.tracker.output_changed(self)
 
         @abstractmethod
         async def commit(self) -> None:
@@ -127,6 +130,14 @@ class Tracker(ABC):
 
         self.latest_commit: int = 0
 
+        self._state_store: typing.Optional[StateStore] = None
+        self._changed_candidates: typing.Set[Tracker._Candidate] = set()
+        self._removed_candidates: typing.Set[str] = set()
+        self._next_candidate_key: int = 0
+        self._changed_outputs: typing.Set[Tracker.Output] = set()
+        self._removed_outputs: typing.Set[str] = set()
+        self._next_output_key: int = 0
+
     @abstractmethod
     def round_candidate(self, start_epoch_ms: int, end_epoch_ms: int) -> typing.Tuple[int, int]:
         pass
@@ -158,44 +169,96 @@ class Tracker(ABC):
     def state_file(self) -> Path:
         raise NotImplementedError
 
+    @property
+    def state_store(self) -> StateStore:
+        if self._state_store is None:
+            self._state_store = StateStore(self.state_file, self._legacy_state)
+        return self._state_store
+
+    @staticmethod
+    def _legacy_state(state: typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+        entries: typing.Dict[str, typing.Any] = dict()
+        for key in ('version', 'candidate_scan', 'latest_commit'):
+            if key in state:
+                entries[key] = state[key]
+        for idx in range(len(state.get('candidates', []))):
+            entries[f"candidate.{idx}"] = state['candidates'][idx]
+        for idx in range(len(state.get('outputs', []))):
+            entries[f"output.{idx}"] = state['outputs'][idx]
+        return entries
+
+    def _candidate_added(self, candidate: "Tracker._Candidate") -> None:
+        self._changed_candidates.add(candidate)
+
+    def _candidate_removed(self, candidate: "Tracker._Candidate") -> None:
+        self._changed_candidates.discard(candidate)
+        if candidate.state_key is not None:
+            self._removed_candidates.add(candidate.state_key)
+            candidate.state_key = None
+
+    def output_changed(self, output: "Tracker.Output") -> None:
+        self._changed_outputs.add(output)
+
+    def output_removed(self, output: "Tracker.Output") -> None:
+        self._changed_outputs.discard(output)
+        if output.state_key is not None:
+            self._removed_outputs.add(output.state_key)
+            output.state_key = None
+
     def save_state(self, sync: bool = False) -> None:
-        state_contents: typing.Dict[str, typing.Any] = {
+        # Only candidates and outputs touched since the last save are written, the store skips any other
+        # unchanged entries
+        changed: typing.Dict[str, typing.Any] = {
             'version': self.STATE_VERSION,
             'candidate_scan': self._candidate_scan_epoch_ms,
-            'candidates': [[p.start_epoch_ms, p.end_epoch_ms] for p in self._candidates],
-            'outputs': [o.to_state() for o in self._outputs],
             'latest_commit': self.latest_commit,
         }
-
-        with open(self.state_file, "w") as f:
-            to_json(state_contents, f)
-
-            if sync:
-                try:
-                    f.flush()
-                    os.fdatasync(f.fileno())
-                except AttributeError:
-                    os.fsync(f.fileno())
+        for c in self._changed_candidates:
+            c.state_key = f"candidate.{self._next_candidate_key}"
+            self._next_candidate_key += 1
+            changed[c.state_key] = [c.start_epoch_ms, c.end_epoch_ms]
+        for o in self._changed_outputs:
+            if o.state_key is None:
+                o.state_key = f"output.{self._next_output_key}"
+                self._next_output_key += 1
+            changed[o.state_key] = o.to_state()
+
+        self.state_store.update(changed, self._removed_candidates | self._removed_outputs, sync=sync)
+        self._changed_candidates.clear()
+        self._removed_candidates.clear()
+        self._changed_outputs.clear()
+        self._removed_outputs.clear()
 
     def load_state(self) -> bool:
-        try:
-            with open(self.state_file, "r") as f:
-                if os.fstat(f.fileno()).st_size == 0:
-                    raise FileNotFoundError
-                state = from_json(f)
-        except FileNotFoundError:
+        state = self.state_store.load()
+        if state is None:
             return False
 
         state_version = state.get('version')
         if state.get('version') != self.STATE_VERSION:
             raise RuntimeError(f"Unsupported state version {state_version} vs {self.STATE_VERSION}")
         self._candidate_scan_epoch_ms = int(state['candidate_scan'])
-        for c in state['candidates']:
-            self.notify_candidate(int(c[0]), int(c[1]), save_state=False)
-        for o in state['outputs']:
-            self._outputs.append(self.Output.from_state(self, o))
-        _LOGGER.debug("Loaded state with %d(%d) candidates and %d outputs",
-                      len(self._candidates), len(state['candidates']), len(state['outputs']),)
+        loaded_candidates: typing.List[Tracker._Candidate] = list()
+        loaded_outputs: typing.List[Tracker.Output] = list()
+        for key, o in state.items():
+            if key.startswith("candidate."):
+                c = self._Candidate(int(o[0]), int(o[1]))
+                c.state_key = key
+                self._next_candidate_key = max(self._next_candidate_key, int(key[10:]) + 1)
+                loaded_candidates.append(c)
+                continue
+            if not key.startswith("output."):
+                continue
+            o = self.Output.from_state(self, o)
+            o.state_key = key
+            self._next_output_key = max(self._next_output_key, int(key[7:]) + 1)
+            loaded_outputs.append(o)
+        loaded_candidates.sort(key=lambda c: c.start_epoch_ms)
+        self._candidates.extend(loaded_candidates)
+        loaded_outputs.sort(key=lambda o: o.start_epoch_ms)
+        self._outputs.extend(loaded_outputs)
+        _LOGGER.debug("Loaded state with %d candidates and %d outputs",
+                      len(loaded_candidates), len(loaded_outputs),)
         return True
 
     async def initial_scan(self) -> None:
@@ -216,10 +279,17 @@ class Tracker(ABC):
                 return len(self.tracker._candidates)
 
             def __delitem__(self, key: typing.Union[slice, int]) -> None:
+                removed = self.tracker._candidates[key]
+                if not isinstance(key, slice):
+                    removed = [removed]
+                for c in removed:
+                    self.tracker._candidate_removed(c)
                 del self.tracker._candidates[key]
 
             def insert(self, index: int, start: int, end: int) -> typing.Any:
-                self.tracker._candidates.insert(index, self.tracker._Candidate(start, end))
+                c = self.tracker._Candidate(start, end)
+                self.tracker._candidates.insert(index, c)
+                self.tracker._candidate_added(c)
                 return True
 
             def merge_contained(self, index: int) -> typing.Any:
@@ -247,6 +317,8 @@ class Tracker(ABC):
             scan_begin = int(floor(time.time() * 1000))
             remaining_candidates = list(self._candidates)
             self._candidates.clear()
+            for c in remaining_candidates:
+                self._candidate_removed(c)
 
             for idx in reversed(range(len(remaining_candidates))):
                 c = remaining_candidates[idx]
@@ -290,9 +362,12 @@ class Tracker(ABC):
 
             def __delitem__(self, key: typing.Union[slice, int]) -> None:
                 if isinstance(key, slice):
-                    self.to_merge.extend(self.tracker._outputs[key])
+                    removed = self.tracker._outputs[key]
                 else:
-                    self.to_merge.append(self.tracker._outputs[key])
+                    removed = [self.tracker._outputs[key]]
+                for o in removed:
+                    self.tracker.output_removed(o)
+                self.to_merge.extend(removed)
                 del self.tracker._outputs[key]
 
             def insert(self, index: int, start: int, end: int) -> typing.Any:
@@ -339,19 +414,24 @@ class Tracker(ABC):
 
             def __delitem__(self, key: typing.Union[slice, int]) -> None:
                 if isinstance(key, slice):
-                    self.to_merge.extend(self.tracker._outputs[key])
+                    removed = self.tracker._outputs[key]
                 else:
-                    self.to_merge.append(self.tracker._outputs[key])
+                    removed = [self.tracker._outputs[key]]
+                for o in removed:
+                    self.tracker.output_removed(o)
+                self.to_merge.extend(removed)
                 del self.tracker._outputs[key]
 
             def insert(self, index: int, start: int, end: int) -> typing.Any:
                 new_output = self.tracker.Output(self.tracker, start, end)
                 new_output.have_committed = True
+                self.tracker.output_changed(new_output)
                 self.tracker._outputs.insert(index, new_output)
                 return new_output
 
             def merge_contained(self, index: int) -> typing.Any:
                 self.tracker._outputs[index].have_committed = True
+                self.tracker.output_changed(self.tracker._outputs[index])
                 return None
 
             def get_start(self, index: int) -> typing.Union[int, float]:
@@ -398,11 +478,13 @@ class Tracker(ABC):
 
             o.have_committed = True
             o.updated.clear()
+            self.output_changed(o)
             return True
 
         process_idx = 0
         while process_idx < len(self._outputs):
             if not await process_output(process_idx):
+                self.output_removed(self._outputs[process_idx])
                 del self._outputs[process_idx]
             else:
                 process_idx += 1
@@ -416,6 +498,7 @@ class Tracker(ABC):
             if not intersects(start_epoch_ms, end_epoch_ms, candidate.start_epoch_ms, candidate.end_epoch_ms):
                 continue
             _LOGGER.debug("Discarding candidate %d,%d", candidate.start_epoch_ms, candidate.end_epoch_ms)
+            self._candidate_removed(candidate)
             del self._candidates[idx]
         for output in self._outputs:
             for idx in reversed(range(len(output.updated))):
@@ -424,6 +507,7 @@ class Tracker(ABC):
                     continue
                 _LOGGER.debug("Discarding update %d,%d", update.start_epoch_ms, update.end_epoch_ms)
                 del output.updated[idx]
+                self.output_changed(output)
 
     def discard_outputs(self, start_epoch_ms: int, end_epoch_ms: int) -> None:
         for idx in reversed(range(len(self._outputs))):
@@ -431,6 +515,7 @@ class Tracker(ABC):
             if not intersects(start_epoch_ms, end_epoch_ms, output.start_epoch_ms, output.end_epoch_ms):
                 continue
             _LOGGER.debug("Discarding output %d,%d", output.start_epoch_ms, output.end_epoch_ms)
+            self.output_removed(output)
             del self._outputs[idx]
 
 
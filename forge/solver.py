@@ -1,5 +1,6 @@
 import typing
 import numpy as np
+from numba import njit
 from math import isfinite, sqrt, nan
 from cmath import sqrt as csqrt
 
@@ -44,6 +45,62 @@ def _newton_raphson_array(
     return x1
 
 
+@njit(cache=True, nogil=True, error_model='numpy')
+def _secant_array_inplace(
+        y_target: np.ndarray,
+        evaluate: typing.Callable[[float], float],
+        x0: np.ndarray, x1: np.ndarray,
+        x_epsilon: float, max_iterations: int,
+) -> None:
+    # Each element iterates on its own until its step converges, so this is identical to the masked array
+    # iteration without allocating anything per step.
+    for i in range(y_target.shape[0]):
+        target = y_target[i]
+        p0 = x0[i]
+        p1 = x1[i]
+        y0 = evaluate(p0)
+        for _ in range(max_iterations):
+            y1 = evaluate(p1)
+            dX = ((p1 - p0) / (y1 - y0)) * (target - y1)
+            y0 = y1
+            p0 = p1
+            p1 += dX
+            if not abs(dX) > x_epsilon:
+                break
+        x1[i] = p1
+
+
+def secant_array(
+        y_target: np.ndarray,
+        evaluate: typing.Callable[[float], float],
+        x0: typing.Union[float, np.ndarray] = None, x1: typing.Union[float, np.ndarray] = None,
+        x_epsilon: float = 1E-6, max_iterations: int = 20,
+) -> np.ndarray:
+    # The compiled equivalent of the array Newton-Raphson (secant) solver, with evaluate being a scalar njit function
+    y_target = np.asarray(y_target, dtype=np.float64)
+    shape = y_target.shape
+    y_target = y_target.ravel()
+
+    if x0 is None:
+        x0 = np.zeros_like(y_target)
+    elif isinstance(x0, (int, float)):
+        x0 = np.full_like(y_target, x0)
+    else:
+        x0 = np.array(x0, dtype=np.float64).ravel()
+
+    if x1 is None:
+        x1 = x0 * 0.9
+        replace = x1 == x0
+        x1[replace] = x0[replace] + 0.1
+    elif isinstance(x1, (int, float)):
+        x1 = np.full_like(y_target, x1)
+    else:
+        x1 = np.array(x1, dtype=np.float64).ravel()
+
+    _secant_array_inplace(y_target, evaluate, x0, x1, x_epsilon, max_iterations)
+    return x1.reshape(shape)
+
+
 def newton_raphson(
         y_target: typing.Union[float, np.ndarray],
         evaluate: typing.Union[typing.Callable[[float], float], typing.Callable[[np.ndarray], np.ndarray]],
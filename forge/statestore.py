@@ -0,0 +1,173 @@
+import typing
+import logging
+import os
+from pathlib import Path
+from json import loads as from_json, dumps as to_json, JSONDecodeError
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _encode(value: typing.Any) -> str:
+    return to_json(value, separators=(',', ':'))
+
+
+def _sync(f: typing.TextIO) -> None:
+    f.flush()
+    try:
+        os.fdatasync(f.fileno())
+    except AttributeError:
+        os.fsync(f.fileno())
+
+
+# The store holds a set of keyed JSON values.  The file itself is a compacted snapshot of all entries, followed
+# by an append-only log (the same name with ".log" appended) of changes made since the snapshot.  Each log line is
+# a single update, so a save is applied completely or not at all:
+#
+#   {"set": {key: value, ...}, "remove": [key, ...]}
+#
+# A trailing partial line (e.g. from an interrupted write) is discarded.  Once the log grows larger than the
+# snapshot it is merged back into a new one, so saves cost the size of the change rather than the whole state.
+#
+# A file that is not a snapshot (e.g. a state file from before the store) is passed to the legacy conversion
+# and rewritten as a snapshot on the next update.
+class StateStore:
+    _SNAPSHOT_KEY = "state_store"
+    _SNAPSHOT_VERSION = 1
+
+    def __init__(self, file: Path,
+                 legacy: typing.Optional[typing.Callable[[typing.Any], typing.Dict[str, typing.Any]]] = None):
+        self.file = file
+        self.legacy = legacy
+        self.compact_size: int = 64 * 1024
+        self._entries: typing.Dict[str, str] = dict()
+        self._loaded: bool = False
+        self._snapshot_size: int = 0
+        self._log_size: int = 0
+        self._rewrite: bool = False
+
+    @property
+    def _log_file(self) -> Path:
+        return self.file.with_name(self.file.name + ".log")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _read_snapshot(self) -> bool:
+        try:
+            with open(self.file, "r") as f:
+                contents = f.read()
+        except FileNotFoundError:
+            return False
+        self._snapshot_size = len(contents)
+        if not contents:
+            return False
+
+        state = from_json(contents)
+        if isinstance(state, dict) and state.get(self._SNAPSHOT_KEY) == self._SNAPSHOT_VERSION:
+            entries = state['entries']
+        elif self.legacy is not None:
+            _LOGGER.debug("Converting legacy state file %s", self.file)
+            entries = self.legacy(state)
+            self._rewrite = True
+        else:
+            raise RuntimeError(f"Unsupported state file {self.file}")
+
+        for key, value in entries.items():
+            self._entries[key] = _encode(value)
+        return True
+
+    def _read_log(self) -> bool:
+        any_applied = False
+        valid_end = 0
+        try:
+            with open(self._log_file, "rb") as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        change = from_json(line)
+                    except (JSONDecodeError, UnicodeDecodeError):
+                        break
+                    for key, value in change.get('set', {}).items():
+                        self._entries[key] = _encode(value)
+                    for key in change.get('remove', []):
+                        self._entries.pop(key, None)
+                    any_applied = True
+                    valid_end += len(line)
+                f.seek(0, os.SEEK_END)
+                if f.tell() != valid_end:
+                    # Drop any partial update, so appends start on a line
+                    _LOGGER.warning("Discarding %d bytes of partial state log in %s", f.tell() - valid_end,
+                                    self._log_file)
+                    os.truncate(self._log_file, valid_end)
+        except FileNotFoundError:
+            pass
+        self._log_size = valid_end
+        return any_applied
+
+    def load(self) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        self._entries.clear()
+        self._rewrite = False
+        self._loaded = True
+        have_snapshot = self._read_snapshot()
+        have_log = self._read_log()
+        if not have_snapshot and not have_log:
+            return None
+        _LOGGER.debug("Loaded %d state entries with %d bytes of log from %s",
+                      len(self._entries), self._log_size, self.file)
+        return {key: from_json(value) for key, value in self._entries.items()}
+
+    def update(self, changed: typing.Dict[str, typing.Any], removed: typing.Iterable[str] = (),
+               sync: bool = False) -> None:
+        if not self._loaded:
+            self.load()
+
+        set_values: typing.Dict[str, str] = dict()
+        for key, value in changed.items():
+            value = _encode(value)
+            if self._entries.get(key) == value:
+                continue
+            set_values[key] = value
+            self._entries[key] = value
+        remove_keys: typing.List[str] = list()
+        for key in removed:
+            if self._entries.pop(key, None) is None:
+                continue
+            remove_keys.append(key)
+
+        if self._rewrite or self._log_size > max(self.compact_size, self._snapshot_size):
+            self.compact(sync=sync)
+            return
+        if not set_values and not remove_keys:
+            return
+
+        line = '{"set":{' + ','.join(f"{_encode(key)}:{value}" for key, value in set_values.items()) + '}'
+        if remove_keys:
+            line += ',"remove":' + _encode(remove_keys)
+        line += '}\n'
+        with open(self._log_file, "a") as f:
+            f.write(line)
+            if sync:
+                _sync(f)
+        self._log_size += len(line.encode('utf-8'))
+
+    def compact(self, sync: bool = False) -> None:
+        if not self._loaded:
+            self.load()
+
+        contents = ('{' + _encode(self._SNAPSHOT_KEY) + ':' + str(self._SNAPSHOT_VERSION) + ',"entries":{' +
+                    ','.join(f"{_encode(key)}:{value}" for key, value in self._entries.items()) + '}}')
+        temporary = self.file.with_name(self.file.name + ".tmp")
+        with open(temporary, "w") as f:
+            f.write(contents)
+            if sync:
+                _sync(f)
+        temporary.replace(self.file)
+        self._snapshot_size = len(contents)
+
+        try:
+            os.truncate(self._log_file, 0)
+        except FileNotFoundError:
+            pass
+        self._log_size = 0
+        self._rewrite = False
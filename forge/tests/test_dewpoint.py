@@ -2,7 +2,10 @@ import typing
 import pytest
 import numpy as np
 from math import nan
-from forge.dewpoint import dewpoint, rh, temperature, extrapolate_rh
+from forge.solver import newton_raphson
+from forge.units import ZERO_C_IN_K
+from forge.dewpoint import dewpoint, rh, temperature, extrapolate_rh, svp, svp_over_ice, svp_over_water, \
+    _svp_solve, _svp_over_ice_kernel, _svp_over_water_kernel, _svp_kernel
 
 
 def test_dewpoint():
@@ -71,3 +74,29 @@ def test_extrapolate_rh():
                           np.array([nan, -15.0]), over_water=True).tolist() == pytest.approx([
         nan, 29.9503350757957
     ], nan_ok=True)
+
+
+def test_svp_kernels():
+    t = np.concatenate((np.linspace(-10.0, 700.0, 2000), [0.0, ZERO_C_IN_K, 678.0, nan, np.inf]))
+    assert [_svp_over_ice_kernel(v) for v in t] == pytest.approx(svp_over_ice(t).tolist(), nan_ok=True, rel=1E-12)
+    assert [_svp_over_water_kernel(v) for v in t] == pytest.approx(svp_over_water(t).tolist(), nan_ok=True, rel=1E-12)
+    assert [_svp_kernel(v) for v in t] == pytest.approx(svp(t).tolist(), nan_ok=True, rel=1E-12)
+
+
+def test_svp_solve_regression():
+    generator = np.random.default_rng(1)
+    t = np.concatenate((generator.uniform(-100.0, 100.0, 19993), [-100.0, 0.0, 100.0, nan, 20.0, 20.0, 20.0]))
+    relative_humidity = np.concatenate((generator.uniform(0.1, 100.0, 19993), [50.0, 100.0, 1.0, 50.0, nan, 0.0, 0.01]))
+    t_kelvin = t + ZERO_C_IN_K
+
+    for over_water in (False, True):
+        svp_target = svp(t_kelvin, over_water=over_water) * (relative_humidity / 100.0)
+        reference = newton_raphson(np.array(svp_target), lambda v: svp(v, over_water=over_water),
+                                   x0=np.array(t_kelvin), x1=t_kelvin + 1.0)
+        result = _svp_solve(svp_target, t_initial=t_kelvin, over_water=over_water)
+        assert np.array_equal(np.isfinite(result), np.isfinite(reference))
+        valid = np.isfinite(reference)
+        assert np.max(np.abs(result[valid] - reference[valid])) < 1E-9
+
+        converted = dewpoint(t.reshape((-1, 8)), relative_humidity.reshape((-1, 8)), over_water=over_water)
+        assert converted.ravel().tolist() == pytest.approx((reference - ZERO_C_IN_K).tolist(), nan_ok=True, abs=1E-9)
@@ -0,0 +1,68 @@
+import asyncio
+import numpy as np
+from math import nan
+from netCDF4 import Dataset
+from forge.data.structure import instrument_timeseries
+from forge.data.structure.timeseries import time_coordinate
+from forge.product.builder import ProductBuilder, LatestValue
+from forge.product.ncei.file import NCEIFile
+
+
+def _write_file(file, day: int, wavelengths) -> None:
+    start = 1609459200 + day * 86400
+    root = Dataset(str(file), 'w', format='NETCDF4')
+    try:
+        instrument_timeseries(root, "bnd", "S11", start, start + 86400, 3600, {"aerosol"})
+        root.history = f"day {day}"
+        data = root.createGroup("data")
+        times = np.arange(start * 1000, (start + 86400) * 1000, 3600 * 1000, dtype=np.int64)
+        time_coordinate(data)[:] = times
+        data.createDimension('wavelength', len(wavelengths))
+        var = data.createVariable('wavelength', 'f8', ('wavelength',), fill_value=nan)
+        var[:] = wavelengths
+        var = data.createVariable('scattering_coefficient', 'f8', ('time', 'wavelength'), fill_value=nan)
+        var[:] = np.random.default_rng(day).normal(10.0, 1.0, (times.shape[0], len(wavelengths)))
+    finally:
+        root.close()
+
+
+def test_merge(tmp_path):
+    files = []
+    for day, wavelengths in enumerate([[450, 550], [550, 700], [450, 550, 700], [880], [450]]):
+        file = tmp_path / f"file{day}.nc"
+        _write_file(file, day, wavelengths)
+        files.append(file)
+
+    def build(workers: int):
+        instrument = NCEIFile.MergeInstrument()
+        value = NCEIFile.MergeVariable()
+        latest = LatestValue(0)
+
+        def integrate(root: Dataset) -> None:
+            instrument.integrate_file(root)
+            value.integrate_selected(root, {"variable_name": "scattering_coefficient"})
+            latest.set(root.history)
+
+        async def run():
+            async with ProductBuilder(workers).integration(integrate, instrument, value, latest) as integration:
+                for file in files:
+                    await integration(file)
+            return integration.files
+
+        loop = asyncio.new_event_loop()
+        try:
+            assert loop.run_until_complete(run()) == len(files)
+        finally:
+            loop.close()
+        return instrument, value, latest
+
+    serial_instrument, serial_value, serial_latest = build(1)
+    parallel_instrument, parallel_value, parallel_latest = build(2)
+
+    assert serial_value._wavelengths == [450, 550, 700, 880]
+    assert parallel_value._wavelengths == serial_value._wavelengths
+    assert parallel_value._cut_sizes == serial_value._cut_sizes
+    assert np.array_equal(parallel_value.times, serial_value.times)
+    assert np.array_equal(parallel_value.values, serial_value.values, equal_nan=True)
+    assert parallel_instrument._history == serial_instrument._history == "day 4"
+    assert parallel_latest.value == serial_latest.value == "day 4"
@@ -0,0 +1,89 @@
+import pytest
+import numpy as np
+from math import isnan
+from forge.data.sketch import Moments, QuantileSketch
+
+
+def test_moments():
+    values = np.random.default_rng(1).normal(1.0E6, 2.0, 10000)
+
+    m = Moments()
+    assert m.count == 0
+    assert isnan(m.stddev)
+    m.update(np.array([np.nan, np.inf]))
+    assert m.count == 0
+
+    m.update(values)
+    assert m.count == values.shape[0]
+    assert m.mean == pytest.approx(float(np.mean(values)))
+    assert m.stddev == pytest.approx(float(np.std(values, ddof=1)))
+    assert m.minimum == float(np.min(values))
+    assert m.maximum == float(np.max(values))
+
+    merged = Moments()
+    for block in np.array_split(values, 7):
+        part = Moments()
+        part.update(block)
+        merged.merge(part)
+    merged.merge(Moments())
+    assert merged.count == m.count
+    assert merged.mean == pytest.approx(m.mean)
+    assert merged.stddev == pytest.approx(m.stddev)
+    assert merged.minimum == m.minimum
+    assert merged.maximum == m.maximum
+
+
+def test_quantile_sketch():
+    rng = np.random.default_rng(2)
+    values = rng.exponential(10.0, 200000)
+
+    s = QuantileSketch(k=200)
+    assert isnan(s.quantile(0.5))
+    for block in np.array_split(values, 50):
+        s.update(block)
+    assert s.count == values.shape[0]
+    assert len(s) < 3 * 200 + 64
+
+    sorted_values = np.sort(values)
+
+    def rank_error(sketch: QuantileSketch, q: float) -> float:
+        return abs(np.searchsorted(sorted_values, sketch.quantile(q)) / sorted_values.shape[0] - q)
+
+    for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+        assert rank_error(s, q) < 0.02
+
+    merged = QuantileSketch(k=200)
+    for block in np.array_split(values, 13):
+        part = QuantileSketch(k=200)
+        part.update(block)
+        merged.merge(part)
+    assert merged.count == values.shape[0]
+    assert len(merged) < 3 * 200 + 64
+    for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+        assert rank_error(merged, q) < 0.02
+
+    small = QuantileSketch()
+    small.update(np.array([3.0, 1.0, np.nan, 2.0]))
+    assert small.count == 3
+    assert small.quantiles([0.0, 0.5, 1.0]) == [1.0, 2.0, 3.0]
+
+
+def test_quantile_sketch_items():
+    rng = np.random.default_rng(4)
+    values = rng.normal(0.0, 1.0, 50000)
+
+    s = QuantileSketch(k=64)
+    s.update(values)
+    items, levels = s.items()
+    assert items.shape == levels.shape
+    assert np.sum(np.left_shift(1, levels.astype(np.int64))) == s.count
+
+    restored = QuantileSketch(k=64)
+    restored.merge_items(np.concatenate((items, [np.nan, np.nan])), np.concatenate((levels, [0, 0])))
+    assert restored.count == s.count
+    assert restored.quantiles([0.1, 0.5, 0.9]) == s.quantiles([0.1, 0.5, 0.9])
+
+    restored.compact(32)
+    assert len(restored) <= 32
+    assert restored.count == s.count
+    assert abs(np.searchsorted(np.sort(values), restored.quantile(0.5)) / values.shape[0] - 0.5) < 0.1
@@ -2,7 +2,13 @@ import typing
 import pytest
 import numpy as np
 from math import nan
-from forge.solver import newton_raphson, polynomial
+from numba import njit
+from forge.solver import newton_raphson, secant_array, polynomial
+
+
+@njit
+def _cubic(x: float) -> float:
+    return (x - 1.0) * (x + 2.0) * x + 0.25 * x
 
 
 def test_newton_raphson():
@@ -13,6 +19,20 @@ def test_newton_raphson():
     )
 
 
+def test_secant_array():
+    assert secant_array(np.array([3.5, 6.0, nan]), njit(lambda x: x * 0.5 + 1.0)).tolist() == pytest.approx([
+        5.0, 10.0, nan], nan_ok=True
+    )
+
+    target = np.random.default_rng(1).uniform(1.0, 50.0, (40, 5))
+    guess = np.full(target.shape, 2.0)
+    result = secant_array(target, _cubic, x0=guess)
+    assert result.shape == target.shape
+    assert result.ravel().tolist() == newton_raphson(target.ravel(), lambda x: (x - 1.0) * (x + 2.0) * x + 0.25 * x,
+                                             x0=guess.ravel()).tolist()
+    assert guess.tolist() == np.full(target.shape, 2.0).tolist()
+
+
 def test_polynomial():
     assert polynomial([0.0, 2.0], 60.0) == [30.0]
     assert polynomial([5.0, 2.0], 65.0) == [30.0]
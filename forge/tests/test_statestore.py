@@ -0,0 +1,70 @@
+import typing
+import pytest
+from json import dump as to_json
+from forge.statestore import StateStore
+
+
+def test_basic(tmp_path):
+    file = tmp_path / "state.json"
+    store = StateStore(file)
+    assert store.load() is None
+
+    store.update({'a': 1, 'b': [1, 2]})
+    store.update({'c': {'x': True}}, ['a'], sync=True)
+    store.update({'b': [1, 2]})
+    assert (tmp_path / "state.json.log").read_text().count('\n') == 2
+
+    check = StateStore(file)
+    assert check.load() == {'b': [1, 2], 'c': {'x': True}}
+
+    store.compact()
+    assert (tmp_path / "state.json.log").read_text() == ""
+    check = StateStore(file)
+    assert check.load() == {'b': [1, 2], 'c': {'x': True}}
+
+    check.update({'b': 3})
+    assert StateStore(file).load() == {'b': 3, 'c': {'x': True}}
+
+
+def test_compact(tmp_path):
+    file = tmp_path / "state.json"
+    store = StateStore(file)
+    store.compact_size = 256
+    for i in range(100):
+        store.update({f"k{i}": i, 'latest': i}, [f"k{i-10}"] if i >= 10 else [])
+    assert (tmp_path / "state.json.log").stat().st_size <= 512
+
+    expected: typing.Dict[str, typing.Any] = {f"k{i}": i for i in range(90, 100)}
+    expected['latest'] = 99
+    assert StateStore(file).load() == expected
+
+
+def test_partial_log(tmp_path):
+    file = tmp_path / "state.json"
+    store = StateStore(file)
+    store.update({'a': 1})
+    store.update({'a': 2})
+    with (tmp_path / "state.json.log").open("a") as f:
+        f.write('{"set":{"a":3')
+
+    check = StateStore(file)
+    assert check.load() == {'a': 2}
+    check.update({'b': 1})
+    assert StateStore(file).load() == {'a': 2, 'b': 1}
+
+
+def test_legacy(tmp_path):
+    file = tmp_path / "state.json"
+    with file.open("w") as f:
+        to_json({'version': 1, 'items': [10, 20]}, f)
+
+    def legacy(state):
+        return {'version': state['version'], 'item.0': state['items'][0], 'item.1': state['items'][1]}
+
+    with pytest.raises(RuntimeError):
+        StateStore(file).load()
+
+    store = StateStore(file, legacy)
+    assert store.load() == {'version': 1, 'item.0': 10, 'item.1': 20}
+    store.update({'item.2': 30}, ['item.0'])
+    assert StateStore(file).load() == {'version': 1, 'item.1': 20, 'item.2': 30}
@@ -0,0 +1,135 @@
+import typing
+import os
+import gzip
+import hashlib
+import mimetypes
+import logging
+from starlette.staticfiles import StaticFiles
+from starlette.datastructures import Headers, QueryParams, URL
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+_LOGGER = logging.getLogger(__name__)
+
+_COMPRESS_TYPES = frozenset({
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+})
+_IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+_REVALIDATE_CACHE = "no-cache"
+
+
+def _accepted_encodings(headers: Headers) -> typing.Set[str]:
+    result: typing.Set[str] = set()
+    for part in headers.get("accept-encoding", "").split(","):
+        coding, *parameters = part.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        for p in parameters:
+            p = p.strip()
+            if not p.startswith("q="):
+                continue
+            try:
+                if float(p[2:]) <= 0.0:
+                    break
+            except ValueError:
+                pass
+        else:
+            result.add(coding)
+    return result
+
+
+class _Asset:
+    def __init__(self, contents: bytes, media_type: str, compress_level: int):
+        self.digest = hashlib.sha256(contents).hexdigest()[:20]
+        self.media_type = media_type
+        # Representations in order of preference, with identity last
+        self.encodings: typing.List[typing.Tuple[typing.Optional[str], bytes]] = list()
+
+        if media_type.startswith("text/") or media_type in _COMPRESS_TYPES:
+            if brotli is not None:
+                compressed = brotli.compress(contents, quality=11)
+                if len(compressed) < len(contents):
+                    self.encodings.append(("br", compressed))
+            compressed = gzip.compress(contents, compresslevel=compress_level, mtime=0)
+            if len(compressed) < len(contents):
+                self.encodings.append(("gzip", compressed))
+        self.encodings.append((None, contents))
+
+    def etag(self, encoding: typing.Optional[str]) -> str:
+        if not encoding:
+            return f'"{self.digest}"'
+        return f'"{self.digest}-{encoding}"'
+
+
+# Static files are read, hashed and compressed once at startup and served from memory.  Pages refer to them
+# through static_url(), which adds the content hash to the URL, so a request carrying the current hash can be
+# cached indefinitely by the browser.  Anything else (e.g. relative references from inside a stylesheet) is
+# revalidated against the content hash ETag.
+class StaticAssets(StaticFiles):
+    def __init__(self, directory: str, compress_level: int = 9):
+        super().__init__(directory=directory)
+        self._assets: typing.Dict[str, _Asset] = dict()
+        self._digests: typing.Dict[str, str] = dict()
+        self._load(directory, compress_level)
+
+    def _load(self, directory: str, compress_level: int) -> None:
+        root = os.path.realpath(directory)
+        total_size = 0
+        for path, _, files in os.walk(root):
+            for name in files:
+                full_path = os.path.join(path, name)
+                with open(full_path, "rb") as f:
+                    contents = f.read()
+                media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                asset = _Asset(contents, media_type, compress_level)
+                self._assets[full_path] = asset
+                self._digests[os.path.relpath(full_path, root).replace(os.sep, "/")] = asset.digest
+                total_size += len(contents)
+        _LOGGER.debug("Loaded %d static assets with %d bytes", len(self._assets), total_size)
+
+    def url_for(self, request: Request, path: str) -> URL:
+        url = request.url_for('static', path=path)
+        digest = self._digests.get(path.lstrip("/"))
+        if digest is None:
+            return url
+        return url.include_query_params(v=digest)
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope,
+                      status_code: int = 200) -> Response:
+        asset = self._assets.get(os.path.realpath(full_path))
+        if asset is None or status_code != 200:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        request_headers = Headers(scope=scope)
+        accepted = _accepted_encodings(request_headers)
+        for encoding, contents in asset.encodings:
+            if not encoding or encoding in accepted:
+                break
+
+        headers = {
+            "etag": asset.etag(encoding),
+            "vary": "Accept-Encoding",
+        }
+        if encoding:
+            headers["content-encoding"] = encoding
+        if QueryParams(scope.get("query_string", b"")).get("v") == asset.digest:
+            headers["cache-control"] = _IMMUTABLE_CACHE
+        else:
+            headers["cache-control"] = _REVALIDATE_CACHE
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            if headers["etag"] in tags or ("W/" + headers["etag"]) in tags:
+                return Response(status_code=304, headers=headers)
+
+        return Response(contents, media_type=asset.media_type, headers=headers)
@@ -360,6 +360,10 @@ class ContaminationRecord(Record):
         def connection_name(self) -> str:
             return "read contamination"
 
+        @property
+        def prefetch_files(self) -> typing.Optional[FileSequence]:
+            return self.files
+
         def _attach(self, selection: InstrumentSelection, var: VariableContext, times: np.ndarray, values: np.ndarray) -> None:
             if not np.issubdtype(var.variable.dtype, np.integer):
                 return
@@ -480,6 +484,10 @@ class DataRecord(Record):
         def connection_name(self) -> str:
             return "read data"
 
+        @property
+        def prefetch_files(self) -> typing.Optional[FileSequence]:
+            return self.files
+
         def _selection_to_streams(self, selection: Selection) -> typing.List[FieldStream]:
             result: typing.List[FieldStream] = list()
             for stream in self.streams.values():
@@ -589,6 +597,9 @@ class RealtimeRecord(DataRecord):
                 self.data_break_threshold = ceil(record_interval * 2 + 1200)
                 self.data_break_epoch_ms = self.discard_epoch_ms + self.data_break_threshold
 
+                # Only ask for what would not be discarded anyway
+                self.start_epoch_ms = self.discard_epoch_ms + self.record_time_offset + 1
+
                 self._hold_fields = stream.hold_fields
 
             async def block_ready(self, block: RealtimeDataBlock) -> None:
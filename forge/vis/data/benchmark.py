@@ -0,0 +1,109 @@
+import typing
+import asyncio
+import argparse
+import time
+import random
+from json import dumps as to_json
+from .stream import RecordStream
+from .binary import encode_frame
+
+
+class _BenchmarkStream(RecordStream):
+    def __init__(self, fields: typing.List[str], binary: bool):
+        self.total_bytes = 0
+        self.total_frames = 0
+        self.encode_time = 0.0
+
+        async def send(content: typing.Dict) -> None:
+            encoded = to_json({
+                'type': 'data',
+                'stream': 1,
+                'content': content,
+            })
+            self.total_bytes += len(encoded.encode('utf-8'))
+            self.total_frames += 1
+
+        super().__init__(send, fields)
+
+        if binary:
+            async def send_binary(payload: bytes) -> None:
+                self.total_bytes += len(encode_frame(1, payload))
+                self.total_frames += 1
+
+            self.send_binary = send_binary
+
+    async def run(self) -> None:
+        pass
+
+
+def _synthetic_records(days: int, interval_ms: int, float_fields: int, array_fields: int,
+                       array_size: int) -> typing.List[typing.Tuple[int, typing.Dict[str, typing.Any]]]:
+    generator = random.Random(0)
+    start_epoch_ms = 1609459200000
+    result: typing.List[typing.Tuple[int, typing.Dict[str, typing.Any]]] = list()
+    for epoch_ms in range(start_epoch_ms, start_epoch_ms + days * 86400 * 1000, interval_ms):
+        record: typing.Dict[str, typing.Any] = dict()
+        for i in range(float_fields):
+            if generator.random() < 0.01:
+                record[f'F{i}'] = None
+            else:
+                record[f'F{i}'] = generator.uniform(-100.0, 1000.0)
+        for i in range(array_fields):
+            record[f'A{i}'] = [generator.uniform(0.0, 100.0) for _ in range(array_size)]
+        result.append((epoch_ms, record))
+    return result
+
+
+async def _encode(records: typing.List[typing.Tuple[int, typing.Dict[str, typing.Any]]],
+                  fields: typing.List[str], binary: bool) -> _BenchmarkStream:
+    stream = _BenchmarkStream(fields, binary)
+    begin = time.perf_counter()
+    for epoch_ms, record in records:
+        await stream.send_record(epoch_ms, record)
+    await stream.flush()
+    stream.encode_time = time.perf_counter() - begin
+    return stream
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forge visualization data stream encoding benchmark.")
+
+    parser.add_argument('--days',
+                        dest='days', type=int, default=30,
+                        help="number of days of synthetic data")
+    parser.add_argument('--interval',
+                        dest='interval', type=float, default=60.0,
+                        help="record interval in seconds")
+    parser.add_argument('--fields',
+                        dest='fields', type=int, default=8,
+                        help="number of scalar float fields")
+    parser.add_argument('--arrays',
+                        dest='arrays', type=int, default=1,
+                        help="number of float array fields")
+    parser.add_argument('--array-size',
+                        dest='array_size', type=int, default=3,
+                        help="number of elements in each array field")
+
+    args = parser.parse_args()
+
+    records = _synthetic_records(args.days, int(round(args.interval * 1000)),
+                                 args.fields, args.arrays, args.array_size)
+    fields = list(records[0][1].keys()) if records else []
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    json_result = loop.run_until_complete(_encode(records, fields, False))
+    binary_result = loop.run_until_complete(_encode(records, fields, True))
+    loop.close()
+
+    print(f"Records: {len(records)} with {len(fields)} fields")
+    for name, result in (("JSON", json_result), ("Binary", binary_result)):
+        print(f"{name:>8}: {result.total_bytes:>12d} bytes in {result.total_frames:>6d} frames, "
+              f"{result.encode_time * 1000.0:>10.1f} ms")
+    if json_result.total_bytes > 0 and json_result.encode_time > 0.0:
+        print(f"   Ratio: {binary_result.total_bytes / json_result.total_bytes:.3f} bytes, "
+              f"{binary_result.encode_time / json_result.encode_time:.3f} time")
+
+
+if __name__ == '__main__':
+    main()
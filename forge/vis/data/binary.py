@@ -0,0 +1,161 @@
+import typing
+import struct
+import numpy as np
+from json import dumps as to_json, loads as from_json
+from math import nan
+from forge.vis.util import sanitize_for_json
+
+# Binary record frames, negotiated per connection as an alternative to the JSON/base64 encoding.
+#
+# All values are little-endian and every section begins on an eight byte boundary, so the
+# browser can map columns directly onto typed arrays.
+#
+#   envelope:    char[4] FRAME_MAGIC, uint32 stream
+#   header:      uint32 record count (N), uint32 field count (F)
+#   field table: F * (uint8 kind, uint8 reserved, uint16 name length, uint32 size, char[] name)
+#   time:        int64[N] epoch milliseconds
+#   columns:     in field table order
+#     FIELD_FLOAT:       float32[N]
+#     FIELD_FLOAT_ARRAY: int32[N] row lengths (zero for missing), float32[N * size] NaN padded
+#     FIELD_JSON:        char[size] UTF-8 encoded JSON list
+
+
+FRAME_MAGIC = b'FVDB'
+
+FIELD_FLOAT = 0
+FIELD_FLOAT_ARRAY = 1
+FIELD_JSON = 2
+
+_ENVELOPE = struct.Struct('<4sI')
+_HEADER = struct.Struct('<II')
+_FIELD = struct.Struct('<BBHI')
+
+
+def is_all_float(check: typing.List) -> bool:
+    if len(check) == 0:
+        return False
+    for v in check:
+        if v is None:
+            continue
+        if isinstance(v, float):
+            continue
+        return False
+    return True
+
+
+def is_all_float_array(check: typing.List) -> bool:
+    if len(check) == 0:
+        return False
+    any_valid = False
+    for v in check:
+        if v is None:
+            continue
+        if not isinstance(v, list):
+            return False
+        if not is_all_float(v):
+            return False
+        any_valid = True
+    return any_valid
+
+
+def to_float32(values: typing.Union[typing.List, np.ndarray]) -> np.ndarray:
+    # None converts to NaN, then anything that does not fit in a float32 becomes missing
+    with np.errstate(over='ignore', invalid='ignore'):
+        result = np.array(values, dtype=np.float64).astype(np.float32)
+    result[~np.isfinite(result)] = nan
+    return result
+
+
+def _pad(raw: bytearray) -> None:
+    remainder = len(raw) % 8
+    if remainder:
+        raw += bytes(8 - remainder)
+
+
+def encode_records(epoch_ms: typing.List[int], values: typing.Dict[str, typing.List[typing.Any]]) -> bytearray:
+    record_count = len(epoch_ms)
+
+    table = bytearray()
+    columns = bytearray()
+    for field, field_values in values.items():
+        name = field.encode('utf-8')
+        if is_all_float(field_values):
+            kind = FIELD_FLOAT
+            size = 0
+            columns += to_float32(field_values).tobytes()
+        elif is_all_float_array(field_values):
+            kind = FIELD_FLOAT_ARRAY
+            lengths = np.array([0 if row is None else len(row) for row in field_values], dtype='<i4')
+            size = int(np.max(lengths)) if record_count > 0 else 0
+            padded: typing.List[typing.List[typing.Optional[float]]] = list()
+            for row in field_values:
+                if row is None:
+                    padded.append([None] * size)
+                elif len(row) != size:
+                    padded.append(row + [None] * (size - len(row)))
+                else:
+                    padded.append(row)
+            contents = to_float32(padded).reshape((record_count, size))
+            columns += lengths.tobytes()
+            columns += contents.tobytes()
+        else:
+            kind = FIELD_JSON
+            encoded = to_json([sanitize_for_json(v) for v in field_values]).encode('utf-8')
+            size = len(encoded)
+            columns += encoded
+        _pad(columns)
+        table += _FIELD.pack(kind, 0, len(name), size)
+        table += name
+
+    result = bytearray(_HEADER.pack(record_count, len(values)))
+    result += table
+    _pad(result)
+    result += np.asarray(epoch_ms, dtype='<i8').tobytes()
+    result += columns
+    return result
+
+
+def encode_frame(stream_id: int, payload: typing.Union[bytes, bytearray]) -> bytes:
+    return _ENVELOPE.pack(FRAME_MAGIC, stream_id) + payload
+
+
+def decode_frame(frame: typing.Union[bytes, bytearray]) -> typing.Tuple[int, np.ndarray, typing.Dict[str, typing.Any]]:
+    magic, stream_id = _ENVELOPE.unpack_from(frame, 0)
+    if magic != FRAME_MAGIC:
+        raise ValueError("invalid frame magic")
+    offset = _ENVELOPE.size
+    record_count, field_count = _HEADER.unpack_from(frame, offset)
+    offset += _HEADER.size
+
+    table: typing.List[typing.Tuple[str, int, int]] = list()
+    for _ in range(field_count):
+        kind, _, name_length, size = _FIELD.unpack_from(frame, offset)
+        offset += _FIELD.size
+        name = bytes(frame[offset:offset + name_length]).decode('utf-8')
+        offset += name_length
+        table.append((name, kind, size))
+    offset += (8 - offset % 8) % 8
+
+    epoch_ms = np.frombuffer(frame, dtype='<i8', count=record_count, offset=offset)
+    offset += record_count * 8
+
+    fields: typing.Dict[str, typing.Any] = dict()
+    for name, kind, size in table:
+        if kind == FIELD_FLOAT:
+            fields[name] = np.frombuffer(frame, dtype='<f4', count=record_count, offset=offset)
+            offset += record_count * 4
+        elif kind == FIELD_FLOAT_ARRAY:
+            lengths = np.frombuffer(frame, dtype='<i4', count=record_count, offset=offset)
+            offset += record_count * 4
+            contents = np.frombuffer(frame, dtype='<f4', count=record_count * size, offset=offset)
+            offset += record_count * size * 4
+            contents = contents.reshape((record_count, size))
+            fields[name] = [contents[i, :lengths[i]] for i in range(record_count)]
+        elif kind == FIELD_JSON:
+            fields[name] = from_json(bytes(frame[offset:offset + size]).decode('utf-8'))
+            offset += size
+        else:
+            raise ValueError(f"unknown field kind {kind}")
+        offset += (8 - offset % 8) % 8
+
+    return stream_id, epoch_ms, fields
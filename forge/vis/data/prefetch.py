@@ -0,0 +1,192 @@
+import typing
+import asyncio
+import logging
+import hashlib
+from collections import OrderedDict
+from forge.tasks import wait_cancelable
+from forge.vis import CONFIGURATION
+from forge.archive.client.connection import Connection, LockDenied
+
+if typing.TYPE_CHECKING:
+    from .selection import FileSequence
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FileCache:
+    class _Entry:
+        def __init__(self, contents: bytes):
+            self.contents = contents
+            self.digest = (len(contents), hashlib.sha256(contents).digest())
+
+    def __init__(self, size: int):
+        self.size = size
+        self._entries: typing.Dict[str, "FileCache._Entry"] = OrderedDict()
+        self.total_bytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.stale: int = 0
+        self.evictions: int = 0
+        self.prefetched_files: int = 0
+        self.prefetched_bytes: int = 0
+        self.cancelled: int = 0
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def _discard(self, name: str) -> None:
+        entry = self._entries.pop(name, None)
+        if entry is not None:
+            self.total_bytes -= len(entry.contents)
+
+    def store(self, name: str, contents: bytes) -> None:
+        if self.size <= 0 or len(contents) > self.size:
+            return
+        self._discard(name)
+        self._entries[name] = self._Entry(contents)
+        self.total_bytes += len(contents)
+        self.prefetched_files += 1
+        self.prefetched_bytes += len(contents)
+        while self.total_bytes > self.size:
+            _, evicted = self._entries.popitem(last=False)
+            self.total_bytes -= len(evicted.contents)
+            self.evictions += 1
+
+    async def read(self, connection: Connection, name: str, destination: typing.BinaryIO) -> bool:
+        if self.size <= 0:
+            return False
+        entry = self._entries.get(name)
+        if entry is None:
+            self.misses += 1
+            return False
+
+        # The file may have been rewritten since it was prefetched, so only the server can say if it is still valid
+        if not connection.file_digests_available:
+            self.misses += 1
+            return False
+        digest = (await connection.file_digests([name]))[0]
+        if digest != entry.digest:
+            self._discard(name)
+            self.stale += 1
+            return False
+
+        self._entries.move_to_end(name)
+        self.hits += 1
+        destination.write(entry.contents)
+        return True
+
+    def metrics(self) -> typing.Dict[str, typing.Any]:
+        return {
+            'files': len(self._entries),
+            'bytes': self.total_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'evictions': self.evictions,
+            'prefetched_files': self.prefetched_files,
+            'prefetched_bytes': self.prefetched_bytes,
+            'cancelled': self.cancelled,
+        }
+
+
+file_cache = FileCache(int(CONFIGURATION.get('SERVER.PREFETCH_CACHE', 256 * 1024 * 1024)))
+
+
+class PrefetchScheduler:
+    def __init__(self, budget: typing.Optional[int] = None, delay: typing.Optional[float] = None,
+                 cache: typing.Optional[FileCache] = None):
+        self.budget = budget if budget is not None else int(CONFIGURATION.get('SERVER.PREFETCH_BUDGET',
+                                                                              64 * 1024 * 1024))
+        self.delay = delay if delay is not None else float(CONFIGURATION.get('SERVER.PREFETCH_DELAY', 1.0))
+        self.cache = cache if cache is not None else file_cache
+        self._served: typing.List["FileSequence"] = list()
+        self._task: typing.Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.cache.size > 0 and self.budget > 0
+
+    def served(self, files: typing.Optional["FileSequence"]) -> None:
+        if files is None or not self.enabled:
+            return
+        self._served.append(files)
+        # Restart the delay so a burst of completing streams becomes a single prefetch pass
+        if self._task is not None:
+            self._task.cancel()
+        self._task = asyncio.ensure_future(self._run(list(self._served)))
+
+    async def cancel(self) -> None:
+        self._served.clear()
+        task = self._task
+        self._task = None
+        if task is None or task.done():
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        except:
+            _LOGGER.debug("Error in cancelled prefetch", exc_info=True)
+
+    @staticmethod
+    def adjacent(served: typing.List["FileSequence"]) -> typing.List["FileSequence"]:
+        result: typing.List["FileSequence"] = list()
+        # Panning forward is the common case, so the following windows go first
+        for files in served:
+            result.append(files.shifted(files.end_epoch_ms - files.start_epoch_ms))
+        for files in served:
+            result.append(files.shifted(files.start_epoch_ms - files.end_epoch_ms))
+        return result
+
+    async def _prefetch_window(self, connection: Connection, files: "FileSequence", remaining: int) -> int:
+        await connection.transaction_begin(False)
+        try:
+            await files.acquire_locks(connection)
+        except LockDenied:
+            # Never wait on the archive for something that was only speculative
+            await connection.transaction_abort()
+            return remaining
+
+        for name in files.file_names():
+            if remaining <= 0:
+                break
+            if name in self.cache:
+                continue
+            try:
+                contents = await connection.read_bytes(name)
+            except FileNotFoundError:
+                continue
+            self.cache.store(name, contents)
+            remaining -= len(contents)
+
+        await connection.transaction_commit()
+        return remaining
+
+    async def _run(self, served: typing.List["FileSequence"]) -> None:
+        await asyncio.sleep(self.delay)
+
+        connection = await Connection.default_connection("prefetch data", use_environ=False)
+        try:
+            await wait_cancelable(connection.startup(), 30.0)
+            # Without digests nothing prefetched could be validated later, so it would never be used
+            remaining = self.budget if connection.file_digests_available else 0
+            for files in self.adjacent(served):
+                if remaining <= 0:
+                    break
+                remaining = await self._prefetch_window(connection, files, remaining)
+            _LOGGER.debug("Prefetched %d bytes for %d windows", self.budget - max(remaining, 0), len(served) * 2)
+        except asyncio.CancelledError:
+            self.cache.cancelled += 1
+            connection.abort()
+            raise
+        except:
+            _LOGGER.debug("Error in data prefetch", exc_info=True)
+            connection.abort()
+        else:
+            self._served.clear()
+            await asyncio.shield(wait_cancelable(connection.shutdown(), 30.0))
@@ -1,6 +1,7 @@
 import typing
 import logging
 import enum
+import copy
 import numpy as np
 from math import isfinite, floor, ceil, nan
 from bisect import bisect_left
@@ -17,6 +18,7 @@ from forge.data.state import is_state_group
 from forge.data.flags import parse_flags
 from forge.data.dimensions import find_dimension_values
 from forge.data.history import parse_history
+from .prefetch import file_cache
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -1013,6 +1015,47 @@ class FileSequence:
                                        selection: InstrumentSelection) -> typing.Optional[typing.Set[str]]:
         return selection.index_to_instruments(index)
 
+    def shifted(self, offset_ms: int) -> "FileSequence":
+        result = copy.copy(self)
+        result.start_epoch_ms = self.start_epoch_ms + offset_ms
+        result.end_epoch_ms = self.end_epoch_ms + offset_ms
+        result._year_start, result._year_end = containing_year_range(result.start_epoch_ms / 1000.0,
+                                                                     result.end_epoch_ms / 1000.0)
+        result._candidate_instruments = dict()
+        return result
+
+    def _file_sources(self) -> typing.Tuple[typing.Set[FileSource], typing.Set[FileSource]]:
+        year_file_sources: typing.Set[FileSource] = set()
+        day_file_sources: typing.Set[FileSource] = set()
+        for _, src in self._candidate_instruments.keys():
+            if src.archive not in ("avgd", "avgm"):
+                day_file_sources.add(src)
+            else:
+                year_file_sources.add(src)
+        return year_file_sources, day_file_sources
+
+    def _day_range(self, year_start: int, year_end: int) -> range:
+        day_start_range = int(floor(self.start_epoch_ms / (24 * 60 * 60 * 1000))) * 24 * 60 * 60
+        day_start_range = max(day_start_range, year_start)
+        day_end_range = int(ceil(self.end_epoch_ms / (24 * 60 * 60 * 1000))) * 24 * 60 * 60
+        day_end_range = min(day_end_range, year_end)
+        return range(day_start_range, day_end_range, 24 * 60 * 60)
+
+    def file_names(self) -> typing.Iterator[str]:
+        year_file_sources, day_file_sources = self._file_sources()
+        for year in range(self._year_start, self._year_end):
+            year_start = start_of_year(year)
+            year_end = start_of_year(year+1)
+            for src in year_file_sources:
+                for instrument in self._candidate_instruments.get((year, src), {}).keys():
+                    yield data_file_name(src.station, src.archive, instrument, year_start)
+            if not day_file_sources:
+                continue
+            for day_start in self._day_range(year_start, year_end):
+                for src in day_file_sources:
+                    for instrument in self._candidate_instruments.get((year, src), {}).keys():
+                        yield data_file_name(src.station, src.archive, instrument, day_start)
+
     async def acquire_locks(self, connection: Connection) -> None:
         for idx, selections in self._indices.items():
             await connection.lock_read(index_lock_key(idx.station, idx.archive), self.start_epoch_ms, self.end_epoch_ms)
@@ -1043,13 +1086,7 @@ class FileSequence:
             await connection.lock_read(data_lock_key(src.station, src.archive), self.start_epoch_ms, self.end_epoch_ms)
 
     async def run(self, connection: Connection) -> "typing.AsyncIterator[typing.Tuple[int, typing.Dict[FileSource, typing.List[typing.Tuple[Dataset, typing.List[InstrumentSelection]]]]]]":
-        year_file_sources: typing.Set[FileSource] = set()
-        day_file_sources: typing.Set[FileSource] = set()
-        for _, src in self._candidate_instruments.keys():
-            if src.archive not in ("avgd", "avgm"):
-                day_file_sources.add(src)
-            else:
-                year_file_sources.add(src)
+        year_file_sources, day_file_sources = self._file_sources()
 
         async with WorkingDirectory() as data_dir:
             for year in range(self._year_start, self._year_end):
@@ -1063,10 +1100,9 @@ class FileSequence:
                                                selections: typing.List[InstrumentSelection]):
                     dest_file = NamedTemporaryFile(suffix=".nc", dir=data_dir)
                     try:
-                        await connection.read_file(
-                            data_file_name(src.station, src.archive, instrument_id, file_start),
-                            dest_file
-                        )
+                        file_name = data_file_name(src.station, src.archive, instrument_id, file_start)
+                        if not await file_cache.read(connection, file_name, dest_file):
+                            await connection.read_file(file_name, dest_file)
                         dest_file.flush()
                         open_data = Dataset(dest_file.name, 'r')
                         try:
@@ -1106,15 +1142,12 @@ class FileSequence:
                         for instrument, selections in instrument_selections.items():
                             await integrate_instrument(src, instrument, year_start, selections)
 
-                    day_start_range = int(floor(self.start_epoch_ms / (24 * 60 * 60 * 1000))) * 24 * 60 * 60
-                    day_start_range = max(day_start_range, year_start)
-                    day_end_range = int(ceil(self.end_epoch_ms / (24 * 60 * 60 * 1000))) * 24 * 60 * 60
-                    day_end_range = min(day_end_range, year_end)
+                    day_range = self._day_range(year_start, year_end)
 
-                    pending_time = day_start_range * 1000
+                    pending_time = day_range.start * 1000
 
                     if day_file_sources:
-                        for day_start in range(day_start_range, day_end_range, 24 * 60 * 60):
+                        for day_start in day_range:
                             pending_time = day_start * 1000
                             for src in day_file_sources:
                                 instrument_selections = self._candidate_instruments.get((year, src))
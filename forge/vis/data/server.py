@@ -11,8 +11,10 @@ from starlette.endpoints import WebSocketEndpoint
 from starlette.exceptions import HTTPException
 from starlette.websockets import WebSocket
 from forge.const import STATIONS
-from .stream import DataStream
+from .stream import DataStream, RecordStream
+from .binary import encode_frame
 from .assemble import begin_stream
+from .prefetch import PrefetchScheduler
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -49,6 +51,8 @@ class _DataSocket(WebSocketEndpoint):
         self.active_data_streams: typing.Dict[int, _DataSocket._ActiveStream] = dict()
         self.was_data_stalled = False
         self.prior_stall_reason: typing.Optional[str] = None
+        self.binary_records = False
+        self.prefetch = PrefetchScheduler()
 
     @requires('authenticated')
     async def on_connect(self, websocket: WebSocket):
@@ -133,6 +137,15 @@ class _DataSocket(WebSocketEndpoint):
                 await self._end_data_stream(websocket, stream_id)
                 return
 
+            if self.binary_records and isinstance(stream, RecordStream):
+                async def send_binary(payload: bytes) -> None:
+                    await websocket.send_bytes(encode_frame(stream_id, payload))
+
+                stream.send_binary = send_binary
+
+            # The user has moved on, so anything speculative gives way to what they asked for
+            await self.prefetch.cancel()
+
             if stream_id in self.active_data_streams:
                 await self.active_data_streams[stream_id].abort()
 
@@ -165,6 +178,7 @@ class _DataSocket(WebSocketEndpoint):
 
                 _LOGGER.debug(f"Completed data stream {stream_id} to {websocket.client.host}")
                 await self._end_data_stream(websocket, stream_id)
+                self.prefetch.served(stream.prefetch_files)
                 try:
                     del self.active_data_streams[stream_id]
                 except KeyError:
@@ -187,20 +201,29 @@ class _DataSocket(WebSocketEndpoint):
             try:
                 await stream.task
             except asyncio.CancelledError:
-                await self._end_data_stream(websocket, stream_id)
-                try:
-                    await stream.stream.abort()
-                except:
-                    pass
+                pass
+            await self._end_data_stream(websocket, stream_id)
+            try:
+                await stream.stream.abort()
+            except:
+                pass
 
             await self._update_stall_state(websocket)
 
             _LOGGER.debug(f"Aborted data stream {stream_id} to {websocket.client.host}")
 
+        elif action == 'protocol':
+            self.binary_records = bool(data.get('binary'))
+            await websocket.send_json({
+                'type': 'protocol',
+                'binary': self.binary_records,
+            })
+
         else:
             await websocket.send_json({'type': 'error', 'error': "Invalid request"})
 
     async def on_disconnect(self, websocket, close_code):
+        await self.prefetch.cancel()
         for stream in list(self.active_data_streams.values()):
             stream.stopped = True
             await stream.abort()
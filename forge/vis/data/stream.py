@@ -7,8 +7,12 @@ from math import isfinite, nan
 from base64 import b64encode
 from forge.tasks import wait_cancelable
 from forge.vis.util import sanitize_for_json
+from .binary import is_all_float, is_all_float_array, encode_records
 from forge.archive.client.connection import Connection, LockDenied, LockBackoff
 
+if typing.TYPE_CHECKING:
+    from .selection import FileSequence
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -26,6 +30,10 @@ class DataStream(ABC):
     async def abort(self) -> None:
         pass
 
+    @property
+    def prefetch_files(self) -> typing.Optional["FileSequence"]:
+        return None
+
 
 # noinspection PyAbstractClass
 class RecordStream(DataStream):
@@ -40,11 +48,19 @@ class RecordStream(DataStream):
         self.values: typing.Dict[str, typing.List[typing.Any]] = dict()
         for field in self.fields:
             self.values[field] = list()
+        self.send_binary: typing.Optional[typing.Callable[[bytes], typing.Awaitable[None]]] = None
 
     async def flush(self) -> None:
         if len(self.epoch_ms) == 0:
             return
 
+        if self.send_binary is not None:
+            await self.send_binary(encode_records(self.epoch_ms, self.values))
+            self.epoch_ms.clear()
+            for values in self.values.values():
+                values.clear()
+            return
+
         origin_epoch_ms = self.epoch_ms[0]
         maximum_delta = 0
         for i in range(len(self.epoch_ms)):
@@ -65,31 +81,6 @@ class RecordStream(DataStream):
             'data': {}
         }
 
-        def is_all_float(check: typing.List) -> bool:
-            if len(check) == 0:
-                return False
-            for v in check:
-                if v is None:
-                    continue
-                if isinstance(v, float):
-                    continue
-                return False
-            return True
-
-        def is_all_float_array(check: typing.List) -> bool:
-            if len(check) == 0:
-                return False
-            any_valid = False
-            for v in check:
-                if v is None:
-                    continue
-                if not isinstance(v, list):
-                    return False
-                if not is_all_float(v):
-                    return False
-                any_valid = True
-            return any_valid
-
         for field, values in self.values.items():
             if is_all_float(values):
                 raw = bytearray()
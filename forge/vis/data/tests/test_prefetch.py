@@ -0,0 +1,77 @@
+import pytest
+import asyncio
+import hashlib
+import io
+import typing
+from forge.vis.data.prefetch import FileCache, PrefetchScheduler
+from forge.vis.data.selection import FileSequence
+
+
+class _DigestConnection:
+    def __init__(self, files: typing.Dict[str, bytes]):
+        self.files = files
+        self.file_digests_available = True
+
+    async def file_digests(self, names: typing.List[str]) -> typing.List[typing.Optional[typing.Tuple[int, bytes]]]:
+        result = list()
+        for name in names:
+            contents = self.files.get(name)
+            if contents is None:
+                result.append(None)
+                continue
+            result.append((len(contents), hashlib.sha256(contents).digest()))
+        return result
+
+
+@pytest.mark.asyncio
+async def test_file_cache():
+    cache = FileCache(16)
+    connection = _DigestConnection({"a": b"12345678", "b": b"abcdefgh"})
+
+    destination = io.BytesIO()
+    assert not await cache.read(connection, "a", destination)
+    assert cache.misses == 1
+
+    cache.store("a", b"12345678")
+    assert await cache.read(connection, "a", destination)
+    assert destination.getvalue() == b"12345678"
+    assert cache.hits == 1
+
+    connection.files["a"] = b"changed"
+    destination = io.BytesIO()
+    assert not await cache.read(connection, "a", destination)
+    assert destination.getvalue() == b""
+    assert cache.stale == 1
+    assert "a" not in cache
+
+    cache.store("a", b"changed")
+    cache.store("b", b"abcdefgh")
+    cache.store("c", b"ABCDEFGH")
+    assert "a" not in cache
+    assert "b" in cache and "c" in cache
+    assert cache.total_bytes == 16
+    assert cache.evictions == 1
+    assert cache.metrics()['prefetched_files'] == 4
+
+
+@pytest.mark.asyncio
+async def test_scheduler_windows():
+    files = FileSequence([], "bnd", "raw", 1000 * 86400 * 1000, 1001 * 86400 * 1000)
+    windows = PrefetchScheduler.adjacent([files])
+    assert [(w.start_epoch_ms, w.end_epoch_ms) for w in windows] == [
+        (1001 * 86400 * 1000, 1002 * 86400 * 1000),
+        (999 * 86400 * 1000, 1000 * 86400 * 1000),
+    ]
+    assert files.start_epoch_ms == 1000 * 86400 * 1000
+
+    scheduler = PrefetchScheduler(budget=1024, delay=60.0, cache=FileCache(1024))
+    scheduler.served(files)
+    task = scheduler._task
+    assert task is not None and not task.done()
+    await scheduler.cancel()
+    assert task.cancelled()
+    assert scheduler._task is None
+
+    scheduler = PrefetchScheduler(budget=1024, delay=60.0, cache=FileCache(0))
+    scheduler.served(files)
+    assert scheduler._task is None
@@ -1,5 +1,7 @@
 import asyncio
 import typing
+import json
+import math
 from starlette.applications import Starlette
 from starlette.testclient import TestClient
 from starlette.routing import Mount
@@ -10,9 +12,13 @@ from starlette.middleware.sessions import SessionMiddleware
 from starlette.middleware.authentication import AuthenticationMiddleware
 from forge.vis.access import AccessUser
 from forge.vis.data.server import sockets
+from forge.vis.data.binary import encode_records, encode_frame, decode_frame
 
 
 class StubUser(AccessUser):
+    def __init__(self):
+        super().__init__([])
+
     @property
     def is_authenticated(self) -> bool:
         return True
@@ -31,7 +37,7 @@ class StubUser(AccessUser):
 
     @property
     def visible_stations(self) -> typing.List[str]:
-        raise ["brw"]
+        return ["brw"]
 
     def allow_station(self, station: str) -> bool:
         return True
@@ -109,3 +115,66 @@ def test_stream_stop():
             assert data['stream'] == 42
 
 
+
+
+def test_binary_stream():
+    app = create_app()
+    client = TestClient(app)
+
+    with client.websocket_connect("/data/brw") as ds:
+        ds.send_json({
+            'action': 'protocol',
+            'binary': True,
+        })
+        data = ds.receive_json()
+        assert data['type'] == 'protocol'
+        assert data['binary']
+
+        ds.send_json({
+            'action': 'start',
+            'stream': 3,
+            'data': 'example-timeseries',
+            'start_epoch_ms': 1609459200000,
+            'end_epoch_ms': 1609545600000,
+        })
+        stream_id, epoch_ms, fields = decode_frame(ds.receive_bytes())
+        assert stream_id == 3
+        assert int(epoch_ms[0]) == 1609459200000
+        assert set(fields.keys()) == {'BsG', 'BaG', 'Tsample', 'Psample', 'Tambient'}
+        assert fields['BsG'].shape == epoch_ms.shape
+        while True:
+            data = ds.receive()
+            if 'text' in data:
+                data = json.loads(data['text'])
+                assert data['type'] == 'end'
+                assert data['stream'] == 3
+                break
+            stream_id, _, _ = decode_frame(data['bytes'])
+            assert stream_id == 3
+
+
+def test_binary_encoding():
+    values = {
+        'float': [1.0, None, float('nan'), 1e300, 2.5],
+        'array': [[1.0, 2.0], None, [3.0], [5.0, 6.0, 7.0], [4.0, None]],
+        'text': ['a', None, 'b', 'c', 'd'],
+    }
+    epoch_ms = [1000, 2000, 3000, 4000, 1 << 40]
+    stream_id, decoded_epoch_ms, decoded = decode_frame(encode_frame(7, encode_records(epoch_ms, values)))
+    assert stream_id == 7
+    assert decoded_epoch_ms.tolist() == epoch_ms
+
+    assert decoded['float'][0] == 1.0
+    assert math.isnan(decoded['float'][1])
+    assert math.isnan(decoded['float'][2])
+    assert math.isnan(decoded['float'][3])
+    assert decoded['float'][4] == 2.5
+
+    assert decoded['array'][0].tolist() == [1.0, 2.0]
+    assert len(decoded['array'][1]) == 0
+    assert decoded['array'][2].tolist() == [3.0]
+    assert decoded['array'][3].tolist() == [5.0, 6.0, 7.0]
+    assert decoded['array'][4][0] == 4.0
+    assert math.isnan(decoded['array'][4][1])
+
+    assert decoded['text'] == ['a', None, 'b', 'c', 'd']
@@ -2,7 +2,7 @@ import typing
 import starlette.status
 from starlette.requests import Request
 from starlette.exceptions import HTTPException
-from forge.vis.station.lookup import station_data
+from forge.vis.station.registry import station_registry
 from . import Mode, ModeGroup, VisibleModes
 
 
@@ -34,7 +34,7 @@ def lookup_mode(request: Request, station: str, mode_name: str) -> typing.Option
             return example_acquisition
         return None
 
-    return station_data(station, 'mode', 'get')(station, mode_name)
+    return station_registry(station, 'mode', 'get')(station, mode_name)
 
 
 def visible_modes(request: Request, station: str, mode_name: typing.Optional[str] = None) -> VisibleModes:
@@ -45,7 +45,7 @@ def visible_modes(request: Request, station: str, mode_name: typing.Optional[str
             ModeGroup("Second Group", [example_view_list3])
         ])
 
-    return station_data(station, 'mode', 'visible')(station, mode_name)
+    return station_registry(station, 'mode', 'visible')(station, mode_name)
 
 
 def mode_exists(request: Request, station: str, mode_name: str) -> bool:
@@ -8,10 +8,26 @@ from starlette.requests import Request
 from starlette.exceptions import HTTPException
 from forge.const import STATIONS
 from forge.vis.util import package_template
+from forge.vis.pagecache import page_cache
 from forge.vis.access.database import AccessLayer as DatabaseLayer
 from .assemble import lookup_mode, visible_modes, mode_exists, default_mode
 from .permissions import is_available
 from .viewlist import ViewList
+from . import Mode, VisibleModes
+
+
+def _page_key(request: Request, station: str, mode: Mode, available_modes: VisibleModes,
+              enable_user_actions: bool) -> typing.Hashable:
+    # Everything about the user that the mode pages display: the station and mode lists, the user initials and
+    # whether the page allows changes
+    user = request.user
+    return (
+        'mode', station, mode.mode_name, user.initials, enable_user_actions,
+        user.allow_mode(station, mode.mode_name, write=True),
+        tuple((check, user.allow_mode(check, mode.mode_name)) for check in user.visible_stations),
+        tuple((add.mode_name, user.allow_mode(station, add.mode_name))
+              for group in available_modes.groups for add in group.modes),
+    )
 
 
 @requires('authenticated')
@@ -36,13 +52,15 @@ async def _mode_request(request: Request) -> Response:
     if mode is None:
         raise HTTPException(starlette.status.HTTP_404_NOT_FOUND, detail="Mode not found")
     available_modes = visible_modes(request, station, mode_name=mode_name)
-    return await mode(
-        request,
-        station=station,
-        available_modes=available_modes,
-        mode_exists=mode_exists,
-        enable_user_actions=request.user.layer_type(DatabaseLayer) is not None,
-    )
+    enable_user_actions = request.user.layer_type(DatabaseLayer) is not None
+    return await page_cache(request, _page_key(request, station, mode, available_modes, enable_user_actions),
+                            lambda: mode(
+                                request,
+                                station=station,
+                                available_modes=available_modes,
+                                mode_exists=mode_exists,
+                                enable_user_actions=enable_user_actions,
+                            ))
 
 
 @requires('authenticated')
@@ -0,0 +1,60 @@
+import typing
+import hashlib
+from collections import OrderedDict
+from starlette.requests import Request
+from starlette.responses import Response, HTMLResponse
+from . import CONFIGURATION
+
+
+class PageCache:
+    class _Entry:
+        def __init__(self, response: Response):
+            self.body = response.body
+            self.status_code = response.status_code
+            self.media_type = response.media_type
+            self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:20] + '"'
+
+    def __init__(self, size: int):
+        self.size = size
+        self._entries: typing.Dict[typing.Hashable, "PageCache._Entry"] = OrderedDict()
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    @staticmethod
+    def _respond(request: Request, entry: "PageCache._Entry") -> Response:
+        # Rendered pages can depend on the user, so only the browser may keep them and it must revalidate
+        headers = {
+            "etag": entry.etag,
+            "cache-control": "private, no-cache",
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            if entry.etag in tags or ("W/" + entry.etag) in tags:
+                return Response(status_code=304, headers=headers)
+        return Response(entry.body, status_code=entry.status_code, media_type=entry.media_type, headers=headers)
+
+    async def __call__(self, request: Request, key: typing.Hashable,
+                       render: typing.Callable[[], typing.Awaitable[Response]]) -> Response:
+        if self.size <= 0:
+            return await render()
+
+        # Rendered URLs are absolute, so they depend on how the server was reached
+        key = (str(request.base_url), key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return self._respond(request, entry)
+
+        response = await render()
+        if response.status_code != 200 or not isinstance(response, HTMLResponse):
+            return response
+        entry = self._Entry(response)
+        self._entries[key] = entry
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+        return self._respond(request, entry)
+
+
+page_cache = PageCache(0 if CONFIGURATION.as_bool('SERVER.DEBUG') else int(CONFIGURATION.get('SERVER.PAGE_CACHE', 256)))
@@ -1,4 +1,5 @@
 import typing
+from operator import itemgetter
 from forge.acquisition.cutsize import CutSize
 from .translation import RealtimeTranslator as BaseTranslator
 from ..data.archive import RealtimeRecord, Record, RealtimeSelection
@@ -27,12 +28,66 @@ class Translator(BaseTranslator):
                         return
                 output.send_field(self.data_name, self.data_field, value)
 
+        class _DataLayout:
+            def __init__(self, cutsize: CutSize.Size, fields: typing.Iterable[str],
+                         data_dispatch: typing.Dict[typing.Tuple[CutSize.Size, str], typing.List["Translator.Instrument._FieldTranslator"]]):
+                targets: typing.Dict[str, typing.List[typing.Tuple[int, str, typing.Optional[typing.Union[str, int]]]]] = dict()
+                for position, field in enumerate(fields):
+                    for t in data_dispatch.get((cutsize, field), ()):
+                        target = targets.get(t.data_name)
+                        if target is None:
+                            target = list()
+                            targets[t.data_name] = target
+                        target.append((position, t.data_field, t.pre_index))
+
+                self.outputs: typing.List[typing.Tuple[str, typing.Callable[[typing.Sequence], typing.Sequence],
+                                                       typing.Tuple[str, ...],
+                                                       typing.Optional[typing.Tuple[typing.Optional[typing.Union[str, int]], ...]]]] = list()
+                for data_name, target in targets.items():
+                    positions = [position for position, _, _ in target]
+                    if len(positions) == 1:
+                        position = positions[0]
+
+                        def gather(values: typing.Sequence, position=position) -> typing.Sequence:
+                            return values[position],
+                    else:
+                        gather = itemgetter(*positions)
+                    pre_index = tuple([index for _, _, index in target])
+                    if all([index is None for index in pre_index]):
+                        pre_index = None
+                    self.outputs.append((data_name, gather, tuple([field for _, field, _ in target]), pre_index))
+
+            def apply(self, values: typing.Sequence, output: "BaseTranslator.OutputInterface") -> None:
+                if not self.outputs:
+                    return
+                records: typing.Dict[str, typing.Dict[str, typing.Any]] = dict()
+                for data_name, gather, fields, pre_index in self.outputs:
+                    gathered = gather(values)
+                    if pre_index is None:
+                        records[data_name] = dict(zip(fields, gathered))
+                        continue
+                    record: typing.Dict[str, typing.Any] = dict()
+                    for field, value, index in zip(fields, gathered, pre_index):
+                        if index is not None:
+                            try:
+                                value = value[index]
+                            except (ValueError, KeyError, TypeError):
+                                continue
+                        record[field] = value
+                    if record:
+                        records[data_name] = record
+                if records:
+                    output.send_records(records)
+
+        LAYOUT_CACHE = 16
+
         def __init__(self, source: str, instrument_info: typing.Dict[str, typing.Any],
                      records: typing.Dict[str, RealtimeRecord]):
             super().__init__(source, instrument_info)
             self._all_records = records
             self._data_dispatch: typing.Dict[typing.Tuple[CutSize.Size, str], typing.List["Translator.Instrument._FieldTranslator"]] = dict()
             self._message_dispatch: typing.Dict[str, typing.List["Translator.Instrument._FieldTranslator"]] = dict()
+            self._data_layouts: typing.Dict[typing.Tuple[CutSize.Size, typing.Tuple[str, ...]], "Translator.Instrument._DataLayout"] = dict()
             self._rebuild_dispatch()
 
         def _rebuild_dispatch(self) -> None:
@@ -46,6 +101,7 @@ class Translator(BaseTranslator):
                 instrument_code: str = ""
 
             self._data_dispatch.clear()
+            self._data_layouts.clear()
             for data_name, record in self._all_records.items():
                 for data_field, selections in record.fields.items():  # type: str, typing.List[RealtimeSelection]
                     for sel in selections:
@@ -74,12 +130,16 @@ class Translator(BaseTranslator):
         def translate_data(self, cutsize: CutSize.Size,
                            values: typing.Dict[str, typing.Union[float, typing.List[float]]],
                            output: "BaseTranslator.OutputInterface") -> None:
-            for field, value in values.items():
-                targets = self._data_dispatch.get((cutsize, field))
-                if not targets:
-                    continue
-                for t in targets:
-                    t.process(value, output)
+            # Instruments report the same fields in the same order every time, so the key order is the layout
+            key = (cutsize, tuple(values.keys()))
+            layout = self._data_layouts.get(key)
+            if layout is None:
+                if len(self._data_layouts) >= self.LAYOUT_CACHE:
+                    # Something is reporting a different layout every time, so do not keep them all
+                    self._data_layouts.clear()
+                layout = self._DataLayout(cutsize, key[1], self._data_dispatch)
+                self._data_layouts[key] = layout
+            layout.apply(tuple(values.values()), output)
 
         def translate_message(self, record: str, message: typing.Any,
                               output: "BaseTranslator.OutputInterface") -> None:
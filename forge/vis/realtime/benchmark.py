@@ -0,0 +1,146 @@
+import typing
+import asyncio
+import argparse
+import time
+import numpy as np
+from forge.acquisition.cutsize import CutSize
+from forge.acquisition.uplink.realtime import RealtimeTranslatorOutput
+from forge.vis.data.archive import RealtimeRecord
+from .translation import RealtimeTranslator
+from .archive import Translator
+
+
+_INSTRUMENT_TAGS: typing.Tuple[typing.Set[str], ...] = (
+    {"cpc"},
+    {"scattering"},
+    {"absorption"},
+    {"aethalometer", "mageeae33"},
+    {"ozone"},
+    {"radiation"},
+    {"met"},
+    {"aerosol"},
+    {"pressure"},
+    {"flow"},
+)
+
+
+class _IdleOutput:
+    class _Writer:
+        def close(self) -> None:
+            pass
+
+    def __init__(self):
+        self.writer = self._Writer()
+
+    async def run(self) -> None:
+        await asyncio.Event().wait()
+
+    async def send_data(self, station: str, data_name: str,
+                        record: typing.Dict[str, typing.Union[float, typing.List[float]]]) -> None:
+        pass
+
+
+def _reference_translate(instrument: Translator.Instrument, cutsize: CutSize.Size,
+                         values: typing.Dict[str, typing.Union[float, typing.List[float]]],
+                         output: RealtimeTranslator.OutputInterface) -> None:
+    # Per key dispatch, as done before the compiled layouts
+    for field, value in values.items():
+        targets = instrument._data_dispatch.get((cutsize, field))
+        if not targets:
+            continue
+        for t in targets:
+            t.process(value, output)
+
+
+def _simulated_station(records: typing.Dict[str, RealtimeRecord], instruments: int, fields: int,
+                       seed: int) -> typing.List[typing.Tuple[Translator.Instrument, typing.List[typing.Dict[str, typing.Any]]]]:
+    generator = np.random.default_rng(seed)
+    translator = Translator(records)
+    result = list()
+    for index in range(instruments):
+        source = f"X{index + 1}"
+        tags = _INSTRUMENT_TAGS[index % len(_INSTRUMENT_TAGS)]
+        instrument = translator.instrument_translator(source, {'tags': sorted(tags), 'type': 'sim'})
+
+        mapped = sorted(set([field for _, field in instrument._data_dispatch.keys()]))
+        names = mapped[:fields] + [f"Z{i}" for i in range(max(fields - len(mapped), 0))]
+        array_fields = set(names[::7])
+
+        values: typing.List[typing.Dict[str, typing.Any]] = list()
+        for _ in range(16):
+            record: typing.Dict[str, typing.Any] = dict()
+            for name in names:
+                if name in array_fields:
+                    record[name] = [float(v) for v in generator.normal(size=3)]
+                else:
+                    record[name] = float(generator.normal())
+            values.append(record)
+        result.append((instrument, values))
+    return result
+
+
+async def _translate(station: typing.List[typing.Tuple[Translator.Instrument, typing.List[typing.Dict[str, typing.Any]]]],
+                     records: int, translate: typing.Callable) -> typing.Tuple[float, typing.Dict[str, typing.Dict]]:
+    # The real uplink output, so queueing for the realtime cache is included
+    output = RealtimeTranslatorOutput("sim", _IdleOutput(), Translator(dict()))
+    output.data_consolidation_time = 3600.0
+    await output.start()
+    try:
+        begin_time = time.perf_counter()
+        for index in range(records):
+            for instrument, values in station:
+                translate(instrument, CutSize.Size.WHOLE, values[index % len(values)], output._translator_output)
+        elapsed = time.perf_counter() - begin_time
+        return elapsed, dict(output._translator_output.queued_data)
+    finally:
+        await output.shutdown()
+
+
+async def run(args: argparse.Namespace) -> None:
+    from forge.vis.station.default.data import data_records
+    station = _simulated_station(data_records, args.instruments, args.fields, args.seed)
+    total_records = args.instruments * args.records
+    mapped = sum([len(set([field for _, field in instrument._data_dispatch.keys()]).intersection(values[0].keys()))
+                  for instrument, values in station])
+    print(f"{args.instruments} instruments, {args.fields} fields each, {mapped} mapped fields in total")
+
+    reference_elapsed, reference_output = await _translate(station, args.records, _reference_translate)
+    compiled_elapsed, compiled_output = await _translate(
+        station, args.records,
+        lambda instrument, cutsize, values, output: instrument.translate_data(cutsize, values, output)
+    )
+
+    print(f"Per key dispatch   {total_records / reference_elapsed:10.0f} records/s, "
+          f"{reference_elapsed / total_records * 1E6:8.2f} us/record")
+    print(f"Compiled layouts   {total_records / compiled_elapsed:10.0f} records/s, "
+          f"{compiled_elapsed / total_records * 1E6:8.2f} us/record, {reference_elapsed / compiled_elapsed:.1f}x")
+    print(f"Output {'matches' if compiled_output == reference_output else 'DIFFERS'}, "
+          f"{len(compiled_output)} data records")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forge realtime translation benchmark.")
+
+    parser.add_argument('--instruments',
+                        dest='instruments', type=int, default=30,
+                        help="number of simulated instruments")
+    parser.add_argument('--fields',
+                        dest='fields', type=int, default=40,
+                        help="number of fields reported by each instrument")
+    parser.add_argument('--records',
+                        dest='records', type=int, default=2000,
+                        help="number of records translated for each instrument")
+    parser.add_argument('--seed',
+                        dest='seed', type=int, default=1,
+                        help="synthetic data random seed")
+
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(run(args))
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+import typing
+import asyncio
+import argparse
+import io
+import time
+import numpy as np
+from pathlib import Path
+from forge.temp import WorkingDirectory
+from .block import DataBlock
+from .records import RecordFile
+
+
+def _synthetic_records(count: int, fields: int, arrays: int, interval_ms: int,
+                       seed: int) -> typing.List[typing.Tuple[int, typing.Dict[str, typing.Union[float, typing.List[float]]]]]:
+    generator = np.random.default_rng(seed)
+    end_ms = round(time.time() * 1000)
+    result = list()
+    for index in range(count):
+        record: typing.Dict[str, typing.Union[float, typing.List[float]]] = dict()
+        for field in range(fields):
+            if generator.random() < 0.05:
+                continue
+            record[f'F{field}'] = float(generator.normal())
+        for field in range(arrays):
+            record[f'A{field}'] = [float(v) for v in generator.normal(size=3)]
+        result.append((end_ms - (count - index) * interval_ms, record))
+    return result
+
+
+async def _full_decode(block_file: Path, start_epoch_ms: int) -> int:
+    block = DataBlock()
+    with open(str(block_file), mode='rb') as f:
+        await block.load(f)
+    return sum(1 for record in block.records if record.epoch_ms >= start_epoch_ms)
+
+
+async def _ranged_read(records: RecordFile, start_epoch_ms: int) -> int:
+    block = DataBlock()
+    contents = records.read(start_epoch_ms)
+    if contents:
+        await block.load(io.BytesIO(contents))
+    return len(block.records)
+
+
+async def _time(call: typing.Callable[[], typing.Awaitable[int]], repeat: int) -> typing.Tuple[float, int]:
+    begin_time = time.perf_counter()
+    selected = 0
+    for _ in range(repeat):
+        selected = await call()
+    return (time.perf_counter() - begin_time) / repeat, selected
+
+
+async def run(args: argparse.Namespace) -> None:
+    source = _synthetic_records(args.records, args.fields, args.arrays, args.interval * 1000, args.seed)
+
+    async with WorkingDirectory() as data_dir:
+        data_dir = Path(data_dir)
+        block = DataBlock()
+        records = RecordFile(data_dir / 'records')
+        begin_time = time.perf_counter()
+        for epoch_ms, record in source:
+            records.append(epoch_ms, record, rounding_ms=1)
+        append_elapsed = (time.perf_counter() - begin_time) / len(source)
+        for epoch_ms, record in source:
+            block.add_record(epoch_ms, record, rounding_ms=1)
+
+        block_file = data_dir / 'block'
+        with open(str(block_file), mode='wb') as f:
+            await block.save(f)
+
+        # What the controller did for every incoming record before the strided layout
+        begin_time = time.perf_counter()
+        rewrite = DataBlock()
+        with open(str(block_file), mode='rb') as f:
+            await rewrite.load(f)
+        rewrite.add_record(source[-1][0] + 1000, source[-1][1], rounding_ms=1)
+        with open(str(data_dir / 'rewrite'), mode='wb') as f:
+            await rewrite.save(f)
+        rewrite_elapsed = time.perf_counter() - begin_time
+
+        print(f"{len(source)} records, {args.fields + args.arrays} fields, "
+              f"block {block_file.stat().st_size} bytes, strided {records.path.stat().st_size} bytes")
+        print(f"Add record: load and save {rewrite_elapsed * 1E3:.3f} ms, append {append_elapsed * 1E3:.3f} ms")
+
+        end_ms = source[-1][0]
+        print(f"{'Window':>8} {'Records':>8} {'Full decode ms':>15} {'Ranged read ms':>15} {'Speedup':>8}")
+        for minutes in (1, 10, 60):
+            start_ms = end_ms - minutes * 60 * 1000
+            full, full_count = await _time(lambda: _full_decode(block_file, start_ms), args.repeat)
+            ranged, ranged_count = await _time(lambda: _ranged_read(records, start_ms), args.repeat)
+            assert full_count == ranged_count
+            print(f"{minutes:>6} m {ranged_count:8d} {full * 1E3:15.3f} {ranged * 1E3:15.3f} {full / ranged:7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forge realtime record read benchmark.")
+
+    parser.add_argument('--records',
+                        dest='records', type=int, default=4000,
+                        help="number of retained records")
+    parser.add_argument('--fields',
+                        dest='fields', type=int, default=40,
+                        help="number of scalar fields per record")
+    parser.add_argument('--arrays',
+                        dest='arrays', type=int, default=2,
+                        help="number of array fields per record")
+    parser.add_argument('--interval',
+                        dest='interval', type=int, default=10,
+                        help="seconds between records")
+    parser.add_argument('--repeat',
+                        dest='repeat', type=int, default=20,
+                        help="number of times to repeat each read")
+    parser.add_argument('--seed',
+                        dest='seed', type=int, default=1,
+                        help="synthetic data random seed")
+
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(run(args))
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
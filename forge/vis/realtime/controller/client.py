@@ -3,6 +3,7 @@ import asyncio
 import struct
 from abc import ABC, abstractmethod
 from math import isfinite, nan
+from forge.const import MAX_I64
 from forge.vis.realtime.controller.protocol import ConnectionType
 from forge.vis.realtime.controller.block import ValueType, DataBlock
 
@@ -59,18 +60,27 @@ class WriteData:
 
 class ReadData(ABC):
     def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
-                 station: str, data_name: str, stream_incoming: bool = True):
+                 station: str, data_name: str, stream_incoming: bool = True,
+                 start_epoch_ms: typing.Optional[int] = None, end_epoch_ms: typing.Optional[int] = None):
         self.reader = reader
         self.writer = writer
         self.station = station
         self.data_name = data_name
         self.stream_incoming = stream_incoming
+        self.start_epoch_ms = start_epoch_ms
+        self.end_epoch_ms = end_epoch_ms
 
     async def run(self) -> None:
         if self.stream_incoming:
-            connection_type = ConnectionType.STREAM
+            if self.start_epoch_ms is not None:
+                connection_type = ConnectionType.STREAM_RANGE
+            else:
+                connection_type = ConnectionType.STREAM
         else:
-            connection_type = ConnectionType.READ
+            if self.start_epoch_ms is not None or self.end_epoch_ms is not None:
+                connection_type = ConnectionType.READ_RANGE
+            else:
+                connection_type = ConnectionType.READ
         self.writer.write(struct.pack('<B', connection_type.value))
 
         def send_string(s: str):
@@ -79,6 +89,12 @@ class ReadData(ABC):
             self.writer.write(raw)
         send_string(self.station)
         send_string(self.data_name)
+        if connection_type == ConnectionType.STREAM_RANGE:
+            self.writer.write(struct.pack('<q', self.start_epoch_ms))
+        elif connection_type == ConnectionType.READ_RANGE:
+            self.writer.write(struct.pack('<qq',
+                                          self.start_epoch_ms if self.start_epoch_ms is not None else 0,
+                                          self.end_epoch_ms if self.end_epoch_ms is not None else MAX_I64))
         await self.writer.drain()
 
         while True:
@@ -6,8 +6,8 @@ import struct
 import logging
 import bisect
 from pathlib import Path
-from forge.service import send_file_contents
-from .block import ValueType, DataBlock, serialize_single_record
+from .block import ValueType, serialize_single_record
+from .records import RecordFile
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -57,6 +57,7 @@ class _DataEntry:
 
     def __init__(self, storage_file: Path):
         self.storage_file = storage_file
+        self.records = RecordFile(storage_file)
         self.file_lock = asyncio.Lock()
         self._streams: typing.Set["_DataEntry.Stream"] = set()
 
@@ -67,17 +68,7 @@ class _DataEntry:
         epoch_ms = round(time.time() * 1000)
 
         async with self.file_lock:
-            block = DataBlock()
-            try:
-                with open(str(self.storage_file), mode='rb') as f:
-                    await block.load(f)
-            except FileNotFoundError:
-                pass
-
-            block.add_record(epoch_ms, contents)
-
-            with open(str(self.storage_file), mode='wb') as f:
-                await block.save(f)
+            self.records.append(epoch_ms, contents)
 
         if len(self._streams) == 0:
             return
@@ -91,7 +82,7 @@ class _DataEntry:
 
 
 class Manager:
-    _STORAGE_VERSION = 1
+    _STORAGE_VERSION = 2
 
     def __init__(self, storage_directory: str):
         self.storage = Path(storage_directory)
@@ -130,10 +121,9 @@ class Manager:
                     pass
                 continue
 
+            entry = _DataEntry(file)
             try:
-                with open(str(file), mode='rb') as f:
-                    block = DataBlock()
-                    await block.load(f)
+                entry.records.load()
             except:
                 _LOGGER.debug(f"Unable to load {file}, removing", exc_info=True)
                 try:
@@ -144,7 +134,7 @@ class Manager:
 
             station = parts[1]
             date_name = parts[2]
-            self._data[_DataKey(station, date_name)] = _DataEntry(file)
+            self._data[_DataKey(station, date_name)] = entry
 
         _LOGGER.debug(f"Loaded {len(self._data)} realtime records")
 
@@ -176,19 +166,17 @@ class Manager:
 
                         return n_discard
 
-                    try:
-                        with open(str(entry.storage_file), mode='r+b') as f:
-                            should_remove = await DataBlock.trim(f, get_n_discard)
-                    except EOFError:
-                        should_remove = True
+                    should_remove = entry.records.trim(get_n_discard)
 
                     if should_remove:
                         _LOGGER.debug(f"Removing cache entry for {key}")
+                        entry.records.reset()
                         try:
                             os.unlink(str(entry.storage_file))
                         except (OSError, FileNotFoundError):
                             pass
                 except FileNotFoundError:
+                    entry.records.reset()
                     should_remove = True
 
                 if should_remove and entry.is_removable():
@@ -226,7 +214,8 @@ class Manager:
 
         await entry.add_record(contents)
 
-    async def stream(self, station: str, data_name: str, writer: asyncio.StreamWriter) -> typing.NoReturn:
+    async def stream(self, station: str, data_name: str, writer: asyncio.StreamWriter,
+                     start_epoch_ms: typing.Optional[int] = None) -> typing.NoReturn:
         key = _DataKey(station, data_name)
         entry = self._data.get(key)
         if not entry:
@@ -236,11 +225,14 @@ class Manager:
         with entry.stream_data(writer) as stream:
             try:
                 async with entry.file_lock:
-                    with open(str(entry.storage_file), mode='rb') as f:
-                        _LOGGER.debug(f"Sending cached data for stream {key}")
-                        await send_file_contents(f, writer)
+                    contents = entry.records.read(start_epoch_ms)
             except FileNotFoundError:
-                pass
+                contents = None
+            # Anything added after the read is queued for the stream, so it still arrives in order
+            if contents:
+                _LOGGER.debug(f"Sending cached data for stream {key}")
+                writer.write(contents)
+                await writer.drain()
 
             _LOGGER.debug(f"Streaming {key}")
             try:
@@ -248,15 +240,18 @@ class Manager:
             except EOFError:
                 pass
 
-    async def read(self, station: str, data_name: str, writer: asyncio.StreamWriter) -> None:
+    async def read(self, station: str, data_name: str, writer: asyncio.StreamWriter,
+                   start_epoch_ms: typing.Optional[int] = None, end_epoch_ms: typing.Optional[int] = None) -> None:
         key = _DataKey(station, data_name)
         entry = self._data.get(key)
         if entry is None:
             return
         try:
             async with entry.file_lock:
-                with open(str(entry.storage_file), mode='rb') as f:
-                    _LOGGER.debug(f"Sending cached data for read {key}")
-                    await send_file_contents(f, writer)
+                contents = entry.records.read(start_epoch_ms, end_epoch_ms)
         except FileNotFoundError:
-            pass
+            return
+        if contents:
+            _LOGGER.debug(f"Sending cached data for read {key}")
+            writer.write(contents)
+            await writer.drain()
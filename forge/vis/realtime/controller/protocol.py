@@ -5,3 +5,5 @@ class ConnectionType(IntEnum):
     WRITE = 0
     STREAM = 1
     READ = 2
+    STREAM_RANGE = 3
+    READ_RANGE = 4
@@ -0,0 +1,284 @@
+import typing
+import struct
+import mmap
+import numpy as np
+from bisect import bisect_left
+from pathlib import Path
+from forge.vis import CONFIGURATION
+from .block import ValueType
+
+
+class _Layout:
+    MAGIC = b'FRTR'
+
+    def __init__(self, fields: typing.Dict[str, int]):
+        # Field array capacities, with zero for a plain float
+        self.fields = fields
+
+        spec: typing.List[typing.Tuple] = [('epoch_ms', '<u8')]
+        header = bytearray(struct.pack('<4sI', self.MAGIC, len(fields)))
+        for index, (name, capacity) in enumerate(fields.items()):
+            if capacity == 0:
+                spec.append((f'f{index}', [('type', 'u1'), ('value', '<f4')]))
+            else:
+                spec.append((f'f{index}', [('type', 'u1'), ('count', '<u4'), ('value', '<f4', (capacity,))]))
+            raw_name = name.encode('utf-8')
+            header += struct.pack('<I', len(raw_name))
+            header += raw_name
+            header += struct.pack('<I', capacity)
+        self.dtype = np.dtype(spec)
+        self.header = bytes(header)
+
+    @classmethod
+    def parse(cls, source: typing.BinaryIO) -> "_Layout":
+        def read_n(n: int) -> bytes:
+            data = source.read(n)
+            if len(data) != n:
+                raise EOFError
+            return data
+
+        magic, n_fields = struct.unpack('<4sI', read_n(8))
+        if magic != cls.MAGIC:
+            raise ValueError("Invalid realtime record file")
+        fields: typing.Dict[str, int] = dict()
+        for _ in range(n_fields):
+            name_len = struct.unpack('<I', read_n(4))[0]
+            name = read_n(name_len).decode('utf-8')
+            fields[name] = struct.unpack('<I', read_n(4))[0]
+        return cls(fields)
+
+    def fits(self, record: typing.Dict[str, typing.Union[float, typing.List[float]]]) -> bool:
+        for name, value in record.items():
+            capacity = self.fields.get(name)
+            if capacity is None:
+                return False
+            if isinstance(value, list) and len(value) > capacity:
+                return False
+        return True
+
+    def expand(self, record: typing.Dict[str, typing.Union[float, typing.List[float]]]) -> "_Layout":
+        fields = dict(self.fields)
+        for name, value in record.items():
+            capacity = fields.get(name, 0)
+            if isinstance(value, list):
+                capacity = max(capacity, len(value), 1)
+            fields[name] = capacity
+        return _Layout(fields)
+
+    def pack(self, rows: np.ndarray, index: int, epoch_ms: int,
+             record: typing.Dict[str, typing.Union[float, typing.List[float]]]) -> None:
+        row = rows[index:index+1]
+        row['epoch_ms'] = epoch_ms
+        for field_index, (name, capacity) in enumerate(self.fields.items()):
+            value = record.get(name)
+            slot = row[f'f{field_index}']
+            if value is None:
+                slot['type'] = ValueType.MISSING.value
+            elif isinstance(value, list):
+                slot['type'] = ValueType.ARRAY_OF_FLOAT.value
+                slot['count'] = len(value)
+                slot['value'][0, :len(value)] = value
+            elif capacity == 0:
+                slot['type'] = ValueType.FLOAT.value
+                slot['value'] = value
+            else:
+                slot['type'] = ValueType.FLOAT.value
+                slot['value'][0, 0] = value
+
+    def unpack(self, row: np.void) -> typing.Dict[str, typing.Union[float, typing.List[float]]]:
+        result: typing.Dict[str, typing.Union[float, typing.List[float]]] = dict()
+        for field_index, (name, capacity) in enumerate(self.fields.items()):
+            slot = row[f'f{field_index}']
+            field_type = int(slot['type'])
+            if field_type == ValueType.ARRAY_OF_FLOAT:
+                result[name] = [float(v) for v in slot['value'][:int(slot['count'])]]
+            elif field_type == ValueType.FLOAT:
+                result[name] = float(slot['value']) if capacity == 0 else float(slot['value'][0])
+        return result
+
+    def encode(self, rows: np.ndarray) -> bytes:
+        # Produces exactly what a DataBlock saves, so ranged reads go out in the existing wire format
+        n_records = rows.shape[0]
+        result = bytearray(struct.pack('<I', n_records))
+        result += rows['epoch_ms'].astype('<u8').tobytes()
+
+        field_data: typing.List[bytes] = list()
+        for field_index, (name, capacity) in enumerate(self.fields.items()):
+            slot = np.ascontiguousarray(rows[f'f{field_index}'])
+            types = slot['type']
+            if not types.any():
+                continue
+            raw = slot.view(np.uint8).reshape(n_records, -1)
+            keep = np.zeros(raw.shape, dtype=np.bool_)
+            keep[:, 0] = True
+            is_float = types == ValueType.FLOAT.value
+            if capacity == 0:
+                keep[is_float, 1:] = True
+            else:
+                is_array = types == ValueType.ARRAY_OF_FLOAT.value
+                keep[is_array, 1:5] = True
+                counts = np.where(is_array, np.minimum(slot['count'], capacity), 0)
+                keep[:, 5:] = (np.arange(capacity * 4) // 4)[None, :] < counts[:, None]
+                keep[is_float, 5:9] = True
+
+            raw_name = name.encode('utf-8')
+            field_data.append(struct.pack('<I', len(raw_name)) + raw_name + raw[keep].tobytes())
+
+        result += struct.pack('<I', len(field_data))
+        for data in field_data:
+            result += data
+        return bytes(result)
+
+
+class RecordFile:
+    INDEX_BLOCK = 64
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._layout: typing.Optional[_Layout] = None
+        self._count: int = 0
+        # First time of every INDEX_BLOCK records, so a range only has to search one block of the mapping
+        self._index: typing.List[int] = list()
+        self._last_epoch_ms: int = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def reset(self) -> None:
+        self._layout = None
+        self._count = 0
+        self._index.clear()
+        self._last_epoch_ms = 0
+
+    def load(self) -> None:
+        self.reset()
+        with open(str(self.path), mode='rb') as f:
+            layout = _Layout.parse(f)
+            size = f.seek(0, 2)
+        count = (size - len(layout.header)) // layout.dtype.itemsize
+        if len(layout.header) + count * layout.dtype.itemsize != size:
+            # Incomplete trailing record from an interrupted write
+            with open(str(self.path), mode='r+b') as f:
+                f.truncate(len(layout.header) + count * layout.dtype.itemsize)
+        self._layout = layout
+        self._count = count
+        if count > 0:
+            times = self._read_rows(0, count)['epoch_ms']
+            self._index = times[::self.INDEX_BLOCK].tolist()
+            self._last_epoch_ms = int(times[-1])
+
+    def _read_rows(self, begin: int, end: int) -> np.ndarray:
+        assert self._layout is not None
+        if end <= begin:
+            return np.empty(0, dtype=self._layout.dtype)
+        with open(str(self.path), mode='rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                rows = np.ndarray((end - begin,), dtype=self._layout.dtype, buffer=m,
+                                  offset=len(self._layout.header) + begin * self._layout.dtype.itemsize)
+                result = rows.copy()
+                # The mapping cannot close while a view still references it
+                del rows
+        return result
+
+    def _write_all(self, layout: _Layout, rows: np.ndarray) -> None:
+        with open(str(self.path), mode='wb') as f:
+            f.write(layout.header)
+            f.write(rows.tobytes())
+        self._layout = layout
+        self._count = rows.shape[0]
+        self._index = rows['epoch_ms'][::self.INDEX_BLOCK].tolist()
+        self._last_epoch_ms = int(rows['epoch_ms'][-1]) if self._count > 0 else 0
+
+    def _relayout(self, record: typing.Dict[str, typing.Union[float, typing.List[float]]]) -> None:
+        # Only happens as new fields first appear, so rewriting everything is fine
+        layout = (self._layout or _Layout(dict())).expand(record)
+        rows = np.zeros(self._count, dtype=layout.dtype)
+        existing = self._read_rows(0, self._count) if self._layout is not None else rows
+        for index in range(self._count):
+            layout.pack(rows, index, int(existing[index]['epoch_ms']), self._layout.unpack(existing[index]))
+        self._write_all(layout, rows)
+
+    def append(self, epoch_ms: int, record: typing.Dict[str, typing.Union[float, typing.List[float]]],
+               rounding_ms: int = None) -> None:
+        if not rounding_ms:
+            rounding_ms = int(CONFIGURATION.get('REALTIME.TIME_ROUNDING', 10)) * 1000
+        if rounding_ms <= 0:
+            rounding_ms = 1
+        epoch_ms = int(int(epoch_ms * rounding_ms) / rounding_ms)
+        # Ranges are located by searching, so never let the clock step backwards in the file
+        epoch_ms = max(epoch_ms, self._last_epoch_ms)
+
+        if self._layout is None or not self._layout.fits(record):
+            self._relayout(record)
+
+        if self._count > 0 and (epoch_ms - self._last_epoch_ms) < rounding_ms:
+            merged = self._read_rows(self._count - 1, self._count)
+            contents = self._layout.unpack(merged[0])
+            contents.update(record)
+            self._layout.pack(merged, 0, self._last_epoch_ms, contents)
+            with open(str(self.path), mode='r+b') as f:
+                f.seek(len(self._layout.header) + (self._count - 1) * self._layout.dtype.itemsize)
+                f.write(merged.tobytes())
+            return
+
+        row = np.zeros(1, dtype=self._layout.dtype)
+        self._layout.pack(row, 0, epoch_ms, record)
+        with open(str(self.path), mode='r+b') as f:
+            f.seek(len(self._layout.header) + self._count * self._layout.dtype.itemsize)
+            f.write(row.tobytes())
+        if self._count % self.INDEX_BLOCK == 0:
+            self._index.append(epoch_ms)
+        self._count += 1
+        self._last_epoch_ms = epoch_ms
+
+    def _locate(self, epoch_ms: int) -> int:
+        block = bisect_left(self._index, epoch_ms)
+        if block == 0:
+            return 0
+        begin = (block - 1) * self.INDEX_BLOCK
+        end = min(block * self.INDEX_BLOCK, self._count)
+        times = self._read_rows(begin, end)['epoch_ms']
+        return begin + int(np.searchsorted(times, epoch_ms, side='left'))
+
+    def read(self, start_epoch_ms: typing.Optional[int] = None, end_epoch_ms: typing.Optional[int] = None) -> bytes:
+        if self._layout is None or self._count == 0:
+            return bytes()
+        begin = self._locate(max(start_epoch_ms, 0)) if start_epoch_ms is not None else 0
+        end = self._locate(max(end_epoch_ms, 0)) if end_epoch_ms is not None else self._count
+        if end <= begin:
+            return bytes()
+        return self._layout.encode(self._read_rows(begin, end))
+
+    def trim(self, discard: typing.Callable[[typing.List[int]], int]) -> bool:
+        if self._layout is None or self._count <= 0:
+            return True
+
+        rows = self._read_rows(0, self._count)
+        n_discard = discard(rows['epoch_ms'].tolist())
+        if n_discard <= 0:
+            return False
+        if n_discard >= self._count:
+            return True
+        rows = rows[n_discard:]
+
+        fields: typing.Dict[str, int] = dict()
+        keep_fields: typing.List[str] = list()
+        for field_index, (name, capacity) in enumerate(self._layout.fields.items()):
+            if not rows[f'f{field_index}']['type'].any():
+                continue
+            fields[name] = capacity
+            keep_fields.append(f'f{field_index}')
+        if not fields:
+            return True
+
+        layout = _Layout(fields)
+        if len(fields) == len(self._layout.fields):
+            self._write_all(layout, rows)
+            return False
+
+        compacted = np.zeros(rows.shape[0], dtype=layout.dtype)
+        compacted['epoch_ms'] = rows['epoch_ms']
+        for field_index, source in enumerate(keep_fields):
+            compacted[f'f{field_index}'] = rows[source]
+        self._write_all(layout, compacted)
+        return False
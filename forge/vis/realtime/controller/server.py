@@ -45,12 +45,15 @@ class Server(SocketServer):
                         await manager.write(station, data_name, reader)
                 except EOFError:
                     pass
-            elif connection_type == ConnectionType.STREAM:
+            elif connection_type == ConnectionType.STREAM or connection_type == ConnectionType.STREAM_RANGE:
                 station = await string_arg()
                 data_name = await string_arg()
+                start_epoch_ms: typing.Optional[int] = None
+                if connection_type == ConnectionType.STREAM_RANGE:
+                    start_epoch_ms = struct.unpack('<q', await reader.readexactly(8))[0]
                 _LOGGER.debug(f"Accepted stream connection for {station} {data_name}")
 
-                stream = asyncio.ensure_future(manager.stream(station, data_name, writer))
+                stream = asyncio.ensure_future(manager.stream(station, data_name, writer, start_epoch_ms))
 
                 while True:
                     try:
@@ -74,6 +77,13 @@ class Server(SocketServer):
 
                 _LOGGER.debug(f"Accepted read connection for {station} {data_name}")
                 await manager.read(station, data_name, writer)
+            elif connection_type == ConnectionType.READ_RANGE:
+                station = await string_arg()
+                data_name = await string_arg()
+                start_epoch_ms, end_epoch_ms = struct.unpack('<qq', await reader.readexactly(16))
+
+                _LOGGER.debug(f"Accepted read connection for {station} {data_name} ({start_epoch_ms},{end_epoch_ms})")
+                await manager.read(station, data_name, writer, start_epoch_ms, end_epoch_ms)
             else:
                 raise ValueError("Invalid connection type")
         except:
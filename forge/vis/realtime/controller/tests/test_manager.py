@@ -149,3 +149,27 @@ async def test_prune(manager, tmp_path, to_manager):
     assert not (tmp_path / 'realtime.nil.data').exists()
 
     m_writer.close()
+
+
+@pytest.mark.asyncio
+async def test_read_range(manager, to_manager, from_manager):
+    m_reader, m_writer = to_manager
+    c_reader, c_writer = from_manager
+
+    write_task = asyncio.ensure_future(_write_record(m_writer, {'foo': 1.0}))
+    await manager.write('nil', 'data', m_reader)
+    await write_task
+
+    read_task = asyncio.ensure_future(_read_blocks(c_reader, 1))
+    await manager.read('nil', 'data', c_writer, 0)
+    blocks = await read_task
+    assert blocks[0].records[0].fields == {'foo': 1.0}
+    epoch_ms = blocks[0].records[0].epoch_ms
+
+    c_writer.close()
+    c_reader, c_writer = await _aio_pipe()
+    await manager.read('nil', 'data', c_writer, epoch_ms + 1)
+    c_writer.close()
+    assert await c_reader.read() == b""
+
+    m_writer.close()
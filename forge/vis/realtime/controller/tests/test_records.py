@@ -0,0 +1,80 @@
+import asyncio
+import io
+import pytest
+from forge.vis.realtime.controller.block import DataBlock
+from forge.vis.realtime.controller.records import RecordFile
+
+
+async def _decode(contents: bytes) -> DataBlock:
+    block = DataBlock()
+    if contents:
+        await block.load(io.BytesIO(contents))
+    return block
+
+
+@pytest.mark.asyncio
+async def test_basic(tmp_path):
+    records = RecordFile(tmp_path / 'records')
+    assert len(records) == 0
+    assert records.read() == b""
+
+    records.append(5000, {'foo': 1.0}, rounding_ms=1)
+    records.append(5000, {'foo': 2.0, 'bar': [3.0, 4.0]}, rounding_ms=1)
+    records.append(6000, {'foo': 5.0}, rounding_ms=1)
+    records.append(7000, {'bar': [6.0, 7.0, 8.0], 'baz': 9.0}, rounding_ms=1)
+    assert len(records) == 3
+
+    reference = DataBlock()
+    reference.add_record(5000, {'foo': 2.0, 'bar': [3.0, 4.0]}, rounding_ms=1)
+    reference.add_record(6000, {'foo': 5.0}, rounding_ms=1)
+    reference.add_record(7000, {'bar': [6.0, 7.0, 8.0], 'baz': 9.0}, rounding_ms=1)
+    saved = io.BytesIO()
+    await reference.save(saved)
+    assert records.read() == saved.getvalue()
+
+    loaded = RecordFile(tmp_path / 'records')
+    loaded.load()
+    block = await _decode(loaded.read())
+    assert [r.epoch_ms for r in block.records] == [5000, 6000, 7000]
+    assert block.records[0].fields == {'foo': 2.0, 'bar': [3.0, 4.0]}
+    assert block.records[1].fields == {'foo': 5.0}
+    assert block.records[2].fields == {'bar': [6.0, 7.0, 8.0], 'baz': 9.0}
+
+
+@pytest.mark.asyncio
+async def test_range(tmp_path):
+    records = RecordFile(tmp_path / 'records')
+    for i in range(RecordFile.INDEX_BLOCK * 3 + 5):
+        records.append(1000 * i, {'foo': float(i)}, rounding_ms=1)
+
+    block = await _decode(records.read(70000, 140000))
+    assert [r.epoch_ms for r in block.records] == list(range(70000, 140000, 1000))
+    assert block.records[0].fields == {'foo': 70.0}
+
+    block = await _decode(records.read(64500))
+    assert block.records[0].epoch_ms == 65000
+    assert block.records[-1].epoch_ms == 1000 * (RecordFile.INDEX_BLOCK * 3 + 4)
+
+    assert records.read(10 ** 9) == b""
+    assert len((await _decode(records.read(end_epoch_ms=500))).records) == 1
+
+
+@pytest.mark.asyncio
+async def test_trim(tmp_path):
+    records = RecordFile(tmp_path / 'records')
+    records.append(1000, {'foo': 1.0}, rounding_ms=1)
+    records.append(2000, {'foo': 2.0, 'bar': 3.0}, rounding_ms=1)
+    records.append(3000, {'bar': 4.0}, rounding_ms=1)
+
+    assert not records.trim(lambda times: 0)
+    assert not records.trim(lambda times: 2)
+    assert len(records) == 1
+    block = await _decode(records.read())
+    assert block.records[0].epoch_ms == 3000
+    assert block.records[0].fields == {'bar': 4.0}
+
+    records.append(4000, {'foo': 5.0}, rounding_ms=1)
+    block = await _decode(records.read())
+    assert [r.fields for r in block.records] == [{'bar': 4.0}, {'foo': 5.0}]
+
+    assert records.trim(lambda times: len(times))
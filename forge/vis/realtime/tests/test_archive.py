@@ -0,0 +1,54 @@
+import typing
+from forge.acquisition.cutsize import CutSize
+from forge.vis.data.archive import RealtimeRecord, RealtimeSelection
+from forge.vis.realtime.translation import RealtimeTranslator
+from forge.vis.realtime.archive import Translator
+
+
+class _Output(RealtimeTranslator.OutputInterface):
+    def __init__(self):
+        self.data: typing.Dict[str, typing.Dict[str, typing.Any]] = dict()
+
+    def send_data(self, data_name: str, record: typing.Dict[str, typing.Any]) -> None:
+        self.data.setdefault(data_name, dict()).update(record)
+
+    def send_field(self, data_name: str, field: str, value: typing.Any) -> None:
+        self.data.setdefault(data_name, dict())[field] = value
+
+
+def test_translate_data():
+    translator = Translator({
+        "first": RealtimeRecord({
+            "a": [RealtimeSelection("A", require_tags={"one"})],
+            "b": [RealtimeSelection("B")],
+            "b1": [RealtimeSelection("B", acquisition_index=1)],
+        }),
+        "second": RealtimeRecord({
+            "c": [RealtimeSelection("C", instrument_id="X1")],
+            "a": [RealtimeSelection("A", require_tags={"two"})],
+        }),
+    })
+
+    instrument = translator.instrument_translator("X1", {'tags': ["one"]})
+    output = _Output()
+    instrument.translate_data(CutSize.Size.WHOLE, {'A': 1.0, 'B': [2.0, 3.0], 'C': 4.0, 'D': 5.0}, output)
+    assert output.data == {
+        "first": {"a": 1.0, "b": [2.0, 3.0], "b1": 3.0},
+        "second": {"c": 4.0},
+    }
+
+    output = _Output()
+    instrument.translate_data(CutSize.Size.WHOLE, {'C': 6.0, 'B': 7.0}, output)
+    assert output.data == {"first": {"b": 7.0}, "second": {"c": 6.0}}
+
+    instrument.update_information({'tags': ["two"]})
+    output = _Output()
+    instrument.translate_data(CutSize.Size.WHOLE, {'A': 1.0, 'B': [2.0, 3.0], 'C': 4.0, 'D': 5.0}, output)
+    assert output.data == {
+        "first": {"b": [2.0, 3.0], "b1": 3.0},
+        "second": {"c": 4.0, "a": 1.0},
+    }
+
+    output = _Output()
+    instrument.translate_data(CutSize.Size.WHOLE, {'D': 5.0}, output)
+    assert output.data == {}
@@ -16,6 +16,10 @@ class RealtimeTranslator(Translator):
         def send_field(self, data_name: str, field: str, value: typing.Union[float, typing.List[float]]) -> None:
             pass
 
+        def send_records(self, records: typing.Dict[str, typing.Dict[str, typing.Union[float, typing.List[float]]]]) -> None:
+            for data_name, record in records.items():
+                self.send_data(data_name, record)
+
     class Instrument:
         def __init__(self, source: str, instrument_info: typing.Dict[str, typing.Any]):
             self.source = source
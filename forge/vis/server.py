@@ -2,12 +2,13 @@ import typing
 import starlette.status
 from secrets import token_urlsafe
 from collections import OrderedDict
+from contextlib import asynccontextmanager
 from starlette.applications import Starlette
 from starlette.routing import Route, Mount, NoMatchFound
 from starlette.requests import Request
 from starlette.responses import Response, HTMLResponse, JSONResponse
 from starlette.exceptions import HTTPException
-from starlette.staticfiles import StaticFiles, FileResponse, RedirectResponse
+from starlette.staticfiles import FileResponse, RedirectResponse
 from starlette.datastructures import Secret
 from starlette.authentication import requires
 from starlette.middleware import Middleware
@@ -17,7 +18,9 @@ from starlette.middleware.trustedhost import TrustedHostMiddleware
 from forge.const import STATIONS
 from . import CONFIGURATION
 from .util import package_data, package_template, TEMPLATE_ENV
+from .assets import StaticAssets
 from forge.vis.mode.assemble import default_mode
+from forge.vis.station.registry import station_registry
 import forge.vis.access.authentication
 import forge.vis.view.server
 import forge.vis.mode.server
@@ -111,10 +114,13 @@ async def _root(request: Request) -> Response:
 
 TEMPLATE_ENV.globals["ENABLE_LOGIN"] = forge.vis.access.authentication.enable_login
 
+static_assets = StaticAssets(package_data('static'))
+TEMPLATE_ENV.globals["static_url"] = static_assets.url_for
+
 
 routes = [
     Route('/static/favicon.png', endpoint=_favicon, name='favicon'),
-    Mount('/static', app=StaticFiles(directory=package_data('static')), name='static'),
+    Mount('/static', app=static_assets, name='static'),
     Route('/favicon.png', endpoint=_favicon),
     Route('/favicon.ico', endpoint=_favicon),
 
@@ -193,4 +199,12 @@ if processing_uri is not None:
     middleware.append(Middleware(ProcessingDatabase, database_uri=processing_uri))
 
 
-app = Starlette(routes=routes, middleware=middleware)
+@asynccontextmanager
+async def _lifespan(_app: Starlette):
+    prewarm_stations = CONFIGURATION.get('SERVER.PREWARM_STATIONS')
+    if prewarm_stations:
+        station_registry.prewarm([str(station) for station in prewarm_stations])
+    yield
+
+
+app = Starlette(routes=routes, middleware=middleware, lifespan=_lifespan)
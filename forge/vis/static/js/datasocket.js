@@ -16,6 +16,8 @@ let DataSocket = {};
         endOfData() {}
     
         incomingDataContent(content) {}
+
+        incomingBinaryContent(buffer, offset) {}
     
         beginStream() {
             if (this._streamID !== undefined) {
@@ -141,10 +143,8 @@ let DataSocket = {};
                     return Number(view.getBigInt64(offset, true));
                 });
             }
-            let plotTime = [];
             epoch.forEach(function(_, index, target) {
                 target[index] += epochOrigin;
-                plotTime.push(DataSocket.toPlotTime(target[index]));
             });
     
             const fields = content.data;
@@ -185,6 +185,84 @@ let DataSocket = {};
                 fieldOutput.set(fieldName, undefined);
             }
 
+            this.incomingRecords(epoch, fieldOutput);
+        }
+
+        incomingBinaryContent(buffer, offset) {
+            const view = new DataView(buffer);
+            const recordCount = view.getUint32(offset, true);
+            const fieldCount = view.getUint32(offset + 4, true);
+            offset += 8;
+
+            const decoder = new TextDecoder();
+            const table = [];
+            for (let i=0; i < fieldCount; i++) {
+                const kind = view.getUint8(offset);
+                const nameLength = view.getUint16(offset + 2, true);
+                const size = view.getUint32(offset + 4, true);
+                offset += 8;
+                const name = decoder.decode(new Uint8Array(buffer, offset, nameLength));
+                offset += nameLength;
+                table.push({name: name, kind: kind, size: size});
+            }
+            const align = function(offset) {
+                return offset + ((8 - offset % 8) % 8);
+            }
+            offset = align(offset);
+            const toFinite = function(value) {
+                return isFinite(value) ? value : Number.NaN;
+            }
+
+            const epoch = [];
+            const epochRaw = new BigInt64Array(buffer, offset, recordCount);
+            for (let i=0; i < recordCount; i++) {
+                epoch.push(Number(epochRaw[i]));
+            }
+            offset += recordCount * 8;
+
+            const fieldOutput = new Map();
+            for (const field of table) {
+                if (field.kind === 0) {
+                    fieldOutput.set(field.name, Array.from(new Float32Array(buffer, offset, recordCount), toFinite));
+                    offset += recordCount * 4;
+                } else if (field.kind === 1) {
+                    const lengths = new Int32Array(buffer, offset, recordCount);
+                    offset += recordCount * 4;
+                    const contents = new Float32Array(buffer, offset, recordCount * field.size);
+                    offset += recordCount * field.size * 4;
+                    const values = [];
+                    for (let i=0; i < recordCount; i++) {
+                        const begin = i * field.size;
+                        values.push(Array.from(contents.subarray(begin, begin + lengths[i]), toFinite));
+                    }
+                    fieldOutput.set(field.name, values);
+                } else if (field.kind === 2) {
+                    const values = JSON.parse(decoder.decode(new Uint8Array(buffer, offset, field.size)));
+                    values.forEach(function(_, index, target) {
+                        const value = target[index];
+                        if (value === undefined || value === null) {
+                            target[index] = Number.NaN;
+                        } else if (typeof value === 'number' && !isFinite(value)) {
+                            target[index] = Number.NaN;
+                        }
+                    });
+                    fieldOutput.set(field.name, values);
+                    offset += field.size;
+                } else {
+                    fieldOutput.set(field.name, undefined);
+                }
+                offset = align(offset);
+            }
+
+            this.incomingRecords(epoch, fieldOutput);
+        }
+
+        incomingRecords(epoch, fieldOutput) {
+            const plotTime = [];
+            epoch.forEach(function(epoch_ms) {
+                plotTime.push(DataSocket.toPlotTime(epoch_ms));
+            });
+
             this.processRecord(fieldOutput, epoch, plotTime);
 
             fieldOutput.forEach((values, fieldName) => {
@@ -198,12 +276,30 @@ let DataSocket = {};
     };
 
     function socketOpen(event) {
+        serverSocket.send(JSON.stringify({
+            action: 'protocol',
+            binary: true,
+        }));
         waitingForConnected.forEach((cb) => {
                 cb();
             });
         waitingForConnected.clear();
     }
+    const binaryFrameMagic = 0x42445646;  // 'FVDB' little-endian
     function socketMessage(event) {
+        if (event.data instanceof ArrayBuffer) {
+            const view = new DataView(event.data);
+            if (view.byteLength < 8 || view.getUint32(0, true) !== binaryFrameMagic) {
+                return;
+            }
+            const target = activeStreams.get(view.getUint32(4, true));
+            if (target === undefined) {
+                return;
+            }
+            target.incomingBinaryContent(event.data, 8);
+            return;
+        }
+
         const reply = JSON.parse(event.data);
         if (reply.type === "end") {
             const index = reply.stream;
@@ -232,6 +328,7 @@ let DataSocket = {};
         }
     }
     function attachServerSocket() {
+        serverSocket.binaryType = 'arraybuffer';
         serverSocket.addEventListener('open', socketOpen);
         serverSocket.addEventListener('message', socketMessage);
         streamSequenceNumber = 0;
@@ -1577,6 +1577,8 @@ class RealtimeReader(DataReader):
         try:
             stream = self.RealtimeStream(self, reader, writer)
             self.apply_stream_parameters(stream)
+            # Only ask for what would not be discarded anyway
+            stream.start_epoch_ms = stream.discard_epoch_ms + stream.record_time_offset + 1
             await stream.run()
             _LOGGER.debug(f"Realtime data connection ended for {self.station} {self.data_name}")
         finally:
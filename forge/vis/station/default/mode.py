@@ -4,6 +4,7 @@ from forge.vis.mode import Mode, ModeGroup, VisibleModes
 from forge.vis.mode.viewlist import ViewList, Editing, Realtime, Public
 from forge.vis.mode.acquisition import Acquisition
 from forge.vis.station.lookup import station_data
+from forge.vis.station.registry import station_registry
 from .acquisition import Acquisition as DefaultAcquisition
 
 
@@ -247,7 +248,7 @@ def get(station: str, mode_name: str) -> typing.Optional[Mode]:
 
 
 def visible(station: str, mode_name: typing.Optional[str] = None) -> VisibleModes:
-    lookup: typing.Callable[[str, str], typing.Optional[Mode]] = station_data(station, 'mode', 'get')
+    lookup: typing.Callable[[str, str], typing.Optional[Mode]] = station_registry(station, 'mode', 'get')
     realtime_visible: typing.Callable[[str, str], bool] = station_data(station, 'realtime', 'visible')
     acquisition_visible: typing.Callable[[str, str], bool] = station_data(station, 'acquisition', 'visible')
     visible_modes = VisibleModes()
@@ -0,0 +1,97 @@
+import typing
+import sys
+import time
+import logging
+from collections import OrderedDict
+from forge.vis import CONFIGURATION
+from .lookup import station_data
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class StationRegistry:
+    _DATA: typing.Tuple[typing.Tuple[str, str], ...] = (
+        ('view', 'get'),
+        ('view', 'modes'),
+        ('mode', 'get'),
+        ('mode', 'visible'),
+    )
+
+    def __init__(self, size: int):
+        self.size = size
+        self._entries: typing.Dict[str, typing.Dict[typing.Tuple[str, str], typing.Callable]] = OrderedDict()
+        self.startup_time: typing.Optional[float] = None
+        self.build_time: typing.Dict[str, float] = dict()
+        self.hits: int = 0
+        self.builds: int = 0
+        self.evictions: int = 0
+
+    def clear(self) -> None:
+        for station in self._entries.keys():
+            self._unload(station)
+        self._entries.clear()
+
+    def _build(self, station: str) -> typing.Dict[typing.Tuple[str, str], typing.Callable]:
+        begin_time = time.perf_counter()
+        entry = {key: station_data(station, *key) for key in self._DATA}
+        elapsed = time.perf_counter() - begin_time
+        self.build_time[station] = elapsed
+        self.builds += 1
+        _LOGGER.debug("Built views and modes for %s in %.3f seconds", station.upper(), elapsed)
+        return entry
+
+    @staticmethod
+    def _unload(station: str) -> None:
+        if station == 'default':
+            return
+        # Only the station's own view and mode definitions are released, the shared defaults stay loaded
+        package_name = 'forge.vis.station.' + station
+        package = sys.modules.get(package_name)
+        for package_data, _ in StationRegistry._DATA:
+            module = sys.modules.pop(package_name + '.' + package_data, None)
+            if module is not None and package is not None and getattr(package, package_data, None) is module:
+                delattr(package, package_data)
+
+    def __call__(self, station: str, package: str, data: str) -> typing.Callable:
+        if self.size <= 0:
+            return station_data(station, package, data)
+
+        entry = self._entries.get(station)
+        if entry is not None:
+            self._entries.move_to_end(station)
+            self.hits += 1
+            return entry[(package, data)]
+
+        entry = self._build(station)
+        self._entries[station] = entry
+        while len(self._entries) > self.size:
+            evicted, _ = self._entries.popitem(last=False)
+            self._unload(evicted)
+            self.evictions += 1
+        return entry[(package, data)]
+
+    def prewarm(self, stations: typing.Iterable[str]) -> None:
+        begin_time = time.perf_counter()
+        for station in stations:
+            self(station.lower(), 'view', 'get')
+        self.startup_time = time.perf_counter() - begin_time
+        _LOGGER.info("Station views and modes ready for %d stations in %.3f seconds",
+                     len(self._entries), self.startup_time)
+
+    @property
+    def loaded(self) -> typing.List[str]:
+        return list(self._entries.keys())
+
+    def metrics(self) -> typing.Dict[str, typing.Any]:
+        return {
+            'size': self.size,
+            'startup_time': self.startup_time,
+            'loaded': self.loaded,
+            'build_time': dict(self.build_time),
+            'hits': self.hits,
+            'builds': self.builds,
+            'evictions': self.evictions,
+        }
+
+
+station_registry = StationRegistry(int(CONFIGURATION.get('SERVER.STATION_CACHE', 32)))
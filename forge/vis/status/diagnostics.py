@@ -0,0 +1,9 @@
+from starlette.authentication import requires
+from starlette.responses import Response, JSONResponse
+from starlette.requests import Request
+from forge.vis.station.registry import station_registry
+
+
+@requires('authenticated')
+async def station_registry_metrics(request: Request) -> Response:
+    return JSONResponse(station_registry.metrics())
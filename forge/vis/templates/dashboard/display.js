@@ -330,7 +330,7 @@ function updateDisplayedInterval() {
     updateVisibleEntries();
 }
 $(timeSelectButton).click(function(e) {
-    showModal("{{ request.url_for('static', path='/modal/intervalselect.html') }}");
+    showModal("{{ static_url(request, '/modal/intervalselect.html') }}");
     e.preventDefault();
 });
 
@@ -447,5 +447,5 @@ $('#email_all').click(function(event) {
         return;
     }
     EMAIL_PROMPT_ENTRIES = Sorting.visibleEntries.slice();
-    showModal("{{ request.url_for('static', path='/modal/dashboardemail.html') }}");
+    showModal("{{ static_url(request, '/modal/dashboardemail.html') }}");
 });
\ No newline at end of file
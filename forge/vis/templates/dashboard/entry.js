@@ -105,7 +105,7 @@ const DashboardEntry = (function() {
                 e.preventDefault();
                 e.stopPropagation();
                 EMAIL_PROMPT_ENTRIES = [ref];
-                showModal("{{ request.url_for('static', path='/modal/dashboardemail.html') }}");
+                showModal("{{ static_url(request, '/modal/dashboardemail.html') }}");
             });
 
             this._status_text = document.createElement('td');
@@ -799,7 +799,7 @@ $(document).ready(function() {
                     'title': title,
                     'details': prompt,
                 };
-                showModal("{{ request.url_for('static', path='/modal/actionprompt.html') }}");
+                showModal("{{ static_url(request, '/modal/actionprompt.html') }}");
             });
         }
 
@@ -1229,7 +1229,7 @@ $(document).ready(function() {
 
         switch(event.code) {
         case 'Backquote':
-            showModal("{{ request.url_for('static', path='/modal/messagelog.html') }}");
+            showModal("{{ static_url(request, '/modal/messagelog.html') }}");
             event.preventDefault();
             break;
         }
@@ -1282,7 +1282,7 @@ $(document).ready(function() {
 
 
     $('#add_message_log').click(function(e) {
-        showModal("{{ request.url_for('static', path='/modal/messagelog.html') }}");
+        showModal("{{ static_url(request, '/modal/messagelog.html') }}");
         e.preventDefault();
     });
     $('#show_restart_acquisition').click(function(e) {
@@ -1293,11 +1293,11 @@ $(document).ready(function() {
             title: "Restart the acquisition system?",
             details: "This will restart the acquisition system, temporarily interrupting data collection.  Restarting the system is most commonly used to apply changes to the configuration.",
         };
-        showModal("{{ request.url_for('static', path='/modal/actionprompt.html') }}");
+        showModal("{{ static_url(request, '/modal/actionprompt.html') }}");
         e.preventDefault();
     });
     $('#show_set_bypass').click(function(e) {
-        showModal("{{ request.url_for('static', path='/modal/setbypass.html') }}");
+        showModal("{{ static_url(request, '/modal/setbypass.html') }}");
         e.preventDefault();
     });
     $('#show_spancheck_simultaneous').click(function(e) {
@@ -1308,7 +1308,7 @@ $(document).ready(function() {
             title: "Start spancheck on all instruments?",
             details: "Start a span gas calibration check on all supported instruments.  This will compare the CO₂ scattering to that of filtered air to generate a percentage error and calibration factors.  Measurements are disabled during the span check.",
         };
-        showModal("{{ request.url_for('static', path='/modal/actionprompt.html') }}");
+        showModal("{{ static_url(request, '/modal/actionprompt.html') }}");
         e.preventDefault();
     });
 });
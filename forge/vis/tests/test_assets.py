@@ -0,0 +1,79 @@
+import gzip
+from starlette.applications import Starlette
+from starlette.routing import Route, Mount
+from starlette.requests import Request
+from starlette.responses import HTMLResponse
+from starlette.testclient import TestClient
+from forge.vis.assets import StaticAssets
+from forge.vis.pagecache import PageCache
+
+
+def test_assets(tmp_path):
+    script = b"function example() { return 1; }\n" * 100
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "example.js").write_bytes(script)
+    (tmp_path / "image.png").write_bytes(b"\x89PNG" + bytes(range(256)))
+
+    assets = StaticAssets(str(tmp_path))
+
+    async def page(request: Request):
+        return HTMLResponse(str(assets.url_for(request, '/js/example.js')))
+
+    client = TestClient(Starlette(routes=[
+        Route('/page', endpoint=page),
+        Mount('/static', app=assets, name='static'),
+    ]))
+
+    url = client.get('/page').text
+    assert '?v=' in url
+
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.headers['cache-control'] == 'public, max-age=31536000, immutable'
+    assert response.content == script
+    etag = response.headers['etag']
+
+    response = client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert response.status_code == 304
+
+    response = client.get('/static/js/example.js', headers={'Accept-Encoding': 'identity'})
+    assert response.status_code == 200
+    assert 'content-encoding' not in response.headers
+    assert response.headers['cache-control'] == 'no-cache'
+    assert response.headers['etag'] != etag
+    assert response.content == script
+
+    response = client.get('/static/image.png', headers={'Accept-Encoding': 'gzip'})
+    assert 'content-encoding' not in response.headers
+    assert response.content == (tmp_path / "image.png").read_bytes()
+
+    assert client.get('/static/missing.js').status_code == 404
+
+
+def test_page_cache():
+    cache = PageCache(2)
+    rendered = []
+
+    async def page(request: Request):
+        name = request.path_params['name']
+
+        async def render():
+            rendered.append(name)
+            return HTMLResponse(f"<p>{name}</p>")
+
+        return await cache(request, name, render)
+
+    client = TestClient(Starlette(routes=[Route('/{name}', endpoint=page)]))
+
+    response = client.get('/a')
+    assert response.text == "<p>a</p>"
+    etag = response.headers['etag']
+    assert client.get('/a').text == "<p>a</p>"
+    assert rendered == ['a']
+    assert client.get('/a', headers={'If-None-Match': etag}).status_code == 304
+
+    client.get('/b')
+    client.get('/c')
+    client.get('/a')
+    assert rendered == ['a', 'b', 'c', 'a']
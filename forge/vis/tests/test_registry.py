@@ -0,0 +1,36 @@
+import sys
+from forge.vis.station.registry import StationRegistry
+
+
+def test_station_registry():
+    registry = StationRegistry(2)
+    registry.prewarm(['BND'])
+    assert registry.startup_time is not None
+    assert registry.loaded == ['bnd']
+
+    view = registry('bnd', 'view', 'get')('bnd', 'aerosol-raw-counts')
+    assert view is not None
+    assert registry('bnd', 'mode', 'get')('bnd', 'aerosol-raw') is not None
+    assert registry('bnd', 'view', 'modes')('bnd', 'aerosol-raw-counts')
+    assert registry('bnd', 'mode', 'visible')('bnd') is not None
+    assert registry.hits == 4
+
+    assert registry('nil', 'view', 'get')('nil', 'aerosol-raw-counts') is not None
+    assert 'forge.vis.station.bnd.view' in sys.modules
+    registry('thd', 'view', 'get')
+    assert registry.loaded == ['nil', 'thd']
+    assert registry.evictions == 1
+    assert 'forge.vis.station.bnd.view' not in sys.modules
+    assert set(registry.build_time.keys()) == {'bnd', 'nil', 'thd'}
+
+    # Rebuilt on demand after eviction
+    assert registry('bnd', 'view', 'get')('bnd', 'aerosol-raw-counts') is not None
+    assert registry.builds == 4
+    metrics = registry.metrics()
+    assert metrics['loaded'] == ['thd', 'bnd']
+    assert metrics['evictions'] == 2
+    assert set(metrics['build_time'].keys()) == {'bnd', 'nil', 'thd'}
+
+    uncached = StationRegistry(0)
+    assert uncached('bnd', 'view', 'get')('bnd', 'aerosol-raw-counts') is not None
+    assert uncached.builds == 0
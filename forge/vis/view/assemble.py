@@ -5,7 +5,8 @@ from starlette.responses import Response
 from starlette.requests import Request
 from starlette.exceptions import HTTPException
 from forge.const import STATIONS
-from forge.vis.station.lookup import station_data
+from forge.vis.station.registry import station_registry
+from forge.vis.pagecache import page_cache
 from .permissions import is_available
 from . import View
 
@@ -29,7 +30,7 @@ def _lookup_view(request: Request, station: str, view_name: str) -> typing.Optio
             return example_solarposition
         return None
 
-    return station_data(station, 'view', 'get')(station, view_name)
+    return station_registry(station, 'view', 'get')(station, view_name)
 
 
 @requires('authenticated')
@@ -45,4 +46,6 @@ async def interior(request: Request) -> Response:
     view = _lookup_view(request, station, view_name)
     if view is None:
         raise HTTPException(starlette.status.HTTP_404_NOT_FOUND, detail="View not found")
-    return await view(request, station=station, view_name=view_name)
+    # Views only display the station, view and query (e.g. a graph filter), with access already checked above
+    return await page_cache(request, ('view', station, view_name, request.url.query),
+                            lambda: view(request, station=station, view_name=view_name))
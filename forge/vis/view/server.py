@@ -7,6 +7,7 @@ from starlette.requests import Request
 from starlette.exceptions import HTTPException
 from forge.const import STATIONS
 from forge.vis.util import package_template
+from forge.vis.pagecache import page_cache
 from .assemble import interior as assemble_interior
 from .permissions import is_available
 
@@ -21,12 +22,15 @@ async def _standalone(request: Request) -> Response:
     if not is_available(request, station, view_name):
         raise HTTPException(starlette.status.HTTP_403_FORBIDDEN, detail="View not available")
 
-    return HTMLResponse(await package_template('view', 'standalone.html').render_async(
-        request=request,
-        station=station,
-        view_url=request.url_for('view', station=station, view_name=view_name),
-        view_name=view_name,
-    ))
+    async def render() -> Response:
+        return HTMLResponse(await package_template('view', 'standalone.html').render_async(
+            request=request,
+            station=station,
+            view_url=request.url_for('view', station=station, view_name=view_name),
+            view_name=view_name,
+        ))
+
+    return await page_cache(request, ('view_standalone', station, view_name, request.url.query), render)
 
 
 routes: typing.List[Route] = [
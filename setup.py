@@ -74,6 +74,7 @@ setup(
 
         "forge-archive-server = forge.archive.server.__main__:main",
         "forge-archive-server-diagnostics = forge.archive.server.diagnostics:main",
+        "forge-archive-server-index = forge.archive.server.mtimeindex:main",
         "forge-archive-put = forge.archive.client.put:cli",
         "forge-archive-reindex = forge.archive.client.reindex:main",
         "forge-archive-notify = forge.archive.client.notify:main",